@@ -121,6 +121,8 @@ class DownloadManager {
                 task.fileName = actualFileName;
                 task.actualFileName = actualFileName;
             }
+            // 下载路径确定后即可开始边下载边上传
+            await this.startFollowUpload(taskId, downloadDelta.filename.current);
         }
 
         // 更新下载状态
@@ -148,7 +150,9 @@ class DownloadManager {
                         console.warn(`[DEBUG] [updateTaskFromDownload] Could not get final filename for task ${taskId}:`, error);
                     }
                     this.notifyTaskUpdate(taskId, task);
-                    if (task.serverId) {
+                    if (task.followTaskId) {
+                        await this.finishFollowUpload(taskId);
+                    } else if (task.serverId) {
                         setTimeout(async () => {
                             console.log(`[DEBUG] [updateTaskFromDownload] Calling startTransferForTask for task ${taskId}`);
                             await this.startTransferForTask(taskId);
@@ -163,6 +167,12 @@ class DownloadManager {
                 case 'interrupted':
                     task.status = TaskStatus.FAILED;
                     task.error = downloadDelta.error?.current || 'Download interrupted';
+                    if (task.followTaskId) {
+                        // 通知后端放弃跟随上传，远端不会留下不完整的目标文件
+                        apiClient.completeFollowUpload(task.followTaskId, { success: false })
+                            .catch(error => console.warn(`[FOLLOW] abort failed for task ${taskId}:`, error));
+                        task.followTaskId = null;
+                    }
                     break;
             }
         }
@@ -195,6 +205,11 @@ class DownloadManager {
 
         this.activeTasks.set(taskId, task);
 
+        // 中转模式：由后端直接从源地址下载并写入服务器，不经过浏览器下载
+        if (serverId && await this.isRelayEnabled()) {
+            return this.startRelayTask(taskId);
+        }
+
         try {
             // 启动浏览器下载
             const downloadOptions = {
@@ -221,6 +236,9 @@ class DownloadManager {
                             task.actualFileName = actualFileName;
                             this.notifyTaskUpdate(taskId, task);
                         }
+                        if (downloadItem.state === 'in_progress') {
+                            await this.startFollowUpload(taskId, downloadItem.filename);
+                        }
                     }
                 } catch (error) {
                     console.warn(`Could not get initial filename for task ${taskId}:`, error);
@@ -241,6 +259,120 @@ class DownloadManager {
         }
     }
 
+    // 是否启用 URL 中转模式
+    async isRelayEnabled() {
+        const { settings } = await chrome.storage.local.get(['settings']);
+        return Boolean(settings && settings.relayMode);
+    }
+
+    // URL 中转：转发 Cookie 给后端，由后端直接下载并写入服务器，轮询后端进度
+    async startRelayTask(taskId) {
+        const task = this.activeTasks.get(taskId);
+        task.status = TaskStatus.TRANSFERRING;
+        task.uploadStartTime = new Date().toISOString();
+        this.notifyTaskUpdate(taskId, task);
+        try {
+            const cookies = {};
+            for (const cookie of await chrome.cookies.getAll({ url: task.sourceUrl })) {
+                cookies[cookie.name] = cookie.value;
+            }
+            const result = await apiClient.relayUrl({
+                url: task.sourceUrl,
+                server_id: task.serverId,
+                target_path: task.targetPath,
+                file_name: task.fileName,
+                headers: { 'User-Agent': navigator.userAgent },
+                cookies
+            });
+            task.relayTaskId = result.task_id;
+            task.totalBytes = result.file_size || 0;
+            this.notifyTaskUpdate(taskId, task);
+            await this.waitForBackendTask(taskId, result.task_id);
+            return { success: true, taskId: taskId };
+        } catch (error) {
+            console.error(`[RELAY] relay failed for task ${taskId}:`, error);
+            task.status = TaskStatus.FAILED;
+            task.error = `中转失败: ${error.message}`;
+            this.notifyTaskUpdate(taskId, task);
+            this.moveTaskToHistory(taskId);
+            return { success: false, error: error.message };
+        }
+    }
+
+    // 轮询后端任务直到结束
+    async waitForBackendTask(taskId, backendTaskId) {
+        const task = this.activeTasks.get(taskId);
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const progress = await apiClient.getTaskProgress(backendTaskId);
+            task.transferredBytes = Math.round((progress.progress / 100) * (task.totalBytes || 0));
+            this.notifyTaskUpdate(taskId, task);
+            if (progress.status === 'completed') {
+                task.status = TaskStatus.COMPLETE;
+                task.completeTime = new Date().toISOString();
+                this.notifyTaskUpdate(taskId, task);
+                this.moveTaskToHistory(taskId);
+                return;
+            }
+            if (progress.status === 'failed' || progress.status === 'cancelled') {
+                throw new Error(`后端任务${progress.status === 'failed' ? '失败' : '已取消'}`);
+            }
+        }
+    }
+
+    // 边下载边上传：下载路径确定后让后端跟随下载中的文件上传
+    async startFollowUpload(taskId, localFilePath) {
+        const task = this.activeTasks.get(taskId);
+        if (!task || !task.serverId || !localFilePath || task.followTaskId || task.followStarting) {
+            return;
+        }
+        const { settings } = await chrome.storage.local.get(['settings']);
+        if (settings && settings.followUpload === false) {
+            return;
+        }
+        task.followStarting = true;
+        try {
+            const result = await apiClient.startFollowUpload({
+                local_path: localFilePath,
+                server_id: task.serverId,
+                target_path: task.targetPath,
+                total_size: task.totalBytes > 0 ? task.totalBytes : undefined
+            });
+            task.followTaskId = result.task_id;
+            console.log(`[FOLLOW] task ${taskId} following ${localFilePath}, backend task ${result.task_id}`);
+        } catch (error) {
+            // 后端不支持或启动失败时，下载完成后按原流程上传
+            console.warn(`[FOLLOW] could not start follow upload for task ${taskId}:`, error);
+        } finally {
+            task.followStarting = false;
+        }
+    }
+
+    // 下载完成后通知后端，等待剩余数据上传并在远端完成重命名
+    async finishFollowUpload(taskId) {
+        const task = this.activeTasks.get(taskId);
+        if (!task) return;
+        task.status = TaskStatus.TRANSFERRING;
+        task.uploadStartTime = task.uploadStartTime || new Date().toISOString();
+        this.notifyTaskUpdate(taskId, task);
+        const followTaskId = task.followTaskId;
+        task.followTaskId = null;
+        try {
+            const downloadItem = await this.getDownloadItem(task.downloadId);
+            const result = await apiClient.completeFollowUpload(followTaskId, {
+                success: true,
+                total_size: downloadItem.fileSize > 0 ? downloadItem.fileSize : undefined
+            });
+            if (!result.success) throw new Error(result.error || '上传失败');
+            // 后端立即返回，剩余数据在后台上传，轮询任务直到结束
+            task.totalBytes = task.totalBytes || downloadItem.fileSize || 0;
+            await this.waitForBackendTask(taskId, followTaskId);
+        } catch (error) {
+            console.warn(`[FOLLOW] follow upload failed for task ${taskId}, falling back to full upload:`, error);
+            await this.startTransferForTask(taskId);
+        }
+    }
+
     // 真实的文件传输功能
     async transferFile(taskId, filePath) {
         const task = this.activeTasks.get(taskId);
@@ -685,6 +817,8 @@ chrome.runtime.onInstalled.addListener(async (details) => {
         settings: {
             autoDetect: true,
             showNotifications: true,
+            followUpload: true,
+            relayMode: false,
             theme: 'light'
         }
     });
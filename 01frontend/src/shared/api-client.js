@@ -348,6 +348,44 @@ class ApiClient {
         if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
         return await resp.json();
     }
+
+    /**
+     * URL 中转：后端直接从源地址下载并写入服务器
+     * @param {Object} params - 参数对象
+     * @param {string} params.url - 源地址
+     * @param {string} params.server_id - 目标服务器ID
+     * @param {string} params.target_path - 服务器目标路径
+     * @param {string} [params.file_name] - 文件名，省略时由后端推断
+     * @param {Object} [params.headers] - 转发的请求头
+     * @param {Object} [params.cookies] - 转发的 Cookie
+     * @returns {Promise<Object>} { success, task_id, file_name, file_size }
+     */
+    async relayUrl(params) {
+        return this.post('/upload/url', params);
+    }
+
+    /**
+     * 边下载边上传：后端跟随仍在下载的本地文件上传
+     * @param {Object} params - 参数对象
+     * @param {string} params.local_path - 下载完成后的本地文件路径
+     * @param {string} params.server_id - 目标服务器ID
+     * @param {string} params.target_path - 服务器目标路径
+     * @param {number} [params.total_size] - 文件总大小，未知时省略
+     * @returns {Promise<Object>} { success: boolean, task_id: string }
+     */
+    async startFollowUpload(params) {
+        return this.post('/upload/follow', params);
+    }
+
+    /**
+     * 通知下载结束，后端立即返回，上传结果通过 getTaskProgress 查询
+     * @param {string} taskId - startFollowUpload 返回的后端任务ID
+     * @param {Object} params - { success: boolean, total_size?: number }
+     * @returns {Promise<Object>} { success: boolean, task_id: string }
+     */
+    async completeFollowUpload(taskId, params) {
+        return this.post(`/upload/follow/${taskId}/complete`, params);
+    }
 }
 
 // 创建全局API客户端实例
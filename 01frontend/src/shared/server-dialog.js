@@ -63,6 +63,7 @@ class ServerDialog {
                             <select name="protocol" style="width: 100%; padding: 10px; border: 1px solid #ddd; border-radius: 4px; font-size: 14px;">
                                 <option value="SFTP" ${(serverData?.protocol?.toUpperCase() || 'SFTP') === 'SFTP' ? 'selected' : ''}>SFTP</option>
                                 <option value="FTP" ${(serverData?.protocol?.toUpperCase() || '') === 'FTP' ? 'selected' : ''}>FTP</option>
+                                <option value="FTPS" ${(serverData?.protocol?.toUpperCase() || '') === 'FTPS' ? 'selected' : ''}>FTPS</option>
                                 <option value="SCP" ${(serverData?.protocol?.toUpperCase() || '') === 'SCP' ? 'selected' : ''}>SCP</option>
                             </select>
                         </div>
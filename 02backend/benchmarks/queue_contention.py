@@ -0,0 +1,155 @@
+"""
+队列锁竞争基准
+模拟大量并发接口客户端同时查询任务、读取队列状态并上报进度与状态，
+对比单把全局锁（写存储时也持锁）的旧队列与当前分段锁、无锁读取的队列
+
+用法:
+    python benchmarks/queue_contention.py               # 默认 128 个客户端
+    python benchmarks/queue_contention.py -c 256 -d 10
+"""
+
+import argparse
+import functools
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.application.services.queue_manager import (  # noqa: E402
+    QueueManager,
+    TaskStatus,
+)
+
+# 操作比例：查询占大头，其余为进度与状态上报
+READ_RATIO = 0.80
+PROGRESS_RATIO = 0.15
+
+
+def _locked(method: Callable[..., Any]) -> Callable[..., Any]:
+    """把方法包在实例的全局锁里"""
+
+    @functools.wraps(method)
+    def wrapper(self: "SingleLockQueue", *args: Any, **kwargs: Any) -> Any:
+        with self.global_lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class SingleLockQueue(QueueManager):
+    """旧队列：所有读写共用一把锁，状态变化时持锁写存储"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.global_lock = threading.RLock()
+        super().__init__(*args, **kwargs)
+
+    add_task = _locked(QueueManager.add_task)
+    get_task = _locked(QueueManager.get_task)
+    list_tasks = _locked(QueueManager.list_tasks)
+    get_queue_status = _locked(QueueManager.get_queue_status)
+    update_task_progress = _locked(QueueManager.update_task_progress)
+    update_task_status = _locked(QueueManager.update_task_status)
+
+
+def client(
+    queue: QueueManager,
+    task_ids: list[str],
+    deadline: float,
+    latencies: list[float],
+    seed: int,
+) -> None:
+    """单个客户端循环发起请求直到截止时间，记录每次请求耗时"""
+    rng = random.Random(seed)
+    statuses = [TaskStatus.RUNNING, TaskStatus.PENDING]
+    while time.perf_counter() < deadline:
+        task_id = rng.choice(task_ids)
+        roll = rng.random()
+        start = time.perf_counter()
+        if roll < READ_RATIO:
+            kind = rng.randrange(10)
+            if kind < 8:
+                queue.get_task(task_id)
+            elif kind < 9:
+                queue.get_queue_status()
+            else:
+                queue.list_tasks(TaskStatus.RUNNING)
+        elif roll < READ_RATIO + PROGRESS_RATIO:
+            queue.update_task_progress(task_id, rng.random() * 100)
+        else:
+            queue.update_task_status(task_id, rng.choice(statuses))
+        latencies.append(time.perf_counter() - start)
+
+
+def run(factory: Callable[[str], QueueManager], args: argparse.Namespace) -> dict:
+    """建队列、并发压测，返回吞吐与延迟统计"""
+    with tempfile.TemporaryDirectory() as storage_dir:
+        queue = factory(storage_dir)
+        task_ids = [
+            queue.add_task(
+                {
+                    "file_path": f"/data/file_{index}.bin",
+                    "file_name": f"file_{index}.bin",
+                    "file_size": 1024,
+                    "server_id": f"server-{index % 20}",
+                    "target_path": "/backup",
+                }
+            )["task_id"]
+            for index in range(args.tasks)
+        ]
+
+        per_client: list[list[float]] = [[] for _ in range(args.clients)]
+        deadline = time.perf_counter() + args.duration
+        threads = [
+            threading.Thread(
+                target=client, args=(queue, task_ids, deadline, per_client[i], i)
+            )
+            for i in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(value for values in per_client for value in values)
+    count = len(latencies)
+    return {
+        "ops": count / elapsed,
+        "p50": latencies[count // 2] * 1000 if count else 0.0,
+        "p99": latencies[int(count * 0.99)] * 1000 if count else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="队列锁竞争基准")
+    parser.add_argument("-c", "--clients", type=int, default=128, help="并发客户端数")
+    parser.add_argument("-t", "--tasks", type=int, default=2000, help="队列中的任务数")
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="每轮秒数")
+    args = parser.parse_args()
+
+    queues = {
+        "single-lock": lambda path: SingleLockQueue(storage_dir=path, recover=False),
+        "striped": lambda path: QueueManager(storage_dir=path, recover=False),
+    }
+    print(f"客户端: {args.clients}  任务数: {args.tasks}  时长: {args.duration}s")
+    print(f"{'队列':<14}{'吞吐(次/秒)':>14}{'p50(毫秒)':>12}{'p99(毫秒)':>12}")
+    results = {}
+    for name, factory in queues.items():
+        stats = run(factory, args)
+        results[name] = stats
+        print(
+            f"{name:<14}{stats['ops']:>14.0f}"
+            f"{stats['p50']:>12.3f}{stats['p99']:>12.2f}"
+        )
+    speedup = results["striped"]["ops"] / max(results["single-lock"]["ops"], 1e-9)
+    print(f"吞吐提升 {speedup:.1f} 倍")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+队列任务内存占用基准
+对比按实例 __dict__ 保存、每个任务各持一份字符串的旧任务模型与当前的
+紧凑任务模型，统计大量排队任务的内存占用
+
+用法:
+    python benchmarks/task_memory.py            # 默认 100 万个任务
+    python benchmarks/task_memory.py -n 200000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.domain.models import TaskStatus, TransferTask  # noqa: E402
+
+SERVERS = 20
+TARGET_PATHS = 50
+
+
+class LegacyTask:
+    """旧任务模型：实例 __dict__、枚举状态、ISO 时间字符串"""
+
+    def __init__(self, **fields: Any):
+        self.id = fields["id"]
+        self.file_path = fields["file_path"]
+        self.file_name = fields["file_name"]
+        self.file_size = fields["file_size"]
+        self.server_id = fields["server_id"]
+        self.target_path = fields["target_path"]
+        self.status = TaskStatus(fields["status"])
+        self.progress = fields["progress"]
+        self.started_at = fields["started_at"]
+        self.completed_at: Optional[str] = None
+        self.error_message: Optional[str] = None
+        self.checksum: Optional[str] = None
+        self.transfer_mode = fields["transfer_mode"]
+        self.direction = fields["direction"]
+
+
+def task_fields(index: int) -> dict[str, Any]:
+    """模拟接口收到的任务数据：每个字段都是新构造的字符串"""
+    name = f"file_{index:07d}.bin"
+    return {
+        "id": str(uuid.UUID(int=index)),
+        "file_path": f"/home/user/downloads/{name}",
+        "file_name": name,
+        "file_size": 1024 * (index % 4096 + 1),
+        "server_id": "server-" + str(index % SERVERS).zfill(8),
+        "target_path": "/data/backup/" + str(index % TARGET_PATHS),
+        "status": "pending",
+        "progress": 0.0,
+        "started_at": datetime.now().isoformat(),
+        "transfer_mode": "".join(["au", "to"]),
+        "direction": "".join(["up", "load"]),
+    }
+
+
+def measure(factory: Callable[[dict[str, Any]], Any], count: int) -> tuple[int, float]:
+    """创建 count 个任务，返回 (占用字节数, 耗时秒)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tasks = {}
+    for index in range(count):
+        fields = task_fields(index)
+        tasks[fields["id"]] = factory(fields)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tasks
+    return size, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="队列任务内存占用基准")
+    parser.add_argument("-n", "--count", type=int, default=1_000_000, help="任务数")
+    args = parser.parse_args()
+
+    models = {
+        "legacy": lambda fields: LegacyTask(**fields),
+        "compact": lambda fields: TransferTask(**fields),
+    }
+    print(f"任务数: {args.count}")
+    print(f"{'模型':<10}{'总占用(MB)':>14}{'每任务(字节)':>16}{'创建耗时(秒)':>16}")
+    results = {}
+    for name, factory in models.items():
+        size, elapsed = measure(factory, args.count)
+        results[name] = size
+        print(
+            f"{name:<10}{size / 1024 / 1024:>14.1f}"
+            f"{size / args.count:>16.0f}{elapsed:>16.2f}"
+        )
+    print(f"紧凑模型占用为旧模型的 {results['compact'] / results['legacy']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,6 @@
 负责异常处理、重试机制和错误恢复
 """
 
-import json
 import logging
 import os
 import random
@@ -12,6 +11,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Callable, Optional, Union
 
+from ...infrastructure.storage.json_writer import get_writer
 from ...infrastructure.storage.storage import Storage
 
 
@@ -380,10 +380,7 @@ class ErrorHandler:
                 }
                 error_list.append(error_dict)
 
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.error_log_file), exist_ok=True)
-            with open(self.error_log_file, "w", encoding="utf-8") as f:
-                json.dump(error_list, f, ensure_ascii=False, indent=2)
+            get_writer(self.error_log_file).save(error_list)
 
         except Exception as e:
             self.logger.error(f"保存错误日志失败: {str(e)}")
@@ -0,0 +1,237 @@
+"""
+asyncio 传输调度模块
+所有 SFTP 会话由一个事件循环驱动，单进程可同时维持数百台服务器的传输
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from ...domain.models import TransferResult
+from ...infrastructure.network.async_sftp import (
+    AsyncConnectionCache,
+    AsyncSFTPTransport,
+)
+from ...infrastructure.network.transport_factory import create_transport
+from .config_manager import ConfigManager
+from .dedup_manager import DedupManager
+from .history_manager import HistoryManager
+from .queue_manager import QueueManager, TaskStatus
+from .task_archiver import TaskArchiver
+from .transfer_dispatcher import TransferDispatcher
+
+# 事件循环内同时进行的传输数上限
+MAX_CONNECTIONS = 1000
+
+
+class AsyncTransferDispatcher(TransferDispatcher):
+    """asyncio 传输调度接口
+
+    任务状态、进度与历史记录的语义与 TransferDispatcher 相同。SFTP 任务在
+    事件循环中执行；其他协议以及压缩、差量传输仍交给线程池中的同步实现。
+    会阻塞的本地操作（任务落盘、历史记录、去重查询）同样放到线程池执行。
+    """
+
+    def __init__(
+        self,
+        queue_manager: QueueManager,
+        config_manager: ConfigManager,
+        history_manager: Optional[HistoryManager] = None,
+        dedup_manager: Optional[DedupManager] = None,
+        max_connections: int = MAX_CONNECTIONS,
+        connections: Optional[AsyncConnectionCache] = None,
+        archiver: Optional[TaskArchiver] = None,
+    ):
+        """初始化asyncio传输调度器
+        Args:
+            queue_manager: 队列管理器
+            config_manager: 配置管理器，用于查找服务器配置
+            history_manager: 历史记录管理器，任务结束时写入历史
+            dedup_manager: 去重管理器，单文件任务上传前尝试去重
+            max_connections: 同时进行的传输数上限
+            connections: asyncssh 连接缓存，默认新建
+            archiver: 任务归档器，设置后历史记录交给它批量写入
+        """
+        super().__init__(
+            queue_manager,
+            config_manager,
+            history_manager,
+            dedup_manager,
+            batch_threshold=0,
+            archiver=archiver,
+        )
+        self.connections = connections or AsyncConnectionCache()
+        self.max_connections = max_connections
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="transfer-loop", daemon=True
+        )
+        self.thread.start()
+
+    def dispatch_pending(self) -> int:
+        """把所有待处理上传任务交给事件循环，下载任务交给线程池
+        Returns:
+            本次提交的任务数
+        """
+        with self.lock:
+            pending = [
+                task
+                for task in self.queue_manager.list_tasks(TaskStatus.PENDING)
+                if task.id not in self.submitted
+            ]
+            for task in pending:
+                self.submitted.add(task.id)
+                if task.direction == "download":
+                    self.executor.submit(self.run_download, task.id)
+                    continue
+                asyncio.run_coroutine_threadsafe(
+                    self.run_task_async(task.id), self.loop
+                )
+            return len(pending)
+
+    def run_task(
+        self,
+        task_id: str,
+        verify_remote: bool = False,
+        dedup: bool = True,
+        compression: str = "none",
+        compression_store: bool = False,
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """执行单个任务并等待完成（可在任意线程调用）"""
+        return asyncio.run_coroutine_threadsafe(
+            self.run_task_async(
+                task_id, verify_remote, dedup, compression, compression_store
+            ),
+            self.loop,
+        ).result()
+
+    async def run_task_async(
+        self,
+        task_id: str,
+        verify_remote: bool = False,
+        dedup: bool = True,
+        compression: str = "none",
+        compression_store: bool = False,
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """在事件循环中执行单个任务
+        Returns:
+            (是否成功, 传输结果)
+        """
+        task = self.queue_manager.get_task(task_id)
+        if task is None:
+            return False, None
+        server_config = self.config_manager.get_server_config(task.server_id)
+        if (
+            server_config is None
+            or server_config.protocol.upper() != "SFTP"
+            or compression != "none"
+            or task.transfer_mode == "delta"
+        ):
+            outcome: tuple[bool, Optional[TransferResult]] = await self._offload(
+                TransferDispatcher.run_task,
+                self,
+                task_id,
+                verify_remote,
+                dedup,
+                compression,
+                compression_store,
+            )
+            return outcome
+
+        if self.semaphore is None:
+            # 在事件循环线程内创建，兼容 3.9 的 loop 绑定
+            self.semaphore = asyncio.Semaphore(self.max_connections)
+        async with self.semaphore:
+            # 去重与续传使用同步实现，在线程池中执行
+            sync_client = create_transport(server_config, verify_remote=verify_remote)
+            if not await self._offload(self._start, task, sync_client):
+                return False, None
+            remote_path = os.path.join(task.target_path, task.file_name)
+            start_time = time.time()
+
+            # 暂停或重启前本任务写出的临时文件还在时从其末尾续传，不做去重
+            offset = await self._offload(self._resume_offset, sync_client, task)
+            result = None
+            if dedup and self.dedup_manager is not None and not offset:
+                result = await self._offload(
+                    self.dedup_manager.resolve,
+                    sync_client,
+                    task.server_id,
+                    task.file_path,
+                    remote_path,
+                    task.file_size,
+                )
+            if offset:
+                result = await self._offload(
+                    self._resume_upload, sync_client, task, remote_path, offset
+                )
+            partial_path = sync_client.partial_path
+            if result:
+                success = True
+                self.queue_manager.update_task_progress(task_id, 100.0)
+            else:
+                client = AsyncSFTPTransport(
+                    server_config, self.connections, verify_remote=verify_remote
+                )
+                client.on_partial = lambda path: self.queue_manager.set_task_partial(
+                    task_id, path
+                )
+                success = await client.upload(
+                    task.file_path,
+                    remote_path,
+                    progress_callback=self._reporter(task_id),
+                )
+                partial_path = client.partial_path
+                result = client.last_result
+                if (
+                    success
+                    and result
+                    and result.checksum
+                    and self.dedup_manager is not None
+                ):
+                    await self._offload(
+                        self.dedup_manager.record,
+                        task.server_id,
+                        task.file_path,
+                        remote_path,
+                        result.checksum,
+                        result.checksum_algorithm,
+                    )
+
+            await self._offload(
+                self._finish_task,
+                task,
+                server_config,
+                success,
+                result,
+                time.time() - start_time,
+                None if success else "SFTP上传失败",
+                partial=(
+                    None
+                    if partial_path is None
+                    else functools.partial(sync_client.remove, partial_path)
+                ),
+            )
+            return success, result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭所有连接并停止事件循环"""
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(
+                self.connections.close_all(), self.loop
+            ).result(timeout=30)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+        super().shutdown(wait)
+
+    async def _offload(
+        self, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        """在线程池中执行会阻塞的同步调用"""
+        return await self.loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
@@ -3,27 +3,55 @@
 负责服务器配置的增删改查操作
 """
 
+import os
+import threading
 import uuid
 from datetime import datetime
 from typing import Any, Optional, Union
 
 from ...domain.models import ServerConfig
 from ...infrastructure.crypto.crypto_utils import CryptoUtils
+from ...infrastructure.network.transport_factory import available_protocols
 from ...infrastructure.storage.storage import Storage
 
+# 服务器使用记录（最近路径、最后使用时间）在内存中合并后写回 servers.json 的间隔（秒）
+USAGE_FLUSH_INTERVAL = 2.0
 
-class ConfigManager:
-    """配置管理接口 - 阶段2核心功能"""
 
-    def __init__(self, storage_dir: Optional[str] = None):
+class ConfigManager:
+    """配置管理接口 - 阶段2核心功能
+
+    servers.json 读入后按文件修改时间缓存，解密后的密码按密文缓存。
+    上传时的最近路径与最后使用时间只记在内存中，读取配置时叠加，由后台
+    线程每隔 flush_interval 秒合并写回；增删改配置前以及 stop 时立即写回。
+    """
+
+    def __init__(
+        self,
+        storage_dir: Optional[str] = None,
+        flush_interval: float = USAGE_FLUSH_INTERVAL,
+    ):
         """初始化配置管理器
         Args:
             storage_dir: 存储目录，默认为当前目录
+            flush_interval: 使用记录写回 servers.json 的间隔（秒）
         """
         self.storage_dir = storage_dir or "."
         self.storage = Storage(self.storage_dir)
         self.crypto_utils = CryptoUtils()
         self.config_file = "servers.json"
+        self.flush_interval = flush_interval
+        # lock 保护内存状态；write_lock 串行化对 servers.json 的读改写
+        self.lock = threading.Lock()
+        self.write_lock = threading.RLock()
+        self.records: dict[str, dict] = {}
+        self.stamp: Optional[tuple[int, ...]] = None
+        self.passwords: dict[str, str] = {}
+        # 尚未写回的使用记录：配置ID -> {"paths": ..., "latest_use_at": ...}
+        self.pending: dict[str, dict[str, Any]] = {}
+        self.dirty = threading.Event()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
 
     def create_server_config(
         self, config_data: dict[str, Union[str, int, list[dict]]]
@@ -34,68 +62,75 @@ class ConfigManager:
         Returns:
             创建结果字典
         """
-        try:
-            # 验证配置数据
-            validation_result = self.validate_config(config_data)
-            if not validation_result["valid"]:
-                return {"success": False, "error": validation_result["error"]}
-
-            # 检查名称是否重复
-            existing_configs = self.storage.load_servers()
-            for config in existing_configs:
-                if config["name"] == config_data["name"]:
-                    return {"success": False, "error": "服务器名称已存在"}
-
-            # 创建新配置
-            config_id = str(uuid.uuid4())
-            now = datetime.now()
-            default_path = config_data["default_path"]
-            raw_paths: Any = config_data.get("paths", [])
-            paths: list[dict] = []
-            if isinstance(raw_paths, list):
-                paths = [
-                    p
-                    for p in raw_paths
-                    if isinstance(p, dict) and "path" in p and "update" in p
-                ]
-            # 填充 paths 逻辑
-            if not paths or len(paths) == 0:
-                paths = [
-                    {"path": default_path, "update": now.isoformat(timespec="seconds")}
-                ]
-            elif len(paths) < 5:
-                # 检查 default_path 是否已存在
-                if not any(p["path"] == default_path for p in paths):
-                    paths.append(
+        with self.write_lock:
+            self.flush()
+            try:
+                # 验证配置数据
+                validation_result = self.validate_config(config_data)
+                if not validation_result["valid"]:
+                    return {"success": False, "error": validation_result["error"]}
+
+                # 检查名称是否重复
+                existing_configs = self.storage.load_servers()
+                for config in existing_configs:
+                    if config["name"] == config_data["name"]:
+                        return {"success": False, "error": "服务器名称已存在"}
+
+                # 创建新配置
+                config_id = str(uuid.uuid4())
+                now = datetime.now()
+                default_path = config_data["default_path"]
+                raw_paths: Any = config_data.get("paths", [])
+                paths: list[dict] = []
+                if isinstance(raw_paths, list):
+                    paths = [
+                        p
+                        for p in raw_paths
+                        if isinstance(p, dict) and "path" in p and "update" in p
+                    ]
+                # 填充 paths 逻辑
+                if not paths or len(paths) == 0:
+                    paths = [
                         {
                             "path": default_path,
                             "update": now.isoformat(timespec="seconds"),
                         }
-                    )
-            paths = paths[:5]
-            new_config = {
-                "id": config_id,
-                "name": config_data["name"],
-                "host": config_data["host"],
-                "port": config_data["port"],
-                "protocol": config_data["protocol"],
-                "username": config_data["username"],
-                "password": self.crypto_utils.encrypt(str(config_data["password"])),
-                "default_path": default_path,
-                "created_at": now.isoformat(),
-                "updated_at": now.isoformat(),
-                "paths": paths,
-                "latest_use_at": now.isoformat(timespec="seconds"),
-            }
-
-            # 保存配置
-            existing_configs.append(new_config)
-            self.storage.save_servers(existing_configs)
-
-            return {"success": True, "config_id": config_id}
+                    ]
+                elif len(paths) < 5:
+                    # 检查 default_path 是否已存在
+                    if not any(p["path"] == default_path for p in paths):
+                        paths.append(
+                            {
+                                "path": default_path,
+                                "update": now.isoformat(timespec="seconds"),
+                            }
+                        )
+                paths = paths[:5]
+                new_config = {
+                    "id": config_id,
+                    "name": config_data["name"],
+                    "host": config_data["host"],
+                    "port": config_data["port"],
+                    "protocol": config_data["protocol"],
+                    "username": config_data.get("username", ""),
+                    "password": self.crypto_utils.encrypt(
+                        str(config_data.get("password", ""))
+                    ),
+                    "default_path": default_path,
+                    "created_at": now.isoformat(),
+                    "updated_at": now.isoformat(),
+                    "paths": paths,
+                    "latest_use_at": now.isoformat(timespec="seconds"),
+                }
 
-        except Exception as e:
-            return {"success": False, "error": f"创建配置失败: {str(e)}"}
+                # 保存配置
+                existing_configs.append(new_config)
+                self._save(existing_configs)
+
+                return {"success": True, "config_id": config_id}
+
+            except Exception as e:
+                return {"success": False, "error": f"创建配置失败: {str(e)}"}
 
     def get_server_config(self, config_id: str) -> Optional[ServerConfig]:
         """获取服务器配置 - 阶段2核心功能
@@ -105,23 +140,23 @@ class ConfigManager:
             服务器配置对象或None
         """
         try:
-            configs = self.storage.load_servers()
-            for config in configs:
-                if config["id"] == config_id:
-                    return ServerConfig(
-                        id=config["id"],
-                        name=config["name"],
-                        host=config["host"],
-                        port=config["port"],
-                        protocol=config["protocol"],
-                        username=config["username"],
-                        password=self.crypto_utils.decrypt(config["password"]),
-                        default_path=config["default_path"],
-                        created_at=config["created_at"],
-                        updated_at=config["updated_at"],
-                        paths=config.get("paths", []),
-                    )
-            return None
+            config = self._records().get(config_id)
+            if config is None:
+                return None
+            config = self._with_usage(config)
+            return ServerConfig(
+                id=config["id"],
+                name=config["name"],
+                host=config["host"],
+                port=config["port"],
+                protocol=config["protocol"],
+                username=config["username"],
+                password=self._decrypt(config["password"]),
+                default_path=config["default_path"],
+                created_at=config["created_at"],
+                updated_at=config["updated_at"],
+                paths=config.get("paths", []),
+            )
 
         except Exception:
             return None
@@ -136,79 +171,84 @@ class ConfigManager:
         Returns:
             更新结果字典
         """
-        try:
-            configs = self.storage.load_servers()
-            config_index = None
-
-            # 查找配置
-            for i, config in enumerate(configs):
-                if config["id"] == config_id:
-                    config_index = i
-                    break
-
-            if config_index is None:
-                return {"success": False, "error": "配置不存在"}
-
-            # 合并原有配置和新数据
-            updated_config = configs[config_index].copy()
-            for key, value in config_data.items():
-                if key == "password":
-                    updated_config[key] = self.crypto_utils.encrypt(str(value))
-                else:
-                    updated_config[key] = value
-
-            updated_config["updated_at"] = datetime.now().isoformat()
-
-            # 校验合并后的配置
-            validation_result = self.validate_config(updated_config)
-            if not validation_result["valid"]:
-                return {"success": False, "error": validation_result["error"]}
-
-            # 检查名称是否重复（排除当前配置）
-            for config in configs:
-                if (
-                    config["id"] != config_id
-                    and config["name"] == updated_config["name"]
-                ):
-                    return {"success": False, "error": "服务器名称已存在"}
-
-            # 修正 paths 逻辑
-            default_path = updated_config["default_path"]
-            raw_paths: Any = updated_config.get("paths", [])
-            paths: list[dict] = []
-            if isinstance(raw_paths, list):
-                paths = [
-                    p
-                    for p in raw_paths
-                    if isinstance(p, dict) and "path" in p and "update" in p
-                ]
-            now = datetime.now()
-            if not paths or len(paths) == 0:
-                paths = [
-                    {"path": default_path, "update": now.isoformat(timespec="seconds")}
-                ]
-            elif len(paths) < 5:
-                if not any(p["path"] == default_path for p in paths):
-                    paths.append(
+        with self.write_lock:
+            self.flush()
+            try:
+                configs = self.storage.load_servers()
+                config_index = None
+
+                # 查找配置
+                for i, config in enumerate(configs):
+                    if config["id"] == config_id:
+                        config_index = i
+                        break
+
+                if config_index is None:
+                    return {"success": False, "error": "配置不存在"}
+
+                # 合并原有配置和新数据
+                updated_config = configs[config_index].copy()
+                for key, value in config_data.items():
+                    if key == "password":
+                        updated_config[key] = self.crypto_utils.encrypt(str(value))
+                    else:
+                        updated_config[key] = value
+
+                updated_config["updated_at"] = datetime.now().isoformat()
+
+                # 校验合并后的配置
+                validation_result = self.validate_config(updated_config)
+                if not validation_result["valid"]:
+                    return {"success": False, "error": validation_result["error"]}
+
+                # 检查名称是否重复（排除当前配置）
+                for config in configs:
+                    if (
+                        config["id"] != config_id
+                        and config["name"] == updated_config["name"]
+                    ):
+                        return {"success": False, "error": "服务器名称已存在"}
+
+                # 修正 paths 逻辑
+                default_path = updated_config["default_path"]
+                raw_paths: Any = updated_config.get("paths", [])
+                paths: list[dict] = []
+                if isinstance(raw_paths, list):
+                    paths = [
+                        p
+                        for p in raw_paths
+                        if isinstance(p, dict) and "path" in p and "update" in p
+                    ]
+                now = datetime.now()
+                if not paths or len(paths) == 0:
+                    paths = [
                         {
                             "path": default_path,
                             "update": now.isoformat(timespec="seconds"),
                         }
-                    )
-            paths = paths[:5]
-            updated_config["paths"] = paths
-            updated_config["latest_use_at"] = now.isoformat(timespec="seconds")
+                    ]
+                elif len(paths) < 5:
+                    if not any(p["path"] == default_path for p in paths):
+                        paths.append(
+                            {
+                                "path": default_path,
+                                "update": now.isoformat(timespec="seconds"),
+                            }
+                        )
+                paths = paths[:5]
+                updated_config["paths"] = paths
+                updated_config["latest_use_at"] = now.isoformat(timespec="seconds")
 
-            # 更新配置
-            configs[config_index] = updated_config
+                # 更新配置
+                configs[config_index] = updated_config
 
-            # 保存配置
-            self.storage.save_servers(configs)
+                # 保存配置
+                self._save(configs)
 
-            return {"success": True}
+                return {"success": True}
 
-        except Exception as e:
-            return {"success": False, "error": f"更新配置失败: {str(e)}"}
+            except Exception as e:
+                return {"success": False, "error": f"更新配置失败: {str(e)}"}
 
     def delete_server_config(self, config_id: str) -> dict[str, Union[bool, str]]:
         """删除服务器配置 - 阶段2核心功能
@@ -217,27 +257,29 @@ class ConfigManager:
         Returns:
             删除结果字典
         """
-        try:
-            configs = self.storage.load_servers()
-            config_index = None
+        with self.write_lock:
+            self.flush()
+            try:
+                configs = self.storage.load_servers()
+                config_index = None
 
-            # 查找配置
-            for i, config in enumerate(configs):
-                if config["id"] == config_id:
-                    config_index = i
-                    break
+                # 查找配置
+                for i, config in enumerate(configs):
+                    if config["id"] == config_id:
+                        config_index = i
+                        break
 
-            if config_index is None:
-                return {"success": False, "error": "配置不存在"}
+                if config_index is None:
+                    return {"success": False, "error": "配置不存在"}
 
-            # 删除配置
-            configs.pop(config_index)
-            self.storage.save_servers(configs)
+                # 删除配置
+                configs.pop(config_index)
+                self._save(configs)
 
-            return {"success": True}
+                return {"success": True}
 
-        except Exception as e:
-            return {"success": False, "error": f"删除配置失败: {str(e)}"}
+            except Exception as e:
+                return {"success": False, "error": f"删除配置失败: {str(e)}"}
 
     def list_server_configs(self) -> list[ServerConfig]:
         """列出所有服务器配置 - 阶段2核心功能
@@ -245,10 +287,10 @@ class ConfigManager:
             服务器配置列表
         """
         try:
-            configs = self.storage.load_servers()
             result = []
 
-            for config in configs:
+            for config in self._records().values():
+                config = self._with_usage(config)
                 result.append(
                     ServerConfig(
                         id=config["id"],
@@ -257,7 +299,7 @@ class ConfigManager:
                         port=config["port"],
                         protocol=config["protocol"],
                         username=config["username"],
-                        password=self.crypto_utils.decrypt(config["password"]),
+                        password=self._decrypt(config["password"]),
                         default_path=config["default_path"],
                         created_at=config["created_at"],
                         updated_at=config["updated_at"],
@@ -272,36 +314,82 @@ class ConfigManager:
             return []
 
     def update_server_paths(self, config_id: str, new_path: str) -> None:
-        configs = self.storage.load_servers()
-        for config in configs:
-            if config["id"] == config_id:
-                now = datetime.now().isoformat(timespec="seconds")
-                raw_paths: Any = config.get("paths", [])
-                paths: list[dict] = []
-                if isinstance(raw_paths, list):
-                    paths = [
-                        p
-                        for p in raw_paths
-                        if isinstance(p, dict) and "path" in p and "update" in p
-                    ]
-                paths = [p for p in paths if p["path"] != new_path]
-                paths.insert(0, {"path": new_path, "update": now})
-                default_path = config.get("default_path", "/home/uploads/")
-                # 补充 default_path 到最后
-                if len(paths) < 5 and not any(p["path"] == default_path for p in paths):
-                    paths.append({"path": default_path, "update": now})
-                config["paths"] = paths[:5]
-                self.storage.save_servers(configs)
-                break
+        """把路径记为最近使用，只更新内存，稍后写回 servers.json
+        Args:
+            config_id: 配置ID
+            new_path: 本次使用的目标路径
+        """
+        config = self._records().get(config_id)
+        if config is None:
+            return
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.lock:
+            usage = self.pending.get(config_id, {})
+            raw_paths: Any = usage.get("paths", config.get("paths", []))
+            paths: list[dict] = []
+            if isinstance(raw_paths, list):
+                paths = [
+                    p
+                    for p in raw_paths
+                    if isinstance(p, dict) and "path" in p and "update" in p
+                ]
+            paths = [p for p in paths if p["path"] != new_path]
+            paths.insert(0, {"path": new_path, "update": now})
+            default_path = config.get("default_path", "/home/uploads/")
+            # 补充 default_path 到最后
+            if len(paths) < 5 and not any(p["path"] == default_path for p in paths):
+                paths.append({"path": default_path, "update": now})
+            # 整体替换而不是原地修改，写回线程据此判断写出后是否又有更新
+            self.pending[config_id] = {**usage, "paths": paths[:5]}
+            self._schedule_flush()
 
     def update_server_latest_use(self, config_id: str) -> None:
-        configs = self.storage.load_servers()
+        """记录服务器最后使用时间，只更新内存，稍后写回 servers.json
+        Args:
+            config_id: 配置ID
+        """
+        if config_id not in self._records():
+            return
         now = datetime.now().isoformat(timespec="seconds")
-        for config in configs:
-            if config["id"] == config_id:
-                config["latest_use_at"] = now
-                break
-        self.storage.save_servers(configs)
+        with self.lock:
+            usage = self.pending.get(config_id, {})
+            self.pending[config_id] = {**usage, "latest_use_at": now}
+            self._schedule_flush()
+
+    def flush(self) -> int:
+        """把内存中的使用记录写回 servers.json
+        Returns:
+            写回的配置数
+        """
+        with self.write_lock:
+            with self.lock:
+                self.dirty.clear()
+                snapshot = dict(self.pending)
+            if not snapshot:
+                return 0
+            try:
+                configs = self.storage.load_servers()
+                for config in configs:
+                    config.update(snapshot.get(config.get("id", ""), {}))
+                self._save(configs)
+            except Exception as e:
+                # 保留在内存中，下次写回时重试
+                print(f"[CONFIG] 写回服务器使用记录失败: {e}")
+                return 0
+            with self.lock:
+                for config_id, usage in snapshot.items():
+                    if self.pending.get(config_id) is usage:
+                        del self.pending[config_id]
+            return len(snapshot)
+
+    def stop(self) -> None:
+        """停止写回线程，并把尚未写回的使用记录写出"""
+        self.stopped.set()
+        self.dirty.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.flush()
 
     def validate_config(
         self, config_data: dict[str, Union[str, int, list[dict]]]
@@ -322,6 +410,10 @@ class ConfigManager:
                 "password",
                 "default_path",
             ]
+            # 本地回环后端不需要登录凭据
+            if config_data.get("protocol") == "LOCAL":
+                required_fields.remove("username")
+                required_fields.remove("password")
             for field in required_fields:
                 if field not in config_data or not config_data[field]:
                     return {"valid": False, "error": f"验证失败: 字段 {field} 不能为空"}
@@ -331,10 +423,11 @@ class ConfigManager:
                 return {"valid": False, "error": "验证失败: 端口号必须在1-65535之间"}
 
             protocol = config_data["protocol"]
-            if protocol not in ["SFTP", "FTP", "SCP"]:
+            protocols = available_protocols()
+            if protocol not in protocols:
                 return {
                     "valid": False,
-                    "error": "验证失败: 协议必须是 SFTP、FTP 或 SCP",
+                    "error": f"验证失败: 协议必须是 {'、'.join(protocols)} 之一",
                 }
 
             host = str(config_data["host"])
@@ -345,3 +438,55 @@ class ConfigManager:
 
         except Exception as e:
             return {"valid": False, "error": f"验证失败: {str(e)}"}
+
+    def _records(self) -> dict[str, dict]:
+        """servers.json 中的配置（按ID索引），文件未变化时直接返回缓存，调用方不得修改"""
+        try:
+            stat = os.stat(self.storage.servers_file)
+            stamp: tuple[int, ...] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = ()
+        with self.lock:
+            if stamp != self.stamp:
+                self.records = {
+                    config["id"]: config
+                    for config in self.storage.load_servers()
+                    if "id" in config
+                }
+                self.stamp = stamp
+            return self.records
+
+    def _with_usage(self, config: dict) -> dict:
+        """叠加尚未写回的使用记录"""
+        usage = self.pending.get(config["id"])
+        return {**config, **usage} if usage else config
+
+    def _decrypt(self, password: str) -> str:
+        """解密密码，结果按密文缓存"""
+        plain = self.passwords.get(password)
+        if plain is None:
+            plain = self.crypto_utils.decrypt(password)
+            self.passwords[password] = plain
+        return plain
+
+    def _save(self, configs: list[dict]) -> None:
+        """写入 servers.json 并使缓存失效"""
+        self.storage.save_servers(configs)
+        with self.lock:
+            self.stamp = None
+
+    def _schedule_flush(self) -> None:
+        """登记待写回的更新，首次调用时启动写回线程（须持有 lock）"""
+        self.dirty.set()
+        if self.thread is None and not self.stopped.is_set():
+            self.thread = threading.Thread(
+                target=self._run, name="server-usage-flush", daemon=True
+            )
+            self.thread.start()
+
+    def _run(self) -> None:
+        """写回线程：有更新时等待一个间隔，把间隔内的更新合并写回"""
+        while not self.stopped.is_set():
+            self.dirty.wait()
+            self.stopped.wait(self.flush_interval)
+            self.flush()
@@ -0,0 +1,102 @@
+"""
+内容去重模块
+负责基于内容摘要跳过重复上传，或在远端复制已送达的相同内容
+"""
+
+from typing import Optional
+
+from ...domain.models import TransferResult
+from ...infrastructure.network.transport import Transport
+from ...infrastructure.storage import DeliveryIndex, HashCache
+
+
+class DedupManager:
+    """内容去重接口"""
+
+    def __init__(
+        self,
+        storage_dir: Optional[str] = None,
+        hardlink: bool = False,
+        algorithm: str = "sha256",
+    ):
+        """初始化去重管理器
+        Args:
+            storage_dir: 存储目录，默认为当前目录
+            hardlink: 远端命中其他路径时使用硬链接而非复制
+            algorithm: 摘要算法，需与上传时流式计算的算法一致
+        """
+        self.storage_dir = storage_dir or "."
+        self.hardlink = hardlink
+        self.algorithm = algorithm
+        self.hash_cache = HashCache(self.storage_dir)
+        self.delivery_index = DeliveryIndex(self.storage_dir)
+
+    def resolve(
+        self,
+        client: Transport,
+        server_id: str,
+        local_path: str,
+        remote_path: str,
+        file_size: int,
+    ) -> Optional[TransferResult]:
+        """尝试不上传即满足传输
+        Args:
+            client: 目标服务器的客户端
+            server_id: 服务器ID
+            local_path: 本地文件路径
+            remote_path: 远端目标路径
+            file_size: 本地文件大小
+        Returns:
+            命中时返回传输结果（mode 为 skipped 或 remote_copy），否则返回None
+        """
+        # 缓存未命中时不额外计算摘要，交给上传时的流式摘要
+        checksum = self.hash_cache.lookup(local_path, self.algorithm)
+        if not checksum:
+            return None
+
+        candidates = self.delivery_index.find(server_id, checksum)
+        if not candidates:
+            return None
+
+        result = TransferResult(
+            local_path=local_path,
+            remote_path=remote_path,
+            file_size=file_size,
+            checksum=checksum,
+            checksum_algorithm=self.algorithm,
+        )
+
+        # 目标路径已有相同内容：确认远端文件仍在后直接跳过
+        if remote_path in candidates:
+            if client.remote_size(remote_path) == file_size:
+                result.mode = "skipped"
+                return result
+            self.delivery_index.forget(server_id, remote_path)
+            candidates.remove(remote_path)
+
+        # 其他路径已有相同内容：远端复制或硬链接
+        for source_path in candidates:
+            if client.remote_size(source_path) != file_size:
+                self.delivery_index.forget(server_id, source_path)
+                continue
+            if client.remote_copy(source_path, remote_path, hardlink=self.hardlink):
+                self.delivery_index.record(server_id, checksum, remote_path)
+                result.mode = "remote_copy"
+                return result
+            break
+
+        return None
+
+    def record(
+        self,
+        server_id: str,
+        local_path: str,
+        remote_path: str,
+        checksum: str,
+        algorithm: Optional[str] = None,
+    ) -> None:
+        """记录一次成功上传的摘要与送达位置"""
+        if (algorithm or self.algorithm) != self.algorithm:
+            return
+        self.hash_cache.store(local_path, checksum, self.algorithm)
+        self.delivery_index.record(server_id, checksum, remote_path)
@@ -0,0 +1,54 @@
+"""
+传输引擎选择模块
+启动时按名称创建传输调度器
+"""
+
+from typing import Any, Optional
+
+from .config_manager import ConfigManager
+from .dedup_manager import DedupManager
+from .history_manager import HistoryManager
+from .queue_manager import QueueManager
+from .transfer_dispatcher import TransferDispatcher
+
+# thread: 线程池 + paramiko；async: 单事件循环 + asyncssh；process: 多进程
+ENGINES = ("thread", "async", "process")
+
+
+def create_dispatcher(
+    engine: str,
+    queue_manager: QueueManager,
+    config_manager: ConfigManager,
+    history_manager: Optional[HistoryManager] = None,
+    dedup_manager: Optional[DedupManager] = None,
+    **options: Any,
+) -> TransferDispatcher:
+    """按引擎名创建传输调度器
+    Args:
+        engine: 引擎名，见 ENGINES
+        queue_manager: 队列管理器
+        config_manager: 配置管理器
+        history_manager: 历史记录管理器
+        dedup_manager: 去重管理器
+        options: 传给具体调度器的额外参数
+    Returns:
+        传输调度器
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"不支持的传输引擎: {engine}")
+    if engine == "async":
+        # 按需导入，线程引擎不加载 asyncio 相关模块
+        from .async_dispatcher import AsyncTransferDispatcher
+
+        return AsyncTransferDispatcher(
+            queue_manager, config_manager, history_manager, dedup_manager, **options
+        )
+    if engine == "process":
+        from .process_dispatcher import ProcessTransferDispatcher
+
+        return ProcessTransferDispatcher(
+            queue_manager, config_manager, history_manager, dedup_manager, **options
+        )
+    return TransferDispatcher(
+        queue_manager, config_manager, history_manager, dedup_manager, **options
+    )
@@ -5,11 +5,19 @@
 
 import json
 import os
+import threading
 import uuid
 from datetime import datetime
 from typing import Optional, Union
 
 from ...domain.models import TransferHistory
+from ...infrastructure.storage.json_writer import get_writer
+
+# 历史记录的可选字段，存在时才写入
+OPTIONAL_FIELDS = ("checksum", "compression_ratio", "throughput")
+
+# 追加日志超过该字节数时合并回 history.json
+JOURNAL_COMPACT_SIZE = 1024 * 1024
 
 
 class HistoryManager:
@@ -22,6 +30,13 @@ class HistoryManager:
         """
         self.storage_dir = storage_dir or "."
         self.history_file = os.path.join(self.storage_dir, "history.json")
+        # 新记录以 JSON 行追加到日志，加载时与 history.json 合并，
+        # 同一记录ID以日志中靠后的一行为准
+        self.journal_file = os.path.join(self.storage_dir, "history.journal")
+        # 读-改-写需串行，调度线程会并发写入历史
+        self.lock = threading.Lock()
+        # task_id 到记录ID的索引，首次追加时加载，避免每批都重读文件
+        self.task_index: Optional[dict[str, str]] = None
 
     def add_history_record(
         self, history_data: dict[str, Union[str, int, float]]
@@ -33,43 +48,81 @@ class HistoryManager:
             添加结果字典
         """
         try:
-            # 验证必填字段
-            required_fields = [
-                "task_id",
-                "file_name",
-                "server_name",
-                "status",
-                "file_size",
-                "duration",
-            ]
-            for field in required_fields:
-                if field not in history_data:
-                    return {"success": False, "error": f"缺少必填字段: {field}"}
-
-            # 创建历史记录
-            record_id = str(uuid.uuid4())
-            now = datetime.now()
-
-            new_record = {
-                "id": record_id,
-                "task_id": history_data["task_id"],
-                "file_name": history_data["file_name"],
-                "server_name": history_data["server_name"],
-                "status": history_data["status"],
-                "file_size": history_data["file_size"],
-                "duration": history_data["duration"],
-                "created_at": now.isoformat(),
+            try:
+                new_record = self._build_record(history_data)
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+            with self.lock:
+                self._append_history_records([new_record])
+
+            return {"success": True, "record_id": str(new_record["id"])}
+
+        except Exception as e:
+            return {"success": False, "error": f"添加历史记录失败: {str(e)}"}
+
+    def add_history_records(
+        self,
+        items: list[dict[str, Union[str, int, float]]],
+        skip_existing: bool = False,
+    ) -> dict[str, Union[bool, str, int]]:
+        """批量添加历史记录，整批追加一次日志
+        Args:
+            items: 历史记录数据列表，缺少必填字段的记录被跳过
+            skip_existing: 跳过已有同一 task_id 历史记录的数据
+        Returns:
+            添加结果字典，added_count 为写入的记录数
+        """
+        try:
+            new_records = self._build_records(items)
+            if new_records:
+                with self.lock:
+                    if skip_existing:
+                        existing = self._task_index()
+                        new_records = [
+                            record
+                            for record in new_records
+                            if record["task_id"] not in existing
+                        ]
+                    if new_records:
+                        self._append_history_records(new_records)
+
+            return {"success": True, "added_count": len(new_records)}
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"批量添加历史记录失败: {str(e)}",
+                "added_count": 0,
             }
 
-            # 保存记录
-            records = self._load_history_records()
-            records.append(new_record)
-            self._save_history_records(records)
+    def replace_history_records(
+        self, items: list[dict[str, Union[str, int, float]]]
+    ) -> dict[str, Union[bool, str, int]]:
+        """用新数据替换同一 task_id 的历史记录，保留原记录ID，没有时新增
+        Args:
+            items: 历史记录数据列表，缺少必填字段的记录被跳过
+        Returns:
+            替换结果字典，added_count 为写入的记录数
+        """
+        try:
+            new_records = self._build_records(items)
+            if new_records:
+                with self.lock:
+                    index = self._task_index()
+                    for record in new_records:
+                        record_id = index.get(str(record["task_id"]))
+                        if record_id is not None:
+                            record["id"] = record_id
+                    self._append_history_records(new_records)
 
-            return {"success": True, "record_id": record_id}
+            return {"success": True, "added_count": len(new_records)}
 
         except Exception as e:
-            return {"success": False, "error": f"添加历史记录失败: {str(e)}"}
+            return {
+                "success": False,
+                "error": f"替换历史记录失败: {str(e)}",
+                "added_count": 0,
+            }
 
     def get_history_record(self, record_id: str) -> Optional[TransferHistory]:
         """获取历史记录 - 阶段2核心功能
@@ -92,6 +145,19 @@ class HistoryManager:
                         file_size=int(record["file_size"]),
                         duration=float(record["duration"]),
                         created_at=str(record["created_at"]),
+                        checksum=(
+                            str(record["checksum"]) if record.get("checksum") else None
+                        ),
+                        compression_ratio=(
+                            float(record["compression_ratio"])
+                            if record.get("compression_ratio")
+                            else None
+                        ),
+                        throughput=(
+                            float(record["throughput"])
+                            if record.get("throughput")
+                            else None
+                        ),
                     )
             return None
         except Exception:
@@ -127,6 +193,19 @@ class HistoryManager:
                         file_size=int(record["file_size"]),
                         duration=float(record["duration"]),
                         created_at=str(record["created_at"]),
+                        checksum=(
+                            str(record["checksum"]) if record.get("checksum") else None
+                        ),
+                        compression_ratio=(
+                            float(record["compression_ratio"])
+                            if record.get("compression_ratio")
+                            else None
+                        ),
+                        throughput=(
+                            float(record["throughput"])
+                            if record.get("throughput")
+                            else None
+                        ),
                     )
                 )
             return result
@@ -141,21 +220,22 @@ class HistoryManager:
             删除结果字典
         """
         try:
-            records = self._load_history_records()
-            record_index = None
+            with self.lock:
+                records = self._load_history_records()
+                record_index = None
 
-            # 查找记录
-            for i, record in enumerate(records):
-                if record.get("id") == record_id:
-                    record_index = i
-                    break
+                # 查找记录
+                for i, record in enumerate(records):
+                    if record.get("id") == record_id:
+                        record_index = i
+                        break
 
-            if record_index is None:
-                return {"success": False, "error": "记录不存在"}
+                if record_index is None:
+                    return {"success": False, "error": "记录不存在"}
 
-            # 删除记录
-            records.pop(record_index)
-            self._save_history_records(records)
+                # 删除记录
+                records.pop(record_index)
+                self._save_history_records(records)
 
             return {"success": True}
 
@@ -170,32 +250,33 @@ class HistoryManager:
             清理结果字典
         """
         try:
-            records = self._load_history_records()
-            original_count = len(records)
+            with self.lock:
+                records = self._load_history_records()
+                original_count = len(records)
 
-            if days == 0:
-                # 清理所有记录
-                self._save_history_records([])
-                return {"success": True, "deleted_count": original_count}
+                if days == 0:
+                    # 清理所有记录
+                    self._save_history_records([])
+                    return {"success": True, "deleted_count": original_count}
 
-            cutoff_date = datetime.now().replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            cutoff_date = cutoff_date.replace(day=cutoff_date.day - days)
+                cutoff_date = datetime.now().replace(
+                    hour=0, minute=0, second=0, microsecond=0
+                )
+                cutoff_date = cutoff_date.replace(day=cutoff_date.day - days)
 
-            filtered_records = []
+                filtered_records = []
 
-            for record in records:
-                try:
-                    record_date = datetime.fromisoformat(str(record["created_at"]))
-                    if record_date >= cutoff_date:
-                        filtered_records.append(record)
-                except Exception:
-                    # 如果日期解析失败，跳过该记录
-                    pass
+                for record in records:
+                    try:
+                        record_date = datetime.fromisoformat(str(record["created_at"]))
+                        if record_date >= cutoff_date:
+                            filtered_records.append(record)
+                    except Exception:
+                        # 如果日期解析失败，跳过该记录
+                        pass
 
-            deleted_count = original_count - len(filtered_records)
-            self._save_history_records(filtered_records)
+                deleted_count = original_count - len(filtered_records)
+                self._save_history_records(filtered_records)
 
             return {"success": True, "deleted_count": deleted_count}
 
@@ -251,27 +332,123 @@ class HistoryManager:
                 "average_duration": 0.0,
             }
 
+    @staticmethod
+    def _build_record(
+        history_data: dict[str, Union[str, int, float]],
+    ) -> dict[str, Union[str, int, float]]:
+        """校验必填字段并生成带ID与创建时间的历史记录，缺少字段时抛出 ValueError"""
+        required_fields = [
+            "task_id",
+            "file_name",
+            "server_name",
+            "status",
+            "file_size",
+            "duration",
+        ]
+        for field in required_fields:
+            if field not in history_data:
+                raise ValueError(f"缺少必填字段: {field}")
+
+        new_record = {
+            "id": str(uuid.uuid4()),
+            "task_id": history_data["task_id"],
+            "file_name": history_data["file_name"],
+            "server_name": history_data["server_name"],
+            "status": history_data["status"],
+            "file_size": history_data["file_size"],
+            "duration": history_data["duration"],
+            "created_at": datetime.now().isoformat(),
+        }
+        # 可选字段：传输摘要、压缩比、吞吐量
+        for field in OPTIONAL_FIELDS:
+            if history_data.get(field):
+                new_record[field] = history_data[field]
+        return new_record
+
+    def _build_records(
+        self, items: list[dict[str, Union[str, int, float]]]
+    ) -> list[dict[str, Union[str, int, float]]]:
+        """生成一批历史记录，缺少必填字段的数据被跳过"""
+        records = []
+        for history_data in items:
+            try:
+                records.append(self._build_record(history_data))
+            except ValueError as e:
+                print(f"[HISTORY] 跳过历史记录: {str(e)}")
+        return records
+
     def _load_history_records(self) -> list[dict[str, Union[str, int, float]]]:
-        """加载历史记录"""
+        """加载历史记录：history.json 中的记录合并追加日志，同一ID取最后一行"""
+        merged: dict[str, dict[str, Union[str, int, float]]] = {}
         try:
             if os.path.exists(self.history_file):
                 with open(self.history_file, encoding="utf-8") as f:
                     data = json.load(f)
                     if isinstance(data, list):
                         # 确保每个元素都是 dict
-                        return [r for r in data if isinstance(r, dict)]
-            return []
+                        for record in data:
+                            if isinstance(record, dict):
+                                merged[str(record.get("id"))] = record
         except Exception:
-            return []
+            pass
+        try:
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # 崩溃时写了一半的行
+                            continue
+                        if isinstance(record, dict):
+                            merged[str(record.get("id"))] = record
+        except Exception:
+            pass
+        return list(merged.values())
 
     def _save_history_records(
         self, records: list[dict[str, Union[str, int, float]]]
     ) -> None:
-        """保存历史记录"""
+        """整体保存历史记录并清空追加日志，调用方持有 self.lock"""
+        self.task_index = None
         try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-            with open(self.history_file, "w", encoding="utf-8") as f:
-                json.dump(records, f, ensure_ascii=False, indent=2)
+            get_writer(self.history_file).save(records)
+            # 日志中的记录已写入 history.json，删除前崩溃时加载按ID去重
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
         except Exception:
             pass
+
+    def _task_index(self) -> dict[str, str]:
+        """task_id 到记录ID的索引，调用方持有 self.lock"""
+        if self.task_index is None:
+            self.task_index = {
+                str(record.get("task_id")): str(record.get("id"))
+                for record in self._load_history_records()
+            }
+        return self.task_index
+
+    def _append_history_records(
+        self, records: list[dict[str, Union[str, int, float]]]
+    ) -> None:
+        """把记录追加到日志并 fsync，日志过大时合并回 history.json，
+        调用方持有 self.lock"""
+        os.makedirs(self.storage_dir, exist_ok=True)
+        lines = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for record in records
+        ).encode("utf-8")
+        with open(self.journal_file, "a+b") as f:
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # 上次崩溃留下写了一半的行，另起一行避免新记录被连带丢弃
+                    lines = b"\n" + lines
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        if self.task_index is not None:
+            for record in records:
+                self.task_index[str(record["task_id"])] = str(record["id"])
+        if os.path.getsize(self.journal_file) > JOURNAL_COMPACT_SIZE:
+            self._save_history_records(self._load_history_records())
@@ -0,0 +1,257 @@
+"""
+多进程传输调度模块
+传输在工作进程中执行，每个进程有自己的连接池，吞吐随 CPU 核数扩展
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from ...domain.models import ServerConfig, TransferResult
+from ...infrastructure.network.cancellation import TransferCancelled
+from ...infrastructure.network.transport import Transport
+from ...infrastructure.network.transport_factory import create_transport
+from .config_manager import ConfigManager
+from .dedup_manager import DedupManager
+from .history_manager import HistoryManager
+from .queue_manager import QueueManager, TransferTask
+from .transfer_dispatcher import TransferDispatcher
+
+# 进度变化超过该比例才发送一次，限制进程间消息量
+PROGRESS_STEP = 0.01
+
+# 任务结束后等待进度消息送达的最长秒数
+PROGRESS_FLUSH_TIMEOUT = 5.0
+
+# 工作进程检查取消标记的最短间隔（秒），每次检查都是一次跨进程调用
+CANCEL_POLL_INTERVAL = 0.05
+
+# 工作进程内的进度队列，由进程池初始化时注入
+_progress_queue: Any = None
+
+
+def _init_worker(progress_queue: Any) -> None:
+    """工作进程初始化"""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _progress_reporter(task_id: str, cancelled: Any = None) -> Callable[[float], None]:
+    """生成按步长节流、经队列回传 (任务ID, 进度) 的回调
+
+    cancelled 为主进程转发取消令牌的跨进程标记，置位后回调抛出
+    TransferCancelled 结束传输循环，与线程引擎中的 _reporter 一致。
+    """
+    last = -1.0
+    checked = 0.0
+
+    def report(progress: float) -> None:
+        nonlocal last, checked
+        if cancelled is not None:
+            now = time.monotonic()
+            if now - checked >= CANCEL_POLL_INTERVAL:
+                checked = now
+                if cancelled.is_set():
+                    raise TransferCancelled("任务已取消")
+        if progress - last >= PROGRESS_STEP or progress >= 1.0:
+            last = progress
+            _progress_queue.put((task_id, progress))
+
+    return report
+
+
+def _run_upload(
+    server_config: ServerConfig,
+    options: dict[str, Any],
+    task_id: str,
+    local_path: str,
+    remote_path: str,
+    mode: str,
+    cancelled: Any = None,
+) -> tuple[bool, Optional[TransferResult], Optional[str]]:
+    """工作进程入口：执行单文件上传，结束时发送 (任务ID, None) 标记
+    Returns:
+        (是否成功, 传输结果, 实际写入的远端路径)
+    """
+    try:
+        client = create_transport(server_config, **options)
+        success = client.upload(
+            local_path, remote_path, _progress_reporter(task_id, cancelled), mode=mode
+        )
+        return success, client.last_result, client.partial_path
+    finally:
+        _progress_queue.put((task_id, None))
+
+
+def _run_batch(
+    server_config: ServerConfig,
+    task_ids: list[str],
+    files: list[tuple[str, str]],
+    cancelled: Optional[list[Any]] = None,
+) -> list[Optional[TransferResult]]:
+    """工作进程入口：执行批量上传"""
+    events = cancelled or [None] * len(task_ids)
+    reporters = [
+        _progress_reporter(task_id, event) for task_id, event in zip(task_ids, events)
+    ]
+    try:
+        return create_transport(server_config).upload_batch(
+            files, lambda index, p: reporters[index](p)
+        )
+    finally:
+        for task_id in task_ids:
+            _progress_queue.put((task_id, None))
+
+
+class ProcessTransferDispatcher(TransferDispatcher):
+    """多进程传输调度接口
+
+    调度、去重、状态与历史记录仍在主进程完成，只有上传本身交给进程池；
+    进度经 multiprocessing 队列回传，由监听线程写入 QueueManager。取消与
+    暂停经 Manager 创建的跨进程 Event 转发，工作进程在进度回调中检查。
+    """
+
+    def __init__(
+        self,
+        queue_manager: QueueManager,
+        config_manager: ConfigManager,
+        history_manager: Optional[HistoryManager] = None,
+        dedup_manager: Optional[DedupManager] = None,
+        processes: Optional[int] = None,
+        **kwargs: Any,
+    ):
+        """初始化多进程传输调度器
+        Args:
+            queue_manager: 队列管理器
+            config_manager: 配置管理器，用于查找服务器配置
+            history_manager: 历史记录管理器，任务结束时写入历史
+            dedup_manager: 去重管理器，单文件任务上传前尝试去重
+            processes: 工作进程数，默认取 CPU 核数与最大并发数中较小者
+            kwargs: 传给 TransferDispatcher 的其他参数
+        """
+        super().__init__(
+            queue_manager, config_manager, history_manager, dedup_manager, **kwargs
+        )
+        # spawn 避免在已有线程的进程中 fork
+        context = multiprocessing.get_context("spawn")
+        self.context = context
+        # 转发取消的 Manager 在第一次上传时启动
+        self.manager: Any = None
+        self.processes = processes or max(
+            1, min(os.cpu_count() or 1, queue_manager.max_concurrent)
+        )
+        self.progress_queue = context.Queue()
+        self.process_pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.progress_queue,),
+        )
+        self.flushed: dict[str, threading.Event] = {}
+        self.listener = threading.Thread(
+            target=self._listen, name="transfer-progress", daemon=True
+        )
+        self.listener.start()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """停止进程池与进度监听线程"""
+        super().shutdown(wait)
+        self.process_pool.shutdown(wait=wait)
+        self.progress_queue.put(None)
+        self.listener.join()
+        if self.manager is not None:
+            self.manager.shutdown()
+
+    def _upload(
+        self,
+        client: Transport,
+        task: TransferTask,
+        remote_path: str,
+        options: dict[str, Any],
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """在工作进程中上传，等待结果与全部进度消息"""
+        flushed = self._track([task.id])
+        try:
+            success, result, client.partial_path = self.process_pool.submit(
+                _run_upload,
+                client.server_config,
+                options,
+                task.id,
+                task.file_path,
+                remote_path,
+                task.transfer_mode,
+                self._cancel_event(task.id),
+            ).result()
+        except Exception as e:
+            print(f"工作进程执行失败: {str(e)}")
+            self._untrack([task.id])
+            return False, None
+        flushed[0].wait(PROGRESS_FLUSH_TIMEOUT)
+        return success, result
+
+    def _upload_batch(
+        self, client: Transport, tasks: list[TransferTask]
+    ) -> list[Optional[TransferResult]]:
+        """在同一个工作进程中批量上传"""
+        task_ids = [task.id for task in tasks]
+        flushed = self._track(task_ids)
+        try:
+            results = self.process_pool.submit(
+                _run_batch,
+                client.server_config,
+                task_ids,
+                [
+                    (task.file_path, os.path.join(task.target_path, task.file_name))
+                    for task in tasks
+                ],
+                [self._cancel_event(task_id) for task_id in task_ids],
+            ).result()
+        except Exception as e:
+            print(f"工作进程执行失败: {str(e)}")
+            self._untrack(task_ids)
+            return [None] * len(tasks)
+        for event in flushed:
+            event.wait(PROGRESS_FLUSH_TIMEOUT)
+        return results
+
+    def _cancel_event(self, task_id: str) -> Any:
+        """创建跨进程取消标记，任务的取消令牌触发时置位"""
+        with self.lock:
+            if self.manager is None:
+                self.manager = self.context.Manager()
+            token = self.tokens.get(task_id)
+        event = self.manager.Event()
+        if token is not None:
+            token.on_cancel(event.set)
+        return event
+
+    def _track(self, task_ids: list[str]) -> list[threading.Event]:
+        """登记等待进度结束标记的任务"""
+        with self.lock:
+            return [
+                self.flushed.setdefault(task_id, threading.Event())
+                for task_id in task_ids
+            ]
+
+    def _untrack(self, task_ids: list[str]) -> None:
+        with self.lock:
+            for task_id in task_ids:
+                self.flushed.pop(task_id, None)
+
+    def _listen(self) -> None:
+        """把工作进程回传的进度写入队列管理器"""
+        while True:
+            message = self.progress_queue.get()
+            if message is None:
+                return
+            task_id, progress = message
+            if progress is None:
+                with self.lock:
+                    event = self.flushed.pop(task_id, None)
+                if event is not None:
+                    event.set()
+            else:
+                self.queue_manager.update_task_progress(task_id, progress * 100)
@@ -3,63 +3,43 @@
 负责传输任务的队列管理和并发控制
 """
 
+import os
 import threading
+import time
 import uuid
-from datetime import datetime
-from enum import Enum
 from typing import Callable, Optional, Union
 
+from ...domain.models import TaskStatus, TransferTask
+from ...domain.models.transfer_task import STATUS_CODES
 from ...infrastructure.storage.storage import Storage
 
+# 启动恢复时每批载入的任务数，批与批之间释放锁，接口请求不必等待全部载入
+RECOVERY_BATCH = 1000
 
-class TaskStatus(Enum):
-    """任务状态枚举"""
+# 任务字段写锁的分段数，不同任务的更新大多落在不同的锁上
+LOCK_STRIPES = 64
 
-    PENDING = "pending"
-    RUNNING = "running"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    CANCELLED = "cancelled"
 
+class QueueManager:
+    """并发队列管理接口 - 阶段2核心功能
 
-class TransferTask:
-    """传输任务数据模型"""
+    读取不加锁：get_task 直接查字典，list_tasks / get_queue_status 使用
+    任务集合的版本化快照，集合变化后的第一次读取重建快照。lock 只保护
+    任务集合的增删；单个任务字段的修改使用按任务ID分段的锁。写存储在
+    所有锁之外进行，并发的保存请求合并为一次写入。
+    """
 
     def __init__(
         self,
-        id: str,
-        file_path: str,
-        file_name: str,
-        file_size: int,
-        server_id: str,
-        target_path: str,
-        status: TaskStatus,
-        progress: float,
-        started_at: Optional[str],
-        completed_at: Optional[str],
-        error_message: Optional[str],
+        max_concurrent: int = 3,
+        storage_dir: Optional[str] = None,
+        recover: bool = True,
     ):
-        self.id = id
-        self.file_path = file_path
-        self.file_name = file_name
-        self.file_size = file_size
-        self.server_id = server_id
-        self.target_path = target_path
-        self.status = status
-        self.progress = progress
-        self.started_at = started_at
-        self.completed_at = completed_at
-        self.error_message = error_message
-
-
-class QueueManager:
-    """并发队列管理接口 - 阶段2核心功能"""
-
-    def __init__(self, max_concurrent: int = 3, storage_dir: Optional[str] = None):
         """初始化队列管理器
         Args:
             max_concurrent: 最大并发数
             storage_dir: 存储目录，默认为当前目录
+            recover: 是否在后台线程中从 tasks.json 恢复上次运行留下的任务
         """
         self.max_concurrent = max_concurrent
         self.storage_dir = storage_dir or "."
@@ -67,6 +47,23 @@ class QueueManager:
         self.tasks: dict[str, TransferTask] = {}
         self.progress_callbacks: dict[str, Callable] = {}
         self.lock = threading.Lock()
+        self.stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        # 任务集合每次增删加一，快照版本落后时重建；
+        # 快照存为 (版本, 任务元组)，一次读取即可拿到配对的两者
+        self.version = 0
+        self.snapshot: tuple[int, tuple[TransferTask, ...]] = (0, ())
+        self.save_lock = threading.Lock()
+        # 启动恢复：恢复完成前不写 tasks.json，避免覆盖尚未载入的任务
+        self.recovered = threading.Event()
+        self.recovery_callbacks: list[Callable[[], object]] = []
+        self.interrupted: set[str] = set()
+        self.dirty = False
+        if recover and os.path.exists(self.storage.tasks_file):
+            threading.Thread(
+                target=self._recover, name="queue-recovery", daemon=True
+            ).start()
+        else:
+            self.recovered.set()
 
     def add_task(
         self, task_data: dict[str, Union[str, int]]
@@ -102,15 +99,18 @@ class QueueManager:
                 target_path=str(task_data["target_path"]),
                 status=TaskStatus.PENDING,
                 progress=0.0,
-                started_at=datetime.now().isoformat(),
+                started_at=time.time(),
                 completed_at=None,
                 error_message=None,
+                transfer_mode=str(task_data.get("transfer_mode", "auto")),
+                direction=str(task_data.get("direction", "upload")),
             )
 
             # 添加到任务列表
             with self.lock:
                 self.tasks[task_id] = task
-                self._save_tasks()
+                self.version += 1
+            self._save_tasks()
 
             return {"success": True, "task_id": task_id}
 
@@ -125,8 +125,8 @@ class QueueManager:
             任务对象或None
         """
         try:
-            with self.lock:
-                return self.tasks.get(task_id)
+            self._wait_recovered(task_id)
+            return self.tasks.get(task_id)
         except Exception:
             return None
 
@@ -138,13 +138,12 @@ class QueueManager:
             任务列表
         """
         try:
-            with self.lock:
-                if status is None:
-                    return list(self.tasks.values())
-                else:
-                    return [
-                        task for task in self.tasks.values() if task.status == status
-                    ]
+            snapshot = self._snapshot()
+            if status is None:
+                return list(snapshot)
+            else:
+                code = STATUS_CODES[status]
+                return [task for task in snapshot if task.status_code == code]
         except Exception:
             return []
 
@@ -156,56 +155,95 @@ class QueueManager:
             取消结果字典
         """
         try:
-            with self.lock:
-                if task_id not in self.tasks:
-                    return {"success": False, "error": "任务不存在"}
+            self._wait_recovered(task_id)
+            task = self.tasks.get(task_id)
+            if task is None:
+                return {"success": False, "error": "任务不存在"}
 
-                task = self.tasks[task_id]
+            with self._stripe(task_id):
                 if task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED]:
                     return {"success": False, "error": "任务已完成，无法取消"}
 
                 task.status = TaskStatus.CANCELLED
-                task.completed_at = datetime.now().isoformat()
-                self._save_tasks()
+                task.completed_ts = time.time()
+            self._save_tasks()
 
-                return {"success": True}
+            return {"success": True}
 
         except Exception as e:
             return {"success": False, "error": f"取消任务失败: {str(e)}"}
 
+    def pause_task(self, task_id: str) -> dict[str, Union[bool, str]]:
+        """暂停排队中或运行中的任务
+        Args:
+            task_id: 任务ID
+        Returns:
+            暂停结果字典
+        """
+        try:
+            self._wait_recovered(task_id)
+            task = self.tasks.get(task_id)
+            if task is None:
+                return {"success": False, "error": "任务不存在"}
+
+            with self._stripe(task_id):
+                if task.status not in [TaskStatus.PENDING, TaskStatus.RUNNING]:
+                    return {"success": False, "error": "只能暂停排队中或运行中的任务"}
+
+                task.status = TaskStatus.PAUSED
+            self._save_tasks()
+
+            return {"success": True}
+
+        except Exception as e:
+            return {"success": False, "error": f"暂停任务失败: {str(e)}"}
+
+    def resume_task(self, task_id: str) -> dict[str, Union[bool, str]]:
+        """恢复已暂停的任务，重新进入排队状态
+        Args:
+            task_id: 任务ID
+        Returns:
+            恢复结果字典
+        """
+        try:
+            self._wait_recovered(task_id)
+            task = self.tasks.get(task_id)
+            if task is None:
+                return {"success": False, "error": "任务不存在"}
+
+            with self._stripe(task_id):
+                if task.status != TaskStatus.PAUSED:
+                    return {"success": False, "error": "任务未处于暂停状态"}
+
+                task.status = TaskStatus.PENDING
+            self._save_tasks()
+
+            return {"success": True}
+
+        except Exception as e:
+            return {"success": False, "error": f"恢复任务失败: {str(e)}"}
+
     def get_queue_status(self) -> dict[str, Union[int, list[str]]]:
         """获取队列状态 - 阶段2核心功能
         Returns:
             队列状态字典
         """
         try:
-            with self.lock:
-                total_tasks = len(self.tasks)
-                pending_tasks = len(
-                    [t for t in self.tasks.values() if t.status == TaskStatus.PENDING]
-                )
-                running_tasks = len(
-                    [t for t in self.tasks.values() if t.status == TaskStatus.RUNNING]
-                )
-                completed_tasks = len(
-                    [t for t in self.tasks.values() if t.status == TaskStatus.COMPLETED]
-                )
-                failed_tasks = len(
-                    [t for t in self.tasks.values() if t.status == TaskStatus.FAILED]
-                )
-                cancelled_tasks = len(
-                    [t for t in self.tasks.values() if t.status == TaskStatus.CANCELLED]
-                )
-
-                return {
-                    "total_tasks": total_tasks,
-                    "pending_tasks": pending_tasks,
-                    "running_tasks": running_tasks,
-                    "completed_tasks": completed_tasks,
-                    "failed_tasks": failed_tasks,
-                    "cancelled_tasks": cancelled_tasks,
-                    "max_concurrent": self.max_concurrent,
-                }
+            snapshot = self._snapshot()
+            counts = [0] * len(STATUS_CODES)
+            for task in snapshot:
+                counts[task.status_code] += 1
+
+            return {
+                "total_tasks": len(snapshot),
+                "pending_tasks": counts[STATUS_CODES[TaskStatus.PENDING]],
+                "running_tasks": counts[STATUS_CODES[TaskStatus.RUNNING]],
+                "completed_tasks": counts[STATUS_CODES[TaskStatus.COMPLETED]],
+                "failed_tasks": counts[STATUS_CODES[TaskStatus.FAILED]],
+                "cancelled_tasks": counts[STATUS_CODES[TaskStatus.CANCELLED]],
+                "paused_tasks": counts[STATUS_CODES[TaskStatus.PAUSED]],
+                "max_concurrent": self.max_concurrent,
+            }
 
         except Exception:
             return {
@@ -215,6 +253,7 @@ class QueueManager:
                 "completed_tasks": 0,
                 "failed_tasks": 0,
                 "cancelled_tasks": 0,
+                "paused_tasks": 0,
                 "max_concurrent": self.max_concurrent,
             }
 
@@ -243,9 +282,10 @@ class QueueManager:
                         del self.progress_callbacks[task_id]
 
                 deleted_count = len(task_ids_to_remove)
-                self._save_tasks()
+                self.version += 1
+            self._save_tasks()
 
-                return {"success": True, "deleted_count": deleted_count}
+            return {"success": True, "deleted_count": deleted_count}
 
         except Exception as e:
             return {
@@ -254,6 +294,25 @@ class QueueManager:
                 "deleted_count": 0,
             }
 
+    def evict_tasks(self, task_ids: list[str]) -> int:
+        """从队列中移除已归档的任务，整批只写一次存储
+        Args:
+            task_ids: 任务ID列表
+        Returns:
+            移除的任务数
+        """
+        with self.lock:
+            removed = 0
+            for task_id in task_ids:
+                if self.tasks.pop(task_id, None) is not None:
+                    removed += 1
+                self.progress_callbacks.pop(task_id, None)
+            if removed:
+                self.version += 1
+        if removed:
+            self._save_tasks()
+        return removed
+
     def set_progress_callback(
         self, task_id: str, callback: Callable[[str, float], None]
     ) -> bool:
@@ -284,21 +343,22 @@ class QueueManager:
             更新结果
         """
         try:
-            with self.lock:
-                if task_id not in self.tasks:
-                    return False
+            task = self.tasks.get(task_id)
+            if task is None:
+                return False
 
-                task = self.tasks[task_id]
-                task.progress = min(100.0, max(0.0, progress))
+            # 单个字段赋值，不需要加锁
+            task.progress = min(100.0, max(0.0, progress))
 
-                # 调用进度回调
-                if task_id in self.progress_callbacks:
-                    try:
-                        self.progress_callbacks[task_id](task_id, task.progress)
-                    except Exception:
-                        pass
+            # 调用进度回调
+            callback = self.progress_callbacks.get(task_id)
+            if callback is not None:
+                try:
+                    callback(task_id, task.progress)
+                except Exception:
+                    pass
 
-                return True
+            return True
 
         except Exception:
             return False
@@ -315,53 +375,205 @@ class QueueManager:
             更新结果
         """
         try:
-            with self.lock:
-                if task_id not in self.tasks:
-                    return False
+            task = self.tasks.get(task_id)
+            if task is None:
+                return False
 
-                task = self.tasks[task_id]
-                task.status = status
-
-                if status == TaskStatus.RUNNING and task.started_at is None:
-                    task.started_at = datetime.now().isoformat()
+            with self._stripe(task_id):
+                # 已取消或暂停的任务不会因迟到的传输结果变为已完成
+                if status == TaskStatus.COMPLETED and task.status in (
+                    TaskStatus.CANCELLED,
+                    TaskStatus.PAUSED,
+                ):
+                    return False
+                if status == TaskStatus.RUNNING and task.started_ts is None:
+                    task.started_ts = time.time()
                 elif status in [
                     TaskStatus.COMPLETED,
                     TaskStatus.FAILED,
                     TaskStatus.CANCELLED,
                 ]:
-                    task.completed_at = datetime.now().isoformat()
+                    task.completed_ts = time.time()
 
                 if error_message:
                     task.error_message = error_message
+                task.status = status
 
-                self._save_tasks()
-                return True
+            self._save_tasks()
+            return True
 
         except Exception:
             return False
 
-    def _save_tasks(self) -> None:
-        """保存任务到存储"""
+    def set_task_checksum(self, task_id: str, checksum: str) -> bool:
+        """记录任务传输摘要 - 内部方法
+        Args:
+            task_id: 任务ID
+            checksum: 上传过程中计算的摘要
+        Returns:
+            更新结果
+        """
+        try:
+            task = self.tasks.get(task_id)
+            if task is None:
+                return False
+
+            task.checksum = checksum
+            self._save_tasks()
+            return True
+
+        except Exception:
+            return False
+
+    def set_task_partial(self, task_id: str, partial_path: Optional[str]) -> bool:
+        """记录任务上传写出的远端临时文件 - 内部方法
+        Args:
+            task_id: 任务ID
+            partial_path: 远端临时文件路径，None 表示清除记录
+        Returns:
+            更新结果
+        """
         try:
-            task_list = []
-            for task in self.tasks.values():
-                task_dict = {
-                    "id": task.id,
-                    "file_path": task.file_path,
-                    "file_name": task.file_name,
-                    "file_size": task.file_size,
-                    "server_id": task.server_id,
-                    "target_path": task.target_path,
-                    "status": task.status.value,
-                    "progress": task.progress,
-                    "started_at": task.started_at,
-                    "completed_at": task.completed_at,
-                    "error_message": task.error_message,
-                }
-                task_list.append(task_dict)
-
-            # 保存为JSON格式，而不是TransferTask对象列表
-            self.storage.save_tasks_json(task_list)
+            task = self.tasks.get(task_id)
+            if task is None:
+                return False
+
+            task.partial_path = partial_path
+            self._save_tasks()
+            return True
 
         except Exception:
-            pass
+            return False
+
+    def on_recovered(self, callback: Callable[[], object]) -> None:
+        """登记启动恢复完成后执行的回调，已完成时立即执行"""
+        with self.lock:
+            if not self.recovered.is_set():
+                self.recovery_callbacks.append(callback)
+                return
+        callback()
+
+    def pop_interrupted(self, task_id: str) -> bool:
+        """任务是否在上次运行中被中断（恢复时处于运行中），查询后清除标记"""
+        with self.lock:
+            if task_id in self.interrupted:
+                self.interrupted.discard(task_id)
+                return True
+            return False
+
+    def _wait_recovered(self, task_id: str) -> None:
+        """恢复进行中且任务尚未载入时等待恢复完成"""
+        if not self.recovered.is_set() and task_id not in self.tasks:
+            self.recovered.wait()
+
+    def _recover(self) -> None:
+        """流式读取 tasks.json，分批重建队列
+
+        运行中的任务重新排队，数据来源还在时由调度器从任务记录的临时文件续传；
+        来源无法重新读取的（如请求体流、源站地址）标记为失败。
+        """
+        recovered = 0
+        batch: list[TransferTask] = []
+        try:
+            for item in self.storage.iter_tasks_json():
+                try:
+                    batch.append(TransferTask.from_dict(item))
+                except Exception as e:
+                    print(f"[QUEUE] 跳过无法解析的任务记录: {str(e)}")
+                if len(batch) >= RECOVERY_BATCH:
+                    recovered += self._restore(batch)
+                    batch = []
+            recovered += self._restore(batch)
+        except Exception as e:
+            print(f"[QUEUE] 恢复任务失败: {str(e)}")
+        finally:
+            # 先写回恢复结果，再放开保存并通知等待方：回调触发时文件已是新状态
+            if self.dirty:
+                self._write_tasks()
+            with self.lock:
+                self.recovered.set()
+                callbacks, self.recovery_callbacks = self.recovery_callbacks, []
+            if self.dirty:
+                # 写回期间又有修改，只被标记未保存
+                self._save_tasks()
+            print(
+                f"[QUEUE] 已恢复 {recovered} 个任务，其中 {len(self.interrupted)} 个被中断"
+            )
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"[QUEUE] 恢复回调执行失败: {str(e)}")
+
+    def _restore(self, batch: list[TransferTask]) -> int:
+        """把一批恢复的任务放回队列，不覆盖恢复期间新加入的同ID任务"""
+        interrupted = []
+        changed = False
+        for task in batch:
+            if task.status not in [TaskStatus.PENDING, TaskStatus.RUNNING]:
+                continue
+            restartable = task.direction == "download" or os.path.isfile(task.file_path)
+            if not restartable:
+                task.status = TaskStatus.FAILED
+                task.error_message = "服务重启，任务的数据来源已无法读取"
+                task.completed_ts = time.time()
+            elif task.status == TaskStatus.RUNNING:
+                task.status = TaskStatus.PENDING
+                interrupted.append(task.id)
+            else:
+                continue
+            changed = True
+        with self.lock:
+            for task in batch:
+                self.tasks.setdefault(task.id, task)
+            self.version += 1
+            self.interrupted.update(interrupted)
+            self.dirty = self.dirty or changed
+        return len(batch)
+
+    def _stripe(self, task_id: str) -> threading.Lock:
+        """任务ID对应的字段写锁"""
+        return self.stripes[hash(task_id) % LOCK_STRIPES]
+
+    def _snapshot(self) -> tuple[TransferTask, ...]:
+        """任务集合的快照，集合未变化时直接复用，不加锁
+
+        只快照集合成员（有哪些任务）：任务对象的状态、进度等字段
+        在分段锁下原地修改，调用者读到的是各任务当前的字段值，
+        不是某一时刻全部任务的一致视图。
+        """
+        version, tasks = self.snapshot
+        if version == self.version:
+            return tasks
+        with self.lock:
+            version, tasks = self.snapshot
+            if version != self.version:
+                tasks = tuple(self.tasks.values())
+                self.snapshot = (self.version, tasks)
+            return tasks
+
+    def _save_tasks(self) -> None:
+        """把当前快照写入存储，须在锁外调用
+
+        已有线程在写入时只登记请求，由它写完后再写一次最新快照；
+        启动恢复完成前只做标记，恢复结束后统一写入。
+        """
+        self.dirty = True
+        if not self.recovered.is_set():
+            return
+        self._write_tasks()
+
+    def _write_tasks(self) -> None:
+        """写入最新快照直到没有未保存的修改，其他线程正在写入时直接返回"""
+        while self.dirty and self.save_lock.acquire(blocking=False):
+            try:
+                self.dirty = False
+                task_list = [task.to_dict() for task in self._snapshot()]
+
+                # 保存为JSON格式，而不是TransferTask对象列表
+                self.storage.save_tasks_json(task_list)
+
+            except Exception:
+                pass
+            finally:
+                self.save_lock.release()
@@ -0,0 +1,187 @@
+"""
+任务归档模块
+把已结束的任务批量写入历史记录，宽限期过后从队列中移除，
+使内存中的队列只保留仍在进行的任务
+"""
+
+import threading
+import time
+from typing import Any, Optional
+
+from .config_manager import ConfigManager
+from .history_manager import HistoryManager
+from .queue_manager import QueueManager, TaskStatus, TransferTask
+
+# 已结束任务在队列中保留的秒数，期间仍可通过 /progress 查询
+ARCHIVE_GRACE_PERIOD = 300.0
+
+# 归档线程的扫描间隔（秒）
+ARCHIVE_INTERVAL = 10.0
+
+# 视为已结束、需要归档的任务状态
+TERMINAL_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+
+def compute_throughput(status: str, file_size: int, duration: float) -> Optional[float]:
+    """成功任务的平均吞吐量（字节/秒），无法计算时返回None"""
+    if status != TaskStatus.COMPLETED.value or duration <= 0:
+        return None
+    return round(file_size / duration, 1)
+
+
+class TaskArchiver:
+    """已结束任务的归档器
+
+    调度器在任务结束时通过 record 提交带传输细节的历史数据；归档线程
+    定期扫描队列，把已结束任务连同提交的数据批量写入历史，没有提交数据
+    的任务（如排队中被取消）按任务自身的时间计算耗时。通过接口取消的
+    运行中任务可能先于调度器提交数据被归档，之后提交的数据替换这条
+    历史记录。已归档任务超过宽限期后整批移出队列。
+    """
+
+    def __init__(
+        self,
+        queue_manager: QueueManager,
+        history_manager: HistoryManager,
+        config_manager: Optional[ConfigManager] = None,
+        grace_period: float = ARCHIVE_GRACE_PERIOD,
+        interval: float = ARCHIVE_INTERVAL,
+    ):
+        """初始化归档器
+        Args:
+            queue_manager: 队列管理器
+            history_manager: 历史记录管理器
+            config_manager: 配置管理器，用于查找服务器名称
+            grace_period: 已结束任务在队列中保留的秒数
+            interval: 归档线程的扫描间隔
+        """
+        self.queue_manager = queue_manager
+        self.history_manager = history_manager
+        self.config_manager = config_manager
+        self.grace_period = grace_period
+        self.interval = interval
+        self.lock = threading.Lock()
+        # 调度器提交、尚未写入历史的数据，以及已写入历史、等待移出队列的任务
+        self.pending: dict[str, dict[str, Any]] = {}
+        self.archived: set[str] = set()
+        # 已归档任务中历史由任务自身生成、仍等待调度器数据替换的任务
+        self.described: set[str] = set()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """启动归档线程"""
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self._run, name="task-archiver", daemon=True
+            )
+            self.thread.start()
+
+    def stop(self) -> None:
+        """停止归档线程，并把尚未写入的历史写出"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.archive_once()
+
+    def record(self, history_data: dict[str, Any]) -> None:
+        """提交任务结束时的历史数据，由下一次归档批量写入
+        Args:
+            history_data: 同 HistoryManager.add_history_record，需包含 task_id
+        """
+        with self.lock:
+            task_id = str(history_data["task_id"])
+            if task_id in self.described:
+                self.described.discard(task_id)
+                self.pending[task_id] = history_data
+            elif task_id not in self.archived:
+                self.pending[task_id] = history_data
+
+    def archive_once(self, now: Optional[float] = None) -> dict[str, int]:
+        """执行一次归档：写入新结束任务的历史，移出超过宽限期的任务
+        Args:
+            now: 当前时间戳，默认取当前时间
+        Returns:
+            {"archived": 写入历史的记录数, "evicted": 移出队列的任务数}
+        """
+        now = time.time() if now is None else now
+        tasks = self.queue_manager.list_tasks()
+        finished = [task for task in tasks if task.status in TERMINAL_STATUSES]
+        with self.lock:
+            records = []
+            for task in finished:
+                if task.id in self.archived:
+                    continue
+                data = self.pending.pop(task.id, None)
+                if data is None:
+                    data = self._describe(task)
+                    self.described.add(task.id)
+                records.append(data)
+                self.archived.add(task.id)
+            # 已归档任务迟到的调度器数据替换原记录
+            replacements = [
+                self.pending.pop(task_id)
+                for task_id in [tid for tid in self.pending if tid in self.archived]
+            ]
+            # 已不在队列中的任务（如已被手动清理）直接写入
+            queued = {task.id for task in tasks}
+            for task_id in [tid for tid in self.pending if tid not in queued]:
+                records.append(self.pending.pop(task_id))
+            expired = [
+                task.id
+                for task in finished
+                if task.id in self.archived
+                and (task.completed_ts or 0) + self.grace_period <= now
+            ]
+
+        for data in records + replacements:
+            if data.get("throughput") is None:
+                data["throughput"] = compute_throughput(
+                    str(data["status"]), int(data["file_size"]), float(data["duration"])
+                )
+        archived = 0
+        if records:
+            # 重启后恢复的队列里可能有上次已归档、仍在宽限期内的任务，
+            # 已有历史记录的任务不再重复写入
+            result = self.history_manager.add_history_records(
+                records, skip_existing=True
+            )
+            archived = int(result.get("added_count", 0))
+        if replacements:
+            result = self.history_manager.replace_history_records(replacements)
+            archived += int(result.get("added_count", 0))
+        evicted = self.queue_manager.evict_tasks(expired) if expired else 0
+        with self.lock:
+            self.archived.difference_update(expired)
+            self.described.difference_update(expired)
+        if archived or evicted:
+            print(f"[ARCHIVE] 写入历史 {archived} 条，移出队列 {evicted} 个任务")
+        return {"archived": archived, "evicted": evicted}
+
+    def _describe(self, task: TransferTask) -> dict[str, Any]:
+        """由任务自身生成历史数据，用于没有经过调度器结束的任务"""
+        server_config = (
+            self.config_manager.get_server_config(task.server_id)
+            if self.config_manager is not None
+            else None
+        )
+        duration = 0.0
+        if task.started_ts is not None and task.completed_ts is not None:
+            duration = max(task.completed_ts - task.started_ts, 0.0)
+        return {
+            "task_id": task.id,
+            "file_name": task.file_name,
+            "server_name": server_config.name if server_config else "",
+            "status": task.status.value,
+            "file_size": task.file_size,
+            "duration": round(duration, 3),
+            "checksum": task.checksum or "",
+        }
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                self.archive_once()
+            except Exception as e:
+                print(f"[ARCHIVE] 归档失败: {str(e)}")
@@ -0,0 +1,1206 @@
+"""
+传输调度模块
+负责从队列中取出待处理任务并执行，小文件按服务器合并为批量传输
+"""
+
+import contextlib
+import io
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Optional, Union
+
+from ...domain.models import ServerConfig, TransferResult
+from ...infrastructure.network.cancellation import CancelToken
+from ...infrastructure.network.checksum import create_hasher
+from ...infrastructure.network.fanout import FanOutReader
+from ...infrastructure.network.growing_file import GrowingFileReader
+from ...infrastructure.network.http_source import HttpSource, SourceInfo
+from ...infrastructure.network.readahead import READ_AHEAD_CHUNK
+from ...infrastructure.network.transport import (
+    PARTIAL_SUFFIX,
+    Readable,
+    Transport,
+)
+from ...infrastructure.network.transport_factory import create_transport
+from .config_manager import ConfigManager
+from .dedup_manager import DedupManager
+from .history_manager import HistoryManager
+from .queue_manager import QueueManager, TaskStatus, TransferTask
+from .task_archiver import TaskArchiver, compute_throughput
+
+# 不超过该大小的文件参与批量传输
+BATCH_THRESHOLD = 1024 * 1024
+
+# 单批最多包含的文件数
+BATCH_MAX_FILES = 1000
+
+# URL 中转时并行的区段请求数
+RELAY_CONNECTIONS = 4
+
+# 并行中转时每个区段的最小大小，文件小于两倍时不拆分
+RELAY_MIN_RANGE = 8 * 1024 * 1024
+
+# 下载时并行读取区段的连接数
+DOWNLOAD_CONNECTIONS = 4
+
+# 取消进行中的任务时对未完成文件的处理：delete 删除，keep 保留以便续传
+CANCEL_POLICIES = ("delete", "keep")
+
+# 续传时等待摘要线程处理的尾部数据块数
+RESUME_HASH_QUEUE = 16
+
+
+class _ResumeHasher:
+    """续传时边上传边计算整个文件的摘要，本地文件只读一遍
+
+    作为上传的输入流读取 offset 之后的尾部，读出的数据同时交给摘要线程；
+    摘要线程先读取并计算 [0, offset) 的前缀，再依次计算这些尾部数据。
+    """
+
+    def __init__(self, path: str, offset: int, algorithm: str):
+        """初始化摘要计算
+        Args:
+            path: 本地文件路径
+            offset: 续传起点，之前的部分由摘要线程读取
+            algorithm: 摘要算法
+        """
+        self.path = path
+        self.offset = offset
+        self.hasher = create_hasher(algorithm)
+        self.stream: BinaryIO = open(path, "rb")
+        self.stream.seek(offset)
+        self.tail: queue.Queue[Optional[bytes]] = queue.Queue(maxsize=RESUME_HASH_QUEUE)
+        self.error: Optional[Exception] = None
+        self.closed = False
+        self.thread = threading.Thread(
+            target=self._run, name="resume-hash", daemon=True
+        )
+        self.thread.start()
+
+    def __enter__(self) -> "_ResumeHasher":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def read(self, size: int = -1) -> bytes:
+        """读取尾部数据，并交给摘要线程"""
+        data = self.stream.read(size)
+        # 关闭后摘要线程不再取数据，上传失败时预读线程迟到的读取直接丢弃
+        if data and not self.closed:
+            self.tail.put(data)
+        return data
+
+    def close(self) -> None:
+        """结束尾部数据并等待摘要线程退出"""
+        if not self.closed:
+            self.closed = True
+            self.tail.put(None)
+            self.thread.join()
+            self.stream.close()
+
+    def hexdigest(self) -> str:
+        """整个文件的摘要，须在尾部全部读出后调用"""
+        self.close()
+        if self.error is not None:
+            raise self.error
+        return self.hasher.hexdigest()
+
+    def _run(self) -> None:
+        try:
+            with open(self.path, "rb") as prefix:
+                remaining = self.offset
+                while remaining > 0:
+                    chunk = prefix.read(min(READ_AHEAD_CHUNK, remaining))
+                    if not chunk:
+                        break
+                    self.hasher.update(chunk)
+                    remaining -= len(chunk)
+        except Exception as e:
+            self.error = e
+        # 出错后仍取完尾部数据，避免上传方阻塞
+        while True:
+            data = self.tail.get()
+            if data is None:
+                return
+            if self.error is None:
+                self.hasher.update(data)
+
+
+class TransferDispatcher:
+    """传输调度接口"""
+
+    def __init__(
+        self,
+        queue_manager: QueueManager,
+        config_manager: ConfigManager,
+        history_manager: Optional[HistoryManager] = None,
+        dedup_manager: Optional[DedupManager] = None,
+        batch_threshold: int = BATCH_THRESHOLD,
+        batch_max_files: int = BATCH_MAX_FILES,
+        cancel_policy: str = "delete",
+        archiver: Optional[TaskArchiver] = None,
+    ):
+        """初始化传输调度器
+        Args:
+            queue_manager: 队列管理器，并发数取其 max_concurrent
+            config_manager: 配置管理器，用于查找服务器配置
+            history_manager: 历史记录管理器，任务结束时写入历史
+            dedup_manager: 去重管理器，单文件任务上传前尝试去重
+            batch_threshold: 参与批量传输的文件大小上限，0 表示不合并
+            batch_max_files: 单批最多文件数
+            cancel_policy: 取消时对未完成文件的默认处理，见 CANCEL_POLICIES
+            archiver: 任务归档器，设置后历史记录交给它批量写入
+        """
+        if cancel_policy not in CANCEL_POLICIES:
+            raise ValueError(f"不支持的取消策略: {cancel_policy}")
+        self.queue_manager = queue_manager
+        self.config_manager = config_manager
+        self.history_manager = history_manager
+        self.dedup_manager = dedup_manager
+        self.archiver = archiver
+        self.batch_threshold = batch_threshold
+        self.batch_max_files = batch_max_files
+        self.executor = ThreadPoolExecutor(
+            max_workers=queue_manager.max_concurrent, thread_name_prefix="transfer"
+        )
+        self.submitted: set[str] = set()
+        self.lock = threading.Lock()
+        # 边下载边上传的任务：等待期间占用线程，与常规任务分开
+        self.follow_executor = ThreadPoolExecutor(thread_name_prefix="transfer-follow")
+        self.following: dict[
+            str,
+            tuple[GrowingFileReader, Future[tuple[bool, Optional[TransferResult]]]],
+        ] = {}
+        # 进行中任务的取消令牌，以及取消时指定的未完成文件处理策略
+        self.cancel_policy = cancel_policy
+        self.tokens: dict[str, CancelToken] = {}
+        self.cancel_policies: dict[str, str] = {}
+
+    def dispatch_pending(self) -> int:
+        """调度所有待处理任务，小文件按服务器分组批量传输
+        Returns:
+            本次提交的任务数
+        """
+        with self.lock:
+            pending = [
+                task
+                for task in self.queue_manager.list_tasks(TaskStatus.PENDING)
+                if task.id not in self.submitted
+            ]
+            groups: dict[str, list[str]] = {}
+            for task in pending:
+                self.submitted.add(task.id)
+                if task.direction == "download":
+                    self.executor.submit(self.run_download, task.id)
+                elif (
+                    task.file_size <= self.batch_threshold
+                    and task.transfer_mode != "delta"
+                ):
+                    groups.setdefault(task.server_id, []).append(task.id)
+                else:
+                    self.executor.submit(self.run_task, task.id)
+
+            for server_id, task_ids in groups.items():
+                if len(task_ids) == 1:
+                    self.executor.submit(self.run_task, task_ids[0])
+                    continue
+                for start in range(0, len(task_ids), self.batch_max_files):
+                    self.executor.submit(
+                        self.run_batch,
+                        server_id,
+                        task_ids[start : start + self.batch_max_files],
+                    )
+            return len(pending)
+
+    def cancel(
+        self, task_id: str, policy: Optional[str] = None
+    ) -> dict[str, Union[bool, str]]:
+        """取消任务：排队中的任务不再执行，进行中的传输立即中断并释放线程
+        Args:
+            task_id: 任务ID
+            policy: 未完成文件的处理策略，默认取 cancel_policy
+        Returns:
+            取消结果字典，同 QueueManager.cancel_task
+        """
+        if policy is not None and policy not in CANCEL_POLICIES:
+            return {"success": False, "error": f"不支持的取消策略: {policy}"}
+        with self.lock:
+            result = self.queue_manager.cancel_task(task_id)
+            if not result.get("success"):
+                return result
+            token = self.tokens.get(task_id)
+            entry = self.following.get(task_id)
+            if policy is not None:
+                self.cancel_policies[task_id] = policy
+        if entry is not None:
+            entry[0].abort("任务已取消")
+        if token is not None:
+            print(f"[CANCEL] 中断进行中的任务: {task_id}")
+            token.cancel()
+        return result
+
+    def pause(self, task_id: str) -> dict[str, Union[bool, str]]:
+        """暂停任务：排队中的任务不再执行，运行中的传输立即中断并释放线程和连接
+
+        只有恢复后能由 dispatch_pending 重新执行的任务（本地文件上传与下载）
+        可以暂停；完整上传写出的远端临时文件保留，恢复后从其末尾续传。
+        Args:
+            task_id: 任务ID
+        Returns:
+            暂停结果字典，同 QueueManager.pause_task
+        """
+        task = self.queue_manager.get_task(task_id)
+        if task is None:
+            return {"success": False, "error": "任务不存在"}
+        if task_id in self.following or (
+            task.direction != "download" and not os.path.isfile(task.file_path)
+        ):
+            return {"success": False, "error": "该任务的数据来源不支持暂停"}
+        with self.lock:
+            result = self.queue_manager.pause_task(task_id)
+            if not result.get("success"):
+                return result
+            token = self.tokens.get(task_id)
+        if token is not None:
+            print(f"[PAUSE] 中断运行中的任务: {task_id}")
+            token.cancel("任务已暂停")
+        return result
+
+    def resume(self, task_id: str) -> dict[str, Union[bool, str]]:
+        """恢复已暂停的任务并立即调度
+        Args:
+            task_id: 任务ID
+        Returns:
+            恢复结果字典，同 QueueManager.resume_task
+        """
+        result = self.queue_manager.resume_task(task_id)
+        if result.get("success"):
+            self.dispatch_pending()
+        return result
+
+    def pause_queue(self, server_id: Optional[str] = None) -> list[str]:
+        """暂停全部（或指定服务器的）排队中与运行中的任务
+        Args:
+            server_id: 服务器ID，None 表示整个队列
+        Returns:
+            已暂停的任务ID列表
+        """
+        paused = []
+        for task in self.queue_manager.list_tasks():
+            if server_id is not None and task.server_id != server_id:
+                continue
+            if task.status not in (TaskStatus.PENDING, TaskStatus.RUNNING):
+                continue
+            if self.pause(task.id).get("success"):
+                paused.append(task.id)
+        return paused
+
+    def resume_queue(self, server_id: Optional[str] = None) -> list[str]:
+        """恢复全部（或指定服务器的）已暂停任务
+        Args:
+            server_id: 服务器ID，None 表示整个队列
+        Returns:
+            已恢复的任务ID列表
+        """
+        resumed = [
+            task.id
+            for task in self.queue_manager.list_tasks(TaskStatus.PAUSED)
+            if (server_id is None or task.server_id == server_id)
+            and self.queue_manager.resume_task(task.id).get("success")
+        ]
+        if resumed:
+            self.dispatch_pending()
+        return resumed
+
+    def run_task(
+        self,
+        task_id: str,
+        verify_remote: bool = False,
+        dedup: bool = True,
+        compression: str = "none",
+        compression_store: bool = False,
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """执行单个任务（在当前线程中同步执行）
+        Args:
+            task_id: 任务ID
+            verify_remote: 是否在远端校验摘要
+            dedup: 是否尝试内容去重
+            compression: 压缩策略 none/auto/gzip/zstd
+            compression_store: 远端保存压缩文件而不是解压
+        Returns:
+            (是否成功, 传输结果)
+        """
+        task = self.queue_manager.get_task(task_id)
+        if task is None:
+            return False, None
+        server_config = self.config_manager.get_server_config(task.server_id)
+        if server_config is None:
+            self._finish_task(task, None, False, None, 0.0, "服务器配置不存在")
+            return False, None
+
+        options = {
+            "verify_remote": verify_remote,
+            "compression": compression,
+            "compression_store": compression_store,
+        }
+        client = create_transport(server_config, **options)
+        if not self._start(task, client):
+            return False, None
+        remote_path = os.path.join(task.target_path, task.file_name)
+        start_time = time.time()
+
+        # 暂停或重启前本任务写出的临时文件还在时从其末尾续传，不做去重
+        offset = self._resume_offset(client, task)
+        # 内容去重：已送达过相同内容时跳过或远端复制
+        result = None
+        if dedup and self.dedup_manager is not None and not offset:
+            result = self.dedup_manager.resolve(
+                client, task.server_id, task.file_path, remote_path, task.file_size
+            )
+        if offset:
+            result = self._resume_upload(client, task, remote_path, offset)
+        if result:
+            success = True
+            self.queue_manager.update_task_progress(task_id, 100.0)
+        else:
+            success, result = self._upload(client, task, remote_path, options)
+            if (
+                success
+                and result
+                and result.checksum
+                and self.dedup_manager is not None
+            ):
+                self.dedup_manager.record(
+                    task.server_id,
+                    task.file_path,
+                    remote_path,
+                    result.checksum,
+                    result.checksum_algorithm,
+                )
+
+        self._finish_task(
+            task,
+            server_config,
+            success,
+            result,
+            time.time() - start_time,
+            None if success else f"{server_config.protocol}上传失败",
+            partial=lambda: self._remove_partial(client),
+        )
+        return success, result
+
+    def run_stream(
+        self,
+        task_id: str,
+        stream: Readable,
+        verify_remote: bool = False,
+        atomic: bool = False,
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """以输入流为数据来源执行任务（在当前线程中同步执行）
+
+        流只能在接收它的线程中读取，因此不经过线程池或工作进程，
+        也不做去重和压缩。
+        Args:
+            task_id: 任务ID，file_size 为 0 时视为大小未知
+            stream: 数据来源，如 HTTP 请求体
+            verify_remote: 是否在远端校验摘要
+            atomic: 先写入远端临时文件，完成后重命名为目标文件
+        Returns:
+            (是否成功, 传输结果)
+        """
+        task = self.queue_manager.get_task(task_id)
+        if task is None:
+            return False, None
+        server_config = self.config_manager.get_server_config(task.server_id)
+        if server_config is None:
+            self._finish_task(task, None, False, None, 0.0, "服务器配置不存在")
+            return False, None
+
+        client = create_transport(server_config, verify_remote=verify_remote)
+        if not self._start(task, client):
+            return False, None
+        remote_path = os.path.join(task.target_path, task.file_name)
+        upload_path = remote_path + PARTIAL_SUFFIX if atomic else remote_path
+        start_time = time.time()
+        try:
+            success = client.upload_stream(
+                stream,
+                upload_path,
+                task.file_size or None,
+                self._reporter(task_id),
+            )
+            if success and atomic:
+                client.rename(upload_path, remote_path)
+                if client.last_result is not None:
+                    client.last_result.remote_path = remote_path
+        except Exception as e:
+            print(f"流式上传失败: {str(e)}")
+            success = False
+        result = client.last_result if success else None
+
+        self._finish_task(
+            task,
+            server_config,
+            success,
+            result,
+            time.time() - start_time,
+            None if success else f"{server_config.protocol}流式上传失败",
+            partial=lambda: client.remove(upload_path),
+        )
+        return success, result
+
+    def follow(
+        self,
+        task_id: str,
+        local_path: str,
+        partial_paths: Optional[list[str]] = None,
+        verify_remote: bool = False,
+    ) -> None:
+        """边下载边上传：后台读取仍在写入的本地文件，写完由 finish_follow 通知
+        Args:
+            task_id: 任务ID
+            local_path: 下载完成后的最终路径
+            partial_paths: 下载中的临时文件路径，默认按浏览器常见后缀推断
+            verify_remote: 是否在远端校验摘要
+        """
+        reader = GrowingFileReader(local_path, partial_paths)
+        with self.lock:
+            self.submitted.add(task_id)
+            self.following[task_id] = (
+                reader,
+                self.follow_executor.submit(
+                    self._run_follow, task_id, reader, verify_remote
+                ),
+            )
+
+    def end_follow(
+        self, task_id: str, success: bool = True, total_size: Optional[int] = None
+    ) -> bool:
+        """通知下载结束，不等待上传完成，剩余数据由后台线程继续上传
+        Args:
+            task_id: 任务ID
+            success: 下载是否成功，失败时放弃上传
+            total_size: 文件最终大小，未知时读到文件末尾为止
+        Returns:
+            任务是否在跟随上传中
+        """
+        with self.lock:
+            entry = self.following.get(task_id)
+        if entry is None:
+            return False
+        reader, _ = entry
+        if success:
+            reader.finish(total_size)
+        else:
+            reader.abort()
+        return True
+
+    def finish_follow(
+        self,
+        task_id: str,
+        success: bool = True,
+        total_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """通知下载结束，等待剩余数据上传完成
+        Args:
+            task_id: 任务ID
+            success: 下载是否成功，失败时放弃上传
+            total_size: 文件最终大小，未知时读到文件末尾为止
+            timeout: 最长等待秒数
+        Returns:
+            (是否成功, 传输结果)
+        """
+        with self.lock:
+            entry = self.following.get(task_id)
+        if entry is None or not self.end_follow(task_id, success, total_size):
+            return False, None
+        return entry[1].result(timeout)
+
+    def relay(
+        self,
+        task_id: str,
+        url: str,
+        headers: Optional[dict[str, str]] = None,
+        cookies: Optional[dict[str, str]] = None,
+        connections: int = RELAY_CONNECTIONS,
+    ) -> None:
+        """提交 URL 中转任务到线程池，参数见 run_relay"""
+        with self.lock:
+            self.submitted.add(task_id)
+        self.executor.submit(
+            self.run_relay, task_id, url, headers, cookies, connections
+        )
+
+    def run_relay(
+        self,
+        task_id: str,
+        url: str,
+        headers: Optional[dict[str, str]] = None,
+        cookies: Optional[dict[str, str]] = None,
+        connections: int = RELAY_CONNECTIONS,
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """从 HTTP(S) 源直接中转到服务器，不经过本地磁盘（在当前线程中同步执行）
+
+        源支持 Range 且文件足够大时按区段并行请求，各区段写入远端临时文件的
+        对应偏移；否则单连接顺序写入，远端留有上次中断的临时文件时从其末尾
+        续传。完成后临时文件重命名为目标文件。
+        Args:
+            task_id: 任务ID
+            url: 源地址
+            headers: 转发的请求头
+            cookies: 转发的 Cookie
+            connections: 并行区段请求数
+        Returns:
+            (是否成功, 传输结果)
+        """
+        task = self.queue_manager.get_task(task_id)
+        if task is None:
+            return False, None
+        server_config = self.config_manager.get_server_config(task.server_id)
+        if server_config is None:
+            self._finish_task(task, None, False, None, 0.0, "服务器配置不存在")
+            return False, None
+
+        if not self._start(task):
+            return False, None
+        remote_path = os.path.join(task.target_path, task.file_name)
+        upload_path = remote_path + PARTIAL_SUFFIX
+        start_time = time.time()
+        result: Optional[TransferResult] = None
+        try:
+            source = HttpSource(url, headers, cookies)
+            info = source.probe()
+            if (
+                info.accept_ranges
+                and info.size is not None
+                and connections > 1
+                and info.size >= RELAY_MIN_RANGE * 2
+            ):
+                result = self._relay_ranges(
+                    server_config, task_id, source, upload_path, info.size, connections
+                )
+            else:
+                result = self._relay_sequential(
+                    server_config, task_id, source, upload_path, info
+                )
+            create_transport(server_config).rename(upload_path, remote_path)
+            result.local_path = url
+            result.remote_path = remote_path
+            success = True
+        except Exception as e:
+            print(f"URL中转失败: {str(e)}")
+            success = False
+            result = None
+
+        self._finish_task(
+            task,
+            server_config,
+            success,
+            result,
+            time.time() - start_time,
+            None if success else f"{server_config.protocol}中转失败",
+            partial=lambda: create_transport(server_config).remove(upload_path),
+        )
+        return success, result
+
+    def fanout(self, task_ids: list[str], verify_remote: bool = False) -> None:
+        """提交多目标分发任务到线程池，参数见 run_fanout"""
+        with self.lock:
+            self.submitted.update(task_ids)
+        self.executor.submit(self.run_fanout, task_ids, verify_remote)
+
+    def run_fanout(self, task_ids: list[str], verify_remote: bool = False) -> int:
+        """同一本地文件只读取一次，并行上传到多个目标（在当前线程中同步执行）
+
+        每个目标各自是一个任务，状态与进度分别上报。读取结果经共享环形缓冲区
+        分发给各目标；落后过多的目标改为自行读取文件，不拖慢其他目标。
+        协议不支持流式写入的目标退回为独立的常规上传。
+        Args:
+            task_ids: 各目标的任务ID，任务的 file_path 必须相同
+            verify_remote: 是否在远端校验摘要
+        Returns:
+            成功的任务数
+        """
+        tasks = [
+            task
+            for task in (self.queue_manager.get_task(task_id) for task_id in task_ids)
+            if task is not None
+        ]
+        if not tasks:
+            return 0
+        if len({task.file_path for task in tasks}) > 1:
+            raise ValueError("分发任务的本地文件必须相同")
+
+        def send(stream: Any, task: TransferTask) -> bool:
+            try:
+                server_config = self.config_manager.get_server_config(task.server_id)
+                if (
+                    server_config is not None
+                    and type(create_transport(server_config)).upload_stream
+                    is Transport.upload_stream
+                ):
+                    stream.close()
+                    return self.run_task(task.id, verify_remote, dedup=False)[0]
+                return self.run_stream(task.id, stream, verify_remote)[0]
+            finally:
+                stream.close()
+
+        with FanOutReader(tasks[0].file_path, len(tasks)) as reader:
+            with ThreadPoolExecutor(
+                max_workers=len(tasks), thread_name_prefix="transfer-fanout"
+            ) as pool:
+                results = list(
+                    pool.map(
+                        send,
+                        [reader.stream(index) for index in range(len(tasks))],
+                        tasks,
+                    )
+                )
+        return sum(results)
+
+    def replicate(
+        self,
+        task_id: str,
+        source_server_id: str,
+        source_path: str,
+        verify_remote: bool = False,
+    ) -> None:
+        """提交服务器间复制任务到线程池，参数见 run_replicate"""
+        with self.lock:
+            self.submitted.add(task_id)
+        self.executor.submit(
+            self.run_replicate, task_id, source_server_id, source_path, verify_remote
+        )
+
+    def run_replicate(
+        self,
+        task_id: str,
+        source_server_id: str,
+        source_path: str,
+        verify_remote: bool = False,
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """把已在源服务器上的文件复制到任务的目标服务器（在当前线程中同步执行）
+
+        优先由源服务器直接推送到目标服务器，数据不经过后端；两台服务器之间
+        不通时经后端流式中转，不在本地落盘。两种方式都先写入远端临时文件，
+        完成后重命名为目标文件。
+        Args:
+            task_id: 任务ID，server_id/target_path 为复制目标
+            source_server_id: 源服务器ID
+            source_path: 源服务器上的文件路径
+            verify_remote: 是否比对源与目标的摘要
+        Returns:
+            (是否成功, 传输结果)
+        """
+        task = self.queue_manager.get_task(task_id)
+        if task is None:
+            return False, None
+        source_config = self.config_manager.get_server_config(source_server_id)
+        server_config = self.config_manager.get_server_config(task.server_id)
+        if source_config is None or server_config is None:
+            self._finish_task(task, server_config, False, None, 0.0, "服务器配置不存在")
+            return False, None
+
+        source = create_transport(source_config)
+        target = create_transport(server_config)
+        if not self._start(task, source):
+            return False, None
+        remote_path = os.path.join(task.target_path, task.file_name)
+        upload_path = remote_path + PARTIAL_SUFFIX
+        start_time = time.time()
+        try:
+            target.mkdir(task.target_path)
+        except Exception as e:
+            print(f"[REPLICATE] 无法预先创建目标目录: {str(e)}")
+
+        pushed = source.remote_push(source_path, server_config, upload_path)
+        with self.lock:
+            token = self.tokens.get(task_id)
+        if token is not None and token.cancelled:
+            # 推送期间被取消或暂停：推送失败也不再改为中转，按取消处理临时文件
+            self._finish_task(
+                task,
+                server_config,
+                False,
+                None,
+                time.time() - start_time,
+                None,
+                partial=lambda: target.remove(upload_path),
+            )
+            return False, None
+        if not pushed:
+            print(
+                f"[REPLICATE] {source_config.name} 无法直接推送到 {server_config.name}，经后端中转"
+            )
+            with contextlib.ExitStack() as stack:
+                try:
+                    stream = stack.enter_context(source.open_read(source_path))
+                except Exception as e:
+                    print(f"读取源文件失败: {str(e)}")
+                    self._finish_task(
+                        task,
+                        server_config,
+                        False,
+                        None,
+                        time.time() - start_time,
+                        f"{source_config.protocol}读取源文件失败",
+                    )
+                    return False, None
+                return self.run_stream(task_id, stream, verify_remote, atomic=True)
+
+        result: Optional[TransferResult] = None
+        try:
+            target.rename(upload_path, remote_path)
+            result = TransferResult(
+                local_path=source_path,
+                remote_path=remote_path,
+                file_size=task.file_size,
+                mode="replicated",
+            )
+            if verify_remote:
+                result.checksum = source.remote_checksum(source_path)
+                if result.checksum:
+                    result.verified = (
+                        target.remote_checksum(remote_path) == result.checksum
+                    )
+            success = result.verified is not False
+        except Exception as e:
+            print(f"服务器间复制失败: {str(e)}")
+            success = False
+        if success:
+            self.queue_manager.update_task_progress(task_id, 100.0)
+
+        self._finish_task(
+            task,
+            server_config,
+            success,
+            result if success else None,
+            time.time() - start_time,
+            None if success else f"{server_config.protocol}复制失败",
+            partial=lambda: target.remove(upload_path),
+        )
+        return success, result if success else None
+
+    def download(self, task_id: str, connections: int = DOWNLOAD_CONNECTIONS) -> None:
+        """提交下载任务到线程池，参数见 run_download"""
+        with self.lock:
+            self.submitted.add(task_id)
+        self.executor.submit(self.run_download, task_id, connections)
+
+    def run_download(
+        self, task_id: str, connections: int = DOWNLOAD_CONNECTIONS
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """从服务器下载文件（在当前线程中同步执行）
+
+        远端文件为 target_path/file_name，下载到本地 file_path；大文件按区段
+        并行读取，中断后再次执行时从本地临时文件续传。
+        Args:
+            task_id: 任务ID
+            connections: 并行读取的连接数
+        Returns:
+            (是否成功, 传输结果)
+        """
+        task = self.queue_manager.get_task(task_id)
+        if task is None:
+            return False, None
+        server_config = self.config_manager.get_server_config(task.server_id)
+        if server_config is None:
+            self._finish_task(task, None, False, None, 0.0, "服务器配置不存在")
+            return False, None
+
+        client = create_transport(server_config)
+        if not self._start(task, client):
+            return False, None
+        remote_path = os.path.join(task.target_path, task.file_name)
+        start_time = time.time()
+        try:
+            success = client.download(
+                remote_path,
+                task.file_path,
+                self._reporter(task_id),
+                connections=connections,
+            )
+        except Exception as e:
+            print(f"下载失败: {str(e)}")
+            success = False
+        result = client.last_result if success else None
+
+        self._finish_task(
+            task,
+            server_config,
+            success,
+            result,
+            time.time() - start_time,
+            None if success else f"{server_config.protocol}下载失败",
+            partial=lambda: os.unlink(task.file_path + PARTIAL_SUFFIX),
+        )
+        return success, result
+
+    def run_batch(self, server_id: str, task_ids: list[str]) -> int:
+        """以单个 tar 流批量执行同一服务器的小文件任务
+        Returns:
+            成功的任务数
+        """
+        tasks = [
+            task
+            for task in (self.queue_manager.get_task(task_id) for task_id in task_ids)
+            if task is not None
+        ]
+        server_config = self.config_manager.get_server_config(server_id)
+        if server_config is None:
+            for task in tasks:
+                self._finish_task(task, None, False, None, 0.0, "服务器配置不存在")
+            return 0
+
+        tasks = [task for task in tasks if self._start(task)]
+        if not tasks:
+            return 0
+        client = create_transport(server_config)
+        start_time = time.time()
+        results = self._upload_batch(client, tasks)
+        duration = time.time() - start_time
+
+        succeeded = 0
+        for task, result in zip(tasks, results):
+            success = result is not None
+            succeeded += int(success)
+            self._finish_task(
+                task,
+                server_config,
+                success,
+                result,
+                duration / max(len(tasks), 1),
+                None if success else f"{server_config.protocol}批量上传失败",
+            )
+        return succeeded
+
+    def shutdown(self, wait: bool = True) -> None:
+        """停止调度线程池，放弃仍在等待下载的任务"""
+        with self.lock:
+            readers = [reader for reader, _ in self.following.values()]
+        for reader in readers:
+            reader.abort("服务停止")
+        self.follow_executor.shutdown(wait=wait)
+        self.executor.shutdown(wait=wait)
+
+    def _start(self, task: TransferTask, client: Optional[Transport] = None) -> bool:
+        """登记取消令牌并把任务置为运行中；任务已被取消或暂停时返回False，不再执行
+
+        取消令牌触发时调用 client.abort 关闭连接，使阻塞的读写立即结束。
+        """
+        token = CancelToken()
+        with self.lock:
+            current = self.queue_manager.get_task(task.id)
+            if current is not None and current.status in (
+                TaskStatus.CANCELLED,
+                TaskStatus.PAUSED,
+            ):
+                self.submitted.discard(task.id)
+                return False
+            self.tokens[task.id] = token
+            self.queue_manager.update_task_status(task.id, TaskStatus.RUNNING)
+        if client is not None:
+            token.on_cancel(client.abort)
+        return True
+
+    def _resume_offset(self, client: Transport, task: TransferTask) -> int:
+        """任务记录的远端临时文件已写入的字节数，没有记录或不能续传时返回0
+
+        临时文件只由本任务的完整上传从头顺序写出，其大小即已写入的前缀。
+        不按目标文件的大小续传：目标可能是无关的旧文件，也可能是写了一半的
+        差量或压缩上传。远端无法计算摘要的协议不续传，续写结果无从核对。
+        """
+        if (
+            not task.partial_path
+            or type(client).upload_stream is Transport.upload_stream
+            or type(client).remote_checksum is Transport.remote_checksum
+        ):
+            return 0
+        try:
+            size = client.remote_size(task.partial_path)
+        except Exception as e:
+            print(f"[PAUSE] 读取临时文件大小失败，重新上传: {str(e)}")
+            return 0
+        return size if size and size < task.file_size else 0
+
+    def _resume_upload(
+        self, client: Transport, task: TransferTask, remote_path: str, offset: int
+    ) -> Optional[TransferResult]:
+        """从 offset 处把本地文件的剩余部分续写到任务记录的临时文件，完成后改名
+
+        按整个文件的摘要核对临时文件，不一致或远端无法计算摘要时返回None，
+        由调用方重新完整上传，未经核对的拼接结果不标记完成。
+        整个文件的摘要在上传尾部的同时计算，本地文件只读一遍。
+        """
+        part_path = str(task.partial_path)
+        rest = task.file_size - offset
+        update = self._reporter(task.id)
+        algorithm = getattr(client, "checksum_algorithm", "sha256")
+        print(f"[PAUSE] 从 {offset} 字节处续传: {task.id}")
+        with _ResumeHasher(task.file_path, offset, algorithm) as source:
+            success = client.upload_stream(
+                source,
+                part_path,
+                rest,
+                lambda p: update((offset + p * rest) / task.file_size),
+                offset=offset,
+            )
+            if not success:
+                return None
+            checksum = source.hexdigest()
+        remote = client.remote_checksum(part_path)
+        if remote is None or remote != checksum:
+            reason = "远端无法核对" if remote is None else "摘要不一致"
+            print(f"[PAUSE] 续传结果{reason}，重新上传: {task.id}")
+            try:
+                client.remove(part_path)
+            except Exception as e:
+                print(f"[PAUSE] 删除临时文件失败: {str(e)}")
+            return None
+        try:
+            client.rename(part_path, remote_path)
+        except Exception as e:
+            print(f"[PAUSE] 续传完成后改名失败，重新上传: {str(e)}")
+            return None
+        self.queue_manager.set_task_partial(task.id, None)
+        return TransferResult(
+            local_path=task.file_path,
+            remote_path=remote_path,
+            file_size=task.file_size,
+            bytes_sent=rest,
+            checksum=checksum,
+            checksum_algorithm=algorithm,
+            verified=True,
+            mode="resumed",
+        )
+
+    def _reporter(self, task_id: str) -> Callable[[float], None]:
+        """进度回调：写入队列；任务被取消时抛出 TransferCancelled 结束传输循环"""
+        with self.lock:
+            token = self.tokens.get(task_id)
+
+        def report(progress: float) -> None:
+            if token is not None:
+                token.check()
+            self.queue_manager.update_task_progress(task_id, progress * 100)
+
+        return report
+
+    def _run_follow(
+        self, task_id: str, reader: GrowingFileReader, verify_remote: bool
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """跟随上传的后台线程入口"""
+        try:
+            return self.run_stream(task_id, reader, verify_remote, atomic=True)
+        finally:
+            reader.abort("上传已结束")
+            reader.close()
+            with self.lock:
+                self.following.pop(task_id, None)
+
+    def _upload(
+        self,
+        client: Transport,
+        task: TransferTask,
+        remote_path: str,
+        options: dict[str, Any],
+    ) -> tuple[bool, Optional[TransferResult]]:
+        """在当前线程执行单文件上传，进度直接写入队列
+
+        完整上传先写入远端临时文件，传输层创建临时文件后回调 on_partial，
+        在任务上记录临时文件路径，暂停或重启后由 _resume_offset 从它续传；
+        差量、压缩等其他方式不记录，中断后重新上传。
+        """
+        client.on_partial = lambda path: self.queue_manager.set_task_partial(
+            task.id, path
+        )
+        success = client.upload(
+            task.file_path,
+            remote_path,
+            progress_callback=self._reporter(task.id),
+            mode=task.transfer_mode,
+        )
+        return success, client.last_result
+
+    def _upload_batch(
+        self, client: Transport, tasks: list[TransferTask]
+    ) -> list[Optional[TransferResult]]:
+        """在当前线程执行批量上传"""
+
+        def report(index: int, progress: float) -> None:
+            self.queue_manager.update_task_progress(tasks[index].id, progress * 100)
+
+        return client.upload_batch(
+            [
+                (task.file_path, os.path.join(task.target_path, task.file_name))
+                for task in tasks
+            ],
+            progress_callback=report,
+        )
+
+    def _relay_sequential(
+        self,
+        server_config: ServerConfig,
+        task_id: str,
+        source: HttpSource,
+        upload_path: str,
+        info: SourceInfo,
+    ) -> TransferResult:
+        """单连接顺序中转，远端临时文件未写完时从其末尾续传"""
+        client = create_transport(server_config)
+        offset = None
+        if info.accept_ranges and info.size:
+            existing = client.remote_size(upload_path)
+            if existing and existing < info.size:
+                offset = existing
+                print(f"[RELAY] 从 {existing} 续传: {upload_path}")
+        start = offset or 0
+        expected = None if info.size is None else info.size - start
+        update = self._reporter(task_id)
+
+        def report(progress: float) -> None:
+            if info.size and expected:
+                update((start + progress * expected) / info.size)
+
+        stream = source.open(start)
+        try:
+            if not client.upload_stream(stream, upload_path, expected, report, offset):
+                raise OSError(f"写入失败: {upload_path}")
+        finally:
+            stream.close()
+        result = client.last_result or TransferResult("", upload_path, 0)
+        if offset is not None:
+            # 摘要只覆盖续传部分
+            result.checksum = None
+            result.mode = "resumed"
+            result.file_size = start + result.bytes_sent
+        return result
+
+    def _relay_ranges(
+        self,
+        server_config: ServerConfig,
+        task_id: str,
+        source: HttpSource,
+        upload_path: str,
+        size: int,
+        connections: int,
+    ) -> TransferResult:
+        """多个区段并行请求，各自写入远端临时文件的对应偏移"""
+        if not create_transport(server_config).upload_stream(
+            io.BytesIO(), upload_path, 0
+        ):
+            raise OSError(f"无法创建远端文件: {upload_path}")
+        count = min(connections, size // RELAY_MIN_RANGE)
+        bounds = [size * i // count for i in range(count + 1)]
+        sent = [0] * count
+        progress_lock = threading.Lock()
+        update = self._reporter(task_id)
+
+        def send(index: int) -> None:
+            start, end = bounds[index], bounds[index + 1]
+
+            def report(progress: float) -> None:
+                with progress_lock:
+                    sent[index] = int(progress * (end - start))
+                    done = sum(sent)
+                update(done / size)
+
+            client = create_transport(server_config)
+            stream = source.open(start, end)
+            try:
+                if not client.upload_stream(
+                    stream, upload_path, end - start, report, start
+                ):
+                    raise OSError(f"区段 {start}-{end} 写入失败")
+            finally:
+                stream.close()
+
+        with ThreadPoolExecutor(
+            max_workers=count, thread_name_prefix="relay-range"
+        ) as pool:
+            for future in [pool.submit(send, index) for index in range(count)]:
+                future.result()
+        return TransferResult("", upload_path, size, bytes_sent=size)
+
+    @staticmethod
+    def _remove_partial(client: Transport) -> None:
+        """删除上传写了一半的远端文件
+
+        只删除传输实际写入的路径：差量与压缩上传写的是临时文件或带后缀的
+        文件，目标文件保持原样；尚未开始写入时不做处理。
+        """
+        if client.partial_path:
+            client.remove(client.partial_path)
+
+    def _finish_task(
+        self,
+        task: TransferTask,
+        server_config: Optional[ServerConfig],
+        success: bool,
+        result: Optional[TransferResult],
+        duration: float,
+        error_message: Optional[str],
+        partial: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """更新任务终态并写入历史记录
+        Args:
+            partial: 删除未完成文件的回调，任务被取消且策略为 delete 时调用
+        """
+        with self.lock:
+            token = self.tokens.pop(task.id, None)
+            policy = self.cancel_policies.pop(task.id, self.cancel_policy)
+        # 取消或暂停后传输仍可能跑完（如工作进程尚未检查到取消），以用户操作为准
+        cancelled = token is not None and token.cancelled
+        current = self.queue_manager.get_task(task.id)
+        if cancelled and current is not None and current.status == TaskStatus.PAUSED:
+            # 暂停：保留已写入的内容和暂停状态，不写历史
+            print(f"[PAUSE] 任务已暂停: {task.id}")
+            with self.lock:
+                self.submitted.discard(task.id)
+            return
+        if cancelled:
+            status = TaskStatus.CANCELLED
+            error_message = token.reason if token else error_message
+            if partial is not None and policy == "delete":
+                try:
+                    partial()
+                except Exception as e:
+                    print(f"[CANCEL] 删除未完成文件失败: {str(e)}")
+        else:
+            status = TaskStatus.COMPLETED if success else TaskStatus.FAILED
+        if task.partial_path:
+            # 任务已结束，不会再从临时文件续传
+            self.queue_manager.set_task_partial(task.id, None)
+
+        checksum = result.checksum if result else None
+        history_data: dict[str, Union[str, int, float]] = {
+            "task_id": task.id,
+            "file_name": task.file_name,
+            "server_name": server_config.name if server_config else "",
+            "status": status.value,
+            "file_size": task.file_size,
+            "duration": round(duration, 3),
+            "checksum": checksum or "",
+        }
+        # 可选字段没有值时不写入
+        optional = {
+            "compression_ratio": result.compression_ratio if result else None,
+            "throughput": compute_throughput(status.value, task.file_size, duration),
+        }
+        history_data.update({k: v for k, v in optional.items() if v is not None})
+        # 归档器在任务进入终态后才写历史，须在更新状态前提交
+        if self.archiver is not None:
+            self.archiver.record(history_data)
+        if checksum:
+            self.queue_manager.set_task_checksum(task.id, checksum)
+        self.queue_manager.update_task_status(task.id, status, error_message)
+        with self.lock:
+            self.submitted.discard(task.id)
+
+        if self.archiver is None and self.history_manager is not None:
+            self.history_manager.add_history_record(history_data)
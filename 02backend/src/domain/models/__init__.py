@@ -1,4 +1,11 @@
 from .server_config import ServerConfig
-from .transfer_task import TransferHistory, TransferTask
+from .transfer_result import TransferResult
+from .transfer_task import TaskStatus, TransferHistory, TransferTask
 
-__all__ = ["ServerConfig", "TransferTask", "TransferHistory"]
+__all__ = [
+    "ServerConfig",
+    "TaskStatus",
+    "TransferTask",
+    "TransferHistory",
+    "TransferResult",
+]
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class TransferResult:
+    """单次传输结果数据模型"""
+
+    local_path: str
+    remote_path: str
+    file_size: int
+    bytes_sent: int = 0
+    checksum: Optional[str] = None
+    checksum_algorithm: str = "sha256"
+    verified: Optional[bool] = None  # None 表示未做远端校验
+    # full/delta/batch/compressed/resumed/skipped/remote_copy/replicated
+    mode: str = "full"
+    compression: Optional[str] = None  # gzip/zstd
+    compression_ratio: Optional[float] = None  # 压缩后/原始
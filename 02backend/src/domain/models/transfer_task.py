@@ -1,21 +1,174 @@
-from dataclasses import dataclass
-from typing import Optional
+import sys
+from datetime import datetime
+from enum import Enum
+from typing import Any, Optional, Union
+
+
+class TaskStatus(Enum):
+    """任务状态枚举"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    PAUSED = "paused"
+
+
+# 任务中的状态保存为小整数，按枚举定义顺序编码
+STATUS_BY_CODE: tuple[TaskStatus, ...] = tuple(TaskStatus)
+STATUS_CODES: dict[TaskStatus, int] = {
+    status: code for code, status in enumerate(STATUS_BY_CODE)
+}
+
+Timestamp = Union[str, float, None]
+
+
+def to_epoch(value: Timestamp) -> Optional[float]:
+    """ISO 时间字符串转为时间戳，时间戳和None原样返回"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.fromisoformat(value).timestamp()
+
+
+def to_iso(value: Optional[float]) -> Optional[str]:
+    """时间戳转为本地时间的 ISO 字符串"""
+    return None if value is None else datetime.fromtimestamp(value).isoformat()
 
 
-@dataclass
 class TransferTask:
-    """传输任务数据模型"""
+    """传输任务数据模型
+
+    队列中可能积压上百万个任务，因此不使用实例 __dict__：服务器ID、
+    目标路径等大量重复的字符串驻留为同一对象，状态保存为小整数，时间保存
+    为时间戳。对外仍通过 status 属性提供 TaskStatus，通过 started_at /
+    completed_at 提供 ISO 字符串。
+    """
+
+    __slots__ = (
+        "id",
+        "file_path",
+        "file_name",
+        "file_size",
+        "server_id",
+        "target_path",
+        "status_code",
+        "progress",
+        "started_ts",
+        "completed_ts",
+        "error_message",
+        "checksum",
+        "transfer_mode",
+        "direction",
+        "partial_path",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        file_path: str,
+        file_name: str,
+        file_size: int,
+        server_id: str,
+        target_path: str,
+        status: Union[TaskStatus, str],
+        progress: float,
+        started_at: Timestamp,
+        completed_at: Timestamp = None,
+        error_message: Optional[str] = None,
+        checksum: Optional[str] = None,
+        transfer_mode: str = "auto",
+        direction: str = "upload",
+        partial_path: Optional[str] = None,
+    ):
+        self.id = id
+        self.file_path = file_path
+        self.file_name = file_name
+        self.file_size = file_size
+        self.server_id = sys.intern(server_id)
+        self.target_path = sys.intern(target_path)
+        self.status_code = STATUS_CODES[TaskStatus(status)]
+        self.progress = progress
+        self.started_ts = to_epoch(started_at)
+        self.completed_ts = to_epoch(completed_at)
+        self.error_message = error_message
+        self.checksum = checksum
+        self.transfer_mode = sys.intern(transfer_mode)  # auto/full/delta
+        # upload: file_path 上传到 target_path；download: 反向下载到 file_path
+        self.direction = sys.intern(direction)
+        # 完整上传写出的远端临时文件，暂停或重启后只从它的末尾续传
+        self.partial_path = partial_path
+
+    @property
+    def status(self) -> TaskStatus:
+        return STATUS_BY_CODE[self.status_code]
+
+    @status.setter
+    def status(self, value: TaskStatus) -> None:
+        self.status_code = STATUS_CODES[value]
+
+    @property
+    def started_at(self) -> Optional[str]:
+        return to_iso(self.started_ts)
+
+    @started_at.setter
+    def started_at(self, value: Timestamp) -> None:
+        self.started_ts = to_epoch(value)
+
+    @property
+    def completed_at(self) -> Optional[str]:
+        return to_iso(self.completed_ts)
+
+    @completed_at.setter
+    def completed_at(self, value: Timestamp) -> None:
+        self.completed_ts = to_epoch(value)
+
+    def __repr__(self) -> str:
+        return (
+            f"TransferTask(id={self.id!r}, file_name={self.file_name!r}, "
+            f"server_id={self.server_id!r}, status={self.status.value!r})"
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """转为 tasks.json 中保存的字典"""
+        return {
+            "id": self.id,
+            "file_path": self.file_path,
+            "file_name": self.file_name,
+            "file_size": self.file_size,
+            "server_id": self.server_id,
+            "target_path": self.target_path,
+            "status": self.status.value,
+            "progress": self.progress,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "error_message": self.error_message,
+            "checksum": self.checksum,
+            "transfer_mode": self.transfer_mode,
+            "direction": self.direction,
+            "partial_path": self.partial_path,
+        }
 
-    id: str
-    file_path: str
-    file_name: str
-    file_size: int
-    server_id: str
-    target_path: str
-    status: str
-    progress: float
-    started_at: str
-    completed_at: Optional[str]
+    @classmethod
+    def from_dict(cls, item: dict[str, Any]) -> "TransferTask":
+        """由 tasks.json 中的字典重建任务"""
+        return cls(
+            id=str(item["id"]),
+            file_path=str(item["file_path"]),
+            file_name=str(item["file_name"]),
+            file_size=int(item["file_size"]),
+            server_id=str(item["server_id"]),
+            target_path=str(item["target_path"]),
+            status=TaskStatus(item["status"]),
+            progress=float(item.get("progress", 0.0)),
+            started_at=item.get("started_at"),
+            completed_at=item.get("completed_at"),
+            error_message=item.get("error_message"),
+            checksum=item.get("checksum"),
+            transfer_mode=str(item.get("transfer_mode", "auto")),
+            direction=str(item.get("direction", "upload")),
+            partial_path=item.get("partial_path"),
+        )
 
 
 class TransferHistory:
@@ -29,6 +182,9 @@ class TransferHistory:
         file_size: int,
         duration: float,
         created_at: str,
+        checksum: Optional[str] = None,
+        compression_ratio: Optional[float] = None,
+        throughput: Optional[float] = None,
     ):
         self.id = id
         self.task_id = task_id
@@ -38,3 +194,6 @@ class TransferHistory:
         self.file_size = file_size
         self.duration = duration
         self.created_at = created_at
+        self.checksum = checksum
+        self.compression_ratio = compression_ratio
+        self.throughput = throughput  # 字节/秒
@@ -0,0 +1,272 @@
+import asyncio
+import os
+import shlex
+import typing
+
+try:  # asyncio 引擎为可选依赖
+    import asyncssh
+except ImportError:  # pragma: no cover - 依赖环境决定
+    asyncssh = None
+
+from ...domain.models import ServerConfig, TransferResult
+from .checksum import (
+    REMOTE_CHECKSUM_COMMANDS,
+    VERIFY_FALLBACKS,
+    create_hasher,
+    parse_checksum_output,
+)
+from .transport import ProgressCallback, partial_name
+
+# 单个 SFTP 写请求大小
+CHUNK_SIZE = 64 * 1024
+
+# 单个文件同时在途的写请求数
+MAX_REQUESTS = 32
+
+# OpenSSH 默认 MaxSessions 为 10，单连接上的并发会话留出余量
+MAX_SESSIONS_PER_CONNECTION = 8
+
+PoolKey = tuple[str, int, str]
+
+
+class AsyncConnectionCache:
+    """asyncssh 连接缓存：同一服务器的多个 SFTP 会话复用少量连接
+
+    每个连接最多承载 max_sessions 个并发会话，满了再新建连接。
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS_PER_CONNECTION):
+        if asyncssh is None:
+            raise RuntimeError("未安装 asyncssh，无法使用 asyncio 传输引擎")
+        self.max_sessions = max_sessions
+        self.connections: dict[PoolKey, list[list[typing.Any]]] = {}
+        self.locks: dict[PoolKey, asyncio.Lock] = {}
+
+    @staticmethod
+    def make_key(server_config: ServerConfig) -> PoolKey:
+        return (server_config.host, int(server_config.port), server_config.username)
+
+    async def acquire(self, server_config: ServerConfig) -> typing.Any:
+        """取得一个还有会话余量的连接"""
+        key = self.make_key(server_config)
+        lock = self.locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entries = self.connections.setdefault(key, [])
+            for entry in entries:
+                if entry[1] < self.max_sessions:
+                    entry[1] += 1
+                    return entry[0]
+            conn = await self._connect(server_config)
+            entries.append([conn, 1])
+            return conn
+
+    async def release(
+        self, server_config: ServerConfig, conn: typing.Any, reusable: bool = True
+    ) -> None:
+        """释放一个会话名额；连接出错时关闭并移出缓存"""
+        entries = self.connections.get(self.make_key(server_config), [])
+        for entry in entries:
+            if entry[0] is conn:
+                entry[1] -= 1
+                if not reusable:
+                    entries.remove(entry)
+                    conn.close()
+                return
+
+    async def close_all(self) -> None:
+        """关闭所有连接"""
+        entries = [entry for items in self.connections.values() for entry in items]
+        self.connections.clear()
+        for conn, _ in entries:
+            conn.close()
+            await conn.wait_closed()
+
+    async def _connect(self, server_config: ServerConfig) -> typing.Any:
+        return await asyncssh.connect(
+            server_config.host,
+            port=server_config.port,
+            username=server_config.username,
+            password=server_config.password,
+            known_hosts=None,
+            connect_timeout=30,
+        )
+
+
+class AsyncSFTPTransport:
+    """基于 asyncio 的 SFTP 上传，在一个事件循环中驱动任意多个会话
+
+    语义与同步的 SFTPClient.upload 一致：返回是否成功，结果保存在 last_result。
+    """
+
+    def __init__(
+        self,
+        server_config: ServerConfig,
+        connections: AsyncConnectionCache,
+        checksum_algorithm: str = "sha256",
+        verify_remote: bool = False,
+        verify_fallback: str = "skip",
+        max_requests: int = MAX_REQUESTS,
+    ) -> None:
+        """初始化异步SFTP传输
+        Args:
+            server_config: 服务器配置
+            connections: 共享的 asyncssh 连接缓存
+            checksum_algorithm: 上传时流式计算的摘要算法
+            verify_remote: 上传后是否在远端校验摘要
+            verify_fallback: 远端无法执行校验命令时的策略 skip/readback/fail
+            max_requests: 单个文件同时在途的写请求数
+        """
+        if verify_fallback not in VERIFY_FALLBACKS:
+            raise ValueError(f"不支持的校验回退策略: {verify_fallback}")
+        self.server_config = server_config
+        self.connections = connections
+        self.checksum_algorithm = checksum_algorithm
+        self.verify_remote = verify_remote
+        self.verify_fallback = verify_fallback
+        self.max_requests = max(1, max_requests)
+        self.last_result: typing.Optional[TransferResult] = None
+        # 当前正在写入的远端文件，取消时由调用方删除
+        self.partial_path: typing.Optional[str] = None
+        # 同 Transport.on_partial：临时文件新建后以其路径调用
+        self.on_partial: typing.Optional[typing.Callable[[str], object]] = None
+
+    async def upload(
+        self,
+        local_path: str,
+        remote_path: str,
+        progress_callback: typing.Optional[ProgressCallback] = None,
+    ) -> bool:
+        """上传文件到服务器，写请求流水线发送，返回是否成功
+
+        先写入临时文件，大小核对无误后原子替换目标文件，同 SFTPClient.upload。
+        """
+        self.last_result = None
+        self.partial_path = None
+        conn = None
+        reusable = True
+        try:
+            print(
+                f"[SFTP-async] 本地文件: {local_path} | 远程路径: {remote_path} | 服务器: {self.server_config.host}:{self.server_config.port} | 用户名: {self.server_config.username}"
+            )
+            conn = await self.connections.acquire(self.server_config)
+            async with conn.start_sftp_client() as sftp:
+                part_path = partial_name(remote_path)
+                result = await self._upload_pipelined(
+                    sftp, local_path, part_path, progress_callback
+                )
+                remote_size = (await sftp.stat(part_path)).size
+                if remote_size != result.file_size:
+                    raise OSError(
+                        f"大小不一致: 预期 {result.file_size}，远端 {remote_size}"
+                    )
+                await sftp.posix_rename(part_path, remote_path)
+                self.partial_path = result.remote_path = remote_path
+                if self.verify_remote:
+                    result.verified = await self._verify_remote(
+                        conn, sftp, remote_path, str(result.checksum)
+                    )
+            self.last_result = result
+
+            if result.verified is False:
+                print(f"SFTP校验失败: {remote_path}")
+                return False
+            return True
+
+        except Exception as e:
+            print(f"SFTP上传失败: {str(e)}")
+            # 远端返回的 SFTP 错误不影响连接本身
+            reusable = asyncssh is not None and isinstance(e, asyncssh.SFTPError)
+            return False
+        finally:
+            if conn is not None:
+                await self.connections.release(self.server_config, conn, reusable)
+
+    async def _upload_pipelined(
+        self,
+        sftp: typing.Any,
+        local_path: str,
+        remote_path: str,
+        progress_callback: typing.Optional[ProgressCallback],
+    ) -> TransferResult:
+        """按偏移并发发出写请求，最多 max_requests 个在途；本地读取交给线程池"""
+        loop = asyncio.get_running_loop()
+        local_size = os.path.getsize(local_path)
+        hasher = create_hasher(self.checksum_algorithm)
+        pending: dict[asyncio.Future, int] = {}
+        offset = 0
+        acked = 0
+
+        async def drain(limit: int) -> None:
+            nonlocal acked
+            while len(pending) > limit:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    future.result()
+                    acked += pending.pop(future)
+                if progress_callback and local_size > 0:
+                    progress_callback(acked / local_size)
+
+        try:
+            async with sftp.open(remote_path, "wb") as remote_file:
+                self.partial_path = remote_path
+                if self.on_partial is not None:
+                    self.on_partial(remote_path)
+                with open(local_path, "rb") as local_file:
+                    while True:
+                        chunk = await loop.run_in_executor(
+                            None, local_file.read, CHUNK_SIZE
+                        )
+                        if not chunk:
+                            break
+                        hasher.update(chunk)
+                        future = asyncio.ensure_future(remote_file.write(chunk, offset))
+                        pending[future] = len(chunk)
+                        offset += len(chunk)
+                        await drain(self.max_requests - 1)
+                await drain(0)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+        return TransferResult(
+            local_path=local_path,
+            remote_path=remote_path,
+            file_size=local_size,
+            bytes_sent=offset,
+            checksum=hasher.hexdigest(),
+            checksum_algorithm=self.checksum_algorithm,
+        )
+
+    async def _verify_remote(
+        self, conn: typing.Any, sftp: typing.Any, remote_path: str, expected: str
+    ) -> typing.Optional[bool]:
+        """远端校验摘要，exec 不可用时按回退策略处理"""
+        remote_digest = None
+        command = REMOTE_CHECKSUM_COMMANDS.get(self.checksum_algorithm.lower())
+        if command:
+            try:
+                completed = await conn.run(
+                    f"{command} {shlex.quote(remote_path)}", check=False
+                )
+                if completed.exit_status == 0:
+                    remote_digest = parse_checksum_output(str(completed.stdout))
+            except Exception as e:
+                print(f"[SFTP-async] 远端校验命令不可用: {str(e)}")
+
+        if remote_digest is None:
+            if self.verify_fallback == "skip":
+                return None
+            if self.verify_fallback == "fail":
+                return False
+            hasher = create_hasher(self.checksum_algorithm)
+            async with sftp.open(remote_path, "rb") as remote_file:
+                while True:
+                    chunk = await remote_file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+            remote_digest = hasher.hexdigest()
+        return remote_digest == expected.lower()
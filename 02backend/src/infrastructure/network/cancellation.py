@@ -0,0 +1,51 @@
+import threading
+import typing
+
+
+class TransferCancelled(Exception):
+    """传输已被取消"""
+
+
+class CancelToken:
+    """协作式取消令牌
+
+    传输循环在块之间调用 check()，取消后抛出 TransferCancelled 退出循环；
+    on_cancel 登记的回调在取消时立即执行，用于关闭阻塞在读写中的连接。
+    """
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.callbacks: list[typing.Callable[[], None]] = []
+        self.reason = ""
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self, reason: str = "任务已取消") -> None:
+        """取消并执行已登记的回调，重复调用无效"""
+        with self.lock:
+            if self.event.is_set():
+                return
+            self.reason = reason
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[CANCEL] 取消回调执行失败: {str(e)}")
+
+    def check(self) -> None:
+        """已取消时抛出 TransferCancelled"""
+        if self.event.is_set():
+            raise TransferCancelled(self.reason)
+
+    def on_cancel(self, callback: typing.Callable[[], None]) -> None:
+        """登记取消时执行的回调，已取消时立即执行"""
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(callback)
+                return
+        callback()
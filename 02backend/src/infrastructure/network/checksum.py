@@ -0,0 +1,97 @@
+import hashlib
+import typing
+
+try:  # xxHash 为可选依赖
+    import xxhash
+except ImportError:  # pragma: no cover - 依赖环境决定
+    xxhash = None
+
+# 远端校验命令映射（通过 SSH exec 通道执行）
+REMOTE_CHECKSUM_COMMANDS: dict[str, str] = {
+    "md5": "md5sum",
+    "sha1": "sha1sum",
+    "sha256": "sha256sum",
+    "sha512": "sha512sum",
+    "xxh64": "xxh64sum",
+}
+
+# 远端校验失败时的回退策略
+VERIFY_FALLBACKS = ("skip", "readback", "fail")
+
+# 摘要对象接受的数据：读取线程交出的 memoryview 切片可直接传入，不必复制
+Buffer = typing.Union[bytes, bytearray, memoryview]
+
+
+class Hasher(typing.Protocol):
+    """流式摘要对象协议"""
+
+    def update(self, data: Buffer) -> None: ...
+
+    def hexdigest(self) -> str: ...
+
+
+def supported_algorithms() -> list[str]:
+    """返回当前环境可用的摘要算法"""
+    algorithms = ["md5", "sha1", "sha256", "sha512"]
+    if xxhash is not None:
+        algorithms.append("xxh64")
+    return algorithms
+
+
+def create_hasher(algorithm: str = "sha256") -> Hasher:
+    """创建流式摘要对象，支持 hashlib 算法与 xxh64"""
+    name = algorithm.lower()
+    if name == "xxh64":
+        if xxhash is None:
+            raise ValueError("未安装 xxhash，无法使用 xxh64 校验")
+        return typing.cast(Hasher, xxhash.xxh64())
+    if name not in hashlib.algorithms_available:
+        raise ValueError(f"不支持的校验算法: {algorithm}")
+    return typing.cast(Hasher, hashlib.new(name))
+
+
+def parse_checksum_output(output: str) -> typing.Optional[str]:
+    """解析 sha256sum 等命令的输出，返回摘要字符串"""
+    line = output.strip().splitlines()[0] if output.strip() else ""
+    if not line:
+        return None
+    digest = line.split()[0].lstrip("\\").lower()
+    return digest or None
+
+
+class ProgressHasher:
+    """包装摘要对象，在更新摘要的同时统计字节数并回调进度"""
+
+    def __init__(
+        self,
+        hasher: Hasher,
+        total: int,
+        progress_callback: typing.Optional[typing.Callable[[float], None]] = None,
+    ) -> None:
+        self.hasher = hasher
+        self.total = total
+        self.processed = 0
+        self.progress_callback = progress_callback
+
+    def update(self, data: Buffer) -> None:
+        self.hasher.update(data)
+        self.processed += len(data)
+        if self.progress_callback and self.total > 0:
+            self.progress_callback(min(1.0, self.processed / self.total))
+
+    def hexdigest(self) -> str:
+        return self.hasher.hexdigest()
+
+
+class HashingReader:
+    """包装文件对象，读取时同步更新摘要（供 tarfile 等按需读取的场景）"""
+
+    def __init__(self, fileobj: typing.BinaryIO, hasher: Hasher) -> None:
+        self.fileobj = fileobj
+        self.hasher = hasher
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.fileobj.read(size)
+        if data:
+            self.hasher.update(data)
+        return data
@@ -0,0 +1,105 @@
+import os
+import typing
+import zlib
+
+try:  # zstd 为可选依赖
+    import zstandard
+except ImportError:  # pragma: no cover - 依赖环境决定
+    zstandard = None
+
+COMPRESSION_MODES = ("none", "auto", "gzip", "zstd")
+
+# 远端解压命令（从标准输入读取压缩流）
+REMOTE_DECOMPRESS_COMMANDS: dict[str, str] = {
+    "gzip": "gzip -dc",
+    "zstd": "zstd -dcq",
+}
+
+# 远端保存压缩文件时追加的后缀
+COMPRESSED_SUFFIXES: dict[str, str] = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+# 已压缩格式，直接跳过采样
+INCOMPRESSIBLE_EXTENSIONS = {
+    ".7z",
+    ".bz2",
+    ".gz",
+    ".jpeg",
+    ".jpg",
+    ".mkv",
+    ".mov",
+    ".mp3",
+    ".mp4",
+    ".png",
+    ".rar",
+    ".tgz",
+    ".webp",
+    ".xz",
+    ".zip",
+    ".zst",
+}
+
+# 采样压缩比（压缩后/原始）低于该值才启用压缩
+DEFAULT_RATIO_THRESHOLD = 0.8
+
+
+class Compressor(typing.Protocol):
+    """流式压缩对象协议"""
+
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+def available_codecs() -> list[str]:
+    """返回当前环境可用的压缩算法"""
+    codecs = ["gzip"]
+    if zstandard is not None:
+        codecs.append("zstd")
+    return codecs
+
+
+def sample_ratio(
+    local_path: str, sample_blocks: int = 4, block_size: int = 64 * 1024
+) -> float:
+    """快速采样文件开头若干块，估计压缩比（压缩后/原始，越小越可压缩）"""
+    with open(local_path, "rb") as f:
+        sample = f.read(sample_blocks * block_size)
+    if not sample:
+        return 1.0
+    return len(zlib.compress(sample, 1)) / len(sample)
+
+
+def choose_codec(
+    local_path: str,
+    mode: str = "auto",
+    ratio_threshold: float = DEFAULT_RATIO_THRESHOLD,
+) -> typing.Optional[str]:
+    """按配置和采样结果为文件选择压缩算法，None 表示不压缩"""
+    if mode not in COMPRESSION_MODES:
+        raise ValueError(f"不支持的压缩模式: {mode}")
+    if mode == "none":
+        return None
+    if mode == "zstd" and zstandard is None:
+        raise ValueError("未安装 zstandard，无法使用 zstd 压缩")
+    if mode in ("gzip", "zstd"):
+        return mode
+
+    if os.path.splitext(local_path)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+        return None
+    if sample_ratio(local_path) > ratio_threshold:
+        return None
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def create_compressor(codec: str) -> Compressor:
+    """创建流式压缩对象"""
+    if codec == "gzip":
+        return typing.cast(Compressor, zlib.compressobj(6, zlib.DEFLATED, 31))
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("未安装 zstandard，无法使用 zstd 压缩")
+        return typing.cast(Compressor, zstandard.ZstdCompressor(level=3).compressobj())
+    raise ValueError(f"不支持的压缩算法: {codec}")
@@ -0,0 +1,118 @@
+import threading
+import time
+import typing
+
+import paramiko
+
+from ...domain.models import ServerConfig
+
+PoolKey = tuple[str, ...]
+
+ConnectionT = typing.TypeVar("ConnectionT")
+
+
+class ConnectionPool(typing.Generic[ConnectionT]):
+    """连接池基类，按服务器复用已认证的连接，子类负责建立和检测连接"""
+
+    def __init__(self, max_idle_per_server: int = 4, idle_timeout: float = 300.0):
+        """初始化连接池
+        Args:
+            max_idle_per_server: 每台服务器最多保留的空闲连接数
+            idle_timeout: 空闲连接超过该秒数后不再复用
+        """
+        self.max_idle_per_server = max_idle_per_server
+        self.idle_timeout = idle_timeout
+        self.idle: dict[PoolKey, list[tuple[ConnectionT, float]]] = {}
+        self.lock = threading.Lock()
+
+    def make_key(self, server_config: ServerConfig) -> PoolKey:
+        return (server_config.host, str(server_config.port), server_config.username)
+
+    def acquire(self, server_config: ServerConfig) -> ConnectionT:
+        """取出一个可用连接，没有空闲连接时新建"""
+        key = self.make_key(server_config)
+        now = time.monotonic()
+        while True:
+            with self.lock:
+                entries = self.idle.get(key)
+                if not entries:
+                    break
+                conn, released_at = entries.pop()
+            if now - released_at <= self.idle_timeout and self._probe(conn):
+                return conn
+            self._close(conn)
+
+        return self._connect(server_config)
+
+    def release(
+        self,
+        server_config: ServerConfig,
+        conn: typing.Optional[ConnectionT],
+        reusable: bool = True,
+    ) -> None:
+        """归还连接；出错的连接或空闲数已满时直接关闭"""
+        if conn is None:
+            return
+        if reusable and self._is_alive(conn):
+            key = self.make_key(server_config)
+            with self.lock:
+                entries = self.idle.setdefault(key, [])
+                if len(entries) < self.max_idle_per_server:
+                    entries.append((conn, time.monotonic()))
+                    return
+        self._close(conn)
+
+    def close_all(self) -> None:
+        """关闭所有空闲连接"""
+        with self.lock:
+            entries = [conn for items in self.idle.values() for conn, _ in items]
+            self.idle.clear()
+        for conn in entries:
+            self._close(conn)
+
+    def idle_count(self) -> int:
+        """当前空闲连接总数"""
+        with self.lock:
+            return sum(len(items) for items in self.idle.values())
+
+    def _connect(self, server_config: ServerConfig) -> ConnectionT:
+        """建立并认证新连接"""
+        raise NotImplementedError
+
+    def _is_alive(self, conn: ConnectionT) -> bool:
+        """归还时的本地检查，不产生网络往返"""
+        return True
+
+    def _probe(self, conn: ConnectionT) -> bool:
+        """复用前的检查，默认与 _is_alive 相同"""
+        return self._is_alive(conn)
+
+    def _close(self, conn: ConnectionT) -> None:
+        try:
+            conn.close()  # type: ignore[attr-defined]
+        except Exception:
+            pass
+
+
+class SSHConnectionPool(ConnectionPool[paramiko.SSHClient]):
+    """SSH 连接池，按 (主机, 端口, 用户名) 复用已认证的连接"""
+
+    def _connect(self, server_config: ServerConfig) -> paramiko.SSHClient:
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh.connect(
+            hostname=server_config.host,
+            port=server_config.port,
+            username=server_config.username,
+            password=server_config.password,
+            timeout=30,
+        )
+        return ssh
+
+    def _is_alive(self, conn: paramiko.SSHClient) -> bool:
+        transport = conn.get_transport()
+        return bool(transport is not None and transport.is_active())
+
+
+# 进程内共享的默认连接池
+default_pool = SSHConnectionPool()
@@ -0,0 +1,196 @@
+import hashlib
+import math
+import struct
+import typing
+import zlib
+
+from .checksum import Hasher
+
+# adler32 取模基数
+ADLER_MOD = 65521
+
+# 差量流结束标记
+END_OP = b"E"
+
+# 单个字面量数据段的最大长度，避免无匹配时缓冲无限增长
+MAX_LITERAL = 1024 * 1024
+
+# 差量操作：("copy", 远端块号) 或 ("data", 字面量字节)
+DeltaOp = tuple[str, typing.Union[int, bytes]]
+
+# 远端签名脚本：逐块输出 "adler32 md5"
+REMOTE_SIGNATURE_SCRIPT = """
+import hashlib, sys, zlib
+path, bs = sys.argv[1], int(sys.argv[2])
+out = sys.stdout
+with open(path, "rb") as f:
+    while True:
+        block = f.read(bs)
+        if not block:
+            break
+        out.write("%d %s\\n" % (zlib.adler32(block), hashlib.md5(block).hexdigest()))
+"""
+
+# 远端重建脚本：从标准输入读取差量流，结合旧文件写出新文件
+REMOTE_PATCH_SCRIPT = """
+import os, struct, sys
+old_path, new_path, bs = sys.argv[1], sys.argv[2], int(sys.argv[3])
+src = sys.stdin.buffer
+def read_exact(n):
+    data = b""
+    while len(data) < n:
+        part = src.read(n - len(data))
+        if not part:
+            raise EOFError("delta stream truncated")
+        data += part
+    return data
+with open(old_path, "rb") as old, open(new_path, "wb") as new:
+    while True:
+        op = read_exact(1)
+        if op == b"C":
+            (index,) = struct.unpack(">Q", read_exact(8))
+            old.seek(index * bs)
+            new.write(old.read(bs))
+        elif op == b"D":
+            (length,) = struct.unpack(">I", read_exact(4))
+            new.write(read_exact(length))
+        elif op == b"E":
+            break
+        else:
+            raise ValueError("bad delta op")
+    new.flush()
+    os.fsync(new.fileno())
+"""
+
+
+def choose_block_size(file_size: int) -> int:
+    """按 rsync 经验取 sqrt(文件大小) 作为块大小，限制在 8KB-1MB 之间"""
+    size = int(math.sqrt(max(file_size, 1)))
+    size = (size + 1023) // 1024 * 1024
+    return max(8 * 1024, min(1024 * 1024, size))
+
+
+def rolling_update(weak: int, out_byte: int, in_byte: int, block_size: int) -> int:
+    """adler32 滚动更新：移出 out_byte，移入 in_byte"""
+    a = weak & 0xFFFF
+    b = (weak >> 16) & 0xFFFF
+    a = (a - out_byte + in_byte) % ADLER_MOD
+    b = (b - block_size * out_byte + a - 1) % ADLER_MOD
+    return (b << 16) | a
+
+
+def compute_signatures(
+    fileobj: typing.BinaryIO, block_size: int
+) -> list[tuple[int, str]]:
+    """计算文件的块签名列表 [(adler32, md5), ...]"""
+    signatures = []
+    while True:
+        block = fileobj.read(block_size)
+        if not block:
+            break
+        signatures.append((zlib.adler32(block), hashlib.md5(block).hexdigest()))
+    return signatures
+
+
+def parse_signatures(output: str) -> list[tuple[int, str]]:
+    """解析远端签名脚本输出"""
+    signatures = []
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            signatures.append((int(parts[0]), parts[1]))
+    return signatures
+
+
+def compute_delta(
+    fileobj: typing.BinaryIO,
+    signatures: list[tuple[int, str]],
+    block_size: int,
+    hasher: typing.Optional[Hasher] = None,
+    read_size: int = 4 * 1024 * 1024,
+) -> typing.Iterator[DeltaOp]:
+    """用滚动校验将本地文件与远端块签名匹配，生成差量操作
+
+    对齐位置的块由 zlib 直接计算（C 实现），只有失配时才逐字节滚动，
+    因此原位修改和追加写的文件几乎不落入慢路径。hasher 会收到本地文件的
+    全部字节，可顺便得到整文件摘要。
+    """
+    table: dict[int, list[tuple[str, int]]] = {}
+    for index, (weak_sig, strong_sig) in enumerate(signatures):
+        table.setdefault(weak_sig, []).append((strong_sig, index))
+
+    buf = bytearray()
+    base = 0  # buf[0] 在文件中的偏移
+    pos = 0  # 当前窗口起点（buf 内）
+    literal_start = 0
+    eof = False
+    weak: typing.Optional[int] = None
+
+    def fill() -> bool:
+        chunk = fileobj.read(read_size)
+        if not chunk:
+            return False
+        if hasher is not None:
+            hasher.update(chunk)
+        buf.extend(chunk)
+        return True
+
+    while True:
+        # 保证窗口后至少还有一个字节可供滚动
+        while not eof and len(buf) - pos <= block_size:
+            eof = not fill()
+        if len(buf) - pos < block_size:
+            break
+
+        if weak is None:
+            weak = zlib.adler32(buf[pos : pos + block_size])
+
+        matched = None
+        candidates = table.get(weak)
+        if candidates:
+            strong = hashlib.md5(buf[pos : pos + block_size]).hexdigest()
+            # 多个候选时优先选择原位置的块，便于原地应用
+            offset = base + pos
+            aligned = offset // block_size if offset % block_size == 0 else -1
+            for strong_sig, index in candidates:
+                if strong_sig == strong:
+                    matched = index
+                    if index == aligned:
+                        break
+
+        if matched is not None:
+            if pos > literal_start:
+                yield ("data", bytes(buf[literal_start:pos]))
+            yield ("copy", matched)
+            pos += block_size
+            literal_start = pos
+            weak = None
+        else:
+            if pos + block_size >= len(buf):
+                break
+            weak = rolling_update(weak, buf[pos], buf[pos + block_size], block_size)
+            pos += 1
+            if pos - literal_start >= MAX_LITERAL:
+                yield ("data", bytes(buf[literal_start:pos]))
+                literal_start = pos
+
+        # 丢弃已输出的数据，保持缓冲有界
+        if literal_start >= read_size:
+            del buf[:literal_start]
+            base += literal_start
+            pos -= literal_start
+            literal_start = 0
+
+    while not eof:
+        eof = not fill()
+    tail = bytes(buf[literal_start:])
+    for start in range(0, len(tail), MAX_LITERAL):
+        yield ("data", tail[start : start + MAX_LITERAL])
+
+
+def encode_op(op: DeltaOp) -> bytes:
+    """将单个差量操作编码为远端重建脚本的输入格式"""
+    _, value = op
+    if isinstance(value, int):
+        return b"C" + struct.pack(">Q", value)
+    return b"D" + struct.pack(">I", len(value)) + value
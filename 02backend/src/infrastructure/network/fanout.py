@@ -0,0 +1,200 @@
+import os
+import threading
+import typing
+
+from .readahead import READ_AHEAD_CHUNK
+
+# 共享环形缓冲区的块数（所有目标共用，最多占用 块大小 x 块数 的内存）
+FANOUT_BUFFERS = 16
+
+
+class FanOutReader:
+    """读取一次本地文件，分发给多个目标的数据流
+
+    读线程把文件按块读入共享环形缓冲区，各目标的流按自己的进度消费。
+    环形缓冲区满且有目标在等待新数据时，最慢的目标脱离共享缓冲区、
+    改为自行从文件读取，慢目标只拖慢它自己。
+
+    用法:
+        with FanOutReader(path, 3) as fan:
+            streams = [fan.stream(i) for i in range(3)]
+            ...  # 每个流交给一个目标的上传线程，用完后 close
+    """
+
+    def __init__(
+        self,
+        path: str,
+        consumers: int,
+        chunk_size: int = READ_AHEAD_CHUNK,
+        buffers: int = FANOUT_BUFFERS,
+    ):
+        """初始化
+        Args:
+            path: 本地文件路径
+            consumers: 目标数，每个目标通过 stream(index) 取得自己的流
+            chunk_size: 单次读取大小
+            buffers: 环形缓冲区块数
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.buffers = max(1, buffers)
+        self.ring: list[bytes] = [b""] * self.buffers
+        self.produced = 0
+        self.eof = False
+        self.error: typing.Optional[Exception] = None
+        self.cursors = [0] * consumers
+        # attached: 从共享缓冲区读取；detached: 自行读文件；closed: 已结束
+        self.states = ["attached"] * consumers
+        self.waiting = 0
+        self.stopped = False
+        self.cond = threading.Condition()
+        self.thread: typing.Optional[threading.Thread] = None
+
+    def __enter__(self) -> "FanOutReader":
+        self.start()
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """启动读线程"""
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self._run, name="fan-out", daemon=True
+            )
+            self.thread.start()
+
+    def close(self) -> None:
+        """停止读线程"""
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def stream(self, index: int) -> "FanOutStream":
+        """取得第 index 个目标的数据流"""
+        return FanOutStream(self, index)
+
+    def detached(self, index: int) -> bool:
+        """该目标是否已脱离共享缓冲区"""
+        return self.states[index] == "detached"
+
+    def _run(self) -> None:
+        try:
+            with open(self.path, "rb", buffering=0) as local_file:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(
+                        local_file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL
+                    )
+                while True:
+                    with self.cond:
+                        while not self.stopped and self._ring_full():
+                            if self.waiting:
+                                self._detach_slowest()
+                            else:
+                                self.cond.wait()
+                        if self.stopped or "attached" not in self.states:
+                            return
+                    data = local_file.read(self.chunk_size)
+                    with self.cond:
+                        if not data:
+                            self.eof = True
+                            self.cond.notify_all()
+                            return
+                        self.ring[self.produced % self.buffers] = data
+                        self.produced += 1
+                        self.cond.notify_all()
+        except Exception as e:
+            with self.cond:
+                self.error = e
+                self.cond.notify_all()
+
+    def _ring_full(self) -> bool:
+        """最慢的共享目标是否已落后整个环形缓冲区"""
+        attached = [
+            cursor
+            for cursor, state in zip(self.cursors, self.states)
+            if state == "attached"
+        ]
+        return bool(attached) and self.produced - min(attached) >= self.buffers
+
+    def _detach_slowest(self) -> None:
+        index = min(
+            (i for i, state in enumerate(self.states) if state == "attached"),
+            key=lambda i: self.cursors[i],
+        )
+        self.states[index] = "detached"
+        print(f"[FANOUT] 目标 {index} 落后于共享缓冲区，改为独立读取: {self.path}")
+        self.cond.notify_all()
+
+    def _next_chunk(self, index: int) -> typing.Optional[bytes]:
+        """从共享缓冲区取下一块；已脱离时返回None，由调用方自行读文件"""
+        with self.cond:
+            while True:
+                state = self.states[index]
+                if state == "closed":
+                    return b""
+                if state == "detached":
+                    return None
+                if self.error is not None:
+                    raise self.error
+                cursor = self.cursors[index]
+                if cursor < self.produced:
+                    self.cursors[index] += 1
+                    self.cond.notify_all()
+                    return self.ring[cursor % self.buffers]
+                if self.eof:
+                    return b""
+                self.waiting += 1
+                try:
+                    self.cond.wait()
+                finally:
+                    self.waiting -= 1
+
+    def _release(self, index: int) -> None:
+        with self.cond:
+            self.states[index] = "closed"
+            self.cond.notify_all()
+
+
+class FanOutStream:
+    """FanOutReader 中单个目标的二进制流"""
+
+    def __init__(self, reader: FanOutReader, index: int):
+        self.reader = reader
+        self.index = index
+        self.pending = memoryview(b"")
+        self.local_file: typing.Optional[typing.BinaryIO] = None
+
+    def read(self, size: int = -1) -> bytes:
+        """读取最多 size 字节，文件读完返回 b\"\" """
+        if not self.pending:
+            chunk = None
+            if self.local_file is None:
+                chunk = self.reader._next_chunk(self.index)
+            if chunk is None:
+                chunk = self._read_detached()
+            self.pending = memoryview(chunk)
+        if size < 0 or size >= len(self.pending):
+            data, self.pending = self.pending, memoryview(b"")
+        else:
+            data, self.pending = self.pending[:size], self.pending[size:]
+        return bytes(data)
+
+    def close(self) -> None:
+        """结束读取，不再占用共享缓冲区"""
+        self.reader._release(self.index)
+        if self.local_file is not None:
+            self.local_file.close()
+            self.local_file = None
+
+    def _read_detached(self) -> bytes:
+        """脱离共享缓冲区后从已消费位置起自行读取文件"""
+        if self.local_file is None:
+            reader = self.reader
+            self.local_file = open(reader.path, "rb")
+            self.local_file.seek(reader.cursors[self.index] * reader.chunk_size)
+        return self.local_file.read(self.reader.chunk_size)
@@ -0,0 +1,506 @@
+import calendar
+import contextlib
+import ftplib
+import os
+import posixpath
+import ssl
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from ...domain.models import ServerConfig, TransferResult
+from .checksum import VERIFY_FALLBACKS, create_hasher
+from .connection_pool import ConnectionPool, PoolKey
+from .transport import (
+    TRANSFER_MODES,
+    ProgressCallback,
+    RemoteEntry,
+    Transport,
+    register_transport,
+)
+
+# 单次读写块大小
+CHUNK_SIZE = 64 * 1024
+
+# 启用多数据连接并行上传的默认文件大小阈值
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+
+
+class ReusedSessionFTPTLS(ftplib.FTP_TLS):
+    """数据连接复用控制连接 TLS 会话的 FTP_TLS
+
+    vsftpd 等服务器默认要求数据连接复用控制连接的 TLS 会话，标准库
+    FTP_TLS 每次都新建会话，既会被拒绝，也多一次完整握手。
+    """
+
+    def ntransfercmd(
+        self, cmd: str, rest: typing.Optional[typing.Union[int, str]] = None
+    ) -> tuple[typing.Any, typing.Optional[int]]:
+        conn, size = ftplib.FTP.ntransfercmd(self, cmd, rest)
+        if self._prot_p:  # type: ignore[attr-defined]
+            conn = self.context.wrap_socket(
+                conn,
+                server_hostname=self.host,
+                session=self.sock.session,  # type: ignore[union-attr]
+            )
+        return conn, size
+
+
+class FTPConnectionPool(ConnectionPool[ftplib.FTP]):
+    """FTP 控制连接池，按 (协议, 主机, 端口, 用户名) 复用已登录的连接"""
+
+    def make_key(self, server_config: ServerConfig) -> PoolKey:
+        return (server_config.protocol.upper(),) + super().make_key(server_config)
+
+    def _connect(self, server_config: ServerConfig) -> ftplib.FTP:
+        tls = server_config.protocol.upper() == "FTPS"
+        ftp = ReusedSessionFTPTLS(timeout=30) if tls else ftplib.FTP(timeout=30)
+        ftp.connect(server_config.host, server_config.port)
+        ftp.login(server_config.username, server_config.password)
+        if isinstance(ftp, ftplib.FTP_TLS):
+            ftp.prot_p()
+        ftp.set_pasv(True)
+        ftp.voidcmd("TYPE I")
+        return ftp
+
+    def _is_alive(self, conn: ftplib.FTP) -> bool:
+        return conn.sock is not None
+
+    def _probe(self, conn: ftplib.FTP) -> bool:
+        # 服务器可能已因空闲超时断开，复用前用 NOOP 确认
+        try:
+            conn.voidcmd("NOOP")
+            return True
+        except Exception:
+            return False
+
+
+# 进程内共享的默认 FTP 连接池
+default_ftp_pool = FTPConnectionPool(idle_timeout=60.0)
+
+
+@register_transport("FTP", "FTPS")
+class FTPClient(Transport):
+    """FTP/FTPS文件传输客户端接口"""
+
+    def __init__(
+        self,
+        server_config: ServerConfig,
+        checksum_algorithm: str = "sha256",
+        verify_remote: bool = False,
+        verify_fallback: str = "skip",
+        resume: bool = False,
+        parallel_connections: int = 4,
+        parallel_threshold: int = PARALLEL_THRESHOLD,
+        pool: typing.Optional[FTPConnectionPool] = None,
+    ) -> None:
+        """初始化FTP客户端
+        Args:
+            server_config: 服务器配置，protocol 为 FTPS 时使用显式 TLS
+            checksum_algorithm: 上传时流式计算的摘要算法
+            verify_remote: 上传后是否校验远端文件（FTP 无法执行命令，按回退策略处理）
+            verify_fallback: 远端校验策略 skip/readback/fail
+            resume: 远端已有较短的同名文件时，用 REST 从断点续传
+            parallel_connections: 大文件并行上传使用的数据连接数，1 表示不并行
+            parallel_threshold: 启用并行上传的文件大小阈值
+            pool: FTP 连接池，默认使用进程内共享连接池
+        """
+        if verify_fallback not in VERIFY_FALLBACKS:
+            raise ValueError(f"不支持的校验回退策略: {verify_fallback}")
+        super().__init__(server_config)
+        self.checksum_algorithm = checksum_algorithm
+        self.verify_remote = verify_remote
+        self.verify_fallback = verify_fallback
+        self.resume = resume
+        self.parallel_connections = max(1, parallel_connections)
+        self.parallel_threshold = parallel_threshold
+        self.pool = pool or default_ftp_pool
+        self.ftp: typing.Optional[ftplib.FTP] = None
+
+    def upload(
+        self,
+        local_path: str,
+        remote_path: str,
+        progress_callback: typing.Optional[ProgressCallback] = None,
+        mode: str = "auto",
+    ) -> bool:
+        """上传文件到服务器，支持进度回调，返回是否成功
+
+        FTP 不支持差量传输，delta 模式按完整上传处理。超过 parallel_threshold
+        的文件按区段经多个数据连接并行上传，服务器不支持 REST 时退回单连接。
+        """
+        if mode not in TRANSFER_MODES:
+            raise ValueError(f"不支持的传输模式: {mode}")
+        self.last_result = None
+        self.partial_path = None
+        try:
+            print(
+                f"[FTP] 本地文件: {local_path} | 远程路径: {remote_path} | 服务器: {self.server_config.host}:{self.server_config.port} | 用户名: {self.server_config.username} | 协议: {self.server_config.protocol}"
+            )
+            if mode == "delta":
+                print("[FTP] FTP 不支持差量传输，改为完整上传")
+
+            ftp = self._acquire()
+            local_size = os.path.getsize(local_path)
+            offset = self._resume_offset(ftp, remote_path, local_size)
+            self.partial_path = remote_path
+
+            result = None
+            if (
+                offset == 0
+                and self.parallel_connections > 1
+                and local_size >= self.parallel_threshold
+            ):
+                result = self._upload_parallel(
+                    local_path, remote_path, local_size, progress_callback
+                )
+            if result is None:
+                result = self._upload_stream(
+                    ftp, local_path, remote_path, local_size, offset, progress_callback
+                )
+
+            # 服务器支持 SIZE 时确认远端文件大小
+            remote_size = self._size(ftp, remote_path)
+            if remote_size is not None and remote_size != local_size:
+                raise OSError(f"大小不一致: 预期 {local_size}，远端 {remote_size}")
+            if self.verify_remote:
+                result.verified = self._verify_remote(
+                    ftp, remote_path, str(result.checksum)
+                )
+            self.last_result = result
+            self._release()
+
+            if result.verified is False:
+                print(f"FTP校验失败: {remote_path}")
+                return False
+            return True
+
+        except Exception as e:
+            print(f"FTP上传失败: {str(e)}")
+            self._release(False)
+            return False
+
+    def remote_size(self, remote_path: str) -> typing.Optional[int]:
+        """通过 SIZE 命令查询远端文件大小，不存在或不支持时返回None"""
+        try:
+            size = self._size(self._acquire(), remote_path)
+            self._release()
+            return size
+        except Exception:
+            self._release(False)
+            return None
+
+    def connect(self) -> None:
+        """提前从连接池取得控制连接"""
+        self._acquire()
+
+    def close(self) -> None:
+        """归还当前连接到连接池"""
+        self._release()
+
+    def abort(self) -> None:
+        """关闭控制连接，服务器随之中止数据连接上的传输"""
+        if self.ftp is not None:
+            self.ftp.close()
+
+    def put_range(
+        self, local_path: str, remote_path: str, offset: int, length: int
+    ) -> int:
+        """用 REST 偏移将本地文件区段写入远端文件相同位置"""
+        with self._ftp_session() as ftp:
+            return self._store_range(ftp, local_path, remote_path, offset, length)
+
+    def stat(self, remote_path: str) -> typing.Optional[RemoteEntry]:
+        """用 MLST 查询远端文件信息，服务器不支持时退回 SIZE"""
+        name = posixpath.basename(remote_path.rstrip("/"))
+        with self._ftp_session() as ftp:
+            try:
+                lines = ftp.sendcmd(f"MLST {remote_path}").splitlines()
+            except ftplib.error_perm as e:
+                if str(e).startswith("550"):
+                    return None
+                # 服务器不支持 MLST
+                size = self._size(ftp, remote_path)
+                return None if size is None else RemoteEntry(name, size, 0.0)
+        facts = lines[1].strip().split(" ", 1)[0] if len(lines) > 1 else ""
+        return self._entry(name, dict(self._parse_facts(facts)))
+
+    def mkdir(self, remote_path: str, parents: bool = True) -> None:
+        """创建远端目录，parents 为 True 时忽略已存在的目录"""
+        with self._ftp_session() as ftp:
+            if not parents:
+                ftp.mkd(remote_path)
+                return
+            current = "/" if remote_path.startswith("/") else ""
+            for part in remote_path.strip("/").split("/"):
+                current = posixpath.join(current, part)
+                try:
+                    ftp.mkd(current)
+                except ftplib.error_perm:
+                    pass  # 已存在
+
+    def rename(self, source_path: str, remote_path: str) -> None:
+        """RNFR/RNTO 重命名远端文件"""
+        with self._ftp_session() as ftp:
+            ftp.rename(source_path, remote_path)
+
+    def remove(self, remote_path: str) -> None:
+        """DELE 删除远端文件"""
+        with self._ftp_session() as ftp:
+            ftp.delete(remote_path)
+
+    def listdir(self, remote_path: str) -> list[RemoteEntry]:
+        """用 MLSD 列出远端目录内容"""
+        with self._ftp_session() as ftp:
+            return [
+                self._entry(name, facts)
+                for name, facts in ftp.mlsd(remote_path, ["type", "size", "modify"])
+                if facts.get("type") not in ("cdir", "pdir")
+            ]
+
+    def _upload_stream(
+        self,
+        ftp: ftplib.FTP,
+        local_path: str,
+        remote_path: str,
+        local_size: int,
+        offset: int,
+        progress_callback: typing.Optional[ProgressCallback],
+    ) -> TransferResult:
+        """单个数据连接上传，offset 大于 0 时用 REST 续传"""
+        hasher = create_hasher(self.checksum_algorithm)
+        transferred = offset
+        with open(local_path, "rb") as local_file:
+            # 续传时已在远端的前缀只参与摘要，不重复发送
+            while local_file.tell() < offset:
+                chunk = local_file.read(min(CHUNK_SIZE, offset - local_file.tell()))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+
+            def on_block(chunk: bytes) -> None:
+                nonlocal transferred
+                hasher.update(chunk)
+                transferred += len(chunk)
+                if progress_callback and local_size > 0:
+                    progress_callback(transferred / local_size)
+
+            ftp.storbinary(
+                f"STOR {remote_path}",
+                local_file,
+                blocksize=CHUNK_SIZE,
+                callback=on_block,
+                rest=offset or None,
+            )
+
+        return TransferResult(
+            local_path=local_path,
+            remote_path=remote_path,
+            file_size=local_size,
+            bytes_sent=transferred - offset,
+            checksum=hasher.hexdigest(),
+            checksum_algorithm=self.checksum_algorithm,
+            mode="resumed" if offset else "full",
+        )
+
+    def _upload_parallel(
+        self,
+        local_path: str,
+        remote_path: str,
+        local_size: int,
+        progress_callback: typing.Optional[ProgressCallback],
+    ) -> typing.Optional[TransferResult]:
+        """将文件切分为区段，每段使用独立的控制/数据连接以 REST 偏移并行写入
+        Returns:
+            传输结果；任一区段失败时返回None，由调用方单连接重传
+        """
+        part = -(-local_size // self.parallel_connections)
+        ranges = [
+            (start, min(part, local_size - start))
+            for start in range(0, local_size, part)
+        ]
+        opened = threading.Event()
+        lock = threading.Lock()
+        transferred = 0
+
+        def on_sent(size: int) -> None:
+            nonlocal transferred
+            with lock:
+                transferred += size
+                done = transferred
+            if progress_callback:
+                progress_callback(done / local_size)
+
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [
+                executor.submit(
+                    self._send_range,
+                    local_path,
+                    remote_path,
+                    start,
+                    length,
+                    opened,
+                    on_sent,
+                )
+                for start, length in ranges
+            ]
+            # 各区段发送期间在本线程顺序计算整文件摘要
+            hasher = create_hasher(self.checksum_algorithm)
+            with open(local_path, "rb") as local_file:
+                while True:
+                    chunk = local_file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+            errors = [future.exception() for future in futures]
+
+        failed = [e for e in errors if e is not None]
+        if failed:
+            print(f"[FTP] 并行上传失败，改为单连接上传: {str(failed[0])}")
+            return None
+        return TransferResult(
+            local_path=local_path,
+            remote_path=remote_path,
+            file_size=local_size,
+            bytes_sent=local_size,
+            checksum=hasher.hexdigest(),
+            checksum_algorithm=self.checksum_algorithm,
+        )
+
+    def _send_range(
+        self,
+        local_path: str,
+        remote_path: str,
+        start: int,
+        length: int,
+        opened: threading.Event,
+        on_sent: typing.Callable[[int], None],
+    ) -> None:
+        """经独立连接发送 [start, start+length) 区段"""
+        # 首段不带 REST，由它创建并截断远端文件，其余区段等它打开后再写入
+        if start > 0:
+            opened.wait()
+        ftp = None
+        try:
+            ftp = self.pool.acquire(self.server_config)
+            self._store_range(
+                ftp, local_path, remote_path, start, length, opened, on_sent
+            )
+        except Exception:
+            if start == 0:
+                opened.set()
+            self.pool.release(self.server_config, ftp, False)
+            raise
+        self.pool.release(self.server_config, ftp)
+
+    @staticmethod
+    def _store_range(
+        ftp: ftplib.FTP,
+        local_path: str,
+        remote_path: str,
+        start: int,
+        length: int,
+        opened: typing.Optional[threading.Event] = None,
+        on_sent: typing.Optional[typing.Callable[[int], None]] = None,
+    ) -> int:
+        """在给定控制连接上发送区段，首段不带 REST（会创建并截断远端文件）"""
+        conn = ftp.transfercmd(f"STOR {remote_path}", rest=start or None)
+        if opened is not None:
+            opened.set()
+        sent = 0
+        try:
+            with open(local_path, "rb") as local_file:
+                local_file.seek(start)
+                while sent < length:
+                    chunk = local_file.read(min(CHUNK_SIZE, length - sent))
+                    if not chunk:
+                        break
+                    conn.sendall(chunk)
+                    sent += len(chunk)
+                    if on_sent:
+                        on_sent(len(chunk))
+            if isinstance(conn, ssl.SSLSocket):
+                conn.unwrap()
+        finally:
+            conn.close()
+        ftp.voidresp()
+        return sent
+
+    def _resume_offset(self, ftp: ftplib.FTP, remote_path: str, local_size: int) -> int:
+        """续传起点：远端已有比本地短的同名文件时返回其大小"""
+        if not self.resume:
+            return 0
+        size = self._size(ftp, remote_path)
+        if size is None or size >= local_size:
+            return 0
+        print(f"[FTP] 从 {size} 字节处续传: {remote_path}")
+        return size
+
+    @staticmethod
+    def _size(ftp: ftplib.FTP, remote_path: str) -> typing.Optional[int]:
+        """SIZE 命令查询远端大小，文件不存在或服务器不支持时返回None"""
+        try:
+            return ftp.size(remote_path)
+        except ftplib.error_perm:
+            return None
+
+    def _verify_remote(
+        self, ftp: ftplib.FTP, remote_path: str, expected: str
+    ) -> typing.Optional[bool]:
+        """FTP 无法执行远端命令，按回退策略跳过、判定失败或回读校验
+        Returns:
+            True/False 表示校验结果，None 表示跳过校验
+        """
+        if self.verify_fallback == "skip":
+            return None
+        if self.verify_fallback == "fail":
+            return False
+        hasher = create_hasher(self.checksum_algorithm)
+        ftp.retrbinary(f"RETR {remote_path}", hasher.update, blocksize=CHUNK_SIZE)
+        return hasher.hexdigest() == expected.lower()
+
+    @staticmethod
+    def _parse_facts(facts: str) -> typing.Iterator[tuple[str, str]]:
+        """解析 MLST 事实串 type=file;size=1;modify=20240101000000;"""
+        for fact in facts.split(";"):
+            if "=" in fact:
+                key, value = fact.split("=", 1)
+                yield key.lower(), value
+
+    @staticmethod
+    def _entry(name: str, facts: dict[str, str]) -> RemoteEntry:
+        mtime = 0.0
+        modify = facts.get("modify", "")
+        if len(modify) >= 14:
+            mtime = calendar.timegm(time.strptime(modify[:14], "%Y%m%d%H%M%S"))
+        return RemoteEntry(
+            name=name,
+            size=int(facts.get("size", 0) or 0),
+            mtime=float(mtime),
+            is_dir=facts.get("type", "").lower() == "dir",
+        )
+
+    @contextlib.contextmanager
+    def _ftp_session(self) -> typing.Iterator[ftplib.FTP]:
+        """取得控制连接，操作结束后归还；服务器回复的错误不影响连接复用"""
+        try:
+            yield self._acquire()
+        except ftplib.error_perm:
+            self._release()
+            raise
+        except Exception:
+            self._release(False)
+            raise
+        self._release()
+
+    def _acquire(self) -> ftplib.FTP:
+        """从连接池取得控制连接（同一次操作内复用）"""
+        if self.ftp is None:
+            self.ftp = self.pool.acquire(self.server_config)
+        return self.ftp
+
+    def _release(self, reusable: bool = True) -> None:
+        """归还连接；出错时关闭而不放回连接池"""
+        ftp, self.ftp = self.ftp, None
+        self.pool.release(self.server_config, ftp, reusable)
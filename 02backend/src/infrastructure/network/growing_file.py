@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+import typing
+
+# 读到末尾后等待新数据的轮询间隔（秒）
+FOLLOW_POLL_INTERVAL = 0.2
+
+# 既没有新数据也没有完成通知时放弃的秒数
+FOLLOW_IDLE_TIMEOUT = 600.0
+
+# 浏览器下载过程中使用的临时文件后缀（Chrome / Firefox）
+PARTIAL_SUFFIXES = (".crdownload", ".part")
+
+
+class GrowingFileReader:
+    """读取仍在写入的文件，读到末尾时等待新数据，收到完成通知后才返回 EOF
+
+    下载中的文件通常是最终路径加 .crdownload/.part 后缀，完成时由浏览器
+    重命名为最终文件名。读取器打开临时文件后一直使用同一个文件描述符，
+    重命名不影响读取；尚未找到临时文件就收到完成通知时直接打开最终文件。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        partial_paths: typing.Optional[list[str]] = None,
+        poll_interval: float = FOLLOW_POLL_INTERVAL,
+        idle_timeout: float = FOLLOW_IDLE_TIMEOUT,
+    ):
+        """初始化
+        Args:
+            path: 下载完成后的最终路径
+            partial_paths: 下载中的临时文件路径，默认为最终路径加常见后缀
+            poll_interval: 等待新数据的轮询间隔
+            idle_timeout: 无新数据且未完成时的超时秒数
+        """
+        self.path = path
+        self.partial_paths = (
+            partial_paths
+            if partial_paths is not None
+            else [path + suffix for suffix in PARTIAL_SUFFIXES]
+        )
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.fd: typing.Optional[int] = None
+        self.offset = 0
+        self.total_size: typing.Optional[int] = None
+        self.error: typing.Optional[str] = None
+        self.completed = threading.Event()
+        self.changed = threading.Event()
+        self.last_activity = time.monotonic()
+
+    def finish(self, total_size: typing.Optional[int] = None) -> None:
+        """通知写入方已完成
+        Args:
+            total_size: 最终大小，未知时读到文件末尾为止
+        """
+        self.total_size = total_size
+        self.completed.set()
+        self.changed.set()
+
+    def abort(self, reason: str = "下载已中断") -> None:
+        """放弃读取，之后的读取抛出 OSError"""
+        self.error = reason
+        self.completed.set()
+        self.changed.set()
+
+    def readinto(self, buffer: typing.Any) -> int:
+        """读取到 buffer，暂无新数据时等待；返回 0 表示文件已完整读出"""
+        view = memoryview(buffer).cast("B")
+        while True:
+            if self.error is not None:
+                raise OSError(self.error)
+            # 先取完成状态再读取，完成通知之后的一次空读才是真正的末尾
+            done = self.completed.is_set()
+            if self.fd is None:
+                self.fd = self._open(done)
+            if self.fd is not None:
+                limit = len(view)
+                if self.total_size is not None:
+                    limit = min(limit, self.total_size - self.offset)
+                size = os.preadv(self.fd, [view[:limit]], self.offset) if limit else 0
+                if size:
+                    self.offset += size
+                    self.last_activity = time.monotonic()
+                    return size
+                if done:
+                    if self.total_size is not None and self.offset < self.total_size:
+                        raise OSError(
+                            f"文件不完整: 预期 {self.total_size}，实际 {self.offset}"
+                        )
+                    return 0
+            if time.monotonic() - self.last_activity > self.idle_timeout:
+                raise TimeoutError(f"等待文件写入超时: {self.path}")
+            self.changed.wait(self.poll_interval)
+            self.changed.clear()
+
+    def read(self, size: int = -1) -> bytes:
+        """读取最多 size 字节，语义同 readinto"""
+        buffer = bytearray(size if size > 0 else 1024 * 1024)
+        count = self.readinto(buffer)
+        return bytes(buffer[:count])
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def _open(self, done: bool) -> typing.Optional[int]:
+        """打开临时文件；已完成时打开最终文件；都不存在时返回None"""
+        candidates = [self.path] if done else self.partial_paths
+        for candidate in candidates:
+            try:
+                return os.open(candidate, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+        if done:
+            raise FileNotFoundError(f"文件不存在: {self.path}")
+        return None
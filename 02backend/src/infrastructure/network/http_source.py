@@ -0,0 +1,211 @@
+import os
+import re
+import time
+import typing
+import urllib.parse
+from dataclasses import dataclass
+
+import requests
+import urllib3
+
+# 读取 HTTP 响应体的块大小
+HTTP_CHUNK_SIZE = 256 * 1024
+
+# 连接中断后按 Range 续传的最多次数
+HTTP_RETRIES = 3
+
+# 首次重试前的等待秒数，之后逐次加倍
+HTTP_RETRY_BACKOFF = 0.5
+
+# 连接与读取超时（秒）
+HTTP_TIMEOUT = 30
+
+
+@dataclass
+class SourceInfo:
+    """HTTP 源文件信息"""
+
+    size: typing.Optional[int]
+    accept_ranges: bool
+    validator: typing.Optional[str] = None  # ETag 或 Last-Modified，用于 If-Range
+    file_name: str = ""
+
+
+class HttpSource:
+    """HTTP(S) 源：探测大小与 Range 支持，按区段打开可续传的响应流
+
+    请求统一带 Accept-Encoding: identity，区段偏移即文件字节偏移。
+    requests.Session 不保证线程安全，每个响应流使用独立会话，
+    区段流可以在不同线程中并行读取。
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: typing.Optional[dict[str, str]] = None,
+        cookies: typing.Optional[dict[str, str]] = None,
+        retries: int = HTTP_RETRIES,
+        timeout: float = HTTP_TIMEOUT,
+    ):
+        """初始化
+        Args:
+            url: 源地址
+            headers: 随请求转发的请求头，如 Referer、Authorization
+            cookies: 随请求转发的 Cookie
+            retries: 连接中断后续传的最多次数
+            timeout: 连接与读取超时
+        """
+        if urllib.parse.urlsplit(url).scheme not in ("http", "https"):
+            raise ValueError(f"不支持的源地址: {url}")
+        self.url = url
+        self.headers = dict(headers or {})
+        self.cookies = dict(cookies or {})
+        self.retries = retries
+        self.timeout = timeout
+        self.info: typing.Optional[SourceInfo] = None
+
+    def new_session(self) -> requests.Session:
+        """创建带转发请求头与 Cookie 的会话"""
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.headers["Accept-Encoding"] = "identity"
+        session.cookies.update(self.cookies)
+        return session
+
+    def probe(self) -> SourceInfo:
+        """请求首字节，获取大小、是否支持 Range 与文件名"""
+        session = self.new_session()
+        response = session.get(
+            self.url,
+            headers={"Range": "bytes=0-0"},
+            stream=True,
+            timeout=self.timeout,
+        )
+        try:
+            if response.status_code == 416:
+                # 空文件无法满足 bytes=0-0
+                self.info = SourceInfo(0, False, file_name=self._file_name(response))
+                return self.info
+            response.raise_for_status()
+            size = None
+            accept_ranges = response.status_code == 206
+            if accept_ranges:
+                match = re.match(
+                    r"bytes\s+\d+-\d+/(\d+)", response.headers.get("Content-Range", "")
+                )
+                size = int(match.group(1)) if match else None
+            elif response.headers.get("Content-Length"):
+                size = int(response.headers["Content-Length"])
+            self.info = SourceInfo(
+                size=size,
+                accept_ranges=accept_ranges and size is not None,
+                validator=response.headers.get("ETag")
+                or response.headers.get("Last-Modified"),
+                file_name=self._file_name(response),
+            )
+            return self.info
+        finally:
+            response.close()
+            session.close()
+
+    def open(self, start: int = 0, end: typing.Optional[int] = None) -> "HttpStream":
+        """打开 [start, end) 区段的响应流，end 为None表示读到末尾"""
+        if self.info is None:
+            self.probe()
+        return HttpStream(self, start, end)
+
+    def _file_name(self, response: requests.Response) -> str:
+        """从 Content-Disposition 或 URL 路径推断文件名"""
+        disposition = response.headers.get("Content-Disposition", "")
+        match = re.search(r"filename\*=(?:UTF-8'')?([^;]+)", disposition, re.I)
+        if match:
+            return os.path.basename(urllib.parse.unquote(match.group(1).strip('"')))
+        match = re.search(r'filename="?([^";]+)"?', disposition, re.I)
+        if match:
+            return os.path.basename(match.group(1))
+        path = urllib.parse.urlsplit(response.url or self.url).path
+        return os.path.basename(urllib.parse.unquote(path))
+
+
+class HttpStream:
+    """HTTP 响应体的二进制流，连接中断时从已读位置按 Range 续传"""
+
+    def __init__(self, source: HttpSource, start: int, end: typing.Optional[int]):
+        self.source = source
+        self.offset = start
+        self.end = end
+        self.session = source.new_session()
+        self.response: typing.Optional[requests.Response] = None
+        self.attempts = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """读取最多 size 字节，区段读完返回 b\"\" """
+        while True:
+            remaining = None if self.end is None else self.end - self.offset
+            if remaining == 0:
+                return b""
+            count = size if size > 0 else HTTP_CHUNK_SIZE
+            if remaining is not None:
+                count = min(count, remaining)
+            error: typing.Optional[Exception] = None
+            data = b""
+            try:
+                if self.response is None:
+                    self.response = self._connect()
+                data = self.response.raw.read(count)
+            except requests.HTTPError:
+                raise
+            except (
+                requests.RequestException,
+                urllib3.exceptions.HTTPError,
+                OSError,
+            ) as e:
+                error = e
+            if data:
+                self.offset += len(data)
+                return data
+            if error is None and remaining is None:
+                return b""
+            self._retry(error)
+
+    def close(self) -> None:
+        self._close_response()
+        self.session.close()
+
+    def _close_response(self) -> None:
+        if self.response is not None:
+            self.response.close()
+            self.response = None
+
+    def _connect(self) -> requests.Response:
+        """从当前位置发起请求，区段请求必须得到 206"""
+        info = self.source.info
+        headers = {}
+        ranged = self.offset > 0 or self.end is not None
+        if ranged:
+            last = "" if self.end is None else str(self.end - 1)
+            headers["Range"] = f"bytes={self.offset}-{last}"
+            if info is not None and info.validator:
+                headers["If-Range"] = info.validator
+        response = self.session.get(
+            self.source.url, headers=headers, stream=True, timeout=self.source.timeout
+        )
+        if response.status_code >= 400:
+            response.close()
+            response.raise_for_status()
+        if ranged and response.status_code != 206:
+            # 源不支持 Range，或 If-Range 不匹配说明源文件已变化
+            response.close()
+            raise ValueError(f"源不支持区段请求或已变化: HTTP {response.status_code}")
+        return response
+
+    def _retry(self, error: typing.Optional[Exception]) -> None:
+        """连接中断或提前结束时等待后重连，无法续传或超过次数时抛出"""
+        self._close_response()
+        info = self.source.info
+        self.attempts += 1
+        resumable = info is not None and info.accept_ranges
+        if not resumable or self.attempts > self.source.retries:
+            raise OSError(f"下载中断于 {self.offset}: {error or '连接提前关闭'}")
+        print(f"[HTTP] 连接中断于 {self.offset}，第 {self.attempts} 次续传: {error}")
+        time.sleep(HTTP_RETRY_BACKOFF * 2 ** (self.attempts - 1))
@@ -0,0 +1,274 @@
+import contextlib
+import os
+import shutil
+import typing
+
+from ...domain.models import ServerConfig, TransferResult
+from .checksum import create_hasher
+from .readahead import ReadAheadReader
+from .transport import (
+    TRANSFER_MODES,
+    ProgressCallback,
+    Readable,
+    RemoteEntry,
+    Transport,
+    partial_name,
+    register_transport,
+)
+
+# 区段写入的读写块大小
+CHUNK_SIZE = 1024 * 1024
+
+
+@register_transport("LOCAL")
+class LocalTransport(Transport):
+    """本地文件系统回环传输
+
+    以服务器配置的 host（可带 file:// 前缀）作为根目录，远端路径映射到根目录下。
+    没有网络开销，用于基准测试队列、调度和存储层，区分网络耗时与后端开销。
+    """
+
+    def __init__(
+        self, server_config: ServerConfig, checksum_algorithm: str = "sha256"
+    ) -> None:
+        """初始化本地传输
+        Args:
+            server_config: 服务器配置，host 为根目录
+            checksum_algorithm: 复制时流式计算的摘要算法
+        """
+        super().__init__(server_config)
+        self.checksum_algorithm = checksum_algorithm
+        root = server_config.host
+        if root.startswith("file://"):
+            root = root[len("file://") :]
+        self.root = os.path.abspath(root or "/")
+
+    def connect(self) -> None:
+        """确保根目录存在"""
+        os.makedirs(self.root, exist_ok=True)
+
+    def upload(
+        self,
+        local_path: str,
+        remote_path: str,
+        progress_callback: typing.Optional[ProgressCallback] = None,
+        mode: str = "auto",
+    ) -> bool:
+        """复制文件到根目录下，支持进度回调，返回是否成功
+
+        先写入临时文件，写完后原子替换目标文件；中断时临时文件可以续传。
+        """
+        if mode not in TRANSFER_MODES:
+            raise ValueError(f"不支持的传输模式: {mode}")
+        self.last_result = None
+        self.partial_path = None
+        try:
+            target = self._path(remote_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            part_path = partial_name(remote_path)
+            local_size = os.path.getsize(local_path)
+            hasher = create_hasher(self.checksum_algorithm)
+            transferred = 0
+            with (
+                ReadAheadReader(local_path) as reader,
+                open(self._path(part_path), "wb") as dst,
+            ):
+                self._begin_partial(part_path)
+                for chunk in reader:
+                    hasher.update(chunk)
+                    dst.write(chunk)
+                    transferred += len(chunk)
+                    if progress_callback and local_size > 0:
+                        progress_callback(transferred / local_size)
+            os.replace(self._path(part_path), target)
+            self.partial_path = remote_path
+            self.last_result = TransferResult(
+                local_path=local_path,
+                remote_path=remote_path,
+                file_size=local_size,
+                bytes_sent=transferred,
+                checksum=hasher.hexdigest(),
+                checksum_algorithm=self.checksum_algorithm,
+            )
+            return True
+        except Exception as e:
+            print(f"本地复制失败: {str(e)}")
+            return False
+
+    def upload_stream(
+        self,
+        stream: Readable,
+        remote_path: str,
+        file_size: typing.Optional[int] = None,
+        progress_callback: typing.Optional[ProgressCallback] = None,
+        offset: typing.Optional[int] = None,
+    ) -> bool:
+        """把二进制流写入根目录下的文件"""
+        self.last_result = None
+        self.partial_path = None
+        try:
+            target = self._path(remote_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            self.partial_path = remote_path
+            hasher = create_hasher(self.checksum_algorithm)
+            transferred = 0
+            with (
+                ReadAheadReader(stream) as reader,
+                open(target, "wb" if offset is None else "r+b") as dst,
+            ):
+                if offset:
+                    dst.seek(offset)
+                for chunk in reader:
+                    hasher.update(chunk)
+                    dst.write(chunk)
+                    transferred += len(chunk)
+                    if progress_callback and file_size:
+                        progress_callback(min(transferred / file_size, 1.0))
+            if file_size is not None and transferred != file_size:
+                raise OSError(f"大小不一致: 预期 {file_size}，实际收到 {transferred}")
+            self.last_result = TransferResult(
+                local_path="",
+                remote_path=remote_path,
+                file_size=transferred,
+                bytes_sent=transferred,
+                checksum=hasher.hexdigest(),
+                checksum_algorithm=self.checksum_algorithm,
+            )
+            return True
+        except Exception as e:
+            print(f"本地流式写入失败: {str(e)}")
+            return False
+
+    def put_range(
+        self, local_path: str, remote_path: str, offset: int, length: int
+    ) -> int:
+        """将本地文件区段写入目标文件相同位置"""
+        target = self._path(remote_path)
+        fd = os.open(target, os.O_WRONLY | os.O_CREAT, 0o644)
+        sent = 0
+        try:
+            with open(local_path, "rb") as src:
+                src.seek(offset)
+                while sent < length:
+                    chunk = src.read(min(CHUNK_SIZE, length - sent))
+                    if not chunk:
+                        break
+                    os.pwrite(fd, chunk, offset + sent)
+                    sent += len(chunk)
+        finally:
+            os.close(fd)
+        return sent
+
+    def stat(self, remote_path: str) -> typing.Optional[RemoteEntry]:
+        """查询目标文件信息，不存在时返回None"""
+        try:
+            st = os.stat(self._path(remote_path))
+        except FileNotFoundError:
+            return None
+        return RemoteEntry(
+            name=os.path.basename(remote_path.rstrip("/")),
+            size=st.st_size,
+            mtime=st.st_mtime,
+            is_dir=os.path.isdir(self._path(remote_path)),
+        )
+
+    def mkdir(self, remote_path: str, parents: bool = True) -> None:
+        """创建目录"""
+        if parents:
+            os.makedirs(self._path(remote_path), exist_ok=True)
+        else:
+            os.mkdir(self._path(remote_path))
+
+    def rename(self, source_path: str, remote_path: str) -> None:
+        """重命名，目标已存在时覆盖"""
+        os.replace(self._path(source_path), self._path(remote_path))
+
+    def remove(self, remote_path: str) -> None:
+        """删除根目录下的文件"""
+        os.unlink(self._path(remote_path))
+
+    def listdir(self, remote_path: str) -> list[RemoteEntry]:
+        """列出目录内容"""
+        entries = []
+        with os.scandir(self._path(remote_path)) as it:
+            for entry in it:
+                st = entry.stat()
+                entries.append(
+                    RemoteEntry(entry.name, st.st_size, st.st_mtime, entry.is_dir())
+                )
+        return entries
+
+    def remote_copy(
+        self, source_path: str, remote_path: str, hardlink: bool = False
+    ) -> bool:
+        """复制或硬链接根目录下已存在的文件"""
+        try:
+            target = self._path(remote_path)
+            if hardlink:
+                if os.path.exists(target):
+                    os.unlink(target)
+                os.link(self._path(source_path), target)
+            else:
+                shutil.copy2(self._path(source_path), target)
+            return True
+        except Exception as e:
+            print(f"本地复制失败: {str(e)}")
+            return False
+
+    @contextlib.contextmanager
+    def open_read(
+        self, remote_path: str, offset: int = 0
+    ) -> typing.Iterator[typing.BinaryIO]:
+        """打开根目录下的文件用于顺序读取"""
+        with open(self._path(remote_path), "rb") as src:
+            src.seek(offset)
+            yield src
+
+    def get_range(
+        self, remote_path: str, local_path: str, offset: int, length: int
+    ) -> int:
+        """将根目录下文件的区段写入本地文件相同位置"""
+        fd = os.open(local_path, os.O_WRONLY)
+        received = 0
+        try:
+            with open(self._path(remote_path), "rb") as src:
+                src.seek(offset)
+                while received < length:
+                    chunk = src.read(min(CHUNK_SIZE, length - received))
+                    if not chunk:
+                        break
+                    os.pwrite(fd, chunk, offset + received)
+                    received += len(chunk)
+        finally:
+            os.close(fd)
+        return received
+
+    def remote_checksum(self, remote_path: str) -> typing.Optional[str]:
+        """计算根目录下文件的摘要"""
+        hasher = create_hasher(self.checksum_algorithm)
+        with ReadAheadReader(self._path(remote_path)) as reader:
+            for chunk in reader:
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def remote_push(
+        self, source_path: str, target: ServerConfig, remote_path: str
+    ) -> bool:
+        """目标同为 LOCAL 时直接在本机复制"""
+        if target.protocol != "LOCAL":
+            return False
+        try:
+            destination = LocalTransport(target)._path(remote_path)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copyfile(self._path(source_path), destination)
+            return True
+        except Exception as e:
+            print(f"本地复制失败: {str(e)}")
+            return False
+
+    def _path(self, remote_path: str) -> str:
+        """远端路径映射为根目录下的本地路径，不允许越出根目录"""
+        path = os.path.normpath(os.path.join(self.root, remote_path.lstrip("/")))
+        if path != self.root and not path.startswith(self.root.rstrip(os.sep) + os.sep):
+            raise ValueError(f"路径越出根目录: {remote_path}")
+        return path
@@ -0,0 +1,201 @@
+import mmap
+import os
+import queue
+import threading
+import typing
+
+from .transport import Readable
+
+# 预读块大小与缓冲区数量（单个传输最多占用 块大小 x 数量 的内存）
+READ_AHEAD_CHUNK = 256 * 1024
+READ_AHEAD_BUFFERS = 8
+
+READ_METHODS = ("pread", "mmap")
+
+# 关闭时等待读线程的秒数（输入为流时读线程可能阻塞在等待数据上）
+STREAM_JOIN_TIMEOUT = 1.0
+
+
+class BufferPool:
+    """固定数量、可复用的读缓冲区"""
+
+    def __init__(self, count: int, size: int):
+        self.size = size
+        self.free: queue.Queue[bytearray] = queue.Queue()
+        for _ in range(count):
+            self.free.put(bytearray(size))
+
+    def acquire(self, timeout: typing.Optional[float] = None) -> bytearray:
+        """取出一个空闲缓冲区，没有时阻塞；超时抛出 queue.Empty"""
+        return self.free.get(timeout=timeout)
+
+    def release(self, buffer: bytearray) -> None:
+        self.free.put(buffer)
+
+
+class ReadAheadReader:
+    """独立线程预读本地文件或输入流，经有界队列交给网络写入方
+
+    读线程把数据读入缓冲池中的缓冲区，读取与网络发送并行进行；
+    缓冲区循环使用，不为每个数据块分配内存。迭代得到的 memoryview 在
+    取下一块时归还缓冲池，调用方不得保留引用。缓冲区用尽时读线程停止
+    读取，输入为网络流时由此向发送方施加背压。
+
+    用法:
+        with ReadAheadReader(path) as reader:
+            for chunk in reader:
+                ...
+    """
+
+    def __init__(
+        self,
+        path: typing.Union[str, Readable],
+        chunk_size: int = READ_AHEAD_CHUNK,
+        buffers: int = READ_AHEAD_BUFFERS,
+        method: str = "pread",
+    ):
+        """初始化预读器
+        Args:
+            path: 本地文件路径，或提供 read/readinto 的二进制流（不负责关闭）
+            chunk_size: 单次读取大小
+            buffers: 缓冲区数量，即最多预读的块数
+            method: pread 用 os.preadv 直接读入缓冲区；mmap 从映射复制，由内核顺序预读
+        """
+        if method not in READ_METHODS:
+            raise ValueError(f"不支持的读取方式: {method}")
+        self.path = path
+        self.chunk_size = chunk_size
+        self.method = method
+        self.pool = BufferPool(max(2, buffers), chunk_size)
+        # 容量大于缓冲区数，读线程放入数据或结束标记时不会阻塞
+        self.ready: queue.Queue[typing.Any] = queue.Queue(maxsize=buffers + 2)
+        self.stopped = threading.Event()
+        self.thread: typing.Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ReadAheadReader":
+        self.start()
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """启动读线程"""
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self._run, name="read-ahead", daemon=True
+            )
+            self.thread.start()
+
+    def close(self) -> None:
+        """停止读线程并回收未消费的缓冲区"""
+        self.stopped.set()
+        if self.thread is not None:
+            # 读线程从流中读到数据或出错后发现已停止，会自行退出
+            self.thread.join(
+                None if isinstance(self.path, str) else STREAM_JOIN_TIMEOUT
+            )
+            self.thread = None
+        while not self.ready.empty():
+            item = self.ready.get_nowait()
+            if isinstance(item, tuple):
+                self.pool.release(item[0])
+
+    def __iter__(self) -> typing.Iterator[memoryview]:
+        self.start()
+        previous = None
+        try:
+            while True:
+                if previous is not None:
+                    self.pool.release(previous)
+                    previous = None
+                item = self.ready.get()
+                if item is None:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                previous, size = item
+                yield memoryview(previous)[:size]
+        finally:
+            if previous is not None:
+                self.pool.release(previous)
+
+    def _run(self) -> None:
+        try:
+            if not isinstance(self.path, str):
+                self._read_stream(self.path)
+                self.ready.put(None)
+                return
+            with open(self.path, "rb", buffering=0) as local_file:
+                fd = local_file.fileno()
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                if self.method == "mmap":
+                    self._read_mmap(fd)
+                else:
+                    self._read_pread(fd)
+            self.ready.put(None)
+        except Exception as e:
+            self.ready.put(e)
+
+    def _read_pread(self, fd: int) -> None:
+        offset = 0
+        while True:
+            buffer = self._acquire()
+            if buffer is None:
+                return
+            if hasattr(os, "preadv"):
+                size = os.preadv(fd, [buffer], offset)
+            else:  # pragma: no cover - 平台决定
+                os.lseek(fd, offset, os.SEEK_SET)
+                size = os.readv(fd, [buffer])
+            if not size:
+                self.pool.release(buffer)
+                return
+            self.ready.put((buffer, size))
+            offset += size
+
+    def _read_stream(self, stream: Readable) -> None:
+        readinto = getattr(stream, "readinto", None)
+        while True:
+            buffer = self._acquire()
+            if buffer is None:
+                return
+            if readinto is not None:
+                size = readinto(buffer)
+            else:
+                data = stream.read(self.chunk_size)
+                size = len(data)
+                buffer[:size] = data
+            if not size:
+                self.pool.release(buffer)
+                return
+            self.ready.put((buffer, size))
+
+    def _read_mmap(self, fd: int) -> None:
+        file_size = os.fstat(fd).st_size
+        if file_size == 0:
+            return
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            source = memoryview(mapped)
+            try:
+                for offset in range(0, file_size, self.chunk_size):
+                    buffer = self._acquire()
+                    if buffer is None:
+                        return
+                    size = min(self.chunk_size, file_size - offset)
+                    buffer[:size] = source[offset : offset + size]
+                    self.ready.put((buffer, size))
+            finally:
+                source.release()
+
+    def _acquire(self) -> typing.Optional[bytearray]:
+        """等待空闲缓冲区，停止时返回None"""
+        while not self.stopped.is_set():
+            try:
+                return self.pool.acquire(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
@@ -0,0 +1,127 @@
+import os
+import posixpath
+import shlex
+import typing
+
+import paramiko
+
+from ...domain.models import TransferResult
+from .checksum import create_hasher
+from .readahead import ReadAheadReader
+from .ssh_transport import SSHTransport
+from .transport import TRANSFER_MODES, ProgressCallback, register_transport
+
+
+class SCPError(OSError):
+    """远端 scp 返回的错误"""
+
+
+@register_transport("SCP")
+class SCPClient(SSHTransport):
+    """SCP文件传输客户端接口
+
+    直接在 exec 通道上运行远端 scp -t 接收端，按 SCP 协议推送文件：
+    没有 SFTP 的逐包请求/确认往返，单个大文件在高延迟链路上吞吐更高。
+    """
+
+    def upload(
+        self,
+        local_path: str,
+        remote_path: str,
+        progress_callback: typing.Optional[ProgressCallback] = None,
+        mode: str = "auto",
+    ) -> bool:
+        """上传文件到服务器，支持进度回调，返回是否成功
+
+        SCP 协议不支持差量传输，delta 模式按完整上传处理。
+        """
+        if mode not in TRANSFER_MODES:
+            raise ValueError(f"不支持的传输模式: {mode}")
+        self.last_result = None
+        self.partial_path = None
+        try:
+            print(
+                f"[SCP] 本地文件: {local_path} | 远程路径: {remote_path} | 服务器: {self.server_config.host}:{self.server_config.port} | 用户名: {self.server_config.username}"
+            )
+            if mode == "delta":
+                print("[SCP] SCP 不支持差量传输，改为完整上传")
+
+            result = self._send_file(local_path, remote_path, progress_callback)
+            if self.verify_remote:
+                result.verified = self._verify_remote(remote_path, str(result.checksum))
+            self.last_result = result
+            self._release()
+
+            if result.verified is False:
+                print(f"SCP校验失败: {remote_path}")
+                return False
+            return True
+
+        except Exception as e:
+            print(f"SCP上传失败: {str(e)}")
+            self._release(False)
+            return False
+
+    def _send_file(
+        self,
+        local_path: str,
+        remote_path: str,
+        progress_callback: typing.Optional[ProgressCallback],
+    ) -> TransferResult:
+        """按 SCP 协议发送单个文件：C 记录头、文件内容、结束字节"""
+        stat = os.stat(local_path)
+        local_size = stat.st_size
+        channel = self._acquire().get_transport().open_session()
+        try:
+            self.partial_path = remote_path
+            channel.exec_command(f"scp -t {shlex.quote(remote_path)}")
+            self._expect_ack(channel)
+            channel.sendall(
+                f"C{stat.st_mode & 0o7777:04o} {local_size} "
+                f"{posixpath.basename(remote_path)}\n".encode()
+            )
+            self._expect_ack(channel)
+
+            hasher = create_hasher(self.checksum_algorithm)
+            transferred = 0
+            with ReadAheadReader(local_path) as reader:
+                for chunk in reader:
+                    hasher.update(chunk)
+                    channel.sendall(chunk)
+                    transferred += len(chunk)
+                    if progress_callback and local_size > 0:
+                        progress_callback(transferred / local_size)
+            channel.sendall(b"\0")
+            self._expect_ack(channel)
+
+            channel.shutdown_write()
+            status = channel.recv_exit_status()
+            if status != 0:
+                raise SCPError(f"远端 scp 退出码 {status}")
+        finally:
+            channel.close()
+
+        return TransferResult(
+            local_path=local_path,
+            remote_path=remote_path,
+            file_size=local_size,
+            bytes_sent=transferred,
+            checksum=hasher.hexdigest(),
+            checksum_algorithm=self.checksum_algorithm,
+        )
+
+    @staticmethod
+    def _expect_ack(channel: paramiko.Channel) -> None:
+        """读取远端应答：0 表示成功，1/2 后跟一行错误信息"""
+        code = channel.recv(1)
+        if code == b"\0":
+            return
+        if not code:
+            raise SCPError("远端 scp 提前关闭连接")
+        message = b""
+        while not message.endswith(b"\n"):
+            part = channel.recv(1)
+            if not part:
+                break
+            message += part
+        raise SCPError(message.decode("utf-8", errors="replace").strip())
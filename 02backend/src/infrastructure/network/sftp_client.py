@@ -1,63 +1,546 @@
+import functools
 import os
+import shlex
 import typing
 
 import paramiko
 
-from ...domain.models import ServerConfig
+from ...domain.models import ServerConfig, TransferResult
+from .checksum import ProgressHasher, create_hasher
+from .compression import (
+    COMPRESSED_SUFFIXES,
+    COMPRESSION_MODES,
+    REMOTE_DECOMPRESS_COMMANDS,
+    choose_codec,
+    create_compressor,
+)
+from .connection_pool import SSHConnectionPool
+from .delta import (
+    END_OP,
+    REMOTE_PATCH_SCRIPT,
+    REMOTE_SIGNATURE_SCRIPT,
+    DeltaOp,
+    choose_block_size,
+    compute_delta,
+    compute_signatures,
+    encode_op,
+    parse_signatures,
+)
+from .readahead import ReadAheadReader
+from .ssh_transport import CHUNK_SIZE, SSHTransport
+from .transport import (
+    TRANSFER_MODES,
+    BatchProgressCallback,
+    Readable,
+    partial_name,
+    register_transport,
+)
 
+# 自动启用差量传输的默认文件大小阈值
+DELTA_THRESHOLD = 64 * 1024 * 1024
 
-class SFTPClient:
+
+@register_transport("SFTP")
+class SFTPClient(SSHTransport):
     """SFTP文件传输客户端接口"""
 
-    def __init__(self, server_config: ServerConfig) -> None:
-        """初始化SFTP客户端"""
-        self.server_config = server_config
-        self.ssh = paramiko.SSHClient()
-        self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    def __init__(
+        self,
+        server_config: ServerConfig,
+        checksum_algorithm: str = "sha256",
+        verify_remote: bool = False,
+        verify_fallback: str = "skip",
+        delta_threshold: typing.Optional[int] = DELTA_THRESHOLD,
+        compression: str = "none",
+        compression_store: bool = False,
+        pool: typing.Optional[SSHConnectionPool] = None,
+    ) -> None:
+        """初始化SFTP客户端
+        Args:
+            server_config: 服务器配置
+            checksum_algorithm: 上传时流式计算的摘要算法
+            verify_remote: 上传后是否在远端校验摘要
+            verify_fallback: 远端无法执行校验命令时的策略 skip/readback/fail
+            delta_threshold: auto 模式下启用差量传输的文件大小阈值，None 表示不自动启用
+            compression: 压缩策略 none/auto/gzip/zstd，auto 按采样结果逐文件选择
+            compression_store: 远端保存压缩文件（追加 .gz/.zst）而不是解压
+            pool: SSH 连接池，默认使用进程内共享连接池
+        """
+        if compression not in COMPRESSION_MODES:
+            raise ValueError(f"不支持的压缩模式: {compression}")
+        super().__init__(
+            server_config, checksum_algorithm, verify_remote, verify_fallback, pool
+        )
+        self.delta_threshold = delta_threshold
+        self.compression = compression
+        self.compression_store = compression_store
 
     def upload(
         self,
         local_path: str,
         remote_path: str,
         progress_callback: typing.Optional[typing.Callable[[float], None]] = None,
+        mode: str = "auto",
     ) -> bool:
-        """上传文件到服务器，支持进度回调，返回是否成功"""
+        """上传文件到服务器，支持进度回调，返回是否成功
+
+        摘要在发送的同一批数据块上增量计算，不会二次读取本地文件，
+        结果保存在 last_result 中。mode 为 delta 时只发送与远端已有文件
+        不同的块；auto 模式在文件超过 delta_threshold 时自动尝试差量传输。
+        """
+        if mode not in TRANSFER_MODES:
+            raise ValueError(f"不支持的传输模式: {mode}")
+        self.last_result = None
+        self.partial_path = None
         try:
             # 打印关键信息
             print(
                 f"[SFTP] 本地文件: {local_path} | 远程路径: {remote_path} | 服务器: {self.server_config.host}:{self.server_config.port} | 用户名: {self.server_config.username} | 协议: {self.server_config.protocol}"
             )
 
-            # 连接SFTP服务器
-            self.ssh.connect(
-                hostname=self.server_config.host,
-                port=self.server_config.port,
-                username=self.server_config.username,
-                password=self.server_config.password,
-                timeout=30,
-            )
-
-            sftp = self.ssh.open_sftp()
+            sftp = self._connect()
 
             # 获取本地文件大小
             local_size = os.path.getsize(local_path)
 
-            # 上传文件，支持进度回调
-            def progress_callback_wrapper(
-                transferred: int, to_be_transferred: int
-            ) -> None:
-                if progress_callback and local_size > 0:
-                    progress = transferred / local_size
-                    progress_callback(progress)
+            result = None
+            if mode == "delta" or (
+                mode == "auto"
+                and self.delta_threshold is not None
+                and local_size >= self.delta_threshold
+            ):
+                result = self._upload_delta(
+                    sftp, local_path, remote_path, local_size, progress_callback
+                )
+            if result is None and mode != "delta":
+                codec = choose_codec(local_path, self.compression)
+                if codec:
+                    result = self._upload_compressed(
+                        sftp,
+                        local_path,
+                        remote_path,
+                        local_size,
+                        codec,
+                        progress_callback,
+                    )
+            if result is None:
+                result = self._upload_full(
+                    sftp, local_path, remote_path, local_size, progress_callback
+                )
 
-            sftp.put(local_path, remote_path, callback=progress_callback_wrapper)
+            # 与 sftp.put 一致，确认远端文件大小（远端保存压缩文件时对比压缩后大小）
+            expected_size = (
+                result.bytes_sent if result.remote_path != remote_path else local_size
+            )
+            remote_size = sftp.stat(result.remote_path).st_size
+            if remote_size != expected_size:
+                raise OSError(f"大小不一致: 预期 {expected_size}，远端 {remote_size}")
+            if self.verify_remote and result.remote_path == remote_path:
+                result.verified = self._verify_remote(
+                    remote_path, str(result.checksum), sftp
+                )
+            self.last_result = result
 
             sftp.close()
-            self.ssh.close()
+            self._release()
+
+            if result.verified is False:
+                print(f"SFTP校验失败: {remote_path}")
+                return False
             return True
 
         except Exception as e:
             print(f"SFTP上传失败: {str(e)}")
-            if hasattr(self, "ssh"):
-                self.ssh.close()
+            self._release(False)
+            return False
+
+    def upload_stream(
+        self,
+        stream: Readable,
+        remote_path: str,
+        file_size: typing.Optional[int] = None,
+        progress_callback: typing.Optional[typing.Callable[[float], None]] = None,
+        offset: typing.Optional[int] = None,
+    ) -> bool:
+        """把二进制流直接流水线写入远端文件，读线程与发送之间只有固定数量的缓冲区"""
+        self.last_result = None
+        self.partial_path = None
+        try:
+            print(
+                f"[SFTP] 流式上传 | 远程路径: {remote_path} | 服务器: {self.server_config.host}:{self.server_config.port} | 用户名: {self.server_config.username}"
+            )
+            sftp = self._connect()
+            hasher = create_hasher(self.checksum_algorithm)
+            transferred = 0
+            open_mode = "wb" if offset is None else "r+"
+            self.partial_path = remote_path
+            with ReadAheadReader(stream) as reader:
+                with sftp.open(remote_path, open_mode) as remote_file:
+                    if offset:
+                        remote_file.seek(offset)
+                    remote_file.set_pipelined(True)
+                    for chunk in reader:
+                        hasher.update(chunk)
+                        remote_file.write(chunk)
+                        transferred += len(chunk)
+                        if progress_callback and file_size:
+                            progress_callback(min(transferred / file_size, 1.0))
+
+            if file_size is not None and transferred != file_size:
+                raise OSError(f"大小不一致: 预期 {file_size}，实际收到 {transferred}")
+            result = TransferResult(
+                local_path="",
+                remote_path=remote_path,
+                file_size=transferred,
+                bytes_sent=transferred,
+                checksum=hasher.hexdigest(),
+                checksum_algorithm=self.checksum_algorithm,
+            )
+            # 只写入部分内容时摘要不代表整个远端文件
+            if self.verify_remote and offset is None:
+                result.verified = self._verify_remote(
+                    remote_path, str(result.checksum), sftp
+                )
+            self.last_result = result
+
+            sftp.close()
+            self._release()
+
+            if result.verified is False:
+                print(f"SFTP校验失败: {remote_path}")
+                return False
+            return True
+
+        except Exception as e:
+            print(f"SFTP流式上传失败: {str(e)}")
+            self._release(False)
             return False
+
+    def remote_size(self, remote_path: str) -> typing.Optional[int]:
+        """查询远端文件大小，不存在或连接失败时返回None"""
+        try:
+            sftp = self._connect()
+            try:
+                size = int(sftp.stat(remote_path).st_size or 0)
+            finally:
+                sftp.close()
+            self._release()
+            return size
+        except Exception:
+            self._release(False)
+            return None
+
+    def _connect(self) -> paramiko.SFTPClient:
+        """从连接池取得连接并打开SFTP会话"""
+        return self._acquire().open_sftp()
+
+    def _upload_files(
+        self,
+        files: list[tuple[str, str]],
+        progress_callback: typing.Optional[BatchProgressCallback],
+    ) -> list[typing.Optional[TransferResult]]:
+        """在同一 SFTP 会话内逐个流水线写入"""
+        results: list[typing.Optional[TransferResult]] = []
+        sftp = self._connect()
+        for index, (local_path, remote_path) in enumerate(files):
+            try:
+                results.append(
+                    self._upload_full(
+                        sftp,
+                        local_path,
+                        remote_path,
+                        os.path.getsize(local_path),
+                        (
+                            functools.partial(progress_callback, index)
+                            if progress_callback
+                            else None
+                        ),
+                    )
+                )
+            except Exception as e:
+                print(f"SFTP上传失败: {local_path}: {str(e)}")
+                results.append(None)
+        sftp.close()
+        return results
+
+    def _upload_full(
+        self,
+        sftp: paramiko.SFTPClient,
+        local_path: str,
+        remote_path: str,
+        local_size: int,
+        progress_callback: typing.Optional[typing.Callable[[float], None]],
+    ) -> TransferResult:
+        """完整上传，读线程预读本地文件，摘要与发送共用同一数据块
+
+        先写入临时文件，写完后原子替换目标文件；中断时临时文件可以续传。
+        """
+        hasher = create_hasher(self.checksum_algorithm)
+        transferred = 0
+        part_path = partial_name(remote_path)
+        with ReadAheadReader(local_path) as reader:
+            with sftp.open(part_path, "wb") as remote_file:
+                self._begin_partial(part_path)
+                remote_file.set_pipelined(True)
+                for chunk in reader:
+                    hasher.update(chunk)
+                    remote_file.write(chunk)
+                    transferred += len(chunk)
+                    if progress_callback and local_size > 0:
+                        progress_callback(transferred / local_size)
+        sftp.posix_rename(part_path, remote_path)
+        self.partial_path = remote_path
+
+        return TransferResult(
+            local_path=local_path,
+            remote_path=remote_path,
+            file_size=local_size,
+            bytes_sent=transferred,
+            checksum=hasher.hexdigest(),
+            checksum_algorithm=self.checksum_algorithm,
+        )
+
+    def _upload_compressed(
+        self,
+        sftp: paramiko.SFTPClient,
+        local_path: str,
+        remote_path: str,
+        local_size: int,
+        codec: str,
+        progress_callback: typing.Optional[typing.Callable[[float], None]],
+    ) -> typing.Optional[TransferResult]:
+        """压缩上传：流式压缩后交给远端解压命令，或直接保存为压缩文件
+
+        远端解压先写入临时文件，解压命令成功退出后才替换目标文件，
+        解压失败时目标文件保持原样。
+        Returns:
+            传输结果；远端没有解压命令或解压失败时返回None，由调用方完整上传
+        """
+        compressor = create_compressor(codec)
+        hasher = create_hasher(self.checksum_algorithm)
+        target_path = remote_path
+        stdin = stdout = stderr = None
+        if self.compression_store:
+            target_path = remote_path + COMPRESSED_SUFFIXES[codec]
+            self.partial_path = target_path
+        else:
+            command = REMOTE_DECOMPRESS_COMMANDS[codec]
+            program = command.split()[0]
+            temp_path = f"{remote_path}.decompress-tmp"
+            try:
+                # exec 通道不会因命令不存在而报错，先确认远端有解压程序
+                status, _, _ = self._exec(f"command -v {program}", timeout=30)
+                if status != 0:
+                    print(f"[SFTP] 远端缺少 {program}，改为完整上传")
+                    return None
+                stdin, stdout, stderr = self._acquire().exec_command(
+                    f"{command} > {shlex.quote(temp_path)}"
+                )
+            except Exception as e:
+                print(f"[SFTP] 远端解压不可用，改为完整上传: {str(e)}")
+                return None
+            self.partial_path = temp_path
+
+        transferred = 0
+        sent = 0
+        with open(local_path, "rb") as local_file:
+            remote_file: typing.Optional[paramiko.SFTPFile] = None
+            if stdin is not None:
+                write = stdin.write
+            else:
+                remote_file = sftp.open(target_path, "wb")
+                write = remote_file.write
+            try:
+                if remote_file is not None:
+                    remote_file.set_pipelined(True)
+                while True:
+                    chunk = local_file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    compressed = compressor.compress(chunk)
+                    if compressed:
+                        write(compressed)
+                        sent += len(compressed)
+                    transferred += len(chunk)
+                    if progress_callback and local_size > 0:
+                        progress_callback(transferred / local_size)
+                tail = compressor.flush()
+                write(tail)
+                sent += len(tail)
+            finally:
+                if remote_file is not None:
+                    remote_file.close()
+
+        if stdin is not None:
+            if stdout is None or stderr is None:
+                raise OSError("远端解压命令的输出通道未打开")
+            stdin.channel.shutdown_write()
+            status = stdout.channel.recv_exit_status()
+            if status != 0:
+                error = stderr.read().decode("utf-8", errors="replace").strip()
+                print(f"[SFTP] 远端解压失败，退出码 {status}，改为完整上传: {error}")
+                try:
+                    sftp.remove(temp_path)
+                except OSError:
+                    pass
+                self.partial_path = None
+                return None
+            sftp.posix_rename(temp_path, remote_path)
+
+        ratio = round(sent / transferred, 4) if transferred else 1.0
+        print(f"[SFTP] 压缩上传完成: {codec} 压缩比 {ratio}")
+        return TransferResult(
+            local_path=local_path,
+            remote_path=target_path,
+            file_size=local_size,
+            bytes_sent=sent,
+            checksum=hasher.hexdigest(),
+            checksum_algorithm=self.checksum_algorithm,
+            mode="compressed",
+            compression=codec,
+            compression_ratio=ratio,
+        )
+
+    def _upload_delta(
+        self,
+        sftp: paramiko.SFTPClient,
+        local_path: str,
+        remote_path: str,
+        local_size: int,
+        progress_callback: typing.Optional[typing.Callable[[float], None]],
+    ) -> typing.Optional[TransferResult]:
+        """差量上传，只发送与远端已有文件不同的块
+        Returns:
+            传输结果；远端无旧文件或无法原地应用差量时返回None，由调用方完整上传
+        """
+        try:
+            remote_size = int(sftp.stat(remote_path).st_size or 0)
+        except OSError:
+            return None
+        if remote_size == 0:
+            return None
+
+        block_size = choose_block_size(max(local_size, remote_size))
+        signatures = self._remote_signatures_exec(remote_path, block_size)
+        use_exec = signatures is not None
+        if signatures is None:
+            # exec 不可用：回读远端文件计算签名
+            with sftp.open(remote_path, "rb") as remote_file:
+                remote_file.prefetch()
+                signatures = compute_signatures(remote_file, block_size)
+
+        hasher = ProgressHasher(
+            create_hasher(self.checksum_algorithm), local_size, progress_callback
+        )
+        with open(local_path, "rb") as local_file:
+            ops = compute_delta(local_file, signatures, block_size, hasher)
+            if use_exec:
+                sent = self._apply_delta_exec(sftp, remote_path, block_size, ops)
+            else:
+                sent = self._apply_delta_inplace(
+                    sftp, local_path, remote_path, block_size, local_size, ops
+                )
+        if sent is None:
+            print(f"[SFTP] 差量无法原地应用，改为完整上传: {remote_path}")
+            return None
+
+        print(f"[SFTP] 差量上传完成: 发送 {sent} / {local_size} 字节")
+        return TransferResult(
+            local_path=local_path,
+            remote_path=remote_path,
+            file_size=local_size,
+            bytes_sent=sent,
+            checksum=hasher.hexdigest(),
+            checksum_algorithm=self.checksum_algorithm,
+            mode="delta",
+        )
+
+    def _remote_signatures_exec(
+        self, remote_path: str, block_size: int
+    ) -> typing.Optional[list[tuple[int, str]]]:
+        """通过 exec 通道在远端计算块签名，不可用时返回None"""
+        try:
+            _, stdout, _ = self._acquire().exec_command(
+                f"python3 -c {shlex.quote(REMOTE_SIGNATURE_SCRIPT)} "
+                f"{shlex.quote(remote_path)} {block_size}",
+                timeout=300,
+            )
+            output = stdout.read().decode("utf-8", errors="replace")
+            if stdout.channel.recv_exit_status() != 0:
+                return None
+            return parse_signatures(output)
+        except Exception as e:
+            print(f"[SFTP] 远端签名不可用: {str(e)}")
+            return None
+
+    def _apply_delta_exec(
+        self,
+        sftp: paramiko.SFTPClient,
+        remote_path: str,
+        block_size: int,
+        ops: typing.Iterator[DeltaOp],
+    ) -> typing.Optional[int]:
+        """将差量流发给远端重建脚本写出临时文件，再原子替换目标文件"""
+        temp_path = f"{remote_path}.delta-tmp"
+        self.partial_path = temp_path
+        stdin, stdout, stderr = self._acquire().exec_command(
+            f"python3 -c {shlex.quote(REMOTE_PATCH_SCRIPT)} "
+            f"{shlex.quote(remote_path)} {shlex.quote(temp_path)} {block_size}",
+            timeout=300,
+        )
+        sent = 0
+        for op in ops:
+            if op[0] == "data":
+                sent += len(op[1])  # type: ignore[arg-type]
+            stdin.write(encode_op(op))
+        stdin.write(END_OP)
+        stdin.channel.shutdown_write()
+        if stdout.channel.recv_exit_status() != 0:
+            print(f"[SFTP] 远端重建失败: {stderr.read().decode(errors='replace')}")
+            try:
+                sftp.remove(temp_path)
+            except OSError:
+                pass
+            return None
+        sftp.posix_rename(temp_path, remote_path)
+        return sent
+
+    def _apply_delta_inplace(
+        self,
+        sftp: paramiko.SFTPClient,
+        local_path: str,
+        remote_path: str,
+        block_size: int,
+        local_size: int,
+        ops: typing.Iterator[DeltaOp],
+    ) -> typing.Optional[int]:
+        """仅用 SFTP 原地覆盖变化的区段；存在错位的复制块时返回None
+
+        写入前先遍历全部差量，检查复制块是否对齐并只记下字面量的位置和长度，
+        有错位时远端文件保持原样；写入时字面量再从本地文件的同一位置读取。
+        """
+        literals: list[tuple[int, int]] = []
+        offset = 0
+        for _, value in ops:
+            if isinstance(value, int):
+                if value * block_size != offset:
+                    return None
+                offset += block_size
+            else:
+                literals.append((offset, len(value)))
+                offset += len(value)
+
+        sent = 0
+        self.partial_path = remote_path
+        with open(local_path, "rb") as local_file:
+            with sftp.open(remote_path, "r+b") as remote_file:
+                remote_file.set_pipelined(True)
+                for start, length in literals:
+                    local_file.seek(start)
+                    data = local_file.read(length)
+                    remote_file.seek(start)
+                    remote_file.write(data)
+                    sent += len(data)
+                remote_file.truncate(local_size)
+        return sent
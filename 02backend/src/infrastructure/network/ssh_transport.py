@@ -0,0 +1,506 @@
+import contextlib
+import functools
+import os
+import posixpath
+import shlex
+import stat
+import tarfile
+import typing
+
+import paramiko
+
+from ...domain.models import ServerConfig, TransferResult
+from .checksum import (
+    REMOTE_CHECKSUM_COMMANDS,
+    VERIFY_FALLBACKS,
+    HashingReader,
+    ProgressHasher,
+    create_hasher,
+    parse_checksum_output,
+)
+from .connection_pool import SSHConnectionPool, default_pool
+from .transport import BatchProgressCallback, RemoteEntry, Transport
+
+# 单次读写块大小，与 paramiko putfo 一致
+CHUNK_SIZE = 32768
+
+# 顺序读取远端文件时每次 readv 并发请求的窗口大小，内存占用以此为界
+READ_WINDOW = 1024 * 1024
+
+# 服务器之间直接推送时连接目标服务器的超时秒数
+PUSH_CONNECT_TIMEOUT = 10
+
+# 服务器之间直接推送时的 StrictHostKeyChecking 取值：目标服务器的主机密钥
+# 必须已在源服务器的 known_hosts 中，否则推送失败并改为经后端中转
+PUSH_HOST_KEY_CHECKING = "yes"
+
+
+class SFTPReadStream:
+    """远端文件的顺序读取流
+
+    每次以 readv 并发请求一个窗口的数据块，减少逐块往返；
+    与 prefetch 不同，未读取的数据不会无限堆积在内存中。
+    """
+
+    def __init__(
+        self,
+        remote_file: paramiko.SFTPFile,
+        file_size: int,
+        window: int = READ_WINDOW,
+        offset: int = 0,
+    ):
+        """初始化
+        Args:
+            remote_file: 已打开的远端文件
+            file_size: 读到该位置为止
+            window: 单次 readv 请求的字节数
+            offset: 起始位置
+        """
+        self.remote_file = remote_file
+        self.file_size = file_size
+        self.window = window
+        self.offset = offset
+        self.pending = memoryview(b"")
+
+    def read(self, size: int = -1) -> bytes:
+        """读取最多 size 字节，文件读完返回 b\"\" """
+        if not self.pending:
+            length = min(self.window, self.file_size - self.offset)
+            if length <= 0:
+                return b""
+            chunk = b"".join(self.remote_file.readv([(self.offset, length)]))
+            if not chunk:
+                return b""
+            self.offset += len(chunk)
+            self.pending = memoryview(chunk)
+        if size < 0 or size >= len(self.pending):
+            data, self.pending = self.pending, memoryview(b"")
+        else:
+            data, self.pending = self.pending[:size], self.pending[size:]
+        return bytes(data)
+
+
+class SSHTransport(Transport):
+    """基于 SSH 的传输协议公共实现：连接池、exec 通道校验、远端复制与 tar 批量上传"""
+
+    def __init__(
+        self,
+        server_config: ServerConfig,
+        checksum_algorithm: str = "sha256",
+        verify_remote: bool = False,
+        verify_fallback: str = "skip",
+        pool: typing.Optional[SSHConnectionPool] = None,
+    ) -> None:
+        """初始化SSH传输
+        Args:
+            server_config: 服务器配置
+            checksum_algorithm: 上传时流式计算的摘要算法
+            verify_remote: 上传后是否在远端校验摘要
+            verify_fallback: 远端无法执行校验命令时的策略 skip/readback/fail
+            pool: SSH 连接池，默认使用进程内共享连接池
+        """
+        if verify_fallback not in VERIFY_FALLBACKS:
+            raise ValueError(f"不支持的校验回退策略: {verify_fallback}")
+        super().__init__(server_config)
+        self.checksum_algorithm = checksum_algorithm
+        self.verify_remote = verify_remote
+        self.verify_fallback = verify_fallback
+        self.pool = pool or default_pool
+        self.ssh: typing.Optional[paramiko.SSHClient] = None
+        # get_range 在各线程中使用的独立连接，abort 时一并关闭
+        self.range_connections: set[paramiko.SSHClient] = set()
+
+    def connect(self) -> None:
+        """提前从连接池取得连接"""
+        self._acquire()
+
+    def close(self) -> None:
+        """归还当前连接到连接池"""
+        self._release()
+
+    def abort(self) -> None:
+        """关闭当前连接及并行区段读取的连接，正在进行的读写立即出错"""
+        for ssh in [self.ssh, *list(self.range_connections)]:
+            if ssh is not None:
+                ssh.close()
+
+    def put_range(
+        self, local_path: str, remote_path: str, offset: int, length: int
+    ) -> int:
+        """经 SFTP 将本地文件区段写入远端文件相同位置"""
+        sent = 0
+        with self._sftp_session() as sftp:
+            try:
+                remote_file = sftp.open(remote_path, "r+b")
+            except FileNotFoundError:
+                remote_file = sftp.open(remote_path, "wb")
+            with remote_file, open(local_path, "rb") as local_file:
+                remote_file.set_pipelined(True)
+                remote_file.seek(offset)
+                local_file.seek(offset)
+                while sent < length:
+                    chunk = local_file.read(min(CHUNK_SIZE, length - sent))
+                    if not chunk:
+                        break
+                    remote_file.write(chunk)
+                    sent += len(chunk)
+        return sent
+
+    def stat(self, remote_path: str) -> typing.Optional[RemoteEntry]:
+        """经 SFTP 查询远端文件信息，不存在时返回None"""
+        with self._sftp_session() as sftp:
+            try:
+                attrs = sftp.stat(remote_path)
+            except FileNotFoundError:
+                return None
+        return self._entry(posixpath.basename(remote_path.rstrip("/")), attrs)
+
+    def mkdir(self, remote_path: str, parents: bool = True) -> None:
+        """经 SFTP 创建远端目录"""
+        with self._sftp_session() as sftp:
+            if not parents:
+                sftp.mkdir(remote_path)
+                return
+            current = "/" if remote_path.startswith("/") else ""
+            for part in remote_path.strip("/").split("/"):
+                current = posixpath.join(current, part)
+                try:
+                    sftp.stat(current)
+                except FileNotFoundError:
+                    sftp.mkdir(current)
+
+    def rename(self, source_path: str, remote_path: str) -> None:
+        """经 SFTP 重命名，优先使用可覆盖目标的 posix-rename 扩展"""
+        with self._sftp_session() as sftp:
+            try:
+                sftp.posix_rename(source_path, remote_path)
+            except OSError:
+                sftp.rename(source_path, remote_path)
+
+    def listdir(self, remote_path: str) -> list[RemoteEntry]:
+        """经 SFTP 列出远端目录内容"""
+        with self._sftp_session() as sftp:
+            return [
+                self._entry(attrs.filename, attrs)
+                for attrs in sftp.listdir_attr(remote_path)
+            ]
+
+    def remove(self, remote_path: str) -> None:
+        """经 SFTP 删除远端文件"""
+        with self._sftp_session() as sftp:
+            sftp.remove(remote_path)
+
+    def remote_size(self, remote_path: str) -> typing.Optional[int]:
+        """通过 exec 通道查询远端文件大小，不存在或连接失败时返回None"""
+        try:
+            status, output, _ = self._exec(f"stat -c %s -- {shlex.quote(remote_path)}")
+            self._release()
+            if status != 0:
+                return None
+            return int(output.decode().strip())
+        except Exception:
+            self._release(False)
+            return None
+
+    def remote_copy(
+        self, source_path: str, remote_path: str, hardlink: bool = False
+    ) -> bool:
+        """通过 exec 通道在远端复制或硬链接已存在的文件，避免重新上传"""
+        command = "ln -f" if hardlink else "cp -p"
+        try:
+            status, _, error = self._exec(
+                f"{command} -- {shlex.quote(source_path)} {shlex.quote(remote_path)}"
+            )
+            self._release()
+            if status != 0:
+                print(f"[SSH] 远端复制失败: {error.decode(errors='replace')}")
+                return False
+            return True
+        except Exception as e:
+            print(f"[SSH] 远端复制不可用: {str(e)}")
+            self._release(False)
+            return False
+
+    @contextlib.contextmanager
+    def open_read(
+        self, remote_path: str, offset: int = 0
+    ) -> typing.Iterator[typing.BinaryIO]:
+        """经 SFTP 打开远端文件用于顺序读取"""
+        with self._sftp_session() as sftp:
+            file_size = int(sftp.stat(remote_path).st_size or 0)
+            with sftp.open(remote_path, "rb") as remote_file:
+                yield typing.cast(
+                    typing.BinaryIO,
+                    SFTPReadStream(remote_file, file_size, offset=offset),
+                )
+
+    def get_range(
+        self, remote_path: str, local_path: str, offset: int, length: int
+    ) -> int:
+        """经独立连接的 SFTP 会话读取远端区段，写入本地文件相同位置"""
+        ssh = self.pool.acquire(self.server_config)
+        self.range_connections.add(ssh)
+        reusable = False
+        written = 0
+        try:
+            sftp = ssh.open_sftp()
+            try:
+                with sftp.open(remote_path, "rb") as remote_file:
+                    stream = SFTPReadStream(remote_file, offset + length, offset=offset)
+                    fd = os.open(local_path, os.O_WRONLY)
+                    try:
+                        while True:
+                            chunk = stream.read()
+                            if not chunk:
+                                break
+                            os.pwrite(fd, chunk, offset + written)
+                            written += len(chunk)
+                    finally:
+                        os.close(fd)
+            finally:
+                sftp.close()
+            reusable = True
+        finally:
+            self.range_connections.discard(ssh)
+            self.pool.release(self.server_config, ssh, reusable)
+        return written
+
+    def remote_checksum(self, remote_path: str) -> typing.Optional[str]:
+        """通过 exec 通道计算远端文件摘要"""
+        try:
+            return self._remote_checksum_exec(remote_path)
+        finally:
+            self._release()
+
+    def remote_push(
+        self, source_path: str, target: ServerConfig, remote_path: str
+    ) -> bool:
+        """在本服务器上经 exec 通道运行 rsync（不可用时 scp），直接推送到目标服务器
+
+        本服务器需要能以密钥免交互登录目标服务器，且已信任目标服务器的主机密钥
+        （见 PUSH_HOST_KEY_CHECKING）；BatchMode 下无法登录、主机密钥未知或
+        连接超时会很快失败，返回False，由调用方改为经后端中转。
+        """
+        if target.protocol not in ("SFTP", "SCP"):
+            return False
+        ssh_options = (
+            f"-o BatchMode=yes -o ConnectTimeout={PUSH_CONNECT_TIMEOUT} "
+            f"-o StrictHostKeyChecking={PUSH_HOST_KEY_CHECKING}"
+        )
+        login = f"{target.username}@{target.host}" if target.username else target.host
+        source = shlex.quote(source_path)
+        destination = shlex.quote(f"{login}:{remote_path}")
+        rsync = (
+            "rsync --partial --times "
+            f"-e {shlex.quote(f'ssh -p {target.port} {ssh_options}')} "
+            f"-- {source} {destination}"
+        )
+        scp = f"scp -q -P {target.port} {ssh_options} -- {source} {destination}"
+        try:
+            print(
+                f"[SSH] 服务器直接推送 | {self.server_config.host}:{source_path} -> {target.host}:{remote_path}"
+            )
+            status, _, error = self._exec(
+                f"{{ command -v rsync >/dev/null 2>&1 && {rsync}; }} || {scp}",
+                timeout=None,
+            )
+            self._release()
+            if status != 0:
+                print(f"[SSH] 服务器直接推送失败: {error.decode(errors='replace')}")
+                return False
+            return True
+        except Exception as e:
+            print(f"[SSH] 服务器直接推送不可用: {str(e)}")
+            self._release(False)
+            return False
+
+    def upload_batch(
+        self,
+        files: list[tuple[str, str]],
+        progress_callback: typing.Optional[BatchProgressCallback] = None,
+    ) -> list[typing.Optional[TransferResult]]:
+        """批量上传小文件，只使用一个连接
+
+        优先把所有文件打包为一个 tar 流，经单个 exec 通道交给远端 tar -x 解包，
+        一次往返完成整批传输；exec 不可用时退回协议自身的逐个上传。
+        Args:
+            files: [(本地路径, 远端路径), ...]
+            progress_callback: 进度回调 (文件序号, 进度)
+        Returns:
+            与 files 对应的传输结果列表，失败项为None
+        """
+        results: list[typing.Optional[TransferResult]] = [None] * len(files)
+        try:
+            print(
+                f"[SSH] 批量上传 {len(files)} 个文件 | 服务器: {self.server_config.host}:{self.server_config.port} | 用户名: {self.server_config.username}"
+            )
+            try:
+                results = list(self._upload_tar_exec(files, progress_callback))
+            except Exception as e:
+                print(f"[SSH] tar 通道不可用，改为逐个上传: {str(e)}")
+                results = self._upload_files(files, progress_callback)
+            self._release()
+        except Exception as e:
+            print(f"批量上传失败: {str(e)}")
+            self._release(False)
+        return results
+
+    def _upload_files(
+        self,
+        files: list[tuple[str, str]],
+        progress_callback: typing.Optional[BatchProgressCallback],
+    ) -> list[typing.Optional[TransferResult]]:
+        """批量上传的回退路径，默认逐个 upload（连接由连接池复用）"""
+        return Transport.upload_batch(self, files, progress_callback)
+
+    def _upload_tar_exec(
+        self,
+        files: list[tuple[str, str]],
+        progress_callback: typing.Optional[BatchProgressCallback],
+    ) -> list[TransferResult]:
+        """将文件流式打包为 tar，经 exec 通道在远端解包"""
+        home = ""
+        if any(not remote_path.startswith("/") for _, remote_path in files):
+            status, output, _ = self._exec("pwd")
+            if status != 0:
+                raise OSError("无法获取远端主目录")
+            home = output.decode().strip()
+
+        stdin, stdout, stderr = self._acquire().exec_command("tar -x -f - -C /")
+        results = []
+        try:
+            with tarfile.open(fileobj=stdin, mode="w|") as archive:
+                for index, (local_path, remote_path) in enumerate(files):
+                    if not remote_path.startswith("/"):
+                        remote_path = posixpath.join(home, remote_path)
+                    info = archive.gettarinfo(
+                        local_path, arcname=remote_path.lstrip("/")
+                    )
+                    info.uid = info.gid = 0
+                    info.uname = info.gname = ""
+                    hasher = ProgressHasher(
+                        create_hasher(self.checksum_algorithm),
+                        info.size,
+                        (
+                            functools.partial(progress_callback, index)
+                            if progress_callback
+                            else None
+                        ),
+                    )
+                    with open(local_path, "rb") as local_file:
+                        archive.addfile(info, HashingReader(local_file, hasher))
+                    results.append(
+                        TransferResult(
+                            local_path=local_path,
+                            remote_path=remote_path,
+                            file_size=info.size,
+                            bytes_sent=info.size,
+                            checksum=hasher.hexdigest(),
+                            checksum_algorithm=self.checksum_algorithm,
+                            mode="batch",
+                        )
+                    )
+            stdin.channel.shutdown_write()
+            status = stdout.channel.recv_exit_status()
+        except Exception:
+            stdin.channel.close()
+            raise
+        if status != 0:
+            error = stderr.read().decode("utf-8", errors="replace").strip()
+            raise OSError(f"远端 tar 退出码 {status}: {error}")
+        return results
+
+    def _verify_remote(
+        self,
+        remote_path: str,
+        expected: str,
+        sftp: typing.Optional[paramiko.SFTPClient] = None,
+    ) -> typing.Optional[bool]:
+        """远端校验摘要，exec 不可用时按回退策略处理
+        Returns:
+            True/False 表示校验结果，None 表示跳过校验
+        """
+        remote_digest = self._remote_checksum_exec(remote_path)
+        if remote_digest is None:
+            if self.verify_fallback == "skip":
+                return None
+            if self.verify_fallback == "fail":
+                return False
+            remote_digest = self._remote_checksum_readback(remote_path, sftp)
+        return remote_digest == expected.lower()
+
+    def _remote_checksum_exec(self, remote_path: str) -> typing.Optional[str]:
+        """通过 exec 通道执行 sha256sum 等命令获取远端摘要"""
+        command = REMOTE_CHECKSUM_COMMANDS.get(self.checksum_algorithm.lower())
+        if not command:
+            return None
+        try:
+            status, output, _ = self._exec(f"{command} {shlex.quote(remote_path)}")
+            if status != 0:
+                return None
+            return parse_checksum_output(output.decode("utf-8", errors="replace"))
+        except Exception as e:
+            print(f"[SSH] 远端校验命令不可用: {str(e)}")
+            return None
+
+    def _remote_checksum_readback(
+        self, remote_path: str, sftp: typing.Optional[paramiko.SFTPClient] = None
+    ) -> str:
+        """回读远端文件计算摘要（只读远端，不重复读取本地文件）"""
+        session = sftp or self._acquire().open_sftp()
+        hasher = create_hasher(self.checksum_algorithm)
+        try:
+            with session.open(remote_path, "rb") as remote_file:
+                remote_file.prefetch()
+                while True:
+                    chunk = remote_file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+        finally:
+            if sftp is None:
+                session.close()
+        return hasher.hexdigest()
+
+    @contextlib.contextmanager
+    def _sftp_session(self) -> typing.Iterator[paramiko.SFTPClient]:
+        """打开临时 SFTP 会话，结束后归还连接（连接池会丢弃已断开的连接）"""
+        try:
+            sftp = self._acquire().open_sftp()
+            try:
+                yield sftp
+            finally:
+                sftp.close()
+        finally:
+            self._release()
+
+    @staticmethod
+    def _entry(name: str, attrs: paramiko.SFTPAttributes) -> RemoteEntry:
+        return RemoteEntry(
+            name=name,
+            size=int(attrs.st_size or 0),
+            mtime=float(attrs.st_mtime or 0),
+            is_dir=stat.S_ISDIR(attrs.st_mode or 0),
+        )
+
+    def _acquire(self) -> paramiko.SSHClient:
+        """从连接池取得连接（同一次操作内复用）"""
+        if self.ssh is None:
+            self.ssh = self.pool.acquire(self.server_config)
+        return self.ssh
+
+    def _release(self, reusable: bool = True) -> None:
+        """归还连接；出错时关闭而不放回连接池"""
+        ssh, self.ssh = self.ssh, None
+        self.pool.release(self.server_config, ssh, reusable)
+
+    def _exec(
+        self, command: str, timeout: typing.Optional[float] = 300
+    ) -> tuple[int, bytes, bytes]:
+        """在 exec 通道执行命令，返回 (退出码, 标准输出, 标准错误)
+        timeout 为None时不限制等待输出的时间，用于长时间无输出的命令
+        """
+        _, stdout, stderr = self._acquire().exec_command(command, timeout=timeout)
+        output = stdout.read()
+        status = stdout.channel.recv_exit_status()
+        return status, output, stderr.read()
@@ -0,0 +1,402 @@
+import abc
+import functools
+import os
+import typing
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from ...domain.models import ServerConfig, TransferResult
+from .checksum import create_hasher
+
+# 传输模式：auto 按阈值自动选择，full 完整上传，delta 差量上传
+TRANSFER_MODES = ("auto", "full", "delta")
+
+# 需要原子替换时，远端先写入带该后缀的临时文件，完成后重命名
+PARTIAL_SUFFIX = ".part"
+
+# 顺序下载时单次读写块大小
+DOWNLOAD_CHUNK = 256 * 1024
+
+# 并行下载时每个区段的大小，文件不足两个区段时顺序下载
+DOWNLOAD_RANGE = 8 * 1024 * 1024
+
+ProgressCallback = typing.Callable[[float], None]
+BatchProgressCallback = typing.Callable[[int, float], None]
+
+
+class Readable(typing.Protocol):
+    """upload_stream 的数据来源：文件、HTTP 响应体、增长中的文件等"""
+
+    def read(self, size: int = -1, /) -> bytes: ...
+
+
+@dataclass
+class RemoteEntry:
+    """远端文件或目录信息"""
+
+    name: str
+    size: int
+    mtime: float
+    is_dir: bool = False
+
+
+def partial_name(remote_path: str) -> str:
+    """完整上传的远端临时文件名，带随机标记，同一目标的并发上传互不覆盖"""
+    return f"{remote_path}.{uuid.uuid4().hex[:8]}{PARTIAL_SUFFIX}"
+
+
+class Transport(abc.ABC):
+    """传输协议抽象接口，SFTP/SCP 等协议实现各自的数据通道
+
+    除 upload 外的操作默认不支持，由各协议按能力覆盖。操作结束后连接
+    归还连接池，connect 只用于提前建立连接。
+    """
+
+    protocol = ""
+
+    def __init__(self, server_config: ServerConfig) -> None:
+        self.server_config = server_config
+        self.last_result: typing.Optional[TransferResult] = None
+        # 最近一次上传实际写入的远端文件（可能是临时文件），传输中断时它的
+        # 内容不完整，取消任务时只删除它；尚未开始写入时为None
+        self.partial_path: typing.Optional[str] = None
+        # 完整上传新建（截断）临时文件、即将从头顺序写入时以其路径调用，
+        # 调用方据此记录可续传的临时文件；只有这类文件能按大小续传
+        self.on_partial: typing.Optional[typing.Callable[[str], object]] = None
+
+    def connect(self) -> None:
+        """提前建立连接
+
+        可选钩子，默认不做处理，首次传输时再建立连接。
+        """
+        return None
+
+    @abc.abstractmethod
+    def upload(
+        self,
+        local_path: str,
+        remote_path: str,
+        progress_callback: typing.Optional[ProgressCallback] = None,
+        mode: str = "auto",
+    ) -> bool:
+        """上传文件到服务器，结果保存在 last_result 中，返回是否成功"""
+
+    def upload_batch(
+        self,
+        files: list[tuple[str, str]],
+        progress_callback: typing.Optional[BatchProgressCallback] = None,
+    ) -> list[typing.Optional[TransferResult]]:
+        """批量上传，默认逐个调用 upload
+        Returns:
+            与 files 对应的传输结果列表，失败项为None
+        """
+        results: list[typing.Optional[TransferResult]] = []
+        for index, (local_path, remote_path) in enumerate(files):
+            success = self.upload(
+                local_path,
+                remote_path,
+                (
+                    functools.partial(progress_callback, index)
+                    if progress_callback
+                    else None
+                ),
+            )
+            results.append(self.last_result if success else None)
+        return results
+
+    def put(
+        self,
+        local_path: str,
+        remote_path: str,
+        progress_callback: typing.Optional[ProgressCallback] = None,
+    ) -> TransferResult:
+        """完整上传单个文件，失败时抛出 OSError"""
+        if not self.upload(local_path, remote_path, progress_callback, mode="full"):
+            raise OSError(f"上传失败: {remote_path}")
+        return self.last_result or TransferResult(
+            local_path=local_path,
+            remote_path=remote_path,
+            file_size=os.path.getsize(local_path),
+        )
+
+    def upload_stream(
+        self,
+        stream: Readable,
+        remote_path: str,
+        file_size: typing.Optional[int] = None,
+        progress_callback: typing.Optional[ProgressCallback] = None,
+        offset: typing.Optional[int] = None,
+    ) -> bool:
+        """把二进制流的内容直接写入远端文件，不经过本地磁盘
+        Args:
+            stream: 数据来源，如 HTTP 请求体
+            remote_path: 远端路径
+            file_size: 预期从流中读到的字节数，未知时为None，不报告进度也不校验大小
+            progress_callback: 进度回调
+            offset: 写入已存在文件的该偏移处且不截断，用于续传和分段并行写入；
+                None 时新建或截断文件
+        Returns:
+            是否成功，结果保存在 last_result 中
+        """
+        raise self._unsupported("upload_stream")
+
+    def put_range(
+        self, local_path: str, remote_path: str, offset: int, length: int
+    ) -> int:
+        """将本地文件 [offset, offset+length) 写入远端文件相同位置
+        调用方应先写入首段以创建远端文件
+        Returns:
+            实际写入的字节数
+        """
+        raise self._unsupported("put_range")
+
+    def download(
+        self,
+        remote_path: str,
+        local_path: str,
+        progress_callback: typing.Optional[ProgressCallback] = None,
+        resume: bool = True,
+        connections: int = 1,
+    ) -> bool:
+        """下载远端文件到本地，结果保存在 last_result 中
+
+        先写入本地 .part 临时文件，完成后重命名为目标文件。文件至少有两个区段
+        且协议实现了 get_range 时，按区段以 connections 个连接并行读取；否则经
+        open_read 顺序读取，resume 时从已有临时文件末尾续传。并行下载的临时文件
+        可能有空洞，失败时删除，不用于续传。
+        Args:
+            remote_path: 远端路径
+            local_path: 本地目标路径
+            progress_callback: 进度回调
+            resume: 是否从已有临时文件续传
+            connections: 并行读取的连接数
+        Returns:
+            是否成功
+        """
+        self.last_result = None
+        part_path = local_path + PARTIAL_SUFFIX
+        parallel = False
+        try:
+            file_size = self.remote_size(remote_path)
+            if file_size is None:
+                raise FileNotFoundError(f"远端文件不存在: {remote_path}")
+            os.makedirs(os.path.dirname(os.path.abspath(local_path)), exist_ok=True)
+            parallel = (
+                connections > 1
+                and file_size >= DOWNLOAD_RANGE * 2
+                and type(self).get_range is not Transport.get_range
+            )
+            algorithm = getattr(self, "checksum_algorithm", "sha256")
+            offset = 0
+            if parallel:
+                checksum = None
+                self._download_ranges(
+                    remote_path, part_path, file_size, connections, progress_callback
+                )
+            else:
+                if resume and os.path.exists(part_path):
+                    offset = min(os.path.getsize(part_path), file_size)
+                checksum = self._download_sequential(
+                    remote_path, part_path, file_size, offset, progress_callback
+                )
+            os.replace(part_path, local_path)
+            self.last_result = TransferResult(
+                local_path=local_path,
+                remote_path=remote_path,
+                file_size=file_size,
+                bytes_sent=file_size - offset,
+                checksum=checksum,
+                checksum_algorithm=algorithm,
+                mode="resumed" if offset else "full",
+            )
+            return True
+        except Exception as e:
+            print(f"下载失败: {str(e)}")
+            if parallel and os.path.exists(part_path):
+                os.unlink(part_path)
+            return False
+
+    def get_range(
+        self, remote_path: str, local_path: str, offset: int, length: int
+    ) -> int:
+        """将远端文件 [offset, offset+length) 写入本地文件相同位置
+
+        可能在多个线程中同时调用，实现需各自使用独立连接。
+        Returns:
+            实际写入的字节数
+        """
+        raise self._unsupported("get_range")
+
+    def stat(self, remote_path: str) -> typing.Optional[RemoteEntry]:
+        """查询远端文件信息，不存在时返回None"""
+        raise self._unsupported("stat")
+
+    def mkdir(self, remote_path: str, parents: bool = True) -> None:
+        """创建远端目录，parents 为 True 时逐级创建且已存在不报错"""
+        raise self._unsupported("mkdir")
+
+    def rename(self, source_path: str, remote_path: str) -> None:
+        """重命名远端文件，目标已存在时覆盖"""
+        raise self._unsupported("rename")
+
+    def listdir(self, remote_path: str) -> list[RemoteEntry]:
+        """列出远端目录内容"""
+        raise self._unsupported("listdir")
+
+    def remove(self, remote_path: str) -> None:
+        """删除远端文件"""
+        raise self._unsupported("remove")
+
+    def remote_size(self, remote_path: str) -> typing.Optional[int]:
+        """查询远端文件大小，不支持或不存在时返回None"""
+        try:
+            entry = self.stat(remote_path)
+        except Exception:
+            return None
+        return entry.size if entry else None
+
+    def remote_copy(
+        self, source_path: str, remote_path: str, hardlink: bool = False
+    ) -> bool:
+        """在远端复制已存在的文件，不支持时返回False"""
+        return False
+
+    def open_read(
+        self, remote_path: str, offset: int = 0
+    ) -> typing.ContextManager[typing.BinaryIO]:
+        """从 offset 处打开远端文件用于顺序读取，作为上下文管理器使用，结束后释放连接"""
+        raise self._unsupported("open_read")
+
+    def remote_checksum(self, remote_path: str) -> typing.Optional[str]:
+        """在远端计算文件摘要（算法同 checksum_algorithm），不支持时返回None"""
+        return None
+
+    def remote_push(
+        self, source_path: str, target: ServerConfig, remote_path: str
+    ) -> bool:
+        """由本服务器直接把文件推送到目标服务器，数据不经过本机
+        Args:
+            source_path: 本服务器上的文件路径
+            target: 目标服务器配置
+            remote_path: 目标服务器上的路径
+        Returns:
+            是否成功，不支持或两台服务器之间不通时返回False
+        """
+        return False
+
+    def abort(self) -> None:
+        """从其他线程中断正在进行的传输：关闭当前连接，使阻塞的读写立即出错
+
+        可选钩子，默认不做处理，传输在下一次进度回调检查取消令牌时结束。
+        """
+        return None
+
+    def close(self) -> None:
+        """释放协议占用的资源
+
+        可选钩子，默认没有需要释放的资源。
+        """
+        return None
+
+    def _download_sequential(
+        self,
+        remote_path: str,
+        part_path: str,
+        file_size: int,
+        offset: int,
+        progress_callback: typing.Optional[ProgressCallback],
+    ) -> typing.Optional[str]:
+        """从 offset 处顺序读取远端文件写入临时文件
+        Returns:
+            完整下载时的摘要，续传时为None
+        """
+        hasher = None
+        if offset == 0:
+            hasher = create_hasher(getattr(self, "checksum_algorithm", "sha256"))
+        received = offset
+        with (
+            self.open_read(remote_path, offset) as stream,
+            open(part_path, "r+b" if offset else "wb") as dst,
+        ):
+            dst.seek(offset)
+            dst.truncate()
+            while True:
+                chunk = stream.read(DOWNLOAD_CHUNK)
+                if not chunk:
+                    break
+                if hasher is not None:
+                    hasher.update(chunk)
+                dst.write(chunk)
+                received += len(chunk)
+                if progress_callback and file_size > 0:
+                    progress_callback(min(received / file_size, 1.0))
+        if received != file_size:
+            raise OSError(f"大小不一致: 预期 {file_size}，实际收到 {received}")
+        return hasher.hexdigest() if hasher is not None else None
+
+    def _download_ranges(
+        self,
+        remote_path: str,
+        part_path: str,
+        file_size: int,
+        connections: int,
+        progress_callback: typing.Optional[ProgressCallback],
+    ) -> None:
+        """按 DOWNLOAD_RANGE 切分区段，由 connections 个线程并行读取"""
+        with open(part_path, "wb") as dst:
+            dst.truncate(file_size)
+        ranges = [
+            (start, min(DOWNLOAD_RANGE, file_size - start))
+            for start in range(0, file_size, DOWNLOAD_RANGE)
+        ]
+        received = 0
+
+        def fetch(offset: int, length: int) -> int:
+            sent = self.get_range(remote_path, part_path, offset, length)
+            if sent != length:
+                raise OSError(f"区段 {offset} 读取不完整: {sent}/{length}")
+            return sent
+
+        pool = ThreadPoolExecutor(
+            max_workers=min(connections, len(ranges)),
+            thread_name_prefix="download-range",
+        )
+        try:
+            # 按区段顺序汇报进度，任一区段失败时放弃尚未开始的区段
+            for sent in pool.map(lambda r: fetch(*r), ranges):
+                received += sent
+                if progress_callback:
+                    progress_callback(received / file_size)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _begin_partial(self, part_path: str) -> None:
+        """临时文件已新建，通知调用方记录，见 on_partial"""
+        self.partial_path = part_path
+        if self.on_partial is not None:
+            self.on_partial(part_path)
+
+    def _unsupported(self, operation: str) -> NotImplementedError:
+        return NotImplementedError(
+            f"{self.protocol or type(self).__name__} 不支持 {operation}"
+        )
+
+
+TransportT = typing.TypeVar("TransportT", bound=type[Transport])
+
+# 协议名 -> 传输实现，由各实现通过 register_transport 注册
+TRANSPORTS: dict[str, type[Transport]] = {}
+
+
+def register_transport(*protocols: str) -> typing.Callable[[TransportT], TransportT]:
+    """按协议名注册传输实现的类装饰器"""
+
+    def decorator(transport_cls: TransportT) -> TransportT:
+        if not transport_cls.protocol:
+            transport_cls.protocol = protocols[0]
+        for protocol in protocols:
+            TRANSPORTS[protocol.upper()] = transport_cls
+        return transport_cls
+
+    return decorator
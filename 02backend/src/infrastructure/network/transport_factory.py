@@ -0,0 +1,27 @@
+import inspect
+import typing
+
+from ...domain.models import ServerConfig
+from . import ftp_client, local_transport, scp_client  # noqa: F401  注册内置传输实现
+from .sftp_client import SFTPClient
+from .transport import TRANSPORTS, Transport
+
+
+def available_protocols() -> list[str]:
+    """已注册的协议名"""
+    return sorted(TRANSPORTS)
+
+
+def create_transport(server_config: ServerConfig, **options: typing.Any) -> Transport:
+    """按服务器配置的协议创建传输实现，未注册的协议退回 SFTP
+
+    各协议支持的选项不同（如压缩只对 SFTP 有效），不被目标实现接受的
+    选项会被忽略。
+    """
+    transport_cls = TRANSPORTS.get(
+        (server_config.protocol or "SFTP").upper(), SFTPClient
+    )
+    accepted = inspect.signature(transport_cls.__init__).parameters
+    return transport_cls(
+        server_config, **{k: v for k, v in options.items() if k in accepted}
+    )
@@ -1,3 +1,12 @@
+from .dedup_store import DeliveryIndex, HashCache
+from .json_writer import DurableJsonWriter, get_writer, writer_metrics
 from .storage import Storage
 
-__all__ = ["Storage"]
+__all__ = [
+    "Storage",
+    "HashCache",
+    "DeliveryIndex",
+    "DurableJsonWriter",
+    "get_writer",
+    "writer_metrics",
+]
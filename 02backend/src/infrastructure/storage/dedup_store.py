@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import typing
+
+from .json_writer import get_writer
+
+
+class HashCache:
+    """本地文件摘要缓存，按 (设备, inode, 大小, 修改时间) 建立索引"""
+
+    def __init__(self, base_dir: str = ".", max_entries: int = 10000):
+        self.cache_file = os.path.join(base_dir, "hash_cache.json")
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: dict[str, dict[str, str]] = self._load()
+
+    @staticmethod
+    def make_key(stat_result: os.stat_result) -> str:
+        """根据文件元数据生成缓存键"""
+        return (
+            f"{stat_result.st_dev}:{stat_result.st_ino}:"
+            f"{stat_result.st_size}:{stat_result.st_mtime_ns}"
+        )
+
+    def lookup(
+        self, local_path: str, algorithm: str = "sha256"
+    ) -> typing.Optional[str]:
+        """查询文件摘要，元数据变化视为未命中"""
+        try:
+            key = self.make_key(os.stat(local_path))
+        except OSError:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry and entry.get("algorithm") == algorithm:
+            return entry.get("checksum")
+        return None
+
+    def store(self, local_path: str, checksum: str, algorithm: str = "sha256") -> None:
+        """记录文件摘要并持久化"""
+        try:
+            key = self.make_key(os.stat(local_path))
+        except OSError:
+            return
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = {"algorithm": algorithm, "checksum": checksum}
+            # 超出容量时淘汰最早写入的条目
+            while len(self.entries) > self.max_entries:
+                self.entries.pop(next(iter(self.entries)))
+            self._save()
+
+    def _load(self) -> dict[str, dict[str, str]]:
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, encoding="utf-8") as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        return {k: v for k, v in data.items() if isinstance(v, dict)}
+            return {}
+        except Exception:
+            return {}
+
+    def _save(self) -> None:
+        try:
+            get_writer(self.cache_file).save(self.entries)
+        except Exception:
+            pass
+
+
+class DeliveryIndex:
+    """按服务器记录已送达内容：摘要 -> 远端路径列表"""
+
+    def __init__(self, base_dir: str = "."):
+        self.index_file = os.path.join(base_dir, "deliveries.json")
+        self.lock = threading.Lock()
+        self.deliveries: dict[str, dict[str, list[str]]] = self._load()
+
+    def find(self, server_id: str, checksum: str) -> list[str]:
+        """查询某服务器上已存在该内容的远端路径"""
+        with self.lock:
+            return list(self.deliveries.get(server_id, {}).get(checksum, []))
+
+    def record(self, server_id: str, checksum: str, remote_path: str) -> None:
+        """记录一次送达；同一远端路径只对应最新内容"""
+        with self.lock:
+            server_index = self.deliveries.setdefault(server_id, {})
+            self._discard(server_index, remote_path)
+            server_index.setdefault(checksum, []).append(remote_path)
+            self._save()
+
+    def forget(self, server_id: str, remote_path: str) -> None:
+        """移除失效的送达记录"""
+        with self.lock:
+            server_index = self.deliveries.get(server_id)
+            if server_index is None:
+                return
+            self._discard(server_index, remote_path)
+            self._save()
+
+    @staticmethod
+    def _discard(server_index: dict[str, list[str]], remote_path: str) -> None:
+        for checksum in list(server_index):
+            paths = [p for p in server_index[checksum] if p != remote_path]
+            if paths:
+                server_index[checksum] = paths
+            else:
+                del server_index[checksum]
+
+    def _load(self) -> dict[str, dict[str, list[str]]]:
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, encoding="utf-8") as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        return {k: v for k, v in data.items() if isinstance(v, dict)}
+            return {}
+        except Exception:
+            return {}
+
+    def _save(self) -> None:
+        try:
+            get_writer(self.index_file).save(self.deliveries)
+        except Exception:
+            pass
@@ -0,0 +1,171 @@
+"""
+JSON 持久化写入模块
+同一文件的并发保存请求合并为一次写入（组提交）：先写临时文件并 fsync，
+再原子替换目标文件，进程或机器崩溃时文件要么是旧内容，要么是新内容
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+# 一次写入前等待合并后续保存请求的秒数
+FLUSH_WINDOW = 0.002
+
+
+class _Batch:
+    """一次写入覆盖的全部保存请求，写入结束后记录结果"""
+
+    __slots__ = ("done", "error")
+
+    def __init__(self) -> None:
+        self.done = False
+        self.error: Optional[Exception] = None
+
+
+class DurableJsonWriter:
+    """单个 JSON 文件的组提交写入器
+
+    每次保存传入文件的完整内容，后提交的内容覆盖先提交的。save 在调用
+    线程中序列化，然后等待包含本次内容（或更新内容）的写入完成才返回：
+    没有写入在进行时调用者自己执行写入，否则等待正在写入的线程写完后
+    由等待者中的一个把期间提交的最新内容一次写出。每个保存请求只看
+    覆盖它的那次写入的结果，之后其他写入成功也不会掩盖这次失败。
+    """
+
+    def __init__(self, path: str, window: float = FLUSH_WINDOW):
+        """初始化写入器
+        Args:
+            path: 目标文件路径
+            window: 写入前等待合并后续请求的秒数
+        """
+        self.path = path
+        self.window = window
+        self.cond = threading.Condition()
+        self.payload: Optional[bytes] = None
+        # 尚未被写入取走的保存请求所属批次
+        self.batch = _Batch()
+        self.flushing = False
+        # 写入统计
+        self.requests = 0
+        self.flushes = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+    def save(self, data: Any) -> None:
+        """保存完整内容，写入落盘后返回
+        Args:
+            data: 可序列化为 JSON 的对象
+        Raises:
+            Exception: 包含本次内容的写入失败时抛出写入异常
+        """
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+        with self.cond:
+            self.requests += 1
+            self.payload = payload
+            batch = self.batch
+            while not batch.done and self.flushing:
+                self.cond.wait()
+            if batch.done:
+                # 覆盖本次内容的写入已结束，按它的结果返回
+                if batch.error is not None:
+                    raise batch.error
+                return
+            self.flushing = True
+        self._flush()
+
+    def metrics(self) -> dict[str, Any]:
+        """写入统计：请求数、实际写入数、合并掉的请求数与写入耗时（毫秒）"""
+        with self.cond:
+            return {
+                "path": self.path,
+                "requests": self.requests,
+                "flushes": self.flushes,
+                "coalesced": self.requests - self.flushes - self.failures,
+                "failures": self.failures,
+                "avg_flush_ms": round(
+                    self.total_latency / max(self.flushes + self.failures, 1) * 1000,
+                    3,
+                ),
+                "max_flush_ms": round(self.max_latency * 1000, 3),
+                "last_flush_ms": round(self.last_latency * 1000, 3),
+            }
+
+    def _flush(self) -> None:
+        """写出最新提交的内容，完成后唤醒等待者"""
+        if self.window > 0:
+            time.sleep(self.window)
+        with self.cond:
+            payload, batch = self.payload, self.batch
+            self.payload = None
+            self.batch = _Batch()
+        error = None
+        start = time.perf_counter()
+        try:
+            if payload is not None:
+                self._write(payload)
+        except Exception as e:
+            error = e
+        latency = time.perf_counter() - start
+        with self.cond:
+            batch.done = True
+            batch.error = error
+            self.flushing = False
+            if error is None:
+                self.flushes += 1
+            else:
+                self.failures += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.last_latency = latency
+            self.cond.notify_all()
+        if error is not None:
+            raise error
+
+    def _write(self, payload: bytes) -> None:
+        """写临时文件并 fsync，原子替换目标文件后同步目录"""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        temp_file = self.path + ".tmp"
+        with open(temp_file, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.path)
+        try:
+            # 目录项落盘后替换才算持久；不支持打开目录的平台跳过
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+_writers: dict[str, DurableJsonWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path: str) -> DurableJsonWriter:
+    """获取文件对应的写入器，同一文件在进程内共用一个，保证写入串行与合并"""
+    key = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = DurableJsonWriter(key)
+        return writer
+
+
+def writer_metrics() -> list[dict[str, Any]]:
+    """进程内所有 JSON 文件的写入统计"""
+    with _writers_lock:
+        writers = list(_writers.values())
+    return [writer.metrics() for writer in writers]
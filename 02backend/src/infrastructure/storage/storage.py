@@ -1,8 +1,13 @@
 import json
 import os
+from collections.abc import Iterator
 
 from ...domain.models import TransferTask
 from ..crypto.crypto_utils import CryptoUtils
+from .json_writer import get_writer
+
+# 流式读取 tasks.json 时每次读入的字符数
+TASKS_READ_CHUNK = 64 * 1024
 
 
 class Storage:
@@ -27,58 +32,49 @@ class Storage:
 
     def save_servers(self, servers: list) -> None:
         """保存所有服务器配置，参数为 dict 列表"""
-        with open(self.servers_file, "w") as f:
-            json.dump(servers, f, indent=2)
+        get_writer(self.servers_file).save(servers)
 
     def load_tasks(self) -> list[TransferTask]:
         """加载所有传输任务"""
         if not os.path.exists(self.tasks_file):
             return []
 
-        with open(self.tasks_file) as f:
+        with open(self.tasks_file, encoding="utf-8") as f:
             data = json.load(f)
 
-        tasks = []
-        for item in data:
-            tasks.append(
-                TransferTask(
-                    id=item["id"],
-                    file_path=item["file_path"],
-                    file_name=item["file_name"],
-                    file_size=item["file_size"],
-                    server_id=item["server_id"],
-                    target_path=item["target_path"],
-                    status=item["status"],
-                    progress=item["progress"],
-                    started_at=item["started_at"],
-                    completed_at=item.get("completed_at"),
-                )
-            )
-        return tasks
+        return [TransferTask.from_dict(item) for item in data]
+
+    def iter_tasks_json(self, chunk_size: int = TASKS_READ_CHUNK) -> Iterator[dict]:
+        """逐条读取任务字典，不把整个文件载入内存
+
+        文件在写入中途被截断时读到最后一条完整记录为止。
+        """
+        if not os.path.exists(self.tasks_file):
+            return
+        decoder = json.JSONDecoder()
+        with open(self.tasks_file, encoding="utf-8") as f:
+            buffer, pos, eof = "", 0, False
+            while True:
+                while pos < len(buffer) and buffer[pos] in "[, \t\r\n":
+                    pos += 1
+                if buffer.startswith("]", pos):
+                    return
+                try:
+                    item, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        return
+                    chunk = f.read(chunk_size)
+                    eof = not chunk
+                    buffer, pos = buffer[pos:] + chunk, 0
+                    continue
+                if isinstance(item, dict):
+                    yield item
 
     def save_tasks_json(self, tasks: list[dict]) -> None:
-        """保存任务字典列表"""
-        with open(self.tasks_file, "w") as f:
-            json.dump(tasks, f, indent=2)
+        """保存任务字典列表，先写临时文件再替换，进程崩溃时不会留下半个文件"""
+        get_writer(self.tasks_file).save(tasks)
 
     def save_tasks(self, tasks: list[TransferTask]) -> None:
         """保存所有传输任务"""
-        data = []
-        for task in tasks:
-            data.append(
-                {
-                    "id": task.id,
-                    "file_path": task.file_path,
-                    "file_name": task.file_name,
-                    "file_size": task.file_size,
-                    "server_id": task.server_id,
-                    "target_path": task.target_path,
-                    "status": task.status,
-                    "progress": task.progress,
-                    "started_at": task.started_at,
-                    "completed_at": task.completed_at,
-                }
-            )
-
-        with open(self.tasks_file, "w") as f:
-            json.dump(data, f, indent=2)
+        self.save_tasks_json([task.to_dict() for task in tasks])
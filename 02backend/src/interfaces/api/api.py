@@ -1,19 +1,49 @@
+import atexit
 import datetime
 import os
-from typing import Any, Union
+import posixpath
+from typing import Any, Optional, Union
 
 from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 
 from src.application.handlers.error_handler import ErrorHandler
 from src.application.services.config_manager import ConfigManager
+from src.application.services.dedup_manager import DedupManager
+from src.application.services.dispatcher_factory import create_dispatcher
 from src.application.services.history_manager import HistoryManager
-from src.application.services.queue_manager import QueueManager
-from src.infrastructure.network.sftp_client import SFTPClient
-
-
-def create_app() -> Flask:
-    """创建Flask应用，注册所有RESTful接口"""
+from src.application.services.queue_manager import QueueManager, TaskStatus
+from src.application.services.task_archiver import ARCHIVE_GRACE_PERIOD, TaskArchiver
+from src.application.services.transfer_dispatcher import (
+    DOWNLOAD_CONNECTIONS,
+    RELAY_CONNECTIONS,
+)
+from src.infrastructure.network.compression import COMPRESSION_MODES
+from src.infrastructure.network.http_source import HttpSource
+from src.infrastructure.network.transport import TRANSFER_MODES
+from src.infrastructure.network.transport_factory import create_transport
+from src.infrastructure.storage.json_writer import writer_metrics
+from src.interfaces.api.streaming import MultipartFileStream
+
+
+def parse_connections(value: Any, default: int) -> Optional[int]:
+    """解析请求中的并行连接数，未提供时取默认值，不是正整数时返回None"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return None
+    try:
+        connections = int(value)
+    except (TypeError, ValueError):
+        return None
+    return connections if connections > 0 else None
+
+
+def create_app(engine: Optional[str] = None) -> Flask:
+    """创建Flask应用，注册所有RESTful接口
+    Args:
+        engine: 传输引擎 thread/async/process，默认读取环境变量 TRANSFER_ENGINE，未设置时为 thread
+    """
     static_dir = os.path.abspath(
         os.path.join(os.path.dirname(__file__), "..", "..", "..", "static")
     )
@@ -22,9 +52,31 @@ def create_app() -> Flask:
 
     # 阶段2核心模块初始化
     config_manager = ConfigManager()
+    # 上传时记录的最近路径与最后使用时间在退出前写回 servers.json
+    atexit.register(config_manager.stop)
     history_manager = HistoryManager()
     queue_manager = QueueManager()
     error_handler = ErrorHandler()
+    # 已结束任务批量写入历史，宽限期（秒）后移出队列
+    archiver = TaskArchiver(
+        queue_manager,
+        history_manager,
+        config_manager,
+        grace_period=float(
+            os.environ.get("ARCHIVE_GRACE_PERIOD", ARCHIVE_GRACE_PERIOD)
+        ),
+    )
+    dispatcher = create_dispatcher(
+        engine or os.environ.get("TRANSFER_ENGINE", "thread"),
+        queue_manager,
+        config_manager,
+        history_manager,
+        DedupManager(),
+        archiver=archiver,
+    )
+    archiver.start()
+    # 上次运行留下的任务在后台恢复，恢复完成后立即重新调度
+    queue_manager.on_recovered(dispatcher.dispatch_pending)
 
     @app.route("/health", methods=["GET"])
     def health_check() -> Union[Response, tuple[Response, int]]:
@@ -44,8 +96,14 @@ def create_app() -> Flask:
         local_path = request.form.get("local_path")
         server_id = request.form.get("server_id")
         target_path = request.form.get("target_path", "/")
+        transfer_mode = request.form.get("transfer_mode", "auto")
+        compression = request.form.get("compression", "none")
         if not local_path or not server_id:
             return jsonify({"error": "缺少参数"}), 400
+        if transfer_mode not in TRANSFER_MODES:
+            return jsonify({"error": f"不支持的传输模式: {transfer_mode}"}), 400
+        if compression not in COMPRESSION_MODES:
+            return jsonify({"error": f"不支持的压缩模式: {compression}"}), 400
 
         # 展开 ~
         local_path = os.path.expanduser(local_path)
@@ -60,13 +118,437 @@ def create_app() -> Flask:
         # 新增：更新服务器最后使用时间
         config_manager.update_server_latest_use(server_id)
 
-        sftp_client = SFTPClient(server_config)
         file_name = os.path.basename(local_path)
-        remote_path = os.path.join(target_path, file_name)
-        success = sftp_client.upload(local_path, remote_path)
+        file_size = os.path.getsize(local_path) if os.path.isfile(local_path) else 0
+
+        # 登记任务，便于进度查询并记录摘要
+        task_result = queue_manager.add_task(
+            {
+                "file_path": local_path,
+                "file_name": file_name,
+                "file_size": file_size,
+                "server_id": server_id,
+                "target_path": target_path,
+                "transfer_mode": transfer_mode,
+            }
+        )
+        task_id = str(task_result.get("task_id", ""))
+        # 先置为运行中，避免被后台调度重复领取
+        queue_manager.update_task_status(task_id, TaskStatus.RUNNING)
+
+        success, transfer_result = dispatcher.run_task(
+            task_id,
+            verify_remote=request.form.get("verify", "false").lower() == "true",
+            dedup=request.form.get("dedup", "true").lower() == "true",
+            compression=compression,
+            compression_store=request.form.get("compression_store", "false").lower()
+            == "true",
+        )
         if not success:
-            return jsonify({"error": "SFTP上传失败"}), 500
-        return jsonify({"success": True})
+            return jsonify({"error": "SFTP上传失败", "task_id": task_id}), 500
+        return jsonify(
+            {
+                "success": True,
+                "task_id": task_id,
+                "checksum": transfer_result.checksum if transfer_result else None,
+                "mode": transfer_result.mode if transfer_result else "full",
+                "compression_ratio": (
+                    transfer_result.compression_ratio if transfer_result else None
+                ),
+            }
+        )
+
+    @app.route("/upload/batch", methods=["POST"])
+    def upload_batch() -> Any:
+        """批量上传：登记多个本地文件后由后台调度，小文件合并为单个 tar 流"""
+        data = request.get_json() or {}
+        local_paths = data.get("local_paths")
+        server_id = data.get("server_id")
+        target_path = data.get("target_path", "/")
+        if not isinstance(local_paths, list) or not local_paths or not server_id:
+            return jsonify({"error": "缺少参数"}), 400
+
+        if not config_manager.get_server_config(server_id):
+            return jsonify({"error": "服务器配置不存在"}), 404
+
+        # 先校验全部路径再登记，避免中途失败留下已登记的任务
+        resolved = []
+        for raw_path in local_paths:
+            local_path = os.path.expanduser(str(raw_path))
+            if not os.path.isfile(local_path):
+                return jsonify({"error": f"文件不存在: {raw_path}"}), 400
+            resolved.append(local_path)
+
+        config_manager.update_server_paths(server_id, target_path)
+        config_manager.update_server_latest_use(server_id)
+
+        task_ids = []
+        for local_path in resolved:
+            result = queue_manager.add_task(
+                {
+                    "file_path": local_path,
+                    "file_name": os.path.basename(local_path),
+                    "file_size": os.path.getsize(local_path),
+                    "server_id": server_id,
+                    "target_path": target_path,
+                }
+            )
+            task_ids.append(result.get("task_id"))
+
+        dispatcher.dispatch_pending()
+        return jsonify({"success": True, "task_ids": task_ids}), 202
+
+    @app.route("/upload/fanout", methods=["POST"])
+    def upload_fanout() -> Any:
+        """多目标分发：本地文件只读取一次，并行上传到多个服务器/路径
+
+        每个目标登记为独立任务，返回的 task_ids 与 destinations 顺序一致，
+        通过 /progress/<task_id> 分别查询各目标的状态。
+        """
+        data = request.get_json() or {}
+        local_path = data.get("local_path")
+        destinations = data.get("destinations")
+        if not local_path or not isinstance(destinations, list) or not destinations:
+            return jsonify({"error": "缺少参数"}), 400
+        local_path = os.path.expanduser(local_path)
+        if not os.path.isfile(local_path):
+            return jsonify({"error": f"文件不存在: {local_path}"}), 400
+        for destination in destinations:
+            if not isinstance(destination, dict) or not destination.get("server_id"):
+                return jsonify({"error": "目标缺少 server_id"}), 400
+            if not config_manager.get_server_config(destination["server_id"]):
+                return (
+                    jsonify({"error": f"服务器配置不存在: {destination['server_id']}"}),
+                    404,
+                )
+
+        file_name = os.path.basename(local_path)
+        file_size = os.path.getsize(local_path)
+        task_ids = []
+        for destination in destinations:
+            server_id = destination["server_id"]
+            target_path = destination.get("target_path", "/")
+            config_manager.update_server_paths(server_id, target_path)
+            config_manager.update_server_latest_use(server_id)
+            result = queue_manager.add_task(
+                {
+                    "file_path": local_path,
+                    "file_name": file_name,
+                    "file_size": file_size,
+                    "server_id": server_id,
+                    "target_path": target_path,
+                }
+            )
+            task_id = str(result.get("task_id", ""))
+            queue_manager.update_task_status(task_id, TaskStatus.RUNNING)
+            task_ids.append(task_id)
+
+        dispatcher.fanout(task_ids, verify_remote=bool(data.get("verify", False)))
+        return jsonify({"success": True, "task_ids": task_ids}), 202
+
+    @app.route("/upload/replicate", methods=["POST"])
+    def upload_replicate() -> Any:
+        """服务器间复制：把已在源服务器上的文件复制到其他服务器
+
+        源服务器能直接登录目标服务器时由源服务器推送，否则经后端流式中转；
+        每个目标登记为独立任务，返回的 task_ids 与 destinations 顺序一致。
+        """
+        data = request.get_json() or {}
+        source_server_id = data.get("source_server_id")
+        source_path = data.get("source_path")
+        destinations = data.get("destinations")
+        if (
+            not source_server_id
+            or not source_path
+            or not isinstance(destinations, list)
+            or not destinations
+        ):
+            return jsonify({"error": "缺少参数"}), 400
+        source_config = config_manager.get_server_config(source_server_id)
+        if not source_config:
+            return jsonify({"error": "源服务器配置不存在"}), 404
+        for destination in destinations:
+            if not isinstance(destination, dict) or not destination.get("server_id"):
+                return jsonify({"error": "目标缺少 server_id"}), 400
+            if not config_manager.get_server_config(destination["server_id"]):
+                return (
+                    jsonify({"error": f"服务器配置不存在: {destination['server_id']}"}),
+                    404,
+                )
+        file_size = create_transport(source_config).remote_size(source_path)
+        if file_size is None:
+            return jsonify({"error": f"源文件不存在: {source_path}"}), 404
+
+        file_name = posixpath.basename(source_path.rstrip("/"))
+        task_ids = []
+        for destination in destinations:
+            server_id = destination["server_id"]
+            target_path = destination.get("target_path", "/")
+            config_manager.update_server_paths(server_id, target_path)
+            config_manager.update_server_latest_use(server_id)
+            result = queue_manager.add_task(
+                {
+                    "file_path": f"{source_config.name}:{source_path}",
+                    "file_name": file_name,
+                    "file_size": file_size,
+                    "server_id": server_id,
+                    "target_path": target_path,
+                }
+            )
+            task_id = str(result.get("task_id", ""))
+            queue_manager.update_task_status(task_id, TaskStatus.RUNNING)
+            dispatcher.replicate(
+                task_id,
+                source_server_id,
+                source_path,
+                verify_remote=bool(data.get("verify", False)),
+            )
+            task_ids.append(task_id)
+        return jsonify({"success": True, "task_ids": task_ids}), 202
+
+    @app.route("/upload/stream", methods=["POST"])
+    def upload_stream() -> Any:
+        """流式上传：文件内容在请求体中发送，边接收边写入远端，不落本地磁盘
+
+        请求体为原始字节（可分块传输）时参数放在查询字符串；为
+        multipart/form-data 时参数也可作为字段放在文件字段之前。
+        """
+        params = dict(request.args)
+        stream: Any = request.stream
+        file_size = request.content_length
+        if request.mimetype == "multipart/form-data":
+            boundary = request.mimetype_params.get("boundary")
+            if not boundary:
+                return jsonify({"error": "缺少 multipart 分隔符"}), 400
+            stream = MultipartFileStream(request.stream, boundary)
+            try:
+                stream.open()
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            params.update(stream.fields)
+            if stream.filename:
+                params.setdefault("file_name", os.path.basename(stream.filename))
+            file_size = None
+
+        server_id = params.get("server_id")
+        file_name = params.get("file_name")
+        target_path = params.get("target_path", "/")
+        if not server_id or not file_name:
+            return jsonify({"error": "缺少参数"}), 400
+        if params.get("file_size"):
+            if not params["file_size"].isdigit():
+                return jsonify({"error": "file_size 必须是非负整数"}), 400
+            file_size = int(params["file_size"])
+
+        if not config_manager.get_server_config(server_id):
+            return jsonify({"error": "服务器配置不存在"}), 404
+        config_manager.update_server_paths(server_id, target_path)
+        config_manager.update_server_latest_use(server_id)
+
+        task_result = queue_manager.add_task(
+            {
+                "file_path": "",
+                "file_name": os.path.basename(file_name),
+                "file_size": file_size or 0,
+                "server_id": server_id,
+                "target_path": target_path,
+            }
+        )
+        task_id = str(task_result.get("task_id", ""))
+        queue_manager.update_task_status(task_id, TaskStatus.RUNNING)
+
+        success, transfer_result = dispatcher.run_stream(
+            task_id,
+            stream,
+            verify_remote=params.get("verify", "false").lower() == "true",
+        )
+        if not success:
+            return jsonify({"error": "流式上传失败", "task_id": task_id}), 500
+        return jsonify(
+            {
+                "success": True,
+                "task_id": task_id,
+                "file_size": transfer_result.file_size if transfer_result else None,
+                "checksum": transfer_result.checksum if transfer_result else None,
+            }
+        )
+
+    @app.route("/upload/follow", methods=["POST"])
+    def upload_follow() -> Any:
+        """边下载边上传：后台跟随仍在下载的本地文件上传，立即返回任务ID
+
+        下载结束后调用 /upload/follow/<task_id>/complete，远端文件在
+        全部内容写入后由临时文件重命名为目标文件。
+        """
+        data = request.get_json() or {}
+        local_path = data.get("local_path")
+        server_id = data.get("server_id")
+        target_path = data.get("target_path", "/")
+        partial_path = data.get("partial_path")
+        if not local_path or not server_id:
+            return jsonify({"error": "缺少参数"}), 400
+
+        local_path = os.path.expanduser(local_path)
+        if not config_manager.get_server_config(server_id):
+            return jsonify({"error": "服务器配置不存在"}), 404
+        config_manager.update_server_paths(server_id, target_path)
+        config_manager.update_server_latest_use(server_id)
+
+        task_result = queue_manager.add_task(
+            {
+                "file_path": local_path,
+                "file_name": os.path.basename(local_path),
+                "file_size": int(data.get("total_size") or 0),
+                "server_id": server_id,
+                "target_path": target_path,
+            }
+        )
+        task_id = str(task_result.get("task_id", ""))
+        queue_manager.update_task_status(task_id, TaskStatus.RUNNING)
+        dispatcher.follow(
+            task_id,
+            local_path,
+            [os.path.expanduser(partial_path)] if partial_path else None,
+            verify_remote=bool(data.get("verify", False)),
+        )
+        return jsonify({"success": True, "task_id": task_id}), 202
+
+    @app.route("/upload/follow/<task_id>/complete", methods=["POST"])
+    def complete_follow(task_id: str) -> Any:
+        """通知下载已结束（success 为 false 表示下载失败），立即返回
+
+        剩余数据在后台继续上传，通过 /progress/<task_id> 查询结果。
+        """
+        data = request.get_json() or {}
+        total_size = data.get("total_size")
+        if total_size and not str(total_size).isdigit():
+            return jsonify({"error": "total_size 必须是非负整数"}), 400
+        if not dispatcher.end_follow(
+            task_id,
+            success=bool(data.get("success", True)),
+            total_size=int(total_size) if total_size else None,
+        ):
+            return jsonify({"error": "任务不在跟随上传中"}), 404
+        return jsonify({"success": True, "task_id": task_id}), 202
+
+    @app.route("/upload/url", methods=["POST"])
+    def upload_url() -> Any:
+        """URL 中转：后端直接从 HTTP(S) 源下载并写入服务器，不经过浏览器和本地磁盘
+
+        headers/cookies 由扩展转发，用于需要登录态的下载地址；任务在后台执行，
+        通过 /progress/<task_id> 查询进度。
+        """
+        data = request.get_json() or {}
+        url = data.get("url")
+        server_id = data.get("server_id")
+        target_path = data.get("target_path", "/")
+        headers = data.get("headers") or {}
+        cookies = data.get("cookies") or {}
+        if not url or not server_id:
+            return jsonify({"error": "缺少参数"}), 400
+        if not isinstance(headers, dict) or not isinstance(cookies, dict):
+            return jsonify({"error": "headers 与 cookies 必须是对象"}), 400
+        connections = parse_connections(data.get("connections"), RELAY_CONNECTIONS)
+        if connections is None:
+            return jsonify({"error": "connections 必须是正整数"}), 400
+        if not config_manager.get_server_config(server_id):
+            return jsonify({"error": "服务器配置不存在"}), 404
+
+        try:
+            info = HttpSource(url, headers, cookies).probe()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": f"无法访问源地址: {str(e)}"}), 502
+        file_name = os.path.basename(data.get("file_name") or info.file_name)
+        if not file_name:
+            return jsonify({"error": "无法确定文件名"}), 400
+
+        config_manager.update_server_paths(server_id, target_path)
+        config_manager.update_server_latest_use(server_id)
+        task_result = queue_manager.add_task(
+            {
+                "file_path": url,
+                "file_name": file_name,
+                "file_size": info.size or 0,
+                "server_id": server_id,
+                "target_path": target_path,
+            }
+        )
+        task_id = str(task_result.get("task_id", ""))
+        queue_manager.update_task_status(task_id, TaskStatus.RUNNING)
+        dispatcher.relay(
+            task_id,
+            url,
+            headers,
+            cookies,
+            connections=connections,
+        )
+        return (
+            jsonify(
+                {
+                    "success": True,
+                    "task_id": task_id,
+                    "file_name": file_name,
+                    "file_size": info.size,
+                    "accept_ranges": info.accept_ranges,
+                }
+            ),
+            202,
+        )
+
+    @app.route("/download", methods=["POST"])
+    def download() -> Any:
+        """从服务器下载文件到本机
+
+        local_path 为已存在的目录或以 / 结尾时，按远端文件名保存到该目录；
+        任务在后台执行，大文件按区段并行读取，通过 /progress/<task_id> 查询进度。
+        """
+        data = request.get_json() or {}
+        server_id = data.get("server_id")
+        remote_path = data.get("remote_path")
+        local_path = data.get("local_path")
+        if not server_id or not remote_path or not local_path:
+            return jsonify({"error": "缺少参数"}), 400
+        connections = parse_connections(data.get("connections"), DOWNLOAD_CONNECTIONS)
+        if connections is None:
+            return jsonify({"error": "connections 必须是正整数"}), 400
+        server_config = config_manager.get_server_config(server_id)
+        if not server_config:
+            return jsonify({"error": "服务器配置不存在"}), 404
+        file_size = create_transport(server_config).remote_size(remote_path)
+        if file_size is None:
+            return jsonify({"error": f"远端文件不存在: {remote_path}"}), 404
+
+        file_name = posixpath.basename(remote_path.rstrip("/"))
+        local_path = os.path.expanduser(local_path)
+        if local_path.endswith(os.sep) or os.path.isdir(local_path):
+            local_path = os.path.join(local_path, file_name)
+        config_manager.update_server_latest_use(server_id)
+        task_result = queue_manager.add_task(
+            {
+                "file_path": local_path,
+                "file_name": file_name,
+                "file_size": file_size,
+                "server_id": server_id,
+                "target_path": posixpath.dirname(remote_path) or "/",
+                "direction": "download",
+            }
+        )
+        task_id = str(task_result.get("task_id", ""))
+        queue_manager.update_task_status(task_id, TaskStatus.RUNNING)
+        dispatcher.download(task_id, connections=connections)
+        return (
+            jsonify(
+                {
+                    "success": True,
+                    "task_id": task_id,
+                    "local_path": local_path,
+                    "file_size": file_size,
+                }
+            ),
+            202,
+        )
 
     @app.route("/progress/<task_id>", methods=["GET"])
     def progress(task_id: str) -> Any:
@@ -204,7 +686,8 @@ def create_app() -> Flask:
 
     @app.route("/history", methods=["GET"])
     def list_history() -> Any:
-        """列出传输历史"""
+        """列出传输历史，先写出尚未归档的已结束任务"""
+        archiver.archive_once()
         records = history_manager.list_history_records()
         # 转换为dict格式返回
         history = []
@@ -219,6 +702,9 @@ def create_app() -> Flask:
                     "file_size": record.file_size,
                     "duration": record.duration,
                     "created_at": record.created_at,
+                    "checksum": record.checksum,
+                    "compression_ratio": record.compression_ratio,
+                    "throughput": record.throughput,
                 }
             )
         return jsonify(history)
@@ -238,6 +724,9 @@ def create_app() -> Flask:
                     "file_size": record.file_size,
                     "duration": record.duration,
                     "created_at": record.created_at,
+                    "checksum": record.checksum,
+                    "compression_ratio": record.compression_ratio,
+                    "throughput": record.throughput,
                 }
             )
         else:
@@ -308,13 +797,50 @@ def create_app() -> Flask:
 
     @app.route("/tasks/<task_id>/cancel", methods=["POST"])
     def cancel_task(task_id: str) -> Any:
-        """取消任务"""
-        result = queue_manager.cancel_task(task_id)
+        """取消任务，进行中的传输立即中断
+
+        可选参数 policy：delete 删除远端未完成文件，keep 保留以便续传
+        """
+        data = request.get_json(silent=True) or {}
+        policy = data.get("policy") or request.args.get("policy")
+        result = dispatcher.cancel(task_id, policy)
         if result["success"]:
             return jsonify({"success": True})
         else:
             return jsonify({"error": result["error"]}), 404
 
+    @app.route("/tasks/<task_id>/pause", methods=["POST"])
+    def pause_task(task_id: str) -> Any:
+        """暂停任务，运行中的传输立即释放线程和连接"""
+        result = dispatcher.pause(task_id)
+        if result["success"]:
+            return jsonify({"success": True})
+        else:
+            return jsonify({"error": result["error"]}), 400
+
+    @app.route("/tasks/<task_id>/resume", methods=["POST"])
+    def resume_task(task_id: str) -> Any:
+        """恢复已暂停的任务，从远端已写入的位置续传"""
+        result = dispatcher.resume(task_id)
+        if result["success"]:
+            return jsonify({"success": True})
+        else:
+            return jsonify({"error": result["error"]}), 400
+
+    @app.route("/queue/pause", methods=["POST"])
+    def pause_queue() -> Any:
+        """暂停整个队列，或通过 server_id 只暂停某台服务器的任务"""
+        data = request.get_json(silent=True) or {}
+        server_id = data.get("server_id") or request.args.get("server_id")
+        return jsonify({"paused": dispatcher.pause_queue(server_id)})
+
+    @app.route("/queue/resume", methods=["POST"])
+    def resume_queue() -> Any:
+        """恢复整个队列，或通过 server_id 只恢复某台服务器的任务"""
+        data = request.get_json(silent=True) or {}
+        server_id = data.get("server_id") or request.args.get("server_id")
+        return jsonify({"resumed": dispatcher.resume_queue(server_id)})
+
     @app.route("/queue/status", methods=["GET"])
     def get_queue_status() -> Any:
         """获取队列状态"""
@@ -350,6 +876,8 @@ def create_app() -> Flask:
                 "errors": error_stats,
                 "history": history_stats,
                 "queue": queue_stats,
+                # 各 JSON 文件的写入次数、合并请求数与写入耗时
+                "persistence": writer_metrics(),
                 "timestamp": datetime.datetime.now().isoformat(),
             }
         )
@@ -0,0 +1,99 @@
+"""
+请求体流式读取模块
+从 multipart/form-data 请求体中边接收边取出文件内容，不缓存到临时文件
+"""
+
+from typing import Any, Optional
+
+from werkzeug.sansio.multipart import (
+    Data,
+    Epilogue,
+    Field,
+    File,
+    MultipartDecoder,
+    NeedData,
+)
+
+# 每次从请求体读取的字节数
+READ_SIZE = 64 * 1024
+
+# 文件之前的普通字段总大小上限
+MAX_FIELDS_SIZE = 64 * 1024
+
+
+class MultipartFileStream:
+    """按需解析 multipart 请求体，以二进制流的形式提供第一个文件字段的内容
+
+    普通字段须位于文件字段之前，open 时读入 fields；文件内容在 read 时
+    才从请求体读取，内存中最多保留一次读取的数据。
+    """
+
+    def __init__(self, stream: Any, boundary: str, read_size: int = READ_SIZE):
+        """初始化
+        Args:
+            stream: 原始请求体
+            boundary: multipart 分隔符
+            read_size: 每次从请求体读取的字节数
+        """
+        self.stream = stream
+        self.read_size = read_size
+        self.decoder = MultipartDecoder(boundary.encode())
+        self.fields: dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.buffer = bytearray()
+        self.finished = False
+
+    def open(self) -> None:
+        """读取文件之前的普通字段，定位到文件内容开头
+        Raises:
+            ValueError: 请求体格式错误、字段过大或没有文件字段
+        """
+        current: Optional[str] = None
+        values: dict[str, bytearray] = {}
+        fields_size = 0
+        while True:
+            event = self._next_event()
+            if isinstance(event, File):
+                self.filename = event.filename
+                break
+            if isinstance(event, Field):
+                current = event.name
+                values[current] = bytearray()
+            elif isinstance(event, Data) and current is not None:
+                fields_size += len(event.data)
+                if fields_size > MAX_FIELDS_SIZE:
+                    raise ValueError("表单字段过大")
+                values[current] += event.data
+            elif isinstance(event, Epilogue):
+                raise ValueError("请求中没有文件")
+        self.fields = {name: value.decode() for name, value in values.items()}
+
+    def read(self, size: int = -1) -> bytes:
+        """读取文件内容，文件字段结束后返回 b\"\" """
+        while not self.buffer and not self.finished:
+            event = self._next_event()
+            if not isinstance(event, Data):
+                self.finished = True
+                break
+            self.buffer += event.data
+            if not event.more_data:
+                self.finished = True
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def _next_event(self) -> Any:
+        """取下一个解析事件，数据不足时从请求体继续读取"""
+        while True:
+            event = self.decoder.next_event()
+            if not isinstance(event, NeedData):
+                return event
+            data = self.stream.read(self.read_size)
+            if not data:
+                if self.decoder.complete:
+                    raise ValueError("请求体不完整")
+                self.decoder.receive_data(None)
+            else:
+                self.decoder.receive_data(data)
@@ -0,0 +1,148 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import asyncio
+import hashlib
+import tempfile
+import threading
+from unittest.mock import MagicMock, patch
+
+from src.application.services.async_dispatcher import AsyncTransferDispatcher
+from src.application.services.queue_manager import QueueManager, TaskStatus
+from src.domain.models import TransferResult
+from src.infrastructure.network.local_transport import LocalTransport
+
+
+class _FakeConnections:
+    async def close_all(self):
+        pass
+
+
+class _FakeAsyncTransport:
+    """记录同时在途的上传数"""
+
+    active = 0
+    max_active = 0
+
+    def __init__(self, server_config, connections, **kwargs):
+        self.last_result = None
+        self.partial_path = None
+
+    async def upload(self, local_path, remote_path, progress_callback=None):
+        cls = type(self)
+        cls.active += 1
+        cls.max_active = max(cls.max_active, cls.active)
+        await asyncio.sleep(0.01)
+        progress_callback(1.0)
+        cls.active -= 1
+        self.last_result = TransferResult(
+            local_path, remote_path, 1, bytes_sent=1, checksum="abc"
+        )
+        return True
+
+
+class TestAsyncTransferDispatcher:
+    """asyncio 传输调度测试类"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue_manager = QueueManager(max_concurrent=2, storage_dir=self.temp_dir)
+        self.config_manager = MagicMock()
+        self.config_manager.get_server_config.return_value.protocol = "SFTP"
+        self.dispatcher = AsyncTransferDispatcher(
+            self.queue_manager, self.config_manager, connections=_FakeConnections()
+        )
+
+    def teardown_method(self):
+        self.dispatcher.shutdown()
+
+    def _add_task(self, name: str) -> str:
+        result = self.queue_manager.add_task(
+            {
+                "file_path": os.path.join(self.temp_dir, name),
+                "file_name": name,
+                "file_size": 1,
+                "server_id": "server1",
+                "target_path": "/",
+            }
+        )
+        return str(result["task_id"])
+
+    def test_run_task_in_event_loop(self):
+        """测试任务在事件循环中执行并更新状态、进度与摘要"""
+        task_id = self._add_task("a.txt")
+        with patch(
+            "src.application.services.async_dispatcher.AsyncSFTPTransport",
+            _FakeAsyncTransport,
+        ):
+            success, result = self.dispatcher.run_task(task_id)
+        assert success is True
+        task = self.queue_manager.get_task(task_id)
+        assert task.status == TaskStatus.COMPLETED
+        assert task.progress == 100.0
+        assert task.checksum == "abc"
+
+    def test_concurrency_not_bound_by_thread_pool(self):
+        """测试并发上传数不受线程池大小限制"""
+        _FakeAsyncTransport.max_active = 0
+        task_ids = [self._add_task(f"{i}.txt") for i in range(10)]
+        with patch(
+            "src.application.services.async_dispatcher.AsyncSFTPTransport",
+            _FakeAsyncTransport,
+        ):
+            futures = [
+                asyncio.run_coroutine_threadsafe(
+                    self.dispatcher.run_task_async(task_id), self.dispatcher.loop
+                )
+                for task_id in task_ids
+            ]
+            assert all(future.result(timeout=10)[0] for future in futures)
+        assert _FakeAsyncTransport.max_active > self.queue_manager.max_concurrent
+
+    def test_download_routed_to_thread_pool(self):
+        """测试下载任务交给线程池中的下载实现，不进入上传协程"""
+        task_id = self._add_task("down.bin")
+        self.queue_manager.get_task(task_id).direction = "download"
+        done = threading.Event()
+        with patch.object(
+            self.dispatcher, "run_download", side_effect=lambda _: done.set()
+        ) as run_download:
+            with patch.object(self.dispatcher, "run_task_async") as run_task_async:
+                assert self.dispatcher.dispatch_pending() == 1
+                assert done.wait(5)
+        run_download.assert_called_once_with(task_id)
+        run_task_async.assert_not_called()
+
+    def test_resume_from_recorded_partial(self):
+        """测试从任务记录的临时文件续传，续传部分由同步实现完成"""
+        root = tempfile.mkdtemp(dir=self.temp_dir)
+        data = os.urandom(256 * 1024)
+        with open(os.path.join(self.temp_dir, "big.bin"), "wb") as f:
+            f.write(data)
+        with open(os.path.join(root, "big.bin.part"), "wb") as f:
+            f.write(data[:100000])
+        task_id = self._add_task("big.bin")
+        self.queue_manager.get_task(task_id).file_size = len(data)
+        self.queue_manager.set_task_partial(task_id, "/big.bin.part")
+        self.config_manager.get_server_config.return_value.host = root
+
+        with patch(
+            "src.application.services.async_dispatcher.create_transport",
+            lambda config, **options: LocalTransport(config),
+        ):
+            with patch(
+                "src.application.services.async_dispatcher.AsyncSFTPTransport"
+            ) as async_transport:
+                success, result = self.dispatcher.run_task(task_id)
+        assert success is True
+        async_transport.assert_not_called()
+        assert result.mode == "resumed"
+        assert result.checksum == hashlib.sha256(data).hexdigest()
+        with open(os.path.join(root, "big.bin"), "rb") as f:
+            assert f.read() == data
+        assert not os.path.exists(os.path.join(root, "big.bin.part"))
+        assert self.queue_manager.get_task(task_id).partial_path is None
@@ -6,6 +6,7 @@ import os
 import shutil
 import sys
 import tempfile
+import time
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(
@@ -26,6 +27,7 @@ class TestConfigManager:
 
     def teardown_method(self):
         """每个测试方法后的清理"""
+        self.config_manager.stop()
         # 清理临时目录
         if os.path.exists(self.temp_dir):
             shutil.rmtree(self.temp_dir)
@@ -218,3 +220,84 @@ class TestConfigManager:
         result = self.config_manager.validate_config(config_data)
         assert result["valid"] is False
         assert "error" in result
+
+    def test_validate_config_registered_protocols(self):
+        """测试协议按已注册的传输实现校验，本地后端不需要凭据"""
+        config_data = {
+            "name": "Local",
+            "host": "file:///tmp/easy_dowload",
+            "port": 1,
+            "protocol": "LOCAL",
+            "default_path": "/",
+        }
+        assert self.config_manager.validate_config(config_data)["valid"] is True
+
+        config_data.update(protocol="WEBDAV", username="u", password="p")
+        result = self.config_manager.validate_config(config_data)
+        assert result["valid"] is False
+        assert "SFTP" in result["error"]
+
+    def _create_server(self, name="Test Server"):
+        """创建一个测试用服务器配置，返回配置ID"""
+        return self.config_manager.create_server_config(
+            {
+                "name": name,
+                "host": "192.168.1.100",
+                "port": 22,
+                "protocol": "SFTP",
+                "username": "testuser",
+                "password": "testpass",
+                "default_path": "/home/testuser",
+            }
+        )["config_id"]
+
+    def test_usage_updates_write_behind(self):
+        """测试使用记录先在内存中生效，写回后才落盘"""
+        config_id = self._create_server()
+        servers_file = self.config_manager.storage.servers_file
+        with open(servers_file) as f:
+            before = f.read()
+
+        self.config_manager.update_server_paths(config_id, "/data/a")
+        self.config_manager.update_server_paths(config_id, "/data/b")
+        self.config_manager.update_server_latest_use(config_id)
+
+        config = self.config_manager.get_server_config(config_id)
+        assert [p["path"] for p in config.paths[:2]] == ["/data/b", "/data/a"]
+        assert self.config_manager.list_server_configs()[0].paths == config.paths
+        with open(servers_file) as f:
+            assert f.read() == before
+
+        assert self.config_manager.flush() == 1
+        assert self.config_manager.flush() == 0
+        saved = self.config_manager.storage.load_servers()[0]
+        assert saved["paths"] == config.paths
+        assert saved["latest_use_at"]
+
+    def test_usage_flushed_in_background(self):
+        """测试写回线程在间隔后把使用记录写入 servers.json"""
+        self.config_manager.stop()
+        self.config_manager = ConfigManager(
+            storage_dir=self.temp_dir, flush_interval=0.05
+        )
+        config_id = self._create_server()
+        self.config_manager.update_server_paths(config_id, "/data/a")
+        for _ in range(100):
+            if not self.config_manager.pending:
+                break
+            time.sleep(0.02)
+        saved = self.config_manager.storage.load_servers()[0]
+        assert saved["paths"][0]["path"] == "/data/a"
+
+    def test_config_update_keeps_pending_usage(self):
+        """测试修改配置前先写回使用记录，不会被覆盖"""
+        config_id = self._create_server()
+        self.config_manager.update_server_paths(config_id, "/data/a")
+        result = self.config_manager.update_server_config(
+            config_id, {"host": "192.168.1.101"}
+        )
+        assert result["success"] is True
+        config = self.config_manager.get_server_config(config_id)
+        assert config.host == "192.168.1.101"
+        assert config.paths[0]["path"] == "/data/a"
+        assert not self.config_manager.pending
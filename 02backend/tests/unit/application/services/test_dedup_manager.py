@@ -0,0 +1,79 @@
+"""
+去重管理器单元测试
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import MagicMock
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+from src.application.services.dedup_manager import DedupManager
+
+
+class TestDedupManager:
+    """去重管理器测试类"""
+
+    def setup_method(self):
+        """每个测试方法前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.local_path = os.path.join(self.temp_dir, "installer.bin")
+        with open(self.local_path, "wb") as f:
+            f.write(b"x" * 10)
+        self.dedup_manager = DedupManager(storage_dir=self.temp_dir)
+        self.client = MagicMock()
+
+    def teardown_method(self):
+        """每个测试方法后的清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_cache_miss_requires_upload(self):
+        """测试缓存未命中时需要上传"""
+        result = self.dedup_manager.resolve(
+            self.client, "s1", self.local_path, "/remote/installer.bin", 10
+        )
+        assert result is None
+        self.client.remote_size.assert_not_called()
+
+    def test_skip_when_already_delivered(self):
+        """测试相同内容已在目标路径时跳过"""
+        self.dedup_manager.record("s1", self.local_path, "/remote/installer.bin", "abc")
+        self.client.remote_size.return_value = 10
+
+        result = self.dedup_manager.resolve(
+            self.client, "s1", self.local_path, "/remote/installer.bin", 10
+        )
+        assert result is not None
+        assert result.mode == "skipped"
+        assert result.checksum == "abc"
+
+    def test_remote_copy_from_other_path(self):
+        """测试相同内容在其他路径时远端复制"""
+        self.dedup_manager.record("s1", self.local_path, "/old/installer.bin", "abc")
+        self.client.remote_size.return_value = 10
+        self.client.remote_copy.return_value = True
+
+        result = self.dedup_manager.resolve(
+            self.client, "s1", self.local_path, "/new/installer.bin", 10
+        )
+        assert result is not None
+        assert result.mode == "remote_copy"
+        self.client.remote_copy.assert_called_once_with(
+            "/old/installer.bin", "/new/installer.bin", hardlink=False
+        )
+
+    def test_stale_delivery_falls_back_to_upload(self):
+        """测试远端文件已变化时回退为上传"""
+        self.dedup_manager.record("s1", self.local_path, "/remote/installer.bin", "abc")
+        self.client.remote_size.return_value = None
+
+        result = self.dedup_manager.resolve(
+            self.client, "s1", self.local_path, "/remote/installer.bin", 10
+        )
+        assert result is None
+        assert self.dedup_manager.delivery_index.find("s1", "abc") == []
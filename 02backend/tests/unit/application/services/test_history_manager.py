@@ -6,12 +6,14 @@ import os
 import shutil
 import sys
 import tempfile
+from unittest.mock import patch
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
 )
 
+from src.application.services import history_manager
 from src.application.services.history_manager import HistoryManager
 
 
@@ -46,6 +48,83 @@ class TestHistoryManager:
         assert result["success"] is True
         assert "record_id" in result
 
+    def test_add_history_records_batch(self):
+        """测试批量添加历史记录，缺少必填字段的记录被跳过"""
+        items = [
+            {
+                "task_id": f"task{i}",
+                "file_name": "test.txt",
+                "server_name": "Test Server",
+                "status": "completed",
+                "file_size": 1024,
+                "duration": 5.0,
+                "throughput": 204.8,
+            }
+            for i in range(3)
+        ]
+        items.append({"task_id": "broken"})
+
+        result = self.history_manager.add_history_records(items)
+
+        assert result["success"] is True
+        assert result["added_count"] == 3
+        records = self.history_manager.list_history_records()
+        assert len(records) == 3
+        assert records[0].throughput == 204.8
+
+    def test_add_history_records_appends_journal(self):
+        """测试批量写入只追加日志，不改写 history.json，加载时合并两者"""
+        base = {
+            "file_name": "test.txt",
+            "server_name": "Test Server",
+            "status": "completed",
+            "file_size": 1024,
+            "duration": 5.0,
+        }
+        # 日志超过上限时合并回 history.json 并清空
+        with patch.object(history_manager, "JOURNAL_COMPACT_SIZE", 0):
+            self.history_manager.add_history_record(dict(base, task_id="first"))
+        assert not os.path.exists(self.history_manager.journal_file)
+        history_file = self.history_manager.history_file
+        snapshot = open(history_file, "rb").read()
+
+        result = self.history_manager.add_history_records(
+            [dict(base, task_id="second"), dict(base, task_id="first")],
+            skip_existing=True,
+        )
+
+        assert result["added_count"] == 1
+        assert open(history_file, "rb").read() == snapshot
+        # 崩溃时写了一半的行被跳过，之后追加的记录不受影响
+        with open(self.history_manager.journal_file, "a", encoding="utf-8") as f:
+            f.write('{"id": "torn"')
+        self.history_manager.add_history_record(dict(base, task_id="third"))
+        task_ids = {r.task_id for r in self.history_manager.list_history_records()}
+        assert task_ids == {"first", "second", "third"}
+
+    def test_replace_history_records_keeps_id(self):
+        """测试替换同一 task_id 的记录时保留原记录ID"""
+        data = {
+            "task_id": "task123",
+            "file_name": "test.txt",
+            "server_name": "",
+            "status": "cancelled",
+            "file_size": 1024,
+            "duration": 0.0,
+        }
+        record_id = self.history_manager.add_history_record(data)["record_id"]
+
+        result = self.history_manager.replace_history_records(
+            [dict(data, server_name="Test Server", duration=2.5)]
+        )
+
+        assert result["added_count"] == 1
+        records = self.history_manager.list_history_records()
+        assert len(records) == 1
+        assert records[0].id == record_id
+        assert records[0].server_name == "Test Server"
+        assert records[0].duration == 2.5
+
     def test_get_history_record_exists(self):
         """测试获取存在的历史记录"""
         history_data = {
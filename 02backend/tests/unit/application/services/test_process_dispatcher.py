@@ -0,0 +1,107 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import hashlib
+import tempfile
+from unittest.mock import MagicMock
+
+from src.application.services.process_dispatcher import ProcessTransferDispatcher
+from src.application.services.queue_manager import QueueManager, TaskStatus
+from src.domain.models import ServerConfig
+
+
+class TestProcessTransferDispatcher:
+    """多进程传输调度测试类"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.remote_dir = tempfile.mkdtemp()
+        self.queue_manager = QueueManager(max_concurrent=2, storage_dir=self.temp_dir)
+        self.config_manager = MagicMock()
+        self.config_manager.get_server_config.return_value = ServerConfig(
+            id="local1",
+            name="Local",
+            host=self.remote_dir,
+            port=1,
+            protocol="LOCAL",
+            username="",
+            password="",
+            default_path="/",
+            created_at="",
+            updated_at="",
+        )
+        self.dispatcher = ProcessTransferDispatcher(
+            self.queue_manager, self.config_manager, processes=2
+        )
+
+    def teardown_method(self):
+        self.dispatcher.shutdown()
+
+    def _add_task(self, name: str, size: int) -> str:
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        result = self.queue_manager.add_task(
+            {
+                "file_path": path,
+                "file_name": name,
+                "file_size": size,
+                "server_id": "local1",
+                "target_path": "/out",
+            }
+        )
+        return str(result["task_id"])
+
+    def test_run_task_in_worker_process(self):
+        """测试上传在工作进程执行，结果与进度回到主进程"""
+        task_id = self._add_task("big.bin", 3 * 1024 * 1024)
+        success, result = self.dispatcher.run_task(task_id, dedup=False)
+        assert success is True
+        with open(os.path.join(self.temp_dir, "big.bin"), "rb") as f:
+            assert result.checksum == hashlib.sha256(f.read()).hexdigest()
+        task = self.queue_manager.get_task(task_id)
+        assert task.status == TaskStatus.COMPLETED
+        assert task.progress == 100.0
+        assert os.path.getsize(os.path.join(self.remote_dir, "out", "big.bin")) == (
+            3 * 1024 * 1024
+        )
+
+    def test_run_batch_in_worker_process(self):
+        """测试批量任务在工作进程中逐个执行"""
+        task_ids = [self._add_task(f"{i}.txt", 100) for i in range(3)]
+        assert self.dispatcher.run_batch("local1", task_ids) == 3
+        assert all(
+            self.queue_manager.get_task(task_id).progress == 100.0
+            for task_id in task_ids
+        )
+
+    def _interrupt_before_upload(self, action: str) -> None:
+        """让取消或暂停在工作进程开始上传前到达"""
+        original = self.dispatcher._upload
+
+        def upload(client, task, remote_path, options):
+            getattr(self.dispatcher, action)(task.id)
+            return original(client, task, remote_path, options)
+
+        self.dispatcher._upload = upload
+
+    def test_cancel_forwarded_to_worker(self):
+        """测试取消转发到工作进程：传输中断，任务不会被标记为已完成"""
+        task_id = self._add_task("cancel.bin", 3 * 1024 * 1024)
+        self._interrupt_before_upload("cancel")
+        success, _ = self.dispatcher.run_task(task_id, dedup=False)
+        assert success is False
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.CANCELLED
+        assert not os.path.exists(os.path.join(self.remote_dir, "out", "cancel.bin"))
+
+    def test_pause_forwarded_to_worker(self):
+        """测试暂停转发到工作进程：任务保持暂停状态"""
+        task_id = self._add_task("pause.bin", 3 * 1024 * 1024)
+        self._interrupt_before_upload("pause")
+        success, _ = self.dispatcher.run_task(task_id, dedup=False)
+        assert success is False
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.PAUSED
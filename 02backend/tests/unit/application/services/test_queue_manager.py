@@ -6,6 +6,7 @@ import os
 import shutil
 import sys
 import tempfile
+import threading
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(
@@ -125,6 +126,63 @@ class TestQueueManager:
         assert result["success"] is False
         assert "不存在" in result["error"]
 
+    def test_pause_and_resume_task(self):
+        """测试暂停任务后恢复为排队状态"""
+        task_data = {
+            "file_path": "/path/to/file.txt",
+            "file_name": "file.txt",
+            "file_size": 1024,
+            "server_id": "server123",
+            "target_path": "/remote/path/",
+        }
+
+        task_id = self.queue_manager.add_task(task_data)["task_id"]
+        assert self.queue_manager.resume_task(task_id)["success"] is False
+
+        assert self.queue_manager.pause_task(task_id)["success"] is True
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.PAUSED
+        assert self.queue_manager.get_queue_status()["paused_tasks"] == 1
+
+        assert self.queue_manager.resume_task(task_id)["success"] is True
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.PENDING
+
+    def test_cancelled_task_not_completed(self):
+        """测试已取消或暂停的任务不会被迟到的结果标记为已完成"""
+        task_data = {
+            "file_path": "/path/to/file.txt",
+            "file_name": "file.txt",
+            "file_size": 1024,
+            "server_id": "server123",
+            "target_path": "/remote/path/",
+        }
+        cancelled_id = self.queue_manager.add_task(task_data)["task_id"]
+        paused_id = self.queue_manager.add_task(task_data)["task_id"]
+        self.queue_manager.cancel_task(cancelled_id)
+        self.queue_manager.pause_task(paused_id)
+        for task_id, status in (
+            (cancelled_id, TaskStatus.CANCELLED),
+            (paused_id, TaskStatus.PAUSED),
+        ):
+            assert not self.queue_manager.update_task_status(
+                task_id, TaskStatus.COMPLETED
+            )
+            assert self.queue_manager.get_task(task_id).status == status
+
+    def test_pause_finished_task(self):
+        """测试已结束的任务不能暂停"""
+        task_data = {
+            "file_path": "/path/to/file.txt",
+            "file_name": "file.txt",
+            "file_size": 1024,
+            "server_id": "server123",
+            "target_path": "/remote/path/",
+        }
+
+        task_id = self.queue_manager.add_task(task_data)["task_id"]
+        self.queue_manager.update_task_status(task_id, TaskStatus.COMPLETED)
+        result = self.queue_manager.pause_task(task_id)
+        assert result["success"] is False
+
     def test_get_queue_status(self):
         """测试获取队列状态"""
         # 创建任务
@@ -190,3 +248,120 @@ class TestQueueManager:
 
         result = self.queue_manager.set_progress_callback(task_id, progress_callback)
         assert result is True
+
+    def test_recover_tasks_on_startup(self):
+        """测试重启后恢复队列：运行中的任务重新排队，无法重读来源的任务标记失败"""
+        local_path = os.path.join(self.temp_dir, "data.bin")
+        with open(local_path, "wb") as f:
+            f.write(b"data")
+        ids = []
+        for file_path in (local_path, local_path, "https://example.com/a.iso"):
+            task_data = {
+                "file_path": file_path,
+                "file_name": "data.bin",
+                "file_size": 4,
+                "server_id": "server123",
+                "target_path": "/remote/path/",
+            }
+            ids.append(self.queue_manager.add_task(task_data)["task_id"])
+        for task_id in ids[1:]:
+            self.queue_manager.update_task_status(task_id, TaskStatus.RUNNING)
+        done_id = self.queue_manager.add_task(task_data)["task_id"]
+        self.queue_manager.update_task_status(done_id, TaskStatus.COMPLETED)
+
+        restarted = QueueManager(storage_dir=self.temp_dir)
+        called = threading.Event()
+        restarted.on_recovered(called.set)
+        assert restarted.get_task(ids[0]).status == TaskStatus.PENDING
+        assert called.wait(5)
+        assert restarted.get_task(ids[1]).status == TaskStatus.PENDING
+        assert restarted.get_task(ids[2]).status == TaskStatus.FAILED
+        assert restarted.get_task(done_id).status == TaskStatus.COMPLETED
+        assert restarted.pop_interrupted(ids[1])
+        assert not restarted.pop_interrupted(ids[1])
+        assert not restarted.pop_interrupted(ids[0])
+
+        # 恢复结果已写回，再次启动时不再视为中断
+        again = QueueManager(storage_dir=self.temp_dir)
+        assert again.recovered.wait(5)
+        assert again.get_task(ids[1]).status == TaskStatus.PENDING
+        assert not again.interrupted
+        assert len(again.list_tasks()) == 4
+
+    def test_recover_disabled(self):
+        """测试关闭启动恢复时不载入旧任务"""
+        task_data = {
+            "file_path": "/path/to/file.txt",
+            "file_name": "file.txt",
+            "file_size": 1024,
+            "server_id": "server123",
+            "target_path": "/remote/path/",
+        }
+        self.queue_manager.add_task(task_data)
+        fresh = QueueManager(storage_dir=self.temp_dir, recover=False)
+        assert fresh.recovered.is_set()
+        assert fresh.list_tasks() == []
+
+    def test_concurrent_updates_and_reads(self):
+        """测试并发更新与读取：读取不阻塞，最终状态全部写入存储"""
+        task_ids = [
+            self.queue_manager.add_task(
+                {
+                    "file_path": f"/path/to/file{i}.txt",
+                    "file_name": f"file{i}.txt",
+                    "file_size": 1024,
+                    "server_id": "server123",
+                    "target_path": "/remote/path/",
+                }
+            )["task_id"]
+            for i in range(50)
+        ]
+        errors = []
+
+        def writer(chunk):
+            for task_id in chunk:
+                self.queue_manager.update_task_progress(task_id, 50.0)
+                self.queue_manager.update_task_status(task_id, TaskStatus.COMPLETED)
+
+        def reader():
+            try:
+                for _ in range(200):
+                    status = self.queue_manager.get_queue_status()
+                    assert status["total_tasks"] == 50
+                    assert len(self.queue_manager.list_tasks()) == 50
+            except AssertionError as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=writer, args=(task_ids[i::5],)) for i in range(5)
+        ] + [threading.Thread(target=reader) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert self.queue_manager.get_queue_status()["completed_tasks"] == 50
+        saved = list(self.queue_manager.storage.iter_tasks_json())
+        assert all(task["status"] == "completed" for task in saved)
+
+    def test_snapshot_follows_queue_changes(self):
+        """测试任务增删后读取到新的快照"""
+        task_data = {
+            "file_path": "/path/to/file.txt",
+            "file_name": "file.txt",
+            "file_size": 1024,
+            "server_id": "server123",
+            "target_path": "/remote/path/",
+        }
+        first = self.queue_manager.add_task(task_data)["task_id"]
+        assert len(self.queue_manager.list_tasks()) == 1
+        self.queue_manager.add_task(task_data)
+        assert len(self.queue_manager.list_tasks()) == 2
+        self.queue_manager.evict_tasks([first])
+        assert first not in [t.id for t in self.queue_manager.list_tasks()]
+        assert self.queue_manager.get_queue_status()["total_tasks"] == 1
+        # 快照的版本与任务元组成对保存
+        version, tasks = self.queue_manager.snapshot
+        assert version == self.queue_manager.version
+        assert [t.id for t in tasks] == list(self.queue_manager.tasks)
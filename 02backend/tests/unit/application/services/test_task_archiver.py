@@ -0,0 +1,136 @@
+"""
+任务归档器单元测试
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+from src.application.services.history_manager import HistoryManager
+from src.application.services.queue_manager import QueueManager, TaskStatus
+from src.application.services.task_archiver import TaskArchiver
+
+
+class TestTaskArchiver:
+    """任务归档器测试类"""
+
+    def setup_method(self):
+        """每个测试方法前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue_manager = QueueManager(storage_dir=self.temp_dir)
+        self.history_manager = HistoryManager(storage_dir=self.temp_dir)
+        self.archiver = TaskArchiver(
+            self.queue_manager, self.history_manager, grace_period=60
+        )
+
+    def teardown_method(self):
+        """每个测试方法后的清理"""
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+
+    def _add(self, name: str) -> str:
+        result = self.queue_manager.add_task(
+            {
+                "file_path": f"/local/{name}",
+                "file_name": name,
+                "file_size": 4096,
+                "server_id": "s1",
+                "target_path": "/remote",
+            }
+        )
+        return result["task_id"]
+
+    def test_archive_then_evict_after_grace(self):
+        """测试已结束任务先写入历史，宽限期过后移出队列，进行中的任务保留"""
+        done_id = self._add("done.bin")
+        running_id = self._add("running.bin")
+        self.queue_manager.update_task_status(running_id, TaskStatus.RUNNING)
+        self.archiver.record(
+            {
+                "task_id": done_id,
+                "file_name": "done.bin",
+                "server_name": "Test Server",
+                "status": "completed",
+                "file_size": 4096,
+                "duration": 2.0,
+            }
+        )
+        self.queue_manager.update_task_status(done_id, TaskStatus.COMPLETED)
+
+        assert self.archiver.archive_once() == {"archived": 1, "evicted": 0}
+        records = self.history_manager.list_history_records()
+        assert [r.task_id for r in records] == [done_id]
+        assert records[0].server_name == "Test Server"
+        assert records[0].throughput == 2048.0
+        assert self.queue_manager.get_task(done_id) is not None
+
+        # 再次归档不重复写入；超过宽限期后移出队列
+        assert self.archiver.archive_once() == {"archived": 0, "evicted": 0}
+        result = self.archiver.archive_once(now=time.time() + 61)
+        assert result == {"archived": 0, "evicted": 1}
+        assert self.queue_manager.get_task(done_id) is None
+        assert self.queue_manager.get_task(running_id) is not None
+        assert len(self.history_manager.list_history_records()) == 1
+
+    def test_task_finished_outside_dispatcher(self):
+        """测试排队中被取消的任务按任务自身的时间生成历史"""
+        task_id = self._add("queued.bin")
+        self.queue_manager.cancel_task(task_id)
+        assert self.archiver.archive_once()["archived"] == 1
+        record = self.history_manager.list_history_records()[0]
+        assert record.task_id == task_id
+        assert record.status == "cancelled"
+        assert record.throughput is None
+
+    def test_late_record_replaces_described_history(self):
+        """测试运行中被接口取消的任务先归档，调度器迟到的数据替换原记录"""
+        task_id = self._add("late.bin")
+        self.queue_manager.update_task_status(task_id, TaskStatus.RUNNING)
+        self.queue_manager.cancel_task(task_id)
+        assert self.archiver.archive_once()["archived"] == 1
+        record_id = self.history_manager.list_history_records()[0].id
+
+        late = {
+            "task_id": task_id,
+            "file_name": "late.bin",
+            "server_name": "Test Server",
+            "status": "cancelled",
+            "file_size": 4096,
+            "duration": 1.5,
+        }
+        self.archiver.record(late)
+        assert self.archiver.archive_once()["archived"] == 1
+        records = self.history_manager.list_history_records()
+        assert len(records) == 1
+        assert records[0].id == record_id
+        assert records[0].server_name == "Test Server"
+        assert records[0].duration == 1.5
+
+        # 调度器数据已写入，再次提交不再改写
+        self.archiver.record(dict(late, duration=9.0))
+        assert self.archiver.archive_once()["archived"] == 0
+        assert self.history_manager.list_history_records()[0].duration == 1.5
+
+    def test_restart_does_not_duplicate_history(self):
+        """测试重启后恢复的已归档任务不再重复写入历史"""
+        task_id = self._add("done.bin")
+        self.queue_manager.update_task_status(task_id, TaskStatus.COMPLETED)
+        assert self.archiver.archive_once()["archived"] == 1
+
+        restarted = QueueManager(storage_dir=self.temp_dir)
+        assert restarted.recovered.wait(5)
+        assert restarted.get_task(task_id) is not None
+        archiver = TaskArchiver(restarted, self.history_manager, grace_period=60)
+        assert archiver.archive_once() == {"archived": 0, "evicted": 0}
+        assert len(self.history_manager.list_history_records()) == 1
+
+        # 宽限期过后照常移出队列
+        assert archiver.archive_once(now=time.time() + 61)["evicted"] == 1
+        assert len(self.history_manager.list_history_records()) == 1
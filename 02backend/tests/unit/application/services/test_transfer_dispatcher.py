@@ -0,0 +1,679 @@
+"""
+传输调度器单元测试
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+from src.application.services.history_manager import HistoryManager
+from src.application.services.queue_manager import QueueManager, TaskStatus
+from src.application.services.transfer_dispatcher import (
+    TransferDispatcher,
+    _ResumeHasher,
+)
+from src.domain.models import ServerConfig, TransferResult
+
+RELAY_DATA = os.urandom(512 * 1024)
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """本地 HTTP 替身，支持 Range 请求"""
+
+    ranges: list = []
+
+    def do_GET(self):
+        start, end = 0, len(RELAY_DATA)
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else end
+            type(self).ranges.append((start, end))
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{end - 1}/{len(RELAY_DATA)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start))
+        self.end_headers()
+        self.wfile.write(RELAY_DATA[start:end])
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTransferDispatcher:
+    """传输调度器测试类"""
+
+    def setup_method(self):
+        """每个测试方法前的设置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue_manager = QueueManager(storage_dir=self.temp_dir)
+        self.history_manager = HistoryManager(storage_dir=self.temp_dir)
+        self.config_manager = MagicMock()
+        server_config = MagicMock()
+        server_config.name = "Test Server"
+        self.config_manager.get_server_config.return_value = server_config
+        self.dispatcher = TransferDispatcher(
+            self.queue_manager,
+            self.config_manager,
+            self.history_manager,
+            batch_threshold=100,
+        )
+
+    def teardown_method(self):
+        """每个测试方法后的清理"""
+        self.dispatcher.shutdown()
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+
+    def _add(self, name: str, size: int, server_id: str = "s1") -> str:
+        result = self.queue_manager.add_task(
+            {
+                "file_path": f"/local/{name}",
+                "file_name": name,
+                "file_size": size,
+                "server_id": server_id,
+                "target_path": "/remote",
+            }
+        )
+        return result["task_id"]
+
+    def _use_local_server(self) -> str:
+        """改用 LOCAL 后端，返回其根目录"""
+        root = tempfile.mkdtemp(dir=self.temp_dir)
+        self.config_manager.get_server_config.return_value = ServerConfig(
+            id="local1",
+            name="Local",
+            host=root,
+            port=1,
+            protocol="LOCAL",
+            username="",
+            password="",
+            default_path="/",
+            created_at="",
+            updated_at="",
+        )
+        return root
+
+    def test_small_files_grouped_into_batch(self):
+        """测试同一服务器的小文件合并为一个批次"""
+        small = [self._add(f"f{i}.txt", 10) for i in range(3)]
+        large = self._add("big.iso", 1000)
+
+        with patch(
+            "src.application.services.transfer_dispatcher.create_transport"
+        ) as client_cls:
+            client = client_cls.return_value
+            client.upload_batch.side_effect = lambda files, progress_callback: [
+                TransferResult(
+                    local_path=local, remote_path=remote, file_size=10, checksum="c"
+                )
+                for local, remote in files
+            ]
+            client.upload.return_value = True
+            client.last_result = None
+
+            assert self.dispatcher.dispatch_pending() == 4
+            self.dispatcher.shutdown()
+
+        assert client.upload_batch.call_count == 1
+        assert len(client.upload_batch.call_args[0][0]) == 3
+        assert client.upload.call_count == 1
+        for task_id in small + [large]:
+            assert self.queue_manager.get_task(task_id).status == TaskStatus.COMPLETED
+        assert self.queue_manager.get_task(small[0]).checksum == "c"
+        assert len(self.history_manager.list_history_records()) == 4
+
+    def test_failed_batch_item_marked_failed(self):
+        """测试批次中失败的文件单独标记失败"""
+        ids = [self._add(f"f{i}.txt", 10) for i in range(2)]
+
+        with patch(
+            "src.application.services.transfer_dispatcher.create_transport"
+        ) as client_cls:
+            client_cls.return_value.upload_batch.return_value = [
+                TransferResult(local_path="a", remote_path="b", file_size=10),
+                None,
+            ]
+            self.dispatcher.dispatch_pending()
+            self.dispatcher.shutdown()
+
+        assert self.queue_manager.get_task(ids[0]).status == TaskStatus.COMPLETED
+        assert self.queue_manager.get_task(ids[1]).status == TaskStatus.FAILED
+
+    def test_follow_uploads_growing_file(self):
+        """测试边下载边上传：完成通知后远端由临时文件重命名为目标文件"""
+        root = self._use_local_server()
+        local_path = os.path.join(self.temp_dir, "big.iso")
+        data = os.urandom(200 * 1024)
+        task_id = self._add("big.iso", len(data))
+        self.queue_manager.update_task_status(task_id, TaskStatus.RUNNING)
+        self.dispatcher.follow(task_id, local_path)
+
+        with open(local_path + ".crdownload", "wb") as f:
+            for start in range(0, len(data), 50 * 1024):
+                f.write(data[start : start + 50 * 1024])
+                f.flush()
+                time.sleep(0.02)
+        assert not os.path.exists(os.path.join(root, "remote", "big.iso"))
+        os.rename(local_path + ".crdownload", local_path)
+
+        success, result = self.dispatcher.finish_follow(task_id, timeout=10)
+        assert success
+        assert result.remote_path == "/remote/big.iso"
+        with open(os.path.join(root, "remote", "big.iso"), "rb") as f:
+            assert f.read() == data
+        assert not os.path.exists(os.path.join(root, "remote", "big.iso.part"))
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.COMPLETED
+        assert task_id not in self.dispatcher.following
+
+    def test_follow_aborted(self):
+        """测试下载失败时放弃上传并标记任务失败"""
+        self._use_local_server()
+        task_id = self._add("gone.iso", 0)
+        self.dispatcher.follow(task_id, os.path.join(self.temp_dir, "gone.iso"))
+        success, _ = self.dispatcher.finish_follow(task_id, success=False, timeout=10)
+        assert not success
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.FAILED
+
+    def _cancel_running_stream(self, policy: str) -> tuple:
+        """启动慢速流式上传，写出部分数据后取消，返回任务ID与远端临时文件路径"""
+        root = self._use_local_server()
+        total = 64 * 1024 * 200
+        task_id = self._add("slow.iso", total)
+
+        class SlowStream:
+            def __init__(self):
+                self.sent = 0
+
+            def read(self, size=-1):
+                if self.sent >= total:
+                    return b""
+                time.sleep(0.01)
+                self.sent += 64 * 1024
+                return b"x" * (64 * 1024)
+
+        outcome = {}
+
+        def run():
+            outcome["result"] = self.dispatcher.run_stream(
+                task_id, SlowStream(), atomic=True
+            )
+
+        worker = threading.Thread(target=run)
+        worker.start()
+        deadline = time.time() + 10
+        while self.queue_manager.get_task(task_id).progress <= 0:
+            assert time.time() < deadline
+            time.sleep(0.01)
+        assert self.dispatcher.cancel(task_id, policy)["success"]
+        worker.join(timeout=5)
+        assert not worker.is_alive()
+        assert outcome["result"] == (False, None)
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.CANCELLED
+        assert task_id not in self.dispatcher.tokens
+        return task_id, os.path.join(root, "remote", "slow.iso.part")
+
+    def test_cancel_running_deletes_partial(self):
+        """测试取消进行中的任务：传输立即结束，远端临时文件被删除"""
+        task_id, partial = self._cancel_running_stream("delete")
+        assert not os.path.exists(partial)
+        record = self.history_manager.list_history_records()[0]
+        assert record.task_id == task_id
+        assert record.status == "cancelled"
+
+    def test_cancel_running_keeps_partial(self):
+        """测试 keep 策略取消后保留远端临时文件以便续传"""
+        _, partial = self._cancel_running_stream("keep")
+        assert os.path.exists(partial)
+
+    def test_cancel_removes_only_written_path(self):
+        """测试取消差量上传时只删除临时文件，不删除远端原文件"""
+        task_id = self._add("big.iso", 10)
+        client = MagicMock()
+        client.partial_path = None
+
+        def upload(local_path, remote_path, progress_callback=None, mode="auto"):
+            client.partial_path = remote_path + ".delta-tmp"
+            self.dispatcher.cancel(task_id, "delete")
+            return False
+
+        client.upload.side_effect = upload
+        with patch(
+            "src.application.services.transfer_dispatcher.create_transport",
+            return_value=client,
+        ):
+            assert self.dispatcher.run_task(task_id)[0] is False
+        client.remove.assert_called_once_with("/remote/big.iso.delta-tmp")
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.CANCELLED
+
+    def test_cancelled_queued_task_not_run(self):
+        """测试排队中被取消的任务不再执行"""
+        task_id = self._add("a.txt", 10)
+        assert self.dispatcher.cancel(task_id)["success"]
+        with patch(
+            "src.application.services.transfer_dispatcher.create_transport"
+        ) as factory:
+            assert self.dispatcher.run_task(task_id) == (False, None)
+        factory.return_value.upload.assert_not_called()
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.CANCELLED
+
+    def test_cancel_rejects_unknown_policy(self):
+        """测试不支持的取消策略"""
+        task_id = self._add("a.txt", 10)
+        assert not self.dispatcher.cancel(task_id, "shred")["success"]
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.PENDING
+
+    def _wait_status(self, task_id: str, status: TaskStatus) -> None:
+        deadline = time.time() + 10
+        while self.queue_manager.get_task(task_id).status != status:
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+    def test_pause_running_and_resume(self):
+        """测试暂停运行中的上传后释放线程，恢复时从任务记录的临时文件续传"""
+        root = self._use_local_server()
+        data = os.urandom(4 * 1024 * 1024)
+        local_path = os.path.join(self.temp_dir, "big.bin")
+        with open(local_path, "wb") as f:
+            f.write(data)
+        result = self.queue_manager.add_task(
+            {
+                "file_path": local_path,
+                "file_name": "big.bin",
+                "file_size": len(data),
+                "server_id": "local1",
+                "target_path": "/remote",
+            }
+        )
+        task_id = result["task_id"]
+        update = self.queue_manager.update_task_progress
+
+        def slow_update(tid, progress):
+            time.sleep(0.02)
+            return update(tid, progress)
+
+        remote = os.path.join(root, "remote", "big.bin")
+        with patch.object(self.queue_manager, "update_task_progress", slow_update):
+            worker = threading.Thread(target=self.dispatcher.run_task, args=(task_id,))
+            worker.start()
+            while self.queue_manager.get_task(task_id).progress <= 0:
+                time.sleep(0.01)
+            assert self.dispatcher.pause(task_id)["success"]
+            worker.join(timeout=5)
+        assert not worker.is_alive()
+        task = self.queue_manager.get_task(task_id)
+        assert task.status == TaskStatus.PAUSED
+        assert re.fullmatch(r"/remote/big\.bin\.\w+\.part", task.partial_path)
+        part = os.path.join(root, task.partial_path.lstrip("/"))
+        assert 0 < os.path.getsize(part) < len(data)
+        assert not os.path.exists(remote)
+        assert self.history_manager.list_history_records() == []
+
+        with patch.object(
+            self.dispatcher, "_resume_upload", wraps=self.dispatcher._resume_upload
+        ) as resumed:
+            assert self.dispatcher.resume(task_id)["success"]
+            self._wait_status(task_id, TaskStatus.COMPLETED)
+        assert resumed.call_count == 1
+        assert resumed.call_args[0][3] > 0
+        with open(remote, "rb") as f:
+            assert f.read() == data
+        assert not os.path.exists(part)
+        assert self.queue_manager.get_task(task_id).partial_path is None
+
+    def test_interrupted_upload_resumes_after_restart(self):
+        """测试重启前中断的上传从任务记录的临时文件续传"""
+        root = self._use_local_server()
+        data = os.urandom(1024 * 1024)
+        local_path = os.path.join(self.temp_dir, "big.bin")
+        with open(local_path, "wb") as f:
+            f.write(data)
+        os.makedirs(os.path.join(root, "remote"))
+        with open(os.path.join(root, "remote", "big.bin.part"), "wb") as f:
+            f.write(data[:300000])
+        result = self.queue_manager.add_task(
+            {
+                "file_path": local_path,
+                "file_name": "big.bin",
+                "file_size": len(data),
+                "server_id": "local1",
+                "target_path": "/remote",
+            }
+        )
+        task_id = result["task_id"]
+        self.queue_manager.set_task_partial(task_id, "/remote/big.bin.part")
+
+        success, transfer_result = self.dispatcher.run_task(task_id)
+        assert success
+        assert transfer_result.mode == "resumed"
+        assert transfer_result.bytes_sent == len(data) - 300000
+        assert transfer_result.checksum == hashlib.sha256(data).hexdigest()
+        with open(os.path.join(root, "remote", "big.bin"), "rb") as f:
+            assert f.read() == data
+        assert not os.path.exists(os.path.join(root, "remote", "big.bin.part"))
+
+    def test_existing_target_not_used_for_resume(self):
+        """测试目标位置已有较小的无关文件时不从它续传，重新完整上传"""
+        root = self._use_local_server()
+        data = os.urandom(1024 * 1024)
+        local_path = os.path.join(self.temp_dir, "big.bin")
+        with open(local_path, "wb") as f:
+            f.write(data)
+        os.makedirs(os.path.join(root, "remote"))
+        with open(os.path.join(root, "remote", "big.bin"), "wb") as f:
+            f.write(os.urandom(300000))
+        task_id = self.queue_manager.add_task(
+            {
+                "file_path": local_path,
+                "file_name": "big.bin",
+                "file_size": len(data),
+                "server_id": "local1",
+                "target_path": "/remote",
+            }
+        )["task_id"]
+        # 重启前处于运行中，但没有记录临时文件
+        self.queue_manager.interrupted.add(task_id)
+
+        success, transfer_result = self.dispatcher.run_task(task_id)
+        assert success
+        assert transfer_result.mode == "full"
+        assert transfer_result.bytes_sent == len(data)
+        with open(os.path.join(root, "remote", "big.bin"), "rb") as f:
+            assert f.read() == data
+
+    def test_unverified_resume_not_completed(self):
+        """测试远端无法核对摘要时不按续传结果完成，重新完整上传"""
+        root = self._use_local_server()
+        data = os.urandom(1024 * 1024)
+        local_path = os.path.join(self.temp_dir, "big.bin")
+        with open(local_path, "wb") as f:
+            f.write(data)
+        os.makedirs(os.path.join(root, "remote"))
+        # 临时文件的内容已损坏，只有摘要核对能发现
+        with open(os.path.join(root, "remote", "big.bin.part"), "wb") as f:
+            f.write(os.urandom(300000))
+        task_id = self.queue_manager.add_task(
+            {
+                "file_path": local_path,
+                "file_name": "big.bin",
+                "file_size": len(data),
+                "server_id": "local1",
+                "target_path": "/remote",
+            }
+        )["task_id"]
+        self.queue_manager.set_task_partial(task_id, "/remote/big.bin.part")
+
+        with patch(
+            "src.infrastructure.network.local_transport.LocalTransport"
+            ".remote_checksum",
+            return_value=None,
+        ):
+            success, transfer_result = self.dispatcher.run_task(task_id)
+        assert success
+        assert transfer_result.mode == "full"
+        with open(os.path.join(root, "remote", "big.bin"), "rb") as f:
+            assert f.read() == data
+        assert not os.path.exists(os.path.join(root, "remote", "big.bin.part"))
+
+    def test_resume_hasher_single_pass(self):
+        """测试续传摘要：尾部原样交给上传方，摘要覆盖整个文件"""
+        data = os.urandom(300 * 1024)
+        local_path = os.path.join(self.temp_dir, "hash.bin")
+        with open(local_path, "wb") as f:
+            f.write(data)
+
+        with _ResumeHasher(local_path, 100000, "sha256") as source:
+            chunks = []
+            while True:
+                chunk = source.read(4096)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            checksum = source.hexdigest()
+        assert b"".join(chunks) == data[100000:]
+        assert checksum == hashlib.sha256(data).hexdigest()
+
+    def test_pause_and_resume_queue_by_server(self):
+        """测试按服务器暂停排队中的任务，暂停期间不执行，恢复后重新调度"""
+        self._use_local_server()
+        local_path = os.path.join(self.temp_dir, "a.txt")
+        with open(local_path, "wb") as f:
+            f.write(b"hello")
+        ids = []
+        for server_id in ("s1", "s2"):
+            result = self.queue_manager.add_task(
+                {
+                    "file_path": local_path,
+                    "file_name": "a.txt",
+                    "file_size": 5,
+                    "server_id": server_id,
+                    "target_path": "/remote",
+                }
+            )
+            ids.append(result["task_id"])
+
+        assert self.dispatcher.pause_queue("s1") == [ids[0]]
+        assert self.queue_manager.get_task(ids[0]).status == TaskStatus.PAUSED
+        assert self.dispatcher.run_task(ids[0]) == (False, None)
+        assert self.queue_manager.get_queue_status()["paused_tasks"] == 1
+
+        assert self.dispatcher.resume_queue() == [ids[0]]
+        self._wait_status(ids[0], TaskStatus.COMPLETED)
+        self._wait_status(ids[1], TaskStatus.COMPLETED)
+
+    def test_pause_rejects_stream_source(self):
+        """测试数据来源无法重新读取的任务不能暂停"""
+        task_id = self._add("a.txt", 10)
+        result = self.dispatcher.pause(task_id)
+        assert not result["success"]
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.PENDING
+
+    def test_fanout_to_several_destinations(self):
+        """测试多目标分发：每个目标各自完成并写入完整文件"""
+        root = self._use_local_server()
+        local_path = os.path.join(self.temp_dir, "big.iso")
+        data = os.urandom(600 * 1024)
+        with open(local_path, "wb") as f:
+            f.write(data)
+        task_ids = [
+            self.queue_manager.add_task(
+                {
+                    "file_path": local_path,
+                    "file_name": "big.iso",
+                    "file_size": len(data),
+                    "server_id": "local1",
+                    "target_path": f"/dest{i}",
+                }
+            )["task_id"]
+            for i in range(3)
+        ]
+
+        assert self.dispatcher.run_fanout(task_ids) == 3
+        for i, task_id in enumerate(task_ids):
+            with open(os.path.join(root, f"dest{i}", "big.iso"), "rb") as f:
+                assert f.read() == data
+            task = self.queue_manager.get_task(task_id)
+            assert task.status == TaskStatus.COMPLETED and task.progress == 100.0
+            assert task.checksum
+
+    def _add_replica(self, root: str, data: bytes) -> str:
+        with open(os.path.join(root, "src.iso"), "wb") as f:
+            f.write(data)
+        return self.queue_manager.add_task(
+            {
+                "file_path": "local1:/src.iso",
+                "file_name": "src.iso",
+                "file_size": len(data),
+                "server_id": "local1",
+                "target_path": "/replica",
+            }
+        )["task_id"]
+
+    def test_replicate_pushes_directly(self):
+        """测试服务器间复制优先由源服务器直接推送"""
+        root = self._use_local_server()
+        data = os.urandom(100 * 1024)
+        task_id = self._add_replica(root, data)
+        with patch(
+            "src.infrastructure.network.local_transport.LocalTransport.open_read"
+        ) as open_read:
+            success, result = self.dispatcher.run_replicate(
+                task_id, "local1", "/src.iso", verify_remote=True
+            )
+        assert success
+        open_read.assert_not_called()
+        assert result.mode == "replicated" and result.verified is True
+        with open(os.path.join(root, "replica", "src.iso"), "rb") as f:
+            assert f.read() == data
+        assert not os.path.exists(os.path.join(root, "replica", "src.iso.part"))
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.COMPLETED
+
+    def test_replicate_relays_when_unreachable(self):
+        """测试服务器之间不通时经后端流式中转"""
+        root = self._use_local_server()
+        data = os.urandom(100 * 1024)
+        task_id = self._add_replica(root, data)
+        with patch(
+            "src.infrastructure.network.local_transport.LocalTransport.remote_push",
+            return_value=False,
+        ):
+            success, result = self.dispatcher.run_replicate(
+                task_id, "local1", "/src.iso"
+            )
+        assert success
+        assert result.remote_path == "/replica/src.iso"
+        with open(os.path.join(root, "replica", "src.iso"), "rb") as f:
+            assert f.read() == data
+        task = self.queue_manager.get_task(task_id)
+        assert task.status == TaskStatus.COMPLETED and task.progress == 100.0
+
+    def test_replicate_cancelled_during_push(self):
+        """测试推送期间取消：不改为中转，任务取消并删除临时文件"""
+        root = self._use_local_server()
+        data = os.urandom(100 * 1024)
+        task_id = self._add_replica(root, data)
+
+        def push(source_path, target, remote_path):
+            with open(os.path.join(root, remote_path.lstrip("/")), "wb") as f:
+                f.write(data[:1000])
+            self.dispatcher.cancel(task_id)
+            return False
+
+        with patch(
+            "src.infrastructure.network.local_transport.LocalTransport.remote_push",
+            side_effect=push,
+        ):
+            with patch.object(self.dispatcher, "run_stream") as run_stream:
+                success, _ = self.dispatcher.run_replicate(
+                    task_id, "local1", "/src.iso"
+                )
+        assert not success
+        run_stream.assert_not_called()
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.CANCELLED
+        assert not os.path.exists(os.path.join(root, "replica", "src.iso.part"))
+        assert task_id not in self.dispatcher.tokens
+
+    def test_replicate_missing_source(self):
+        """测试源文件不存在时任务失败"""
+        self._use_local_server()
+        task_id = self._add("gone.iso", 10)
+        success, _ = self.dispatcher.run_replicate(task_id, "local1", "/gone.iso")
+        assert not success
+        assert self.queue_manager.get_task(task_id).status == TaskStatus.FAILED
+
+    def test_download_task(self):
+        """测试下载任务写入本地文件并更新进度与历史"""
+        root = self._use_local_server()
+        data = os.urandom(100 * 1024)
+        os.makedirs(os.path.join(root, "remote"))
+        with open(os.path.join(root, "remote", "pull.iso"), "wb") as f:
+            f.write(data)
+        local_path = os.path.join(self.temp_dir, "pulled", "pull.iso")
+        task_id = self.queue_manager.add_task(
+            {
+                "file_path": local_path,
+                "file_name": "pull.iso",
+                "file_size": len(data),
+                "server_id": "local1",
+                "target_path": "/remote",
+                "direction": "download",
+            }
+        )["task_id"]
+
+        assert self.dispatcher.dispatch_pending() == 1
+        self.dispatcher.shutdown()
+        with open(local_path, "rb") as f:
+            assert f.read() == data
+        task = self.queue_manager.get_task(task_id)
+        assert task.status == TaskStatus.COMPLETED and task.progress == 100.0
+        assert task.checksum == hashlib.sha256(data).hexdigest()
+        assert self.history_manager.list_history_records()[0].task_id == task_id
+
+    def _serve(self) -> str:
+        """启动本地 HTTP 替身，返回下载地址"""
+        _RangeHandler.ranges = []
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers = getattr(self, "servers", []) + [server]
+        return f"http://127.0.0.1:{server.server_port}/big.bin"
+
+    def _stop_servers(self):
+        for server in getattr(self, "servers", []):
+            server.shutdown()
+            server.server_close()
+
+    def test_relay_ranges_in_parallel(self):
+        """测试 URL 中转按区段并行写入，完成后重命名为目标文件"""
+        root = self._use_local_server()
+        url = self._serve()
+        task_id = self._add("big.bin", len(RELAY_DATA))
+        try:
+            with patch(
+                "src.application.services.transfer_dispatcher.RELAY_MIN_RANGE",
+                64 * 1024,
+            ):
+                success, result = self.dispatcher.run_relay(task_id, url, connections=4)
+        finally:
+            self._stop_servers()
+        assert success
+        assert result.remote_path == "/remote/big.bin"
+        assert len([r for r in _RangeHandler.ranges if r != (0, 1)]) == 4
+        with open(os.path.join(root, "remote", "big.bin"), "rb") as f:
+            assert f.read() == RELAY_DATA
+        assert not os.path.exists(os.path.join(root, "remote", "big.bin.part"))
+        task = self.queue_manager.get_task(task_id)
+        assert task.status == TaskStatus.COMPLETED and task.progress == 100.0
+
+    def test_relay_resumes_partial(self):
+        """测试顺序中转从远端未写完的临时文件末尾续传"""
+        root = self._use_local_server()
+        url = self._serve()
+        os.makedirs(os.path.join(root, "remote"))
+        with open(os.path.join(root, "remote", "big.bin.part"), "wb") as f:
+            f.write(RELAY_DATA[:100000])
+        task_id = self._add("big.bin", len(RELAY_DATA))
+        try:
+            success, result = self.dispatcher.run_relay(task_id, url, connections=1)
+        finally:
+            self._stop_servers()
+        assert success
+        assert result.mode == "resumed"
+        assert result.bytes_sent == len(RELAY_DATA) - 100000
+        assert (100000, len(RELAY_DATA)) in _RangeHandler.ranges
+        with open(os.path.join(root, "remote", "big.bin"), "rb") as f:
+            assert f.read() == RELAY_DATA
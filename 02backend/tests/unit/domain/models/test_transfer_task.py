@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+import pytest
+
+from src.domain.models import TaskStatus, TransferTask
+
+
+def _task(server_id: str, **overrides) -> TransferTask:
+    fields = {
+        "id": "task1",
+        "file_path": "/tmp/a.bin",
+        "file_name": "a.bin",
+        "file_size": 1024,
+        "server_id": server_id,
+        "target_path": "/data/" + "backup",
+        "status": "pending",
+        "progress": 0.0,
+        "started_at": "2024-01-01T08:00:00.123456",
+    }
+    fields.update(overrides)
+    return TransferTask(**fields)
+
+
+class TestTransferTask:
+    """紧凑任务模型测试类"""
+
+    def test_no_instance_dict(self):
+        """测试任务不带实例 __dict__，不能随意添加属性"""
+        task = _task("server1")
+        assert not hasattr(task, "__dict__")
+        with pytest.raises(AttributeError):
+            task.extra = 1
+
+    def test_repeated_strings_interned(self):
+        """测试不同任务的服务器ID与目标路径共享同一字符串对象"""
+        first = _task("".join(["server", "1"]))
+        second = _task("".join(["server", "1"]))
+        assert first.server_id is second.server_id
+        assert first.target_path is second.target_path
+
+    def test_status_stored_as_code(self):
+        """测试状态以整数保存，对外仍为 TaskStatus"""
+        task = _task("server1")
+        assert task.status is TaskStatus.PENDING
+        task.status = TaskStatus.PAUSED
+        assert isinstance(task.status_code, int)
+        assert task.status is TaskStatus.PAUSED
+
+    def test_timestamps_round_trip(self):
+        """测试时间保存为时间戳，读取与序列化时还原为 ISO 字符串"""
+        task = _task("server1")
+        assert isinstance(task.started_ts, float)
+        assert task.started_at == "2024-01-01T08:00:00.123456"
+        assert task.completed_at is None
+
+        restored = TransferTask.from_dict(task.to_dict())
+        assert restored.to_dict() == task.to_dict()
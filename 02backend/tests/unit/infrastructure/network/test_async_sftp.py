@@ -0,0 +1,151 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import asyncio
+import hashlib
+import random
+import tempfile
+from types import SimpleNamespace
+
+from src.domain.models import ServerConfig
+from src.infrastructure.network.async_sftp import AsyncSFTPTransport
+
+
+def _server_config() -> ServerConfig:
+    return ServerConfig(
+        id="server1",
+        name="Test Server",
+        host="127.0.0.1",
+        port=22,
+        protocol="SFTP",
+        username="user",
+        password="pass",
+        default_path="/tmp",
+        created_at="",
+        updated_at="",
+    )
+
+
+class _FakeRemoteFile:
+    """写请求随机延迟完成，模拟乱序确认"""
+
+    def __init__(self, path: str, mode: str, stats: dict):
+        self.handle = open(path, mode)
+        self.stats = stats
+
+    async def write(self, data, offset):
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(
+            self.stats["max_in_flight"], self.stats["in_flight"]
+        )
+        await asyncio.sleep(random.random() / 1000)
+        os.pwrite(self.handle.fileno(), data, offset)
+        self.stats["in_flight"] -= 1
+
+    async def read(self, size):
+        return self.handle.read(size)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.handle.close()
+
+
+class _FakeSFTP:
+    def __init__(self, root: str, stats: dict):
+        self.root = root
+        self.stats = stats
+
+    def _path(self, remote_path):
+        return os.path.join(self.root, remote_path.lstrip("/"))
+
+    def open(self, remote_path, mode):
+        return _FakeRemoteFile(self._path(remote_path), mode, self.stats)
+
+    async def stat(self, remote_path):
+        return SimpleNamespace(size=os.path.getsize(self._path(remote_path)))
+
+    async def posix_rename(self, old_path, new_path):
+        os.replace(self._path(old_path), self._path(new_path))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class _FakeConn:
+    def __init__(self, root: str):
+        self.root = root
+        self.stats = {"in_flight": 0, "max_in_flight": 0}
+
+    def start_sftp_client(self):
+        return _FakeSFTP(self.root, self.stats)
+
+    async def run(self, command, check=False):
+        return SimpleNamespace(exit_status=127, stdout="")
+
+
+class _FakeConnections:
+    def __init__(self, conn):
+        self.conn = conn
+        self.released: list[bool] = []
+
+    async def acquire(self, server_config):
+        return self.conn
+
+    async def release(self, server_config, conn, reusable=True):
+        self.released.append(reusable)
+
+
+class TestAsyncSFTPTransport:
+    """asyncio SFTP传输测试类"""
+
+    def setup_method(self):
+        self.remote_dir = tempfile.mkdtemp()
+        self.local_file = os.path.join(tempfile.mkdtemp(), "data.bin")
+        self.data = os.urandom(1024 * 1024 + 123)
+        with open(self.local_file, "wb") as f:
+            f.write(self.data)
+        self.conn = _FakeConn(self.remote_dir)
+        self.connections = _FakeConnections(self.conn)
+
+    def test_pipelined_upload(self):
+        """测试写请求并发在途且乱序完成后文件内容正确"""
+        client = AsyncSFTPTransport(
+            _server_config(),
+            self.connections,
+            verify_remote=True,
+            verify_fallback="readback",
+            max_requests=8,
+        )
+        progress = []
+        recorded = []
+        client.on_partial = recorded.append
+        assert asyncio.run(client.upload(self.local_file, "/data.bin", progress.append))
+        with open(os.path.join(self.remote_dir, "data.bin"), "rb") as f:
+            assert f.read() == self.data
+        # 先写入记录下来的临时文件，完成后替换目标文件
+        assert len(recorded) == 1
+        assert recorded[0].startswith("/data.bin.") and recorded[0].endswith(".part")
+        assert os.listdir(self.remote_dir) == ["data.bin"]
+        assert client.partial_path == "/data.bin"
+        assert client.last_result.remote_path == "/data.bin"
+        assert client.last_result.checksum == hashlib.sha256(self.data).hexdigest()
+        assert client.last_result.verified is True
+        assert 1 < self.conn.stats["max_in_flight"] <= 8
+        assert progress[-1] == 1.0
+        assert self.connections.released == [True]
+
+    def test_upload_failure(self):
+        """测试本地文件不存在时返回失败并释放连接"""
+        client = AsyncSFTPTransport(_server_config(), self.connections)
+        assert asyncio.run(client.upload("/nonexistent", "/data.bin")) is False
+        assert client.last_result is None
+        assert self.connections.released == [False]
@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import pytest
+
+from src.infrastructure.network.cancellation import CancelToken, TransferCancelled
+
+
+class TestCancelToken:
+    """取消令牌测试类"""
+
+    def test_check_raises_after_cancel(self):
+        """测试取消前 check 通过，取消后抛出并带有原因"""
+        token = CancelToken()
+        token.check()
+        token.cancel("用户取消")
+        assert token.cancelled
+        with pytest.raises(TransferCancelled, match="用户取消"):
+            token.check()
+
+    def test_callbacks_run_once(self):
+        """测试回调在取消时执行一次，回调异常不影响其他回调"""
+        token = CancelToken()
+        calls = []
+
+        def broken():
+            raise OSError("连接已关闭")
+
+        token.on_cancel(broken)
+        token.on_cancel(lambda: calls.append(1))
+        token.cancel()
+        token.cancel()
+        assert calls == [1]
+
+    def test_callback_after_cancel_runs_immediately(self):
+        """测试已取消后登记的回调立即执行"""
+        token = CancelToken()
+        token.cancel()
+        calls = []
+        token.on_cancel(lambda: calls.append(1))
+        assert calls == [1]
@@ -0,0 +1,43 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import hashlib
+
+import pytest
+
+from src.infrastructure.network.checksum import (
+    create_hasher,
+    parse_checksum_output,
+    supported_algorithms,
+)
+
+
+class TestChecksum:
+    """校验和工具测试类"""
+
+    def test_incremental_digest_matches_hashlib(self):
+        """测试分块增量摘要与一次性摘要一致"""
+        data = os.urandom(100_000)
+        hasher = create_hasher("sha256")
+        for i in range(0, len(data), 32768):
+            hasher.update(data[i : i + 32768])
+        assert hasher.hexdigest() == hashlib.sha256(data).hexdigest()
+
+    def test_unsupported_algorithm(self):
+        """测试不支持的算法"""
+        with pytest.raises(ValueError):
+            create_hasher("not-a-hash")
+
+    def test_supported_algorithms_contains_sha256(self):
+        """测试可用算法列表"""
+        assert "sha256" in supported_algorithms()
+
+    def test_parse_checksum_output(self):
+        """测试解析 sha256sum 输出"""
+        output = "ABCDEF0123  /home/user/file.txt\n"
+        assert parse_checksum_output(output) == "abcdef0123"
+        assert parse_checksum_output("") is None
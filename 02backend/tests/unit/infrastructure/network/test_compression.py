@@ -0,0 +1,64 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import gzip
+import shutil
+import tempfile
+
+import pytest
+
+from src.infrastructure.network.compression import (
+    choose_codec,
+    create_compressor,
+    sample_ratio,
+)
+
+
+class TestCompression:
+    """压缩工具测试类"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.text_file = os.path.join(self.temp_dir, "app.log")
+        with open(self.text_file, "w") as f:
+            f.write("2026-01-01 INFO request handled in 12ms\n" * 5000)
+        self.random_file = os.path.join(self.temp_dir, "random.bin")
+        with open(self.random_file, "wb") as f:
+            f.write(os.urandom(256 * 1024))
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_sample_ratio(self):
+        """测试采样压缩比区分文本与随机数据"""
+        assert sample_ratio(self.text_file) < 0.2
+        assert sample_ratio(self.random_file) > 0.9
+
+    def test_choose_codec_auto(self):
+        """测试 auto 模式按采样结果选择"""
+        assert choose_codec(self.text_file, "auto") in ("gzip", "zstd")
+        assert choose_codec(self.random_file, "auto") is None
+        assert choose_codec(self.text_file, "none") is None
+
+    def test_choose_codec_skips_compressed_extension(self):
+        """测试已压缩格式直接跳过"""
+        archive = os.path.join(self.temp_dir, "logs.zip")
+        shutil.copy(self.text_file, archive)
+        assert choose_codec(archive, "auto") is None
+
+    def test_invalid_mode(self):
+        """测试非法压缩模式"""
+        with pytest.raises(ValueError):
+            choose_codec(self.text_file, "lz4")
+
+    def test_gzip_stream_roundtrip(self):
+        """测试 gzip 流式压缩可被标准 gzip 解压"""
+        compressor = create_compressor("gzip")
+        data = b"hello world\n" * 1000
+        compressed = compressor.compress(data[:5000]) + compressor.compress(data[5000:])
+        compressed += compressor.flush()
+        assert gzip.decompress(compressed) == data
@@ -0,0 +1,60 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from unittest.mock import MagicMock, patch
+
+from src.domain.models import ServerConfig
+from src.infrastructure.network.connection_pool import SSHConnectionPool
+
+
+def _server_config() -> ServerConfig:
+    return ServerConfig(
+        id="server1",
+        name="Test Server",
+        host="127.0.0.1",
+        port=22,
+        protocol="SFTP",
+        username="user",
+        password="pass",
+        default_path="/tmp",
+        created_at="",
+        updated_at="",
+    )
+
+
+class TestSSHConnectionPool:
+    """SSH连接池测试类"""
+
+    def setup_method(self):
+        self.pool = SSHConnectionPool(max_idle_per_server=1)
+        self.config = _server_config()
+
+    def test_reuse_released_connection(self):
+        """测试归还的连接被再次取出，不重新握手"""
+        with patch(
+            "src.infrastructure.network.connection_pool.paramiko.SSHClient"
+        ) as ssh_class:
+            ssh = self.pool.acquire(self.config)
+            self.pool.release(self.config, ssh)
+            assert self.pool.acquire(self.config) is ssh
+            assert ssh_class.call_count == 1
+            ssh.connect.assert_called_once()
+
+    def test_broken_connection_closed(self):
+        """测试出错的连接和超出空闲上限的连接被关闭"""
+        broken, extra, kept = MagicMock(), MagicMock(), MagicMock()
+        self.pool.release(self.config, broken, reusable=False)
+        self.pool.release(self.config, kept)
+        self.pool.release(self.config, extra)
+        broken.close.assert_called_once()
+        extra.close.assert_called_once()
+        kept.close.assert_not_called()
+        assert self.pool.idle_count() == 1
+
+        self.pool.close_all()
+        kept.close.assert_called_once()
+        assert self.pool.idle_count() == 0
@@ -0,0 +1,95 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import hashlib
+import io
+import random
+import zlib
+
+from src.infrastructure.network.delta import (
+    choose_block_size,
+    compute_delta,
+    compute_signatures,
+    parse_signatures,
+    rolling_update,
+)
+
+
+def _apply(old: bytes, ops, block_size: int) -> bytes:
+    """按差量操作在本地重建文件"""
+    out = bytearray()
+    for kind, value in ops:
+        if kind == "copy":
+            out += old[value * block_size : (value + 1) * block_size]
+        else:
+            out += value
+    return bytes(out)
+
+
+class TestDelta:
+    """差量传输算法测试类"""
+
+    def setup_method(self):
+        rng = random.Random(42)
+        self.block_size = 1024
+        self.old = bytes(rng.getrandbits(8) for _ in range(64 * 1024))
+
+    def _delta(self, new: bytes):
+        signatures = compute_signatures(io.BytesIO(self.old), self.block_size)
+        hasher = hashlib.sha256()
+        ops = list(
+            compute_delta(io.BytesIO(new), signatures, self.block_size, hasher, 8192)
+        )
+        assert hasher.hexdigest() == hashlib.sha256(new).hexdigest()
+        assert _apply(self.old, ops, self.block_size) == new
+        return ops
+
+    @staticmethod
+    def _literal_bytes(ops) -> int:
+        return sum(len(v) for k, v in ops if k == "data")
+
+    def test_rolling_matches_adler32(self):
+        """测试滚动更新结果与 zlib.adler32 一致"""
+        data = self.old[: self.block_size + 10]
+        weak = zlib.adler32(data[: self.block_size])
+        for i in range(10):
+            weak = rolling_update(
+                weak, data[i], data[i + self.block_size], self.block_size
+            )
+            assert weak == zlib.adler32(data[i + 1 : i + 1 + self.block_size])
+
+    def test_identical_file_sends_nothing(self):
+        """测试相同文件无字面量数据"""
+        ops = self._delta(self.old)
+        assert self._literal_bytes(ops) == 0
+
+    def test_in_place_modification(self):
+        """测试原位修改只发送变化的块"""
+        new = bytearray(self.old)
+        new[5000:5010] = b"x" * 10
+        ops = self._delta(bytes(new))
+        assert self._literal_bytes(ops) == self.block_size
+
+    def test_appended_data(self):
+        """测试追加写只发送新增数据"""
+        ops = self._delta(self.old + b"appended" * 100)
+        assert self._literal_bytes(ops) == 800
+
+    def test_inserted_data_uses_rolling_match(self):
+        """测试插入数据后仍能通过滚动校验匹配后续块"""
+        new = self.old[:3000] + b"inserted" + self.old[3000:]
+        ops = self._delta(new)
+        assert self._literal_bytes(ops) < 3 * self.block_size
+
+    def test_parse_signatures(self):
+        """测试解析远端签名输出"""
+        assert parse_signatures("1 abc\n2 def\n\n") == [(1, "abc"), (2, "def")]
+
+    def test_choose_block_size_bounds(self):
+        """测试块大小范围"""
+        assert choose_block_size(0) == 8 * 1024
+        assert choose_block_size(10**15) == 1024 * 1024
@@ -0,0 +1,75 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import tempfile
+import threading
+
+import pytest
+
+from src.infrastructure.network.fanout import FanOutReader
+
+
+class TestFanOutReader:
+    """多目标分发读取器测试类"""
+
+    def setup_method(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "data.bin")
+        self.data = os.urandom(256 * 1024 + 5)
+        with open(self.path, "wb") as f:
+            f.write(self.data)
+
+    def _drain(self, stream, size=-1):
+        chunks = []
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        stream.close()
+        return b"".join(chunks)
+
+    def test_every_stream_gets_whole_file(self):
+        """测试各目标都读到完整文件"""
+        results = {}
+        with FanOutReader(self.path, 3, chunk_size=8192, buffers=4) as reader:
+            threads = [
+                threading.Thread(
+                    target=lambda i=i: results.__setitem__(
+                        i, self._drain(reader.stream(i), 5000)
+                    )
+                )
+                for i in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+        assert [results[i] for i in range(3)] == [self.data] * 3
+
+    def test_slow_stream_detached(self):
+        """测试落后的目标改为独立读取，不阻塞其他目标"""
+        with FanOutReader(self.path, 2, chunk_size=8192, buffers=2) as reader:
+            slow = reader.stream(1)
+            first = slow.read()
+            # 慢目标停住时快目标仍能读完
+            assert self._drain(reader.stream(0)) == self.data
+            assert reader.detached(1)
+            assert first + self._drain(slow) == self.data
+
+    def test_closed_stream_releases_ring(self):
+        """测试提前结束的目标不再占用共享缓冲区"""
+        with FanOutReader(self.path, 2, chunk_size=8192, buffers=2) as reader:
+            reader.stream(1).close()
+            assert self._drain(reader.stream(0)) == self.data
+            assert not reader.detached(1)
+
+    def test_missing_file_raises(self):
+        """测试读取错误在各目标的流中抛出"""
+        with FanOutReader(self.path + ".missing", 2) as reader:
+            for index in range(2):
+                with pytest.raises(FileNotFoundError):
+                    reader.stream(index).read()
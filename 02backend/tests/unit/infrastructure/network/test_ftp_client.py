@@ -0,0 +1,159 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import ftplib
+import hashlib
+import tempfile
+import threading
+
+from src.domain.models import ServerConfig
+from src.infrastructure.network.ftp_client import FTPClient, FTPConnectionPool
+
+
+def _server_config(protocol: str = "FTP") -> ServerConfig:
+    return ServerConfig(
+        id="server1",
+        name="Test Server",
+        host="127.0.0.1",
+        port=21,
+        protocol=protocol,
+        username="user",
+        password="pass",
+        default_path="/tmp",
+        created_at="",
+        updated_at="",
+    )
+
+
+class _DataConn:
+    """模拟数据连接，按 REST 偏移写入本地文件"""
+
+    def __init__(self, path: str, offset: int):
+        self.handle = open(path, "r+b" if offset else "wb")
+        self.handle.seek(offset)
+
+    def sendall(self, data):
+        self.handle.write(data)
+
+    def close(self):
+        self.handle.close()
+
+
+class _FakeFTP:
+    """以本地目录模拟 FTP 服务器"""
+
+    lock = threading.Lock()
+
+    def __init__(self, root: str, support_rest: bool = True):
+        self.root = root
+        self.support_rest = support_rest
+        self.sock = object()
+        self.rests: list = []
+
+    def _path(self, remote_path: str) -> str:
+        return os.path.join(self.root, remote_path.lstrip("/"))
+
+    def transfercmd(self, cmd, rest=None):
+        with self.lock:
+            self.rests.append(rest)
+        if rest and not self.support_rest:
+            raise ftplib.error_perm("502 REST not implemented")
+        return _DataConn(self._path(cmd.split(" ", 1)[1]), int(rest or 0))
+
+    def voidresp(self):
+        return "226 Transfer complete"
+
+    def storbinary(self, cmd, fp, blocksize=8192, callback=None, rest=None):
+        conn = self.transfercmd(cmd, rest)
+        while True:
+            block = fp.read(blocksize)
+            if not block:
+                break
+            conn.sendall(block)
+            if callback:
+                callback(block)
+        conn.close()
+        return self.voidresp()
+
+    def retrbinary(self, cmd, callback, blocksize=8192):
+        with open(self._path(cmd.split(" ", 1)[1]), "rb") as f:
+            callback(f.read())
+
+    def size(self, remote_path):
+        try:
+            return os.path.getsize(self._path(remote_path))
+        except OSError:
+            raise ftplib.error_perm("550 No such file") from None
+
+
+class _FakePool(FTPConnectionPool):
+    def __init__(self, ftp: _FakeFTP):
+        super().__init__()
+        self.ftp = ftp
+
+    def _connect(self, server_config):
+        return self.ftp
+
+    def _probe(self, conn):
+        return True
+
+
+class TestFTPClient:
+    """FTP客户端测试类"""
+
+    def setup_method(self):
+        self.remote_dir = tempfile.mkdtemp()
+        self.local_file = os.path.join(tempfile.mkdtemp(), "data.bin")
+        self.data = os.urandom(300_000)
+        with open(self.local_file, "wb") as f:
+            f.write(self.data)
+
+    def _client(self, support_rest: bool = True, **kwargs) -> FTPClient:
+        self.ftp = _FakeFTP(self.remote_dir, support_rest)
+        return FTPClient(_server_config(), pool=_FakePool(self.ftp), **kwargs)
+
+    def _remote_data(self) -> bytes:
+        with open(os.path.join(self.remote_dir, "data.bin"), "rb") as f:
+            return f.read()
+
+    def test_upload_stream(self):
+        """测试单连接上传并计算摘要"""
+        client = self._client(verify_remote=True, verify_fallback="readback")
+        progress = []
+        assert client.upload(self.local_file, "/data.bin", progress.append) is True
+        assert client.last_result.checksum == hashlib.sha256(self.data).hexdigest()
+        assert client.last_result.verified is True
+        assert progress[-1] == 1.0
+        assert self._remote_data() == self.data
+
+    def test_resume_from_remote_size(self):
+        """测试远端已有部分文件时用 REST 续传"""
+        with open(os.path.join(self.remote_dir, "data.bin"), "wb") as f:
+            f.write(self.data[:100_000])
+        client = self._client(resume=True)
+        assert client.upload(self.local_file, "/data.bin") is True
+        assert client.last_result.mode == "resumed"
+        assert client.last_result.bytes_sent == len(self.data) - 100_000
+        assert client.last_result.checksum == hashlib.sha256(self.data).hexdigest()
+        assert self.ftp.rests == [100_000]
+        assert self._remote_data() == self.data
+
+    def test_parallel_ranges(self):
+        """测试大文件按区段并行上传"""
+        client = self._client(parallel_connections=3, parallel_threshold=1)
+        assert client.upload(self.local_file, "/data.bin") is True
+        assert sorted(self.ftp.rests, key=lambda r: r or 0) == [None, 100_000, 200_000]
+        assert client.last_result.checksum == hashlib.sha256(self.data).hexdigest()
+        assert self._remote_data() == self.data
+
+    def test_parallel_falls_back_without_rest(self):
+        """测试服务器不支持 REST 时退回单连接上传"""
+        client = self._client(
+            support_rest=False, parallel_connections=3, parallel_threshold=1
+        )
+        assert client.upload(self.local_file, "/data.bin") is True
+        assert self._remote_data() == self.data
@@ -0,0 +1,83 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import tempfile
+import threading
+import time
+
+import pytest
+
+from src.infrastructure.network.growing_file import GrowingFileReader
+
+
+class TestGrowingFileReader:
+    """跟随读取下载中文件的测试类"""
+
+    def setup_method(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "video.mp4")
+        self.data = os.urandom(256 * 1024)
+
+    def _download(self, reader: GrowingFileReader, finish: bool = True) -> None:
+        """模拟浏览器：分块写入 .crdownload，完成后重命名并通知"""
+        time.sleep(0.05)
+        with open(self.path + ".crdownload", "wb") as f:
+            for start in range(0, len(self.data), 64 * 1024):
+                f.write(self.data[start : start + 64 * 1024])
+                f.flush()
+                time.sleep(0.02)
+        os.rename(self.path + ".crdownload", self.path)
+        if finish:
+            reader.finish(len(self.data))
+
+    def _read_all(self, reader: GrowingFileReader) -> bytes:
+        chunks = []
+        while True:
+            chunk = reader.read(10000)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def test_follows_until_finished(self):
+        """测试边写边读，重命名后读到完成通知为止"""
+        reader = GrowingFileReader(self.path, poll_interval=0.01)
+        writer = threading.Thread(target=self._download, args=(reader,))
+        writer.start()
+        try:
+            assert self._read_all(reader) == self.data
+        finally:
+            writer.join()
+            reader.close()
+
+    def test_finished_before_open(self):
+        """测试下载在开始读取前已完成时直接读取最终文件"""
+        with open(self.path, "wb") as f:
+            f.write(self.data)
+        reader = GrowingFileReader(self.path)
+        reader.finish()
+        assert self._read_all(reader) == self.data
+        reader.close()
+
+    def test_abort_and_short_file(self):
+        """测试下载失败与内容少于最终大小时报错"""
+        reader = GrowingFileReader(self.path, poll_interval=0.01)
+        threading.Timer(0.05, reader.abort).start()
+        with pytest.raises(OSError):
+            self._read_all(reader)
+
+        with open(self.path, "wb") as f:
+            f.write(self.data[:100])
+        reader = GrowingFileReader(self.path)
+        reader.finish(len(self.data))
+        with pytest.raises(OSError):
+            self._read_all(reader)
+        reader.close()
+
+    def test_idle_timeout(self):
+        """测试长时间没有新数据时超时"""
+        reader = GrowingFileReader(self.path, poll_interval=0.01, idle_timeout=0.05)
+        with pytest.raises(TimeoutError):
+            reader.read(100)
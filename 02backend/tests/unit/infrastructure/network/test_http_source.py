@@ -0,0 +1,113 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.infrastructure.network.http_source import HttpSource
+
+DATA = os.urandom(300 * 1024)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """本地 HTTP 替身：支持 Range，可按配置在中途断开或拒绝区段请求"""
+
+    ranges = True
+    drop_after = None  # 首个响应发送该字节数后断开
+    requests: list = []
+
+    def do_GET(self):
+        type(self).requests.append(dict(self.headers))
+        start, end = 0, len(DATA)
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match and self.ranges:
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else len(DATA)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(DATA)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start))
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Disposition", 'attachment; filename="data.bin"')
+        self.end_headers()
+        body = DATA[start:end]
+        drop_after = type(self).drop_after
+        if drop_after is not None and len(body) > drop_after:
+            type(self).drop_after = None
+            self.wfile.write(body[:drop_after])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpSource:
+    """HTTP 源测试类"""
+
+    def setup_method(self):
+        _Handler.ranges = True
+        _Handler.drop_after = None
+        _Handler.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/files/x?id=1"
+
+    def teardown_method(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _read(self, stream) -> bytes:
+        chunks = []
+        while True:
+            chunk = stream.read(64 * 1024)
+            if not chunk:
+                stream.close()
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def test_probe_and_range(self):
+        """测试探测大小、Range 支持与文件名，并读取区段"""
+        source = HttpSource(url=self.url, headers={"Referer": "http://page"})
+        info = source.probe()
+        assert info.size == len(DATA)
+        assert info.accept_ranges
+        assert info.file_name == "data.bin"
+        assert self._read(source.open(1000, 5000)) == DATA[1000:5000]
+        assert _Handler.requests[-1]["Referer"] == "http://page"
+        assert _Handler.requests[-1]["If-Range"] == '"v1"'
+
+    def test_resume_after_drop(self):
+        """测试连接中途断开后按 Range 续传"""
+        _Handler.drop_after = 100 * 1024
+        source = HttpSource(self.url)
+        source.probe()
+        assert self._read(source.open()) == DATA
+        assert _Handler.requests[-1]["Range"].startswith("bytes=")
+
+    def test_no_range_support(self):
+        """测试源不支持 Range 时整体读取，中途断开则失败"""
+        _Handler.ranges = False
+        source = HttpSource(self.url)
+        info = source.probe()
+        assert not info.accept_ranges and info.size == len(DATA)
+        assert self._read(source.open()) == DATA
+
+        _Handler.drop_after = 1024
+        with pytest.raises(OSError):
+            self._read(source.open())
+
+    def test_rejects_non_http(self):
+        """测试拒绝非 HTTP(S) 地址"""
+        with pytest.raises(ValueError):
+            HttpSource("file:///etc/passwd")
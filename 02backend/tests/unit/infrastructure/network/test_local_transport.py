@@ -0,0 +1,156 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import hashlib
+import io
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from src.domain.models import ServerConfig
+from src.infrastructure.network.local_transport import LocalTransport
+from src.infrastructure.network.transport_factory import create_transport
+
+
+def _server_config(root: str) -> ServerConfig:
+    return ServerConfig(
+        id="local1",
+        name="Local",
+        host=f"file://{root}",
+        port=1,
+        protocol="LOCAL",
+        username="",
+        password="",
+        default_path="/",
+        created_at="",
+        updated_at="",
+    )
+
+
+class TestLocalTransport:
+    """本地回环传输测试类"""
+
+    def setup_method(self):
+        self.root = tempfile.mkdtemp()
+        self.local_file = os.path.join(tempfile.mkdtemp(), "data.bin")
+        self.data = os.urandom(3 * 1024 * 1024 + 17)
+        with open(self.local_file, "wb") as f:
+            f.write(self.data)
+        self.transport = create_transport(_server_config(self.root))
+
+    def test_registered_by_protocol(self):
+        """测试工厂按 LOCAL 协议创建本地后端"""
+        assert isinstance(self.transport, LocalTransport)
+
+    def test_put_and_metadata(self):
+        """测试上传、创建目录、重命名、查询与列目录"""
+        self.transport.connect()
+        self.transport.mkdir("/a/b")
+        progress = []
+        result = self.transport.put(self.local_file, "/a/b/tmp.bin", progress.append)
+        assert result.checksum == hashlib.sha256(self.data).hexdigest()
+        assert progress[-1] == 1.0
+
+        self.transport.rename("/a/b/tmp.bin", "/a/b/data.bin")
+        assert self.transport.stat("/a/b/tmp.bin") is None
+        entry = self.transport.stat("/a/b/data.bin")
+        assert entry.size == len(self.data) and not entry.is_dir
+        assert [e.name for e in self.transport.listdir("/a/b")] == ["data.bin"]
+        assert self.transport.remote_size("/a/b/data.bin") == len(self.data)
+
+    def test_upload_writes_recorded_partial_first(self):
+        """测试完整上传先写入临时文件并回调其路径，完成后替换目标文件"""
+        with open(os.path.join(self.root, "old.bin"), "wb") as f:
+            f.write(b"old content")
+        recorded = []
+
+        def on_partial(path):
+            recorded.append(path)
+            # 回调时临时文件已新建，目标文件仍是旧内容
+            assert os.path.getsize(os.path.join(self.root, path.lstrip("/"))) == 0
+            with open(os.path.join(self.root, "old.bin"), "rb") as f:
+                assert f.read() == b"old content"
+
+        self.transport.on_partial = on_partial
+        assert self.transport.upload(self.local_file, "/old.bin")
+        assert len(recorded) == 1 and recorded[0].startswith("/old.bin.")
+        assert recorded[0].endswith(".part")
+        assert os.listdir(self.root) == ["old.bin"]
+        with open(os.path.join(self.root, "old.bin"), "rb") as f:
+            assert f.read() == self.data
+
+    def test_put_range(self):
+        """测试按区段写入还原完整文件"""
+        half = len(self.data) // 2
+        assert self.transport.put_range(self.local_file, "/r.bin", 0, half) == half
+        self.transport.put_range(self.local_file, "/r.bin", half, len(self.data))
+        with open(os.path.join(self.root, "r.bin"), "rb") as f:
+            assert f.read() == self.data
+
+    def test_upload_stream(self):
+        """测试从二进制流写入并校验预期大小"""
+        progress = []
+        assert self.transport.upload_stream(
+            io.BytesIO(self.data), "/s/data.bin", len(self.data), progress.append
+        )
+        assert (
+            self.transport.last_result.checksum == hashlib.sha256(self.data).hexdigest()
+        )
+        assert progress[-1] == 1.0
+        assert not self.transport.upload_stream(
+            io.BytesIO(self.data[:100]), "/s/short.bin", len(self.data)
+        )
+
+    def test_download_and_resume(self):
+        """测试顺序下载计算摘要，并从本地临时文件续传"""
+        self.transport.put(self.local_file, "/d/data.bin")
+        target = os.path.join(tempfile.mkdtemp(), "out", "data.bin")
+        progress = []
+        assert self.transport.download("/d/data.bin", target, progress.append)
+        result = self.transport.last_result
+        assert result.checksum == hashlib.sha256(self.data).hexdigest()
+        assert progress[-1] == 1.0
+        with open(target, "rb") as f:
+            assert f.read() == self.data
+
+        with open(target + ".part", "wb") as f:
+            f.write(self.data[:1000])
+        os.unlink(target)
+        assert self.transport.download("/d/data.bin", target)
+        assert self.transport.last_result.mode == "resumed"
+        assert self.transport.last_result.bytes_sent == len(self.data) - 1000
+        with open(target, "rb") as f:
+            assert f.read() == self.data
+        assert not os.path.exists(target + ".part")
+
+    def test_download_ranges_in_parallel(self):
+        """测试按区段并行下载"""
+        self.transport.put(self.local_file, "/d/data.bin")
+        target = os.path.join(tempfile.mkdtemp(), "data.bin")
+        with (
+            patch("src.infrastructure.network.transport.DOWNLOAD_RANGE", 512 * 1024),
+            patch.object(
+                LocalTransport, "get_range", wraps=self.transport.get_range
+            ) as get_range,
+        ):
+            assert self.transport.download("/d/data.bin", target, connections=3)
+        assert get_range.call_count == 7
+        assert self.transport.last_result.checksum is None
+        with open(target, "rb") as f:
+            assert f.read() == self.data
+
+    def test_download_missing(self):
+        """测试远端文件不存在时下载失败"""
+        target = os.path.join(tempfile.mkdtemp(), "data.bin")
+        assert not self.transport.download("/missing.bin", target)
+        assert not os.path.exists(target)
+
+    def test_path_escape_rejected(self):
+        """测试不允许越出根目录"""
+        with pytest.raises(ValueError):
+            self.transport.stat("/../outside")
@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import tempfile
+
+import pytest
+
+from src.infrastructure.network.readahead import ReadAheadReader
+
+
+class TestReadAheadReader:
+    """预读器测试类"""
+
+    def setup_method(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "data.bin")
+        self.data = os.urandom(1024 * 1024 + 7)
+        with open(self.path, "wb") as f:
+            f.write(self.data)
+
+    @pytest.mark.parametrize("method", ["pread", "mmap"])
+    def test_reads_whole_file_with_reused_buffers(self, method):
+        """测试完整读出文件且只使用缓冲池中的缓冲区"""
+        chunks = []
+        buffers = set()
+        with ReadAheadReader(
+            self.path, chunk_size=64 * 1024, buffers=3, method=method
+        ) as reader:
+            for chunk in reader:
+                buffers.add(id(chunk.obj))
+                chunks.append(bytes(chunk))
+        assert b"".join(chunks) == self.data
+        assert len(buffers) <= 3
+
+    def test_empty_file(self):
+        """测试空文件不产生数据块"""
+        open(self.path, "wb").close()
+        with ReadAheadReader(self.path, method="mmap") as reader:
+            assert list(reader) == []
+
+    def test_early_close(self):
+        """测试消费方提前退出时读线程能停止"""
+        with ReadAheadReader(self.path, chunk_size=4096, buffers=2) as reader:
+            for _ in reader:
+                break
+        assert reader.thread is None
+        assert reader.pool.free.qsize() == 2
+
+    def test_missing_file_raises(self):
+        """测试读线程的错误在迭代时抛出"""
+        with pytest.raises(FileNotFoundError):
+            with ReadAheadReader(self.path + ".missing") as reader:
+                list(reader)
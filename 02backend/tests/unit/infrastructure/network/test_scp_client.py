@@ -0,0 +1,122 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import hashlib
+import tempfile
+from unittest.mock import MagicMock
+
+from src.domain.models import ServerConfig
+from src.infrastructure.network.scp_client import SCPClient
+from src.infrastructure.network.sftp_client import SFTPClient
+from src.infrastructure.network.transport_factory import create_transport
+
+
+def _server_config(protocol: str = "SCP") -> ServerConfig:
+    return ServerConfig(
+        id="server1",
+        name="Test Server",
+        host="127.0.0.1",
+        port=22,
+        protocol=protocol,
+        username="user",
+        password="pass",
+        default_path="/tmp",
+        created_at="",
+        updated_at="",
+    )
+
+
+class _FakeChannel:
+    """模拟远端 scp -t 接收端，记录发送的数据"""
+
+    def __init__(self, replies: list[bytes]):
+        self.replies = b"".join(replies)
+        self.sent = bytearray()
+        self.command = None
+
+    def exec_command(self, command):
+        self.command = command
+
+    def recv(self, size):
+        data, self.replies = self.replies[:size], self.replies[size:]
+        return data
+
+    def sendall(self, data):
+        self.sent.extend(data)
+
+    def shutdown_write(self):
+        pass
+
+    def recv_exit_status(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+class _FakePool:
+    def __init__(self, ssh):
+        self.ssh = ssh
+        self.released: list[bool] = []
+
+    def acquire(self, server_config):
+        return self.ssh
+
+    def release(self, server_config, ssh, reusable=True):
+        if ssh is not None:
+            self.released.append(reusable)
+
+
+class TestSCPClient:
+    """SCP客户端测试类"""
+
+    def setup_method(self):
+        self.local_file = os.path.join(tempfile.mkdtemp(), "data.bin")
+        self.data = os.urandom(70_000)
+        with open(self.local_file, "wb") as f:
+            f.write(self.data)
+
+    def _client(self, channel: _FakeChannel) -> SCPClient:
+        ssh = MagicMock()
+        ssh.get_transport.return_value.open_session.return_value = channel
+        self.pool = _FakePool(ssh)
+        return SCPClient(_server_config(), pool=self.pool)
+
+    def test_upload_sends_scp_protocol(self):
+        """测试按 SCP 协议发送记录头、内容与结束字节"""
+        channel = _FakeChannel([b"\0", b"\0", b"\0"])
+        client = self._client(channel)
+        progress = []
+        assert client.upload(self.local_file, "/upload/data.bin", progress.append)
+
+        assert channel.command == "scp -t /upload/data.bin"
+        header = b"C%04o %d data.bin\n" % (
+            os.stat(self.local_file).st_mode & 0o7777,
+            len(self.data),
+        )
+        assert bytes(channel.sent) == header + self.data + b"\0"
+        assert client.last_result.checksum == hashlib.sha256(self.data).hexdigest()
+        assert progress[-1] == 1.0
+        assert self.pool.released == [True]
+
+    def test_upload_remote_error(self):
+        """测试远端返回错误时上传失败且连接不放回连接池"""
+        channel = _FakeChannel([b"\x01scp: /upload: Permission denied\n"])
+        client = self._client(channel)
+        assert client.upload(self.local_file, "/upload/data.bin") is False
+        assert client.last_result is None
+        assert self.pool.released == [False]
+
+
+class TestCreateTransport:
+    """传输工厂测试类"""
+
+    def test_select_by_protocol(self):
+        """测试按协议选择传输实现并忽略不支持的选项"""
+        client = create_transport(_server_config("SCP"), compression="gzip")
+        assert isinstance(client, SCPClient)
+        assert isinstance(create_transport(_server_config("SFTP")), SFTPClient)
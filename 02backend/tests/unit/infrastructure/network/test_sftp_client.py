@@ -5,12 +5,112 @@ sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
 )
 
+import hashlib
+import tempfile
+from unittest.mock import MagicMock
+
 import pytest
 
+from src.domain.models import ServerConfig
+from src.infrastructure.network.sftp_client import SFTPClient
+
+
+def _server_config() -> ServerConfig:
+    return ServerConfig(
+        id="server1",
+        name="Test Server",
+        host="127.0.0.1",
+        port=22,
+        protocol="SFTP",
+        username="user",
+        password="pass",
+        default_path="/tmp",
+        created_at="",
+        updated_at="",
+    )
+
+
+class _FakeSFTP:
+    """以本地目录模拟远端 SFTP 文件系统"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, remote_path: str) -> str:
+        return os.path.join(self.root, remote_path.lstrip("/"))
+
+    def open(self, remote_path: str, mode: str = "r"):
+        return _HandleWrapper(open(self._path(remote_path), mode))
+
+    def stat(self, remote_path: str):
+        return os.stat(self._path(remote_path))
+
+    def remove(self, remote_path: str):
+        os.unlink(self._path(remote_path))
+
+    def posix_rename(self, source_path: str, remote_path: str):
+        os.replace(self._path(source_path), self._path(remote_path))
+
+    def close(self):
+        pass
+
+
+class _HandleWrapper:
+    def __init__(self, handle):
+        self.handle = handle
+
+    def __getattr__(self, name):
+        return getattr(self.handle, name)
+
+    def set_pipelined(self, pipelined=True):
+        pass
+
+    def prefetch(self):
+        pass
+
+    def readv(self, chunks):
+        for offset, size in chunks:
+            self.handle.seek(offset)
+            yield self.handle.read(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.handle.close()
+
+
+class _FakePool:
+    """始终返回同一个模拟连接的连接池"""
+
+    def __init__(self, ssh):
+        self.ssh = ssh
+        self.released: list[bool] = []
+
+    def acquire(self, server_config):
+        return self.ssh
+
+    def release(self, server_config, ssh, reusable=True):
+        if ssh is not None:
+            self.released.append(reusable)
+
 
 class TestSFTPClient:
     """SFTP客户端测试类"""
 
+    def setup_method(self):
+        self.remote_dir = tempfile.mkdtemp()
+        self.local_file = os.path.join(tempfile.mkdtemp(), "data.bin")
+        self.data = os.urandom(70_000)
+        with open(self.local_file, "wb") as f:
+            f.write(self.data)
+
+    def _client(self, **kwargs) -> SFTPClient:
+        self.ssh = MagicMock()
+        self.ssh.open_sftp.return_value = _FakeSFTP(self.remote_dir)
+        self.pool = _FakePool(self.ssh)
+        return SFTPClient(_server_config(), pool=self.pool, **kwargs)
+
     def test_upload_success(self):
         """测试上传成功（跳过，需要真实SFTP服务器）"""
         pytest.skip("需要真实SFTP服务器，跳过测试")
@@ -18,3 +118,257 @@ class TestSFTPClient:
     def test_upload_progress_callback(self):
         """测试上传进度回调（跳过，需要真实SFTP服务器）"""
         pytest.skip("需要真实SFTP服务器，跳过测试")
+
+    def test_upload_computes_streaming_checksum(self):
+        """测试上传过程中计算摘要"""
+        client = self._client()
+        progress = []
+        assert client.upload(self.local_file, "/data.bin", progress.append) is True
+        assert client.last_result is not None
+        assert client.last_result.checksum == hashlib.sha256(self.data).hexdigest()
+        assert client.last_result.verified is None
+        assert progress[-1] == 1.0
+        assert self.pool.released == [True]
+        with open(os.path.join(self.remote_dir, "data.bin"), "rb") as f:
+            assert f.read() == self.data
+
+    def test_verify_readback_fallback(self):
+        """测试 exec 不可用时回读远端校验"""
+        client = self._client(verify_remote=True, verify_fallback="readback")
+        self.ssh.exec_command.side_effect = Exception("exec not allowed")
+        assert client.upload(self.local_file, "/data.bin") is True
+        assert client.last_result.verified is True
+
+    def test_verify_fail_fallback(self):
+        """测试 exec 不可用且策略为 fail 时上传失败"""
+        client = self._client(verify_remote=True, verify_fallback="fail")
+        self.ssh.exec_command.side_effect = Exception("exec not allowed")
+        assert client.upload(self.local_file, "/data.bin") is False
+
+    def test_delta_upload_inplace_without_exec(self):
+        """测试 exec 不可用时差量上传原地覆盖变化区段"""
+        remote_file = os.path.join(self.remote_dir, "data.bin")
+        old = bytearray(self.data)
+        old[100:110] = b"0123456789"
+        with open(remote_file, "wb") as f:
+            f.write(bytes(old) + b"stale-tail")
+
+        client = self._client()
+        self.ssh.exec_command.side_effect = Exception("exec not allowed")
+        assert client.upload(self.local_file, "/data.bin", mode="delta") is True
+        assert client.last_result.mode == "delta"
+        assert client.last_result.bytes_sent < len(self.data)
+        assert client.last_result.checksum == hashlib.sha256(self.data).hexdigest()
+        with open(remote_file, "rb") as f:
+            assert f.read() == self.data
+
+    def test_delta_inplace_misaligned_leaves_remote_untouched(self):
+        """测试复制块错位时不写入任何字面量，远端文件保持原样"""
+        remote_file = os.path.join(self.remote_dir, "data.bin")
+        with open(remote_file, "wb") as f:
+            f.write(self.data)
+
+        client = self._client()
+        sftp = _FakeSFTP(self.remote_dir)
+        ops = iter([("data", b"new-bytes"), ("copy", 0), ("copy", 3)])
+        assert (
+            client._apply_delta_inplace(
+                sftp, self.local_file, "/data.bin", 1024, 10_000, ops
+            )
+            is None
+        )
+        with open(remote_file, "rb") as f:
+            assert f.read() == self.data
+
+    def _small_files(self, count: int = 3) -> list[tuple[str, str]]:
+        files = []
+        for i in range(count):
+            path = os.path.join(os.path.dirname(self.local_file), f"small{i}.txt")
+            with open(path, "wb") as f:
+                f.write(f"content {i}".encode())
+            files.append((path, f"/small{i}.txt"))
+        return files
+
+    def test_upload_batch_tar_stream(self):
+        """测试批量上传经单个 tar 流发送"""
+        import io
+        import tarfile
+
+        captured = io.BytesIO()
+        stdin = MagicMock()
+        stdin.write.side_effect = captured.write
+        stdout = MagicMock()
+        stdout.channel.recv_exit_status.return_value = 0
+
+        client = self._client()
+        self.ssh.open_sftp.return_value = MagicMock(normalize=lambda p: "/home/u")
+        self.ssh.exec_command.return_value = (stdin, stdout, MagicMock())
+        files = self._small_files()
+        results = client.upload_batch(files)
+
+        assert self.ssh.exec_command.call_count == 1
+        assert all(r is not None and r.mode == "batch" for r in results)
+        assert results[0].checksum == hashlib.sha256(b"content 0").hexdigest()
+        captured.seek(0)
+        with tarfile.open(fileobj=captured, mode="r") as archive:
+            assert archive.getnames() == ["small0.txt", "small1.txt", "small2.txt"]
+
+    def test_upload_batch_falls_back_to_sftp(self):
+        """测试 exec 不可用时批量上传退回 SFTP"""
+        client = self._client()
+        self.ssh.exec_command.side_effect = Exception("exec not allowed")
+        files = self._small_files()
+        results = client.upload_batch(files)
+        assert all(r is not None for r in results)
+        with open(os.path.join(self.remote_dir, "small2.txt"), "rb") as f:
+            assert f.read() == b"content 2"
+
+    def test_compressed_upload_store(self):
+        """测试压缩后直接保存为远端 .gz 文件"""
+        import gzip
+
+        text = b"INFO line of a very repetitive log\n" * 4000
+        with open(self.local_file, "wb") as f:
+            f.write(text)
+        client = self._client(compression="gzip", compression_store=True)
+        assert client.upload(self.local_file, "/data.bin") is True
+        result = client.last_result
+        assert result.mode == "compressed"
+        assert result.remote_path == "/data.bin.gz"
+        assert result.compression_ratio < 0.1
+        assert result.checksum == hashlib.sha256(text).hexdigest()
+        with open(os.path.join(self.remote_dir, "data.bin.gz"), "rb") as f:
+            assert gzip.decompress(f.read()) == text
+
+    def _fake_decompress(self, probe_status: int, exit_status: int) -> list:
+        """模拟远端 exec：command -v 探测与解压到临时文件，返回执行过的命令"""
+        import gzip
+        import io
+        import shlex
+
+        commands = []
+
+        def exec_command(command, timeout=None):
+            commands.append(command)
+            stdout = MagicMock()
+            stdout.read.return_value = b""
+            if command.startswith("command -v"):
+                stdout.channel.recv_exit_status.return_value = probe_status
+                return MagicMock(), stdout, MagicMock(read=lambda: b"")
+            temp_path = shlex.split(command)[-1]
+            captured = io.BytesIO()
+            stdin = MagicMock()
+            stdin.write.side_effect = captured.write
+
+            def finish():
+                if exit_status == 0:
+                    with open(os.path.join(self.remote_dir, temp_path[1:]), "wb") as f:
+                        f.write(gzip.decompress(captured.getvalue()))
+                return exit_status
+
+            stdout.channel.recv_exit_status.side_effect = finish
+            return stdin, stdout, MagicMock(read=lambda: b"gzip: broken pipe")
+
+        self.ssh.exec_command.side_effect = exec_command
+        return commands
+
+    def _repetitive_file(self) -> bytes:
+        text = b"INFO line of a very repetitive log\n" * 4000
+        with open(self.local_file, "wb") as f:
+            f.write(text)
+        with open(os.path.join(self.remote_dir, "data.bin"), "wb") as f:
+            f.write(b"original")
+        return text
+
+    def test_compressed_upload_decompress_remote(self):
+        """测试远端解压到临时文件，成功后替换目标文件"""
+        text = self._repetitive_file()
+        client = self._client(compression="gzip")
+        commands = self._fake_decompress(0, 0)
+        assert client.upload(self.local_file, "/data.bin") is True
+        assert client.last_result.mode == "compressed"
+        assert commands[0] == "command -v gzip"
+        assert "/data.bin.decompress-tmp" in commands[1]
+        with open(os.path.join(self.remote_dir, "data.bin"), "rb") as f:
+            assert f.read() == text
+        assert not os.path.exists(
+            os.path.join(self.remote_dir, "data.bin.decompress-tmp")
+        )
+
+    def test_compressed_upload_falls_back_without_codec(self):
+        """测试远端没有解压程序时不发送压缩流，改为完整上传"""
+        text = self._repetitive_file()
+        client = self._client(compression="gzip")
+        commands = self._fake_decompress(1, 0)
+        assert client.upload(self.local_file, "/data.bin") is True
+        assert commands == ["command -v gzip"]
+        assert client.last_result.mode != "compressed"
+        with open(os.path.join(self.remote_dir, "data.bin"), "rb") as f:
+            assert f.read() == text
+
+    def test_compressed_upload_falls_back_on_decompress_error(self):
+        """测试远端解压失败时删除临时文件并改为完整上传"""
+        text = self._repetitive_file()
+        client = self._client(compression="gzip")
+        self._fake_decompress(0, 1)
+        assert client.upload(self.local_file, "/data.bin") is True
+        assert client.last_result.mode != "compressed"
+        with open(os.path.join(self.remote_dir, "data.bin"), "rb") as f:
+            assert f.read() == text
+
+    def test_open_read_windowed(self):
+        """测试按窗口 readv 顺序读取远端文件"""
+        import shutil
+
+        from src.infrastructure.network.ssh_transport import SFTPReadStream
+
+        shutil.copy(self.local_file, os.path.join(self.remote_dir, "src.bin"))
+        client = self._client()
+        with client.open_read("/src.bin") as stream:
+            stream.window = 16384
+            chunks = []
+            while True:
+                chunk = stream.read(5000)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        assert isinstance(stream, SFTPReadStream)
+        assert b"".join(chunks) == self.data
+        assert self.pool.released == [True]
+
+    def test_remote_push_command(self):
+        """测试服务器直接推送在源服务器上以免交互方式运行 rsync/scp"""
+        client = self._client()
+        stdout = MagicMock()
+        stdout.read.return_value = b""
+        stdout.channel.recv_exit_status.return_value = 0
+        self.ssh.exec_command.return_value = (MagicMock(), stdout, MagicMock())
+        target = _server_config()
+        target.host = "10.0.0.2"
+        target.port = 2222
+
+        assert client.remote_push("/data/a b.iso", target, "/dst/a b.iso.part")
+        command = self.ssh.exec_command.call_args[0][0]
+        assert "rsync" in command and "scp -q -P 2222" in command
+        assert "BatchMode=yes" in command
+        assert "'user@10.0.0.2:/dst/a b.iso.part'" in command
+
+        stdout.channel.recv_exit_status.return_value = 255
+        assert not client.remote_push("/data/a.iso", target, "/dst/a.iso")
+        target.protocol = "FTP"
+        assert not client.remote_push("/data/a.iso", target, "/dst/a.iso")
+
+    def test_download_ranges_in_parallel(self):
+        """测试按区段经独立连接并行下载，连接用完归还连接池"""
+        from unittest.mock import patch
+
+        self.data = os.urandom(300_000)
+        with open(os.path.join(self.remote_dir, "src.bin"), "wb") as f:
+            f.write(self.data)
+        client = self._client()
+        target = os.path.join(tempfile.mkdtemp(), "src.bin")
+        with patch("src.infrastructure.network.transport.DOWNLOAD_RANGE", 65536):
+            assert client.download("/src.bin", target, connections=3)
+        with open(target, "rb") as f:
+            assert f.read() == self.data
+        assert self.pool.released.count(True) == len(self.pool.released) == 6
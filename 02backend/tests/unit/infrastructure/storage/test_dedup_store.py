@@ -0,0 +1,60 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import shutil
+import tempfile
+
+from src.infrastructure.storage import DeliveryIndex, HashCache
+
+
+class TestDedupStore:
+    """去重存储测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "installer.bin")
+        with open(self.file_path, "wb") as f:
+            f.write(b"payload")
+
+    def teardown_method(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_hash_cache_persists(self):
+        """测试摘要缓存持久化"""
+        HashCache(self.temp_dir).store(self.file_path, "abc")
+        assert HashCache(self.temp_dir).lookup(self.file_path) == "abc"
+
+    def test_hash_cache_invalidated_on_change(self):
+        """测试文件修改后缓存失效"""
+        cache = HashCache(self.temp_dir)
+        cache.store(self.file_path, "abc")
+        with open(self.file_path, "ab") as f:
+            f.write(b"more")
+        assert cache.lookup(self.file_path) is None
+
+    def test_hash_cache_algorithm_mismatch(self):
+        """测试算法不一致视为未命中"""
+        cache = HashCache(self.temp_dir)
+        cache.store(self.file_path, "abc", "sha256")
+        assert cache.lookup(self.file_path, "md5") is None
+
+    def test_delivery_index_record_and_forget(self):
+        """测试送达记录"""
+        index = DeliveryIndex(self.temp_dir)
+        index.record("s1", "abc", "/a/file")
+        index.record("s1", "abc", "/b/file")
+        assert DeliveryIndex(self.temp_dir).find("s1", "abc") == ["/a/file", "/b/file"]
+        assert index.find("s2", "abc") == []
+
+        # 同一路径写入新内容后旧记录失效
+        index.record("s1", "def", "/a/file")
+        assert index.find("s1", "abc") == ["/b/file"]
+
+        index.forget("s1", "/b/file")
+        assert index.find("s1", "abc") == []
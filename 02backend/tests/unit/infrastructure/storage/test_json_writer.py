@@ -0,0 +1,138 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import json
+import shutil
+import tempfile
+import threading
+import time
+
+from src.infrastructure.storage import DurableJsonWriter, get_writer
+
+
+class SlowWriter(DurableJsonWriter):
+    """第一次写入阻塞到放行为止，便于构造并发保存"""
+
+    def __init__(self, path):
+        super().__init__(path, window=0)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def _write(self, payload):
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(5)
+        super()._write(payload)
+
+
+class TestDurableJsonWriter:
+    """JSON 组提交写入测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "data.json")
+
+    def teardown_method(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_save_compact_and_atomic(self):
+        """测试写入紧凑 JSON，不留下临时文件"""
+        writer = DurableJsonWriter(self.path)
+        writer.save([{"name": "中文", "size": 1}])
+        with open(self.path, encoding="utf-8") as f:
+            assert f.read() == '[{"name":"中文","size":1}]'
+        assert not os.path.exists(self.path + ".tmp")
+        metrics = writer.metrics()
+        assert metrics["requests"] == 1
+        assert metrics["flushes"] == 1
+
+    def test_concurrent_saves_coalesced(self):
+        """测试写入进行中提交的保存合并为一次写入，且最新内容落盘"""
+        writer = SlowWriter(self.path)
+        first = threading.Thread(target=writer.save, args=([0],))
+        first.start()
+        assert writer.entered.wait(5)
+
+        waiters = []
+        for i in range(1, 11):
+            thread = threading.Thread(target=writer.save, args=([i],))
+            thread.start()
+            waiters.append(thread)
+            # 按顺序提交，最后提交的内容应当落盘
+            while writer.metrics()["requests"] < i + 1:
+                time.sleep(0.001)
+        writer.release.set()
+        for thread in [first] + waiters:
+            thread.join(5)
+
+        with open(self.path, encoding="utf-8") as f:
+            assert json.load(f) == [10]
+        metrics = writer.metrics()
+        assert metrics["flushes"] == 2
+        assert metrics["coalesced"] == 9
+
+    def test_failed_write_raises(self):
+        """测试写入失败时抛出异常，原文件保持不变"""
+        writer = DurableJsonWriter(self.path)
+        writer.save({"version": 1})
+
+        def fail(payload):
+            raise OSError("disk full")
+
+        writer._write = fail
+        try:
+            writer.save({"version": 2})
+            raise AssertionError("写入应当失败")
+        except OSError:
+            pass
+        with open(self.path, encoding="utf-8") as f:
+            assert json.load(f) == {"version": 1}
+        assert writer.metrics()["failures"] == 1
+
+    def test_failed_write_reported_to_covered_waiters(self):
+        """测试同一次失败写入覆盖的保存都收到异常，后续写入成功不掩盖失败"""
+        writer = DurableJsonWriter(self.path, window=0.3)
+        attempts = []
+        original = writer._write
+
+        def fail_first(payload):
+            attempts.append(payload)
+            if len(attempts) == 1:
+                raise OSError("disk full")
+            original(payload)
+
+        writer._write = fail_first
+        errors = []
+
+        def save(value):
+            try:
+                writer.save([value])
+            except OSError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=save, args=(i,)) for i in range(2)]
+        for count, thread in enumerate(threads, 1):
+            thread.start()
+            while writer.metrics()["requests"] < count:
+                time.sleep(0.001)
+        for thread in threads:
+            thread.join(5)
+        # 两次保存在合并窗口内提交，由同一次（失败的）写入覆盖
+        assert len(attempts) == 1
+        assert len(errors) == 2
+
+        writer.save([2])
+        with open(self.path, encoding="utf-8") as f:
+            assert json.load(f) == [2]
+
+    def test_get_writer_shared(self):
+        """测试同一文件共用一个写入器"""
+        assert get_writer(self.path) is get_writer(
+            os.path.join(self.temp_dir, ".", "data.json")
+        )
@@ -104,3 +104,18 @@ class TestStorage:
         assert len(loaded_tasks) == 2
         assert loaded_tasks[0].file_name == "test1.txt"
         assert loaded_tasks[1].file_name == "test2.txt"
+
+    def test_iter_tasks_json(self):
+        """测试流式读取任务，文件被截断时读到最后一条完整记录"""
+        tasks = [{"id": f"task{i}", "file_name": "a" * 40} for i in range(200)]
+        self.storage.save_tasks_json(tasks)
+        assert list(self.storage.iter_tasks_json(chunk_size=64)) == tasks
+        assert not os.path.exists(self.storage.tasks_file + ".tmp")
+
+        with open(self.storage.tasks_file) as f:
+            content = f.read()
+        with open(self.storage.tasks_file, "w") as f:
+            f.write(content[: len(content) // 2])
+        loaded = list(self.storage.iter_tasks_json(chunk_size=64))
+        assert 0 < len(loaded) < len(tasks)
+        assert loaded == tasks[: len(loaded)]
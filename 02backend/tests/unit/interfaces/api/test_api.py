@@ -5,6 +5,11 @@ sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
 )
 
+import hashlib
+import io
+import tempfile
+import time
+
 import pytest
 
 from src.interfaces.api.api import create_app
@@ -31,3 +36,251 @@ class TestAPI:
     def test_servers_get_post(self):
         """测试服务器配置接口（跳过，需要完整集成测试）"""
         pass
+
+    def test_upload_stream(self):
+        """测试请求体直接流式写入 LOCAL 后端"""
+        root = tempfile.mkdtemp()
+        response = self.client.post(
+            "/servers",
+            json={
+                "name": "stream-local",
+                "host": f"file://{root}",
+                "port": 1,
+                "protocol": "LOCAL",
+                "default_path": "/",
+            },
+        )
+        server_id = response.get_json()["server"]["id"]
+        content = os.urandom(512 * 1024)
+
+        response = self.client.post(
+            f"/upload/stream?server_id={server_id}&file_name=raw.bin&target_path=/in",
+            data=content,
+            content_type="application/octet-stream",
+        )
+        assert response.status_code == 200
+        assert response.get_json()["checksum"] == hashlib.sha256(content).hexdigest()
+        with open(os.path.join(root, "in", "raw.bin"), "rb") as f:
+            assert f.read() == content
+
+        response = self.client.post(
+            "/upload/stream",
+            data={
+                "server_id": server_id,
+                "target_path": "/form",
+                "file": (io.BytesIO(content), "form.bin"),
+            },
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 200
+        with open(os.path.join(root, "form", "form.bin"), "rb") as f:
+            assert f.read() == content
+        self.client.delete(f"/servers/{server_id}")
+
+    def test_download(self):
+        """测试下载接口登记下载任务并保存到本地目录"""
+        root = tempfile.mkdtemp()
+        response = self.client.post(
+            "/servers",
+            json={
+                "name": "download-local",
+                "host": f"file://{root}",
+                "port": 1,
+                "protocol": "LOCAL",
+                "default_path": "/",
+            },
+        )
+        server_id = response.get_json()["server"]["id"]
+        content = os.urandom(200 * 1024)
+        os.makedirs(os.path.join(root, "data"))
+        with open(os.path.join(root, "data", "pull.bin"), "wb") as f:
+            f.write(content)
+        local_dir = tempfile.mkdtemp()
+
+        response = self.client.post(
+            "/download",
+            json={
+                "server_id": server_id,
+                "remote_path": "/data/pull.bin",
+                "local_path": local_dir,
+            },
+        )
+        assert response.status_code == 202
+        body = response.get_json()
+        assert body["local_path"] == os.path.join(local_dir, "pull.bin")
+        assert body["file_size"] == len(content)
+        for _ in range(100):
+            status = self.client.get(f"/progress/{body['task_id']}").get_json()
+            if status["status"] != "running":
+                break
+            time.sleep(0.05)
+        assert status["status"] == "completed"
+        with open(body["local_path"], "rb") as f:
+            assert f.read() == content
+
+        response = self.client.post(
+            "/download",
+            json={
+                "server_id": server_id,
+                "remote_path": "/data/missing.bin",
+                "local_path": local_dir,
+            },
+        )
+        assert response.status_code == 404
+
+        for connections in ("many", 0, -2):
+            response = self.client.post(
+                "/download",
+                json={
+                    "server_id": server_id,
+                    "remote_path": "/data/pull.bin",
+                    "local_path": local_dir,
+                    "connections": connections,
+                },
+            )
+            assert response.status_code == 400
+        response = self.client.post(
+            "/upload/url",
+            json={
+                "url": "http://127.0.0.1:9/pull.bin",
+                "server_id": server_id,
+                "connections": "many",
+            },
+        )
+        assert response.status_code == 400
+        self.client.delete(f"/servers/{server_id}")
+
+    def test_upload_follow_complete_returns_immediately(self):
+        """测试跟随上传的结束通知立即返回，结果通过进度接口查询"""
+        root = tempfile.mkdtemp()
+        response = self.client.post(
+            "/servers",
+            json={
+                "name": "follow-local",
+                "host": f"file://{root}",
+                "port": 1,
+                "protocol": "LOCAL",
+                "default_path": "/",
+            },
+        )
+        server_id = response.get_json()["server"]["id"]
+        content = os.urandom(300 * 1024)
+        local_path = os.path.join(tempfile.mkdtemp(), "follow.bin")
+        with open(local_path, "wb") as f:
+            f.write(content)
+
+        response = self.client.post(
+            "/upload/follow",
+            json={
+                "local_path": local_path,
+                "server_id": server_id,
+                "target_path": "/in",
+            },
+        )
+        assert response.status_code == 202
+        task_id = response.get_json()["task_id"]
+        response = self.client.post(
+            f"/upload/follow/{task_id}/complete", json={"total_size": "big"}
+        )
+        assert response.status_code == 400
+        response = self.client.post(
+            f"/upload/follow/{task_id}/complete", json={"total_size": len(content)}
+        )
+        assert response.status_code == 202
+        assert response.get_json()["task_id"] == task_id
+        for _ in range(100):
+            status = self.client.get(f"/progress/{task_id}").get_json()
+            if status["status"] != "running":
+                break
+            time.sleep(0.05)
+        assert status["status"] == "completed"
+        with open(os.path.join(root, "in", "follow.bin"), "rb") as f:
+            assert f.read() == content
+        response = self.client.post(f"/upload/follow/{task_id}/complete", json={})
+        assert response.status_code == 404
+        self.client.delete(f"/servers/{server_id}")
+
+    def test_upload_fanout(self):
+        """测试多目标分发：每个目标一个任务，分别查询状态"""
+        roots = [tempfile.mkdtemp() for _ in range(2)]
+        server_ids = []
+        for index, root in enumerate(roots):
+            response = self.client.post(
+                "/servers",
+                json={
+                    "name": f"fanout-local-{index}",
+                    "host": f"file://{root}",
+                    "port": 1,
+                    "protocol": "LOCAL",
+                    "default_path": "/",
+                },
+            )
+            server_ids.append(response.get_json()["server"]["id"])
+        local_path = os.path.join(tempfile.mkdtemp(), "fan.bin")
+        content = os.urandom(300 * 1024)
+        with open(local_path, "wb") as f:
+            f.write(content)
+
+        response = self.client.post(
+            "/upload/fanout",
+            json={
+                "local_path": local_path,
+                "destinations": [
+                    {"server_id": server_id, "target_path": "/out"}
+                    for server_id in server_ids
+                ],
+            },
+        )
+        assert response.status_code == 202
+        task_ids = response.get_json()["task_ids"]
+        assert len(task_ids) == 2
+        for task_id in task_ids:
+            for _ in range(100):
+                status = self.client.get(f"/progress/{task_id}").get_json()["status"]
+                if status != "running":
+                    break
+                time.sleep(0.05)
+            assert status == "completed"
+        for root in roots:
+            with open(os.path.join(root, "out", "fan.bin"), "rb") as f:
+                assert f.read() == content
+
+        response = self.client.post(
+            "/upload/fanout",
+            json={"local_path": local_path, "destinations": [{"server_id": "nope"}]},
+        )
+        assert response.status_code == 404
+        for server_id in server_ids:
+            self.client.delete(f"/servers/{server_id}")
+
+    def test_upload_batch_missing_path_adds_nothing(self):
+        """测试批量上传中有路径不存在时不登记任何任务"""
+        root = tempfile.mkdtemp()
+        response = self.client.post(
+            "/servers",
+            json={
+                "name": "batch-local",
+                "host": f"file://{root}",
+                "port": 1,
+                "protocol": "LOCAL",
+                "default_path": "/",
+            },
+        )
+        server_id = response.get_json()["server"]["id"]
+        local_dir = tempfile.mkdtemp()
+        local_path = os.path.join(local_dir, "batch-present.bin")
+        with open(local_path, "wb") as f:
+            f.write(b"data")
+
+        response = self.client.post(
+            "/upload/batch",
+            json={
+                "local_paths": [local_path, os.path.join(local_dir, "missing.bin")],
+                "server_id": server_id,
+                "target_path": "/in",
+            },
+        )
+        assert response.status_code == 400
+        tasks = self.client.get("/tasks").get_json()
+        assert all(task["file_name"] != "batch-present.bin" for task in tasks)
+        self.client.delete(f"/servers/{server_id}")
@@ -0,0 +1,75 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+import io
+
+import pytest
+
+from src.interfaces.api.streaming import MultipartFileStream
+
+BOUNDARY = "----boundary1234"
+
+
+def _multipart(fields: dict, filename: str, content: bytes) -> bytes:
+    body = b""
+    for name, value in fields.items():
+        body += (
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f"{value}\r\n"
+        ).encode()
+    body += (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    return body + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+class TestMultipartFileStream:
+    """multipart 请求体流式解析测试类"""
+
+    def test_fields_and_file_content(self):
+        """测试读取文件前的字段并分块读出文件内容"""
+        content = os.urandom(300 * 1024)
+        stream = MultipartFileStream(
+            io.BytesIO(_multipart({"server_id": "s1"}, "a.bin", content)),
+            BOUNDARY,
+            read_size=4096,
+        )
+        stream.open()
+        assert stream.fields == {"server_id": "s1"}
+        assert stream.filename == "a.bin"
+
+        chunks = []
+        while True:
+            chunk = stream.read(10000)
+            if not chunk:
+                break
+            assert len(chunk) <= 10000
+            chunks.append(chunk)
+        assert b"".join(chunks) == content
+
+    def test_missing_file(self):
+        """测试没有文件字段时报错"""
+        body = (
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="a"\r\n\r\n'
+            f"1\r\n--{BOUNDARY}--\r\n"
+        )
+        stream = MultipartFileStream(io.BytesIO(body.encode()), BOUNDARY)
+        with pytest.raises(ValueError):
+            stream.open()
+
+    def test_truncated_body(self):
+        """测试请求体被截断时报错"""
+        body = _multipart({}, "a.bin", b"x" * 1000)[:-200]
+        stream = MultipartFileStream(io.BytesIO(body), BOUNDARY)
+        stream.open()
+        with pytest.raises(ValueError):
+            while stream.read(100):
+                pass